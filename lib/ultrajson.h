@@ -184,6 +184,7 @@ enum JSTYPES
   JT_UTF8,        // (char 8-bit)
   JT_ARRAY,       // Array structure
   JT_OBJECT,      // Key/Value structure
+  JT_RAW,         // (char 8-bit) Already encoded JSON, copied to the output as is
   JT_INVALID,     // Internal, do not return nor expect
 };
 
@@ -194,6 +195,14 @@ typedef struct __JSONTypeContext
 {
   int type;
   void *prv;
+
+  // The encoder encoding the value, for implementors keeping per call options next to it
+  struct __JSONObjectEncoder *encoder;
+
+  /*
+  Optional. beginTypeContext may set this to another object to encode in place of obj, which is
+  then passed to all the later calls for the value. The encoder sets it to NULL beforehand */
+  JSOBJ substitute;
 } JSONTypeContext;
 
 /*
@@ -274,6 +283,25 @@ typedef struct __JSONObjectEncoder
   If true, '<', '>', and '&' characters will be encoded as \u003c, \u003e, and \u0026, respectively. If false, no special encoding will be used. */
   int encodeHTMLChars;
 
+  /*
+  If true doubles are encoded with the shortest digits which read back as the same double and
+  doublePrecision is ignored. If false they're rounded to doublePrecision decimals */
+  int shortestFloat;
+
+  /*
+  Optional. Called when the buffer runs full before it is grown. The implementor may write out
+  the data between start and offset and move offset back towards start, keeping any data which
+  wasn't written at start. Return 0 on failure and 1 on success. Set to NULL to always grow the
+  buffer */
+  int (*flush)(struct __JSONObjectEncoder *enc);
+
+  /*
+  Optional. Size of the state the implementor keeps in JSONTypeContext.prv. If set, the encoder
+  allocates one slot per nesting level up front and beginTypeContext finds the slot for the current
+  level in tc->prv, to use instead of allocating its own. Siblings reuse the same slot. Set to 0 to
+  leave tc->prv to the implementor */
+  size_t cbTypeContext;
+
   /*
   Set to an error message if error occured */
   const char *errorMsg;
@@ -285,6 +313,7 @@ typedef struct __JSONObjectEncoder
   char *end;
   int heap;
   int level;
+  char *typeContexts;
 
 } JSONObjectEncoder;
 
@@ -310,11 +339,27 @@ JSONObjectEncoder.free or free() as specified when calling this function.
 */
 EXPORTFUNCTION char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *buffer, size_t cbBuffer);
 
+/*
+Encode each item of the array obj as a document of its own followed by a newline (JSON Lines).
+Arguments, return value and buffer handling are the same as for JSON_EncodeObject.
+*/
+EXPORTFUNCTION char *JSON_EncodeLines(JSOBJ obj, JSONObjectEncoder *enc, char *buffer, size_t cbBuffer);
+
 
 
 typedef struct __JSONObjectDecoder
 {
   JSOBJ (*newString)(void *prv, wchar_t *start, wchar_t *end);
+
+  /*
+  Called instead of newString for strings consisting only of ASCII characters without any
+  escape sequences. start and end point straight into the input buffer */
+  JSOBJ (*newASCIIString)(void *prv, char *start, char *end);
+
+  /*
+  Same as newASCIIString but called for object keys. Set to NULL to use newASCIIString */
+  JSOBJ (*newASCIIKey)(void *prv, char *start, char *end);
+
   void (*objectAddKey)(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value);
   void (*arrayAddItem)(void *prv, JSOBJ obj, JSOBJ value);
   JSOBJ (*newTrue)(void *prv);
@@ -333,9 +378,169 @@ typedef struct __JSONObjectDecoder
   char *errorStr;
   char *errorOffset;
   int preciseFloat;
+
+  /*
+  Optional. If set, numbers with a fraction or an exponent are passed as their text from start to
+  end instead of being converted for newDouble. Set to NULL to decode them as doubles */
+  JSOBJ (*newDecimal)(void *prv, char *start, char *end);
+
+  /*
+  Optional. Called before the value of each object key, or each array item with its index, is
+  decoded. depth is the nesting level of the container, 1 for the outermost one. Returns one of
+  JSFILTERRESULT, values which aren't skipped are added to their container as usual. Only used by
+  JSON_DecodeObject and JSON_DecodeLines */
+  int (*filterKey)(void *prv, JSUINT32 depth, JSOBJ name);
+  int (*filterItem)(void *prv, JSUINT32 depth, size_t index);
+
   void *prv;
 } JSONObjectDecoder;
 
+enum JSFILTERRESULT
+{
+  JSF_ERROR = -1,   // Stop decoding, the same as a callback returning NULL
+  JSF_SKIP = 0,     // Skip over the value, only checking its syntax
+  JSF_KEEP,         // Decode the value in full, without calling the filters within it
+  JSF_DESCEND,      // Decode the value, calling the filters for its own keys or items
+};
+
 EXPORTFUNCTION JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer);
 
+/*
+Decode newline delimited JSON (JSON Lines), one document per line. Returns an array made with
+newArray/arrayAddItem holding the documents, blank lines are skipped. On error dec->errorOffset
+points at the failing character in buffer.
+*/
+EXPORTFUNCTION JSOBJ JSON_DecodeLines(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer);
+
+/*
+A tape is a flat, preorder list of the values of a decoded document built without calling back into
+the host language, so it can be made without holding any interpreter lock. Containers come before
+their items and know how many items they have and the index just past their last descendant. Object
+items come as a key string followed by its value. */
+enum JSTAPEFLAGS
+{
+  JTF_KEY = 1,    // String is an object key
+  JTF_WIDE = 2,   // String is in the strings arena as wchar_t, otherwise it's plain ASCII in the input
+  JTF_DECIMAL = 4,  // JT_DOUBLE kept as its text in the input, see JSONTape.decimal
+};
+
+typedef struct __JSONTapeEntry
+{
+  int type;
+  int flags;
+  union
+  {
+    JSINT64 longValue;
+    double doubleValue;
+
+    struct
+    {
+      const char *start;
+      size_t length;
+    } ascii;
+
+    struct
+    {
+      size_t offset;
+      size_t length;
+    } wide;
+
+    struct
+    {
+      size_t count;
+      size_t end;
+    } container;
+  } value;
+} JSONTapeEntry;
+
+typedef struct __JSONTape
+{
+  JSONTapeEntry *entries;
+  size_t cbEntries;
+  size_t cbEntriesAlloc;
+  wchar_t *strings;
+  size_t cbStrings;
+  size_t cbStringsAlloc;
+
+  /*
+  Copies of the ASCII spans which didn't lie in the input, such as a number cut off at the end of
+  unterminated input, which the stream decoder completes in a buffer of its own */
+  char *spans;
+
+  /* Library functions
+  Set to NULL to use STDLIB malloc,realloc,free. Don't use functions which need the interpreter lock
+  if the tape is going to be decoded without it */
+  JSPFN_MALLOC malloc;
+  JSPFN_FREE free;
+  JSPFN_REALLOC realloc;
+
+  int preciseFloat;
+
+  /*
+  Set to keep numbers with a fraction or an exponent as their text in the input, in value.ascii
+  with the JTF_DECIMAL flag, like JSONObjectDecoder.newDecimal */
+  int decimal;
+
+  /*
+  Set if the input isn't followed by a NUL byte. It's then decoded with the stream decoder, which
+  never reads past the end of the input */
+  int unterminated;
+
+  char *errorStr;
+  char *errorOffset;
+} JSONTape;
+
+EXPORTFUNCTION void JSON_InitTape(JSONTape *tape);
+
+/*
+Decode buffer into tape, replacing what the tape held before. String entries which aren't wide point
+straight into buffer so it must outlive the use of the tape. Returns 1 on success or 0 on error with
+tape->errorStr set */
+EXPORTFUNCTION int JSON_DecodeTape(JSONTape *tape, const char *buffer, size_t cbBuffer);
+
+EXPORTFUNCTION void JSON_FreeTape(JSONTape *tape);
+
+typedef struct __JSONStreamFrame
+{
+  JSOBJ obj;
+  JSOBJ key;
+  int isObject;
+} JSONStreamFrame;
+
+/*
+State of an incremental decode, see JSON_DecodeChunk. Containers which are still open are kept
+on the frames stack and a token which isn't complete at the end of a chunk is kept in pending
+until the rest of it arrives */
+typedef struct __JSONStreamDecoder
+{
+  JSONObjectDecoder *dec;
+  JSONStreamFrame *frames;
+  int depth;
+  int cbFrames;
+  int state;
+  char *pending;
+  size_t cbPending;
+  size_t cbPendingAlloc;
+  int tokenType;
+  int escape;
+  JSOBJ result;
+} JSONStreamDecoder;
+
+EXPORTFUNCTION void JSON_InitStreamDecoder(JSONStreamDecoder *sd, JSONObjectDecoder *dec);
+
+/*
+Decode the next cbBuffer bytes of input. Set final when there is no more input to come.
+
+Returns:
+1 once the top level value is complete and stored in sd->result, 0 if more input is needed or -1
+on error. On error dec->errorStr is set unless a callback failed, all objects held by the decoder
+are released and the decoder starts over with the next chunk.
+*/
+EXPORTFUNCTION int JSON_DecodeChunk(JSONStreamDecoder *sd, const char *buffer, size_t cbBuffer, int final);
+
+/*
+Releases open containers, the result if it's still set and any memory held by the decoder.
+The decoder can be used again afterwards */
+EXPORTFUNCTION void JSON_ReleaseStreamDecoder(JSONStreamDecoder *sd);
+
 #endif
\ No newline at end of file
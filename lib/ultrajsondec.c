@@ -43,6 +43,11 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 #include <wchar.h>
 #include <stdlib.h>
 #include <errno.h>
+#include <locale.h>
+#include <float.h>
+#if defined(_MSC_VER) && defined(_M_X64)
+#include <intrin.h>
+#endif
 
 #ifndef TRUE
 #define TRUE 1
@@ -60,7 +65,11 @@ struct DecoderState
   wchar_t *escEnd;
   int escHeap;
   int lastType;
+  int objectKey;
   JSUINT32 objDepth;
+
+  // Set while decoding a value kept by a filter, the filters aren't called within it
+  int unfiltered;
   void *prv;
   JSONObjectDecoder *dec;
 };
@@ -81,23 +90,1077 @@ double createDouble(double intNeg, double intValue, double frcValue, int frcDeci
   return (intValue + (frcValue * g_pow10[frcDecimalCount])) * intNeg;
 }
 
-FASTCALL_ATTR JSOBJ FASTCALL_MSVC decodePreciseFloat(struct DecoderState *ds)
+/*
+Exact decimal to double conversion. Most numbers are exact after one multiplication or division
+by an exact power of ten (Clinger's fast path). The rest go through the Eisel-Lemire algorithm,
+see Daniel Lemire, "Number Parsing at a Gigabyte per Second" (2021), which leaves the rare
+inputs it can't decide to strtod. strtod reads the number with the decimal point of the current
+locale, so it's handed a copy using that */
+#define EISEL_LEMIRE_MIN_EXP10 -348
+#define EISEL_LEMIRE_MAX_EXP10 347
+
+/*
+128 bit approximations of the powers of ten from 1e-348 to 1e347, normalized so the top bit is
+set and rounded down. Each entry is { low 64 bits, high 64 bits } */
+static const JSUINT64 g_pow10_128[][2] =
 {
-  char *end;
-  double value;
+  { 0x1732c869cd60e453ULL, 0xfa8fd5a0081c0288ULL }, // 1e-348
+  { 0x0e7fbd42205c8eb4ULL, 0x9c99e58405118195ULL }, // 1e-347
+  { 0x521fac92a873b261ULL, 0xc3c05ee50655e1faULL }, // 1e-346
+  { 0xe6a797b752909ef9ULL, 0xf4b0769e47eb5a78ULL }, // 1e-345
+  { 0x9028bed2939a635cULL, 0x98ee4a22ecf3188bULL }, // 1e-344
+  { 0x7432ee873880fc33ULL, 0xbf29dcaba82fdeaeULL }, // 1e-343
+  { 0x113faa2906a13b3fULL, 0xeef453d6923bd65aULL }, // 1e-342
+  { 0x4ac7ca59a424c507ULL, 0x9558b4661b6565f8ULL }, // 1e-341
+  { 0x5d79bcf00d2df649ULL, 0xbaaee17fa23ebf76ULL }, // 1e-340
+  { 0xf4d82c2c107973dcULL, 0xe95a99df8ace6f53ULL }, // 1e-339
+  { 0x79071b9b8a4be869ULL, 0x91d8a02bb6c10594ULL }, // 1e-338
+  { 0x9748e2826cdee284ULL, 0xb64ec836a47146f9ULL }, // 1e-337
+  { 0xfd1b1b2308169b25ULL, 0xe3e27a444d8d98b7ULL }, // 1e-336
+  { 0xfe30f0f5e50e20f7ULL, 0x8e6d8c6ab0787f72ULL }, // 1e-335
+  { 0xbdbd2d335e51a935ULL, 0xb208ef855c969f4fULL }, // 1e-334
+  { 0xad2c788035e61382ULL, 0xde8b2b66b3bc4723ULL }, // 1e-333
+  { 0x4c3bcb5021afcc31ULL, 0x8b16fb203055ac76ULL }, // 1e-332
+  { 0xdf4abe242a1bbf3dULL, 0xaddcb9e83c6b1793ULL }, // 1e-331
+  { 0xd71d6dad34a2af0dULL, 0xd953e8624b85dd78ULL }, // 1e-330
+  { 0x8672648c40e5ad68ULL, 0x87d4713d6f33aa6bULL }, // 1e-329
+  { 0x680efdaf511f18c2ULL, 0xa9c98d8ccb009506ULL }, // 1e-328
+  { 0x0212bd1b2566def2ULL, 0xd43bf0effdc0ba48ULL }, // 1e-327
+  { 0x014bb630f7604b57ULL, 0x84a57695fe98746dULL }, // 1e-326
+  { 0x419ea3bd35385e2dULL, 0xa5ced43b7e3e9188ULL }, // 1e-325
+  { 0x52064cac828675b9ULL, 0xcf42894a5dce35eaULL }, // 1e-324
+  { 0x7343efebd1940993ULL, 0x818995ce7aa0e1b2ULL }, // 1e-323
+  { 0x1014ebe6c5f90bf8ULL, 0xa1ebfb4219491a1fULL }, // 1e-322
+  { 0xd41a26e077774ef6ULL, 0xca66fa129f9b60a6ULL }, // 1e-321
+  { 0x8920b098955522b4ULL, 0xfd00b897478238d0ULL }, // 1e-320
+  { 0x55b46e5f5d5535b0ULL, 0x9e20735e8cb16382ULL }, // 1e-319
+  { 0xeb2189f734aa831dULL, 0xc5a890362fddbc62ULL }, // 1e-318
+  { 0xa5e9ec7501d523e4ULL, 0xf712b443bbd52b7bULL }, // 1e-317
+  { 0x47b233c92125366eULL, 0x9a6bb0aa55653b2dULL }, // 1e-316
+  { 0x999ec0bb696e840aULL, 0xc1069cd4eabe89f8ULL }, // 1e-315
+  { 0xc00670ea43ca250dULL, 0xf148440a256e2c76ULL }, // 1e-314
+  { 0x380406926a5e5728ULL, 0x96cd2a865764dbcaULL }, // 1e-313
+  { 0xc605083704f5ecf2ULL, 0xbc807527ed3e12bcULL }, // 1e-312
+  { 0xf7864a44c633682eULL, 0xeba09271e88d976bULL }, // 1e-311
+  { 0x7ab3ee6afbe0211dULL, 0x93445b8731587ea3ULL }, // 1e-310
+  { 0x5960ea05bad82964ULL, 0xb8157268fdae9e4cULL }, // 1e-309
+  { 0x6fb92487298e33bdULL, 0xe61acf033d1a45dfULL }, // 1e-308
+  { 0xa5d3b6d479f8e056ULL, 0x8fd0c16206306babULL }, // 1e-307
+  { 0x8f48a4899877186cULL, 0xb3c4f1ba87bc8696ULL }, // 1e-306
+  { 0x331acdabfe94de87ULL, 0xe0b62e2929aba83cULL }, // 1e-305
+  { 0x9ff0c08b7f1d0b14ULL, 0x8c71dcd9ba0b4925ULL }, // 1e-304
+  { 0x07ecf0ae5ee44dd9ULL, 0xaf8e5410288e1b6fULL }, // 1e-303
+  { 0xc9e82cd9f69d6150ULL, 0xdb71e91432b1a24aULL }, // 1e-302
+  { 0xbe311c083a225cd2ULL, 0x892731ac9faf056eULL }, // 1e-301
+  { 0x6dbd630a48aaf406ULL, 0xab70fe17c79ac6caULL }, // 1e-300
+  { 0x092cbbccdad5b108ULL, 0xd64d3d9db981787dULL }, // 1e-299
+  { 0x25bbf56008c58ea5ULL, 0x85f0468293f0eb4eULL }, // 1e-298
+  { 0xaf2af2b80af6f24eULL, 0xa76c582338ed2621ULL }, // 1e-297
+  { 0x1af5af660db4aee1ULL, 0xd1476e2c07286faaULL }, // 1e-296
+  { 0x50d98d9fc890ed4dULL, 0x82cca4db847945caULL }, // 1e-295
+  { 0xe50ff107bab528a0ULL, 0xa37fce126597973cULL }, // 1e-294
+  { 0x1e53ed49a96272c8ULL, 0xcc5fc196fefd7d0cULL }, // 1e-293
+  { 0x25e8e89c13bb0f7aULL, 0xff77b1fcbebcdc4fULL }, // 1e-292
+  { 0x77b191618c54e9acULL, 0x9faacf3df73609b1ULL }, // 1e-291
+  { 0xd59df5b9ef6a2417ULL, 0xc795830d75038c1dULL }, // 1e-290
+  { 0x4b0573286b44ad1dULL, 0xf97ae3d0d2446f25ULL }, // 1e-289
+  { 0x4ee367f9430aec32ULL, 0x9becce62836ac577ULL }, // 1e-288
+  { 0x229c41f793cda73fULL, 0xc2e801fb244576d5ULL }, // 1e-287
+  { 0x6b43527578c1110fULL, 0xf3a20279ed56d48aULL }, // 1e-286
+  { 0x830a13896b78aaa9ULL, 0x9845418c345644d6ULL }, // 1e-285
+  { 0x23cc986bc656d553ULL, 0xbe5691ef416bd60cULL }, // 1e-284
+  { 0x2cbfbe86b7ec8aa8ULL, 0xedec366b11c6cb8fULL }, // 1e-283
+  { 0x7bf7d71432f3d6a9ULL, 0x94b3a202eb1c3f39ULL }, // 1e-282
+  { 0xdaf5ccd93fb0cc53ULL, 0xb9e08a83a5e34f07ULL }, // 1e-281
+  { 0xd1b3400f8f9cff68ULL, 0xe858ad248f5c22c9ULL }, // 1e-280
+  { 0x23100809b9c21fa1ULL, 0x91376c36d99995beULL }, // 1e-279
+  { 0xabd40a0c2832a78aULL, 0xb58547448ffffb2dULL }, // 1e-278
+  { 0x16c90c8f323f516cULL, 0xe2e69915b3fff9f9ULL }, // 1e-277
+  { 0xae3da7d97f6792e3ULL, 0x8dd01fad907ffc3bULL }, // 1e-276
+  { 0x99cd11cfdf41779cULL, 0xb1442798f49ffb4aULL }, // 1e-275
+  { 0x40405643d711d583ULL, 0xdd95317f31c7fa1dULL }, // 1e-274
+  { 0x482835ea666b2572ULL, 0x8a7d3eef7f1cfc52ULL }, // 1e-273
+  { 0xda3243650005eecfULL, 0xad1c8eab5ee43b66ULL }, // 1e-272
+  { 0x90bed43e40076a82ULL, 0xd863b256369d4a40ULL }, // 1e-271
+  { 0x5a7744a6e804a291ULL, 0x873e4f75e2224e68ULL }, // 1e-270
+  { 0x711515d0a205cb36ULL, 0xa90de3535aaae202ULL }, // 1e-269
+  { 0x0d5a5b44ca873e03ULL, 0xd3515c2831559a83ULL }, // 1e-268
+  { 0xe858790afe9486c2ULL, 0x8412d9991ed58091ULL }, // 1e-267
+  { 0x626e974dbe39a872ULL, 0xa5178fff668ae0b6ULL }, // 1e-266
+  { 0xfb0a3d212dc8128fULL, 0xce5d73ff402d98e3ULL }, // 1e-265
+  { 0x7ce66634bc9d0b99ULL, 0x80fa687f881c7f8eULL }, // 1e-264
+  { 0x1c1fffc1ebc44e80ULL, 0xa139029f6a239f72ULL }, // 1e-263
+  { 0xa327ffb266b56220ULL, 0xc987434744ac874eULL }, // 1e-262
+  { 0x4bf1ff9f0062baa8ULL, 0xfbe9141915d7a922ULL }, // 1e-261
+  { 0x6f773fc3603db4a9ULL, 0x9d71ac8fada6c9b5ULL }, // 1e-260
+  { 0xcb550fb4384d21d3ULL, 0xc4ce17b399107c22ULL }, // 1e-259
+  { 0x7e2a53a146606a48ULL, 0xf6019da07f549b2bULL }, // 1e-258
+  { 0x2eda7444cbfc426dULL, 0x99c102844f94e0fbULL }, // 1e-257
+  { 0xfa911155fefb5308ULL, 0xc0314325637a1939ULL }, // 1e-256
+  { 0x793555ab7eba27caULL, 0xf03d93eebc589f88ULL }, // 1e-255
+  { 0x4bc1558b2f3458deULL, 0x96267c7535b763b5ULL }, // 1e-254
+  { 0x9eb1aaedfb016f16ULL, 0xbbb01b9283253ca2ULL }, // 1e-253
+  { 0x465e15a979c1cadcULL, 0xea9c227723ee8bcbULL }, // 1e-252
+  { 0x0bfacd89ec191ec9ULL, 0x92a1958a7675175fULL }, // 1e-251
+  { 0xcef980ec671f667bULL, 0xb749faed14125d36ULL }, // 1e-250
+  { 0x82b7e12780e7401aULL, 0xe51c79a85916f484ULL }, // 1e-249
+  { 0xd1b2ecb8b0908810ULL, 0x8f31cc0937ae58d2ULL }, // 1e-248
+  { 0x861fa7e6dcb4aa15ULL, 0xb2fe3f0b8599ef07ULL }, // 1e-247
+  { 0x67a791e093e1d49aULL, 0xdfbdcece67006ac9ULL }, // 1e-246
+  { 0xe0c8bb2c5c6d24e0ULL, 0x8bd6a141006042bdULL }, // 1e-245
+  { 0x58fae9f773886e18ULL, 0xaecc49914078536dULL }, // 1e-244
+  { 0xaf39a475506a899eULL, 0xda7f5bf590966848ULL }, // 1e-243
+  { 0x6d8406c952429603ULL, 0x888f99797a5e012dULL }, // 1e-242
+  { 0xc8e5087ba6d33b83ULL, 0xaab37fd7d8f58178ULL }, // 1e-241
+  { 0xfb1e4a9a90880a64ULL, 0xd5605fcdcf32e1d6ULL }, // 1e-240
+  { 0x5cf2eea09a55067fULL, 0x855c3be0a17fcd26ULL }, // 1e-239
+  { 0xf42faa48c0ea481eULL, 0xa6b34ad8c9dfc06fULL }, // 1e-238
+  { 0xf13b94daf124da26ULL, 0xd0601d8efc57b08bULL }, // 1e-237
+  { 0x76c53d08d6b70858ULL, 0x823c12795db6ce57ULL }, // 1e-236
+  { 0x54768c4b0c64ca6eULL, 0xa2cb1717b52481edULL }, // 1e-235
+  { 0xa9942f5dcf7dfd09ULL, 0xcb7ddcdda26da268ULL }, // 1e-234
+  { 0xd3f93b35435d7c4cULL, 0xfe5d54150b090b02ULL }, // 1e-233
+  { 0xc47bc5014a1a6dafULL, 0x9efa548d26e5a6e1ULL }, // 1e-232
+  { 0x359ab6419ca1091bULL, 0xc6b8e9b0709f109aULL }, // 1e-231
+  { 0xc30163d203c94b62ULL, 0xf867241c8cc6d4c0ULL }, // 1e-230
+  { 0x79e0de63425dcf1dULL, 0x9b407691d7fc44f8ULL }, // 1e-229
+  { 0x985915fc12f542e4ULL, 0xc21094364dfb5636ULL }, // 1e-228
+  { 0x3e6f5b7b17b2939dULL, 0xf294b943e17a2bc4ULL }, // 1e-227
+  { 0xa705992ceecf9c42ULL, 0x979cf3ca6cec5b5aULL }, // 1e-226
+  { 0x50c6ff782a838353ULL, 0xbd8430bd08277231ULL }, // 1e-225
+  { 0xa4f8bf5635246428ULL, 0xece53cec4a314ebdULL }, // 1e-224
+  { 0x871b7795e136be99ULL, 0x940f4613ae5ed136ULL }, // 1e-223
+  { 0x28e2557b59846e3fULL, 0xb913179899f68584ULL }, // 1e-222
+  { 0x331aeada2fe589cfULL, 0xe757dd7ec07426e5ULL }, // 1e-221
+  { 0x3ff0d2c85def7621ULL, 0x9096ea6f3848984fULL }, // 1e-220
+  { 0x0fed077a756b53a9ULL, 0xb4bca50b065abe63ULL }, // 1e-219
+  { 0xd3e8495912c62894ULL, 0xe1ebce4dc7f16dfbULL }, // 1e-218
+  { 0x64712dd7abbbd95cULL, 0x8d3360f09cf6e4bdULL }, // 1e-217
+  { 0xbd8d794d96aacfb3ULL, 0xb080392cc4349decULL }, // 1e-216
+  { 0xecf0d7a0fc5583a0ULL, 0xdca04777f541c567ULL }, // 1e-215
+  { 0xf41686c49db57244ULL, 0x89e42caaf9491b60ULL }, // 1e-214
+  { 0x311c2875c522ced5ULL, 0xac5d37d5b79b6239ULL }, // 1e-213
+  { 0x7d633293366b828bULL, 0xd77485cb25823ac7ULL }, // 1e-212
+  { 0xae5dff9c02033197ULL, 0x86a8d39ef77164bcULL }, // 1e-211
+  { 0xd9f57f830283fdfcULL, 0xa8530886b54dbdebULL }, // 1e-210
+  { 0xd072df63c324fd7bULL, 0xd267caa862a12d66ULL }, // 1e-209
+  { 0x4247cb9e59f71e6dULL, 0x8380dea93da4bc60ULL }, // 1e-208
+  { 0x52d9be85f074e608ULL, 0xa46116538d0deb78ULL }, // 1e-207
+  { 0x67902e276c921f8bULL, 0xcd795be870516656ULL }, // 1e-206
+  { 0x00ba1cd8a3db53b6ULL, 0x806bd9714632dff6ULL }, // 1e-205
+  { 0x80e8a40eccd228a4ULL, 0xa086cfcd97bf97f3ULL }, // 1e-204
+  { 0x6122cd128006b2cdULL, 0xc8a883c0fdaf7df0ULL }, // 1e-203
+  { 0x796b805720085f81ULL, 0xfad2a4b13d1b5d6cULL }, // 1e-202
+  { 0xcbe3303674053bb0ULL, 0x9cc3a6eec6311a63ULL }, // 1e-201
+  { 0xbedbfc4411068a9cULL, 0xc3f490aa77bd60fcULL }, // 1e-200
+  { 0xee92fb5515482d44ULL, 0xf4f1b4d515acb93bULL }, // 1e-199
+  { 0x751bdd152d4d1c4aULL, 0x991711052d8bf3c5ULL }, // 1e-198
+  { 0xd262d45a78a0635dULL, 0xbf5cd54678eef0b6ULL }, // 1e-197
+  { 0x86fb897116c87c34ULL, 0xef340a98172aace4ULL }, // 1e-196
+  { 0xd45d35e6ae3d4da0ULL, 0x9580869f0e7aac0eULL }, // 1e-195
+  { 0x8974836059cca109ULL, 0xbae0a846d2195712ULL }, // 1e-194
+  { 0x2bd1a438703fc94bULL, 0xe998d258869facd7ULL }, // 1e-193
+  { 0x7b6306a34627ddcfULL, 0x91ff83775423cc06ULL }, // 1e-192
+  { 0x1a3bc84c17b1d542ULL, 0xb67f6455292cbf08ULL }, // 1e-191
+  { 0x20caba5f1d9e4a93ULL, 0xe41f3d6a7377eecaULL }, // 1e-190
+  { 0x547eb47b7282ee9cULL, 0x8e938662882af53eULL }, // 1e-189
+  { 0xe99e619a4f23aa43ULL, 0xb23867fb2a35b28dULL }, // 1e-188
+  { 0x6405fa00e2ec94d4ULL, 0xdec681f9f4c31f31ULL }, // 1e-187
+  { 0xde83bc408dd3dd04ULL, 0x8b3c113c38f9f37eULL }, // 1e-186
+  { 0x9624ab50b148d445ULL, 0xae0b158b4738705eULL }, // 1e-185
+  { 0x3badd624dd9b0957ULL, 0xd98ddaee19068c76ULL }, // 1e-184
+  { 0xe54ca5d70a80e5d6ULL, 0x87f8a8d4cfa417c9ULL }, // 1e-183
+  { 0x5e9fcf4ccd211f4cULL, 0xa9f6d30a038d1dbcULL }, // 1e-182
+  { 0x7647c3200069671fULL, 0xd47487cc8470652bULL }, // 1e-181
+  { 0x29ecd9f40041e073ULL, 0x84c8d4dfd2c63f3bULL }, // 1e-180
+  { 0xf468107100525890ULL, 0xa5fb0a17c777cf09ULL }, // 1e-179
+  { 0x7182148d4066eeb4ULL, 0xcf79cc9db955c2ccULL }, // 1e-178
+  { 0xc6f14cd848405530ULL, 0x81ac1fe293d599bfULL }, // 1e-177
+  { 0xb8ada00e5a506a7cULL, 0xa21727db38cb002fULL }, // 1e-176
+  { 0xa6d90811f0e4851cULL, 0xca9cf1d206fdc03bULL }, // 1e-175
+  { 0x908f4a166d1da663ULL, 0xfd442e4688bd304aULL }, // 1e-174
+  { 0x9a598e4e043287feULL, 0x9e4a9cec15763e2eULL }, // 1e-173
+  { 0x40eff1e1853f29fdULL, 0xc5dd44271ad3cdbaULL }, // 1e-172
+  { 0xd12bee59e68ef47cULL, 0xf7549530e188c128ULL }, // 1e-171
+  { 0x82bb74f8301958ceULL, 0x9a94dd3e8cf578b9ULL }, // 1e-170
+  { 0xe36a52363c1faf01ULL, 0xc13a148e3032d6e7ULL }, // 1e-169
+  { 0xdc44e6c3cb279ac1ULL, 0xf18899b1bc3f8ca1ULL }, // 1e-168
+  { 0x29ab103a5ef8c0b9ULL, 0x96f5600f15a7b7e5ULL }, // 1e-167
+  { 0x7415d448f6b6f0e7ULL, 0xbcb2b812db11a5deULL }, // 1e-166
+  { 0x111b495b3464ad21ULL, 0xebdf661791d60f56ULL }, // 1e-165
+  { 0xcab10dd900beec34ULL, 0x936b9fcebb25c995ULL }, // 1e-164
+  { 0x3d5d514f40eea742ULL, 0xb84687c269ef3bfbULL }, // 1e-163
+  { 0x0cb4a5a3112a5112ULL, 0xe65829b3046b0afaULL }, // 1e-162
+  { 0x47f0e785eaba72abULL, 0x8ff71a0fe2c2e6dcULL }, // 1e-161
+  { 0x59ed216765690f56ULL, 0xb3f4e093db73a093ULL }, // 1e-160
+  { 0x306869c13ec3532cULL, 0xe0f218b8d25088b8ULL }, // 1e-159
+  { 0x1e414218c73a13fbULL, 0x8c974f7383725573ULL }, // 1e-158
+  { 0xe5d1929ef90898faULL, 0xafbd2350644eeacfULL }, // 1e-157
+  { 0xdf45f746b74abf39ULL, 0xdbac6c247d62a583ULL }, // 1e-156
+  { 0x6b8bba8c328eb783ULL, 0x894bc396ce5da772ULL }, // 1e-155
+  { 0x066ea92f3f326564ULL, 0xab9eb47c81f5114fULL }, // 1e-154
+  { 0xc80a537b0efefebdULL, 0xd686619ba27255a2ULL }, // 1e-153
+  { 0xbd06742ce95f5f36ULL, 0x8613fd0145877585ULL }, // 1e-152
+  { 0x2c48113823b73704ULL, 0xa798fc4196e952e7ULL }, // 1e-151
+  { 0xf75a15862ca504c5ULL, 0xd17f3b51fca3a7a0ULL }, // 1e-150
+  { 0x9a984d73dbe722fbULL, 0x82ef85133de648c4ULL }, // 1e-149
+  { 0xc13e60d0d2e0ebbaULL, 0xa3ab66580d5fdaf5ULL }, // 1e-148
+  { 0x318df905079926a8ULL, 0xcc963fee10b7d1b3ULL }, // 1e-147
+  { 0xfdf17746497f7052ULL, 0xffbbcfe994e5c61fULL }, // 1e-146
+  { 0xfeb6ea8bedefa633ULL, 0x9fd561f1fd0f9bd3ULL }, // 1e-145
+  { 0xfe64a52ee96b8fc0ULL, 0xc7caba6e7c5382c8ULL }, // 1e-144
+  { 0x3dfdce7aa3c673b0ULL, 0xf9bd690a1b68637bULL }, // 1e-143
+  { 0x06bea10ca65c084eULL, 0x9c1661a651213e2dULL }, // 1e-142
+  { 0x486e494fcff30a62ULL, 0xc31bfa0fe5698db8ULL }, // 1e-141
+  { 0x5a89dba3c3efccfaULL, 0xf3e2f893dec3f126ULL }, // 1e-140
+  { 0xf89629465a75e01cULL, 0x986ddb5c6b3a76b7ULL }, // 1e-139
+  { 0xf6bbb397f1135823ULL, 0xbe89523386091465ULL }, // 1e-138
+  { 0x746aa07ded582e2cULL, 0xee2ba6c0678b597fULL }, // 1e-137
+  { 0xa8c2a44eb4571cdcULL, 0x94db483840b717efULL }, // 1e-136
+  { 0x92f34d62616ce413ULL, 0xba121a4650e4ddebULL }, // 1e-135
+  { 0x77b020baf9c81d17ULL, 0xe896a0d7e51e1566ULL }, // 1e-134
+  { 0x0ace1474dc1d122eULL, 0x915e2486ef32cd60ULL }, // 1e-133
+  { 0x0d819992132456baULL, 0xb5b5ada8aaff80b8ULL }, // 1e-132
+  { 0x10e1fff697ed6c69ULL, 0xe3231912d5bf60e6ULL }, // 1e-131
+  { 0xca8d3ffa1ef463c1ULL, 0x8df5efabc5979c8fULL }, // 1e-130
+  { 0xbd308ff8a6b17cb2ULL, 0xb1736b96b6fd83b3ULL }, // 1e-129
+  { 0xac7cb3f6d05ddbdeULL, 0xddd0467c64bce4a0ULL }, // 1e-128
+  { 0x6bcdf07a423aa96bULL, 0x8aa22c0dbef60ee4ULL }, // 1e-127
+  { 0x86c16c98d2c953c6ULL, 0xad4ab7112eb3929dULL }, // 1e-126
+  { 0xe871c7bf077ba8b7ULL, 0xd89d64d57a607744ULL }, // 1e-125
+  { 0x11471cd764ad4972ULL, 0x87625f056c7c4a8bULL }, // 1e-124
+  { 0xd598e40d3dd89bcfULL, 0xa93af6c6c79b5d2dULL }, // 1e-123
+  { 0x4aff1d108d4ec2c3ULL, 0xd389b47879823479ULL }, // 1e-122
+  { 0xcedf722a585139baULL, 0x843610cb4bf160cbULL }, // 1e-121
+  { 0xc2974eb4ee658828ULL, 0xa54394fe1eedb8feULL }, // 1e-120
+  { 0x733d226229feea32ULL, 0xce947a3da6a9273eULL }, // 1e-119
+  { 0x0806357d5a3f525fULL, 0x811ccc668829b887ULL }, // 1e-118
+  { 0xca07c2dcb0cf26f7ULL, 0xa163ff802a3426a8ULL }, // 1e-117
+  { 0xfc89b393dd02f0b5ULL, 0xc9bcff6034c13052ULL }, // 1e-116
+  { 0xbbac2078d443ace2ULL, 0xfc2c3f3841f17c67ULL }, // 1e-115
+  { 0xd54b944b84aa4c0dULL, 0x9d9ba7832936edc0ULL }, // 1e-114
+  { 0x0a9e795e65d4df11ULL, 0xc5029163f384a931ULL }, // 1e-113
+  { 0x4d4617b5ff4a16d5ULL, 0xf64335bcf065d37dULL }, // 1e-112
+  { 0x504bced1bf8e4e45ULL, 0x99ea0196163fa42eULL }, // 1e-111
+  { 0xe45ec2862f71e1d6ULL, 0xc06481fb9bcf8d39ULL }, // 1e-110
+  { 0x5d767327bb4e5a4cULL, 0xf07da27a82c37088ULL }, // 1e-109
+  { 0x3a6a07f8d510f86fULL, 0x964e858c91ba2655ULL }, // 1e-108
+  { 0x890489f70a55368bULL, 0xbbe226efb628afeaULL }, // 1e-107
+  { 0x2b45ac74ccea842eULL, 0xeadab0aba3b2dbe5ULL }, // 1e-106
+  { 0x3b0b8bc90012929dULL, 0x92c8ae6b464fc96fULL }, // 1e-105
+  { 0x09ce6ebb40173744ULL, 0xb77ada0617e3bbcbULL }, // 1e-104
+  { 0xcc420a6a101d0515ULL, 0xe55990879ddcaabdULL }, // 1e-103
+  { 0x9fa946824a12232dULL, 0x8f57fa54c2a9eab6ULL }, // 1e-102
+  { 0x47939822dc96abf9ULL, 0xb32df8e9f3546564ULL }, // 1e-101
+  { 0x59787e2b93bc56f7ULL, 0xdff9772470297ebdULL }, // 1e-100
+  { 0x57eb4edb3c55b65aULL, 0x8bfbea76c619ef36ULL }, // 1e-99
+  { 0xede622920b6b23f1ULL, 0xaefae51477a06b03ULL }, // 1e-98
+  { 0xe95fab368e45ecedULL, 0xdab99e59958885c4ULL }, // 1e-97
+  { 0x11dbcb0218ebb414ULL, 0x88b402f7fd75539bULL }, // 1e-96
+  { 0xd652bdc29f26a119ULL, 0xaae103b5fcd2a881ULL }, // 1e-95
+  { 0x4be76d3346f0495fULL, 0xd59944a37c0752a2ULL }, // 1e-94
+  { 0x6f70a4400c562ddbULL, 0x857fcae62d8493a5ULL }, // 1e-93
+  { 0xcb4ccd500f6bb952ULL, 0xa6dfbd9fb8e5b88eULL }, // 1e-92
+  { 0x7e2000a41346a7a7ULL, 0xd097ad07a71f26b2ULL }, // 1e-91
+  { 0x8ed400668c0c28c8ULL, 0x825ecc24c873782fULL }, // 1e-90
+  { 0x728900802f0f32faULL, 0xa2f67f2dfa90563bULL }, // 1e-89
+  { 0x4f2b40a03ad2ffb9ULL, 0xcbb41ef979346bcaULL }, // 1e-88
+  { 0xe2f610c84987bfa8ULL, 0xfea126b7d78186bcULL }, // 1e-87
+  { 0x0dd9ca7d2df4d7c9ULL, 0x9f24b832e6b0f436ULL }, // 1e-86
+  { 0x91503d1c79720dbbULL, 0xc6ede63fa05d3143ULL }, // 1e-85
+  { 0x75a44c6397ce912aULL, 0xf8a95fcf88747d94ULL }, // 1e-84
+  { 0xc986afbe3ee11abaULL, 0x9b69dbe1b548ce7cULL }, // 1e-83
+  { 0xfbe85badce996168ULL, 0xc24452da229b021bULL }, // 1e-82
+  { 0xfae27299423fb9c3ULL, 0xf2d56790ab41c2a2ULL }, // 1e-81
+  { 0xdccd879fc967d41aULL, 0x97c560ba6b0919a5ULL }, // 1e-80
+  { 0x5400e987bbc1c920ULL, 0xbdb6b8e905cb600fULL }, // 1e-79
+  { 0x290123e9aab23b68ULL, 0xed246723473e3813ULL }, // 1e-78
+  { 0xf9a0b6720aaf6521ULL, 0x9436c0760c86e30bULL }, // 1e-77
+  { 0xf808e40e8d5b3e69ULL, 0xb94470938fa89bceULL }, // 1e-76
+  { 0xb60b1d1230b20e04ULL, 0xe7958cb87392c2c2ULL }, // 1e-75
+  { 0xb1c6f22b5e6f48c2ULL, 0x90bd77f3483bb9b9ULL }, // 1e-74
+  { 0x1e38aeb6360b1af3ULL, 0xb4ecd5f01a4aa828ULL }, // 1e-73
+  { 0x25c6da63c38de1b0ULL, 0xe2280b6c20dd5232ULL }, // 1e-72
+  { 0x579c487e5a38ad0eULL, 0x8d590723948a535fULL }, // 1e-71
+  { 0x2d835a9df0c6d851ULL, 0xb0af48ec79ace837ULL }, // 1e-70
+  { 0xf8e431456cf88e65ULL, 0xdcdb1b2798182244ULL }, // 1e-69
+  { 0x1b8e9ecb641b58ffULL, 0x8a08f0f8bf0f156bULL }, // 1e-68
+  { 0xe272467e3d222f3fULL, 0xac8b2d36eed2dac5ULL }, // 1e-67
+  { 0x5b0ed81dcc6abb0fULL, 0xd7adf884aa879177ULL }, // 1e-66
+  { 0x98e947129fc2b4e9ULL, 0x86ccbb52ea94baeaULL }, // 1e-65
+  { 0x3f2398d747b36224ULL, 0xa87fea27a539e9a5ULL }, // 1e-64
+  { 0x8eec7f0d19a03aadULL, 0xd29fe4b18e88640eULL }, // 1e-63
+  { 0x1953cf68300424acULL, 0x83a3eeeef9153e89ULL }, // 1e-62
+  { 0x5fa8c3423c052dd7ULL, 0xa48ceaaab75a8e2bULL }, // 1e-61
+  { 0x3792f412cb06794dULL, 0xcdb02555653131b6ULL }, // 1e-60
+  { 0xe2bbd88bbee40bd0ULL, 0x808e17555f3ebf11ULL }, // 1e-59
+  { 0x5b6aceaeae9d0ec4ULL, 0xa0b19d2ab70e6ed6ULL }, // 1e-58
+  { 0xf245825a5a445275ULL, 0xc8de047564d20a8bULL }, // 1e-57
+  { 0xeed6e2f0f0d56712ULL, 0xfb158592be068d2eULL }, // 1e-56
+  { 0x55464dd69685606bULL, 0x9ced737bb6c4183dULL }, // 1e-55
+  { 0xaa97e14c3c26b886ULL, 0xc428d05aa4751e4cULL }, // 1e-54
+  { 0xd53dd99f4b3066a8ULL, 0xf53304714d9265dfULL }, // 1e-53
+  { 0xe546a8038efe4029ULL, 0x993fe2c6d07b7fabULL }, // 1e-52
+  { 0xde98520472bdd033ULL, 0xbf8fdb78849a5f96ULL }, // 1e-51
+  { 0x963e66858f6d4440ULL, 0xef73d256a5c0f77cULL }, // 1e-50
+  { 0xdde7001379a44aa8ULL, 0x95a8637627989aadULL }, // 1e-49
+  { 0x5560c018580d5d52ULL, 0xbb127c53b17ec159ULL }, // 1e-48
+  { 0xaab8f01e6e10b4a6ULL, 0xe9d71b689dde71afULL }, // 1e-47
+  { 0xcab3961304ca70e8ULL, 0x9226712162ab070dULL }, // 1e-46
+  { 0x3d607b97c5fd0d22ULL, 0xb6b00d69bb55c8d1ULL }, // 1e-45
+  { 0x8cb89a7db77c506aULL, 0xe45c10c42a2b3b05ULL }, // 1e-44
+  { 0x77f3608e92adb242ULL, 0x8eb98a7a9a5b04e3ULL }, // 1e-43
+  { 0x55f038b237591ed3ULL, 0xb267ed1940f1c61cULL }, // 1e-42
+  { 0x6b6c46dec52f6688ULL, 0xdf01e85f912e37a3ULL }, // 1e-41
+  { 0x2323ac4b3b3da015ULL, 0x8b61313bbabce2c6ULL }, // 1e-40
+  { 0xabec975e0a0d081aULL, 0xae397d8aa96c1b77ULL }, // 1e-39
+  { 0x96e7bd358c904a21ULL, 0xd9c7dced53c72255ULL }, // 1e-38
+  { 0x7e50d64177da2e54ULL, 0x881cea14545c7575ULL }, // 1e-37
+  { 0xdde50bd1d5d0b9e9ULL, 0xaa242499697392d2ULL }, // 1e-36
+  { 0x955e4ec64b44e864ULL, 0xd4ad2dbfc3d07787ULL }, // 1e-35
+  { 0xbd5af13bef0b113eULL, 0x84ec3c97da624ab4ULL }, // 1e-34
+  { 0xecb1ad8aeacdd58eULL, 0xa6274bbdd0fadd61ULL }, // 1e-33
+  { 0x67de18eda5814af2ULL, 0xcfb11ead453994baULL }, // 1e-32
+  { 0x80eacf948770ced7ULL, 0x81ceb32c4b43fcf4ULL }, // 1e-31
+  { 0xa1258379a94d028dULL, 0xa2425ff75e14fc31ULL }, // 1e-30
+  { 0x096ee45813a04330ULL, 0xcad2f7f5359a3b3eULL }, // 1e-29
+  { 0x8bca9d6e188853fcULL, 0xfd87b5f28300ca0dULL }, // 1e-28
+  { 0x775ea264cf55347dULL, 0x9e74d1b791e07e48ULL }, // 1e-27
+  { 0x95364afe032a819dULL, 0xc612062576589ddaULL }, // 1e-26
+  { 0x3a83ddbd83f52204ULL, 0xf79687aed3eec551ULL }, // 1e-25
+  { 0xc4926a9672793542ULL, 0x9abe14cd44753b52ULL }, // 1e-24
+  { 0x75b7053c0f178293ULL, 0xc16d9a0095928a27ULL }, // 1e-23
+  { 0x5324c68b12dd6338ULL, 0xf1c90080baf72cb1ULL }, // 1e-22
+  { 0xd3f6fc16ebca5e03ULL, 0x971da05074da7beeULL }, // 1e-21
+  { 0x88f4bb1ca6bcf584ULL, 0xbce5086492111aeaULL }, // 1e-20
+  { 0x2b31e9e3d06c32e5ULL, 0xec1e4a7db69561a5ULL }, // 1e-19
+  { 0x3aff322e62439fcfULL, 0x9392ee8e921d5d07ULL }, // 1e-18
+  { 0x09befeb9fad487c2ULL, 0xb877aa3236a4b449ULL }, // 1e-17
+  { 0x4c2ebe687989a9b3ULL, 0xe69594bec44de15bULL }, // 1e-16
+  { 0x0f9d37014bf60a10ULL, 0x901d7cf73ab0acd9ULL }, // 1e-15
+  { 0x538484c19ef38c94ULL, 0xb424dc35095cd80fULL }, // 1e-14
+  { 0x2865a5f206b06fb9ULL, 0xe12e13424bb40e13ULL }, // 1e-13
+  { 0xf93f87b7442e45d3ULL, 0x8cbccc096f5088cbULL }, // 1e-12
+  { 0xf78f69a51539d748ULL, 0xafebff0bcb24aafeULL }, // 1e-11
+  { 0xb573440e5a884d1bULL, 0xdbe6fecebdedd5beULL }, // 1e-10
+  { 0x31680a88f8953030ULL, 0x89705f4136b4a597ULL }, // 1e-9
+  { 0xfdc20d2b36ba7c3dULL, 0xabcc77118461cefcULL }, // 1e-8
+  { 0x3d32907604691b4cULL, 0xd6bf94d5e57a42bcULL }, // 1e-7
+  { 0xa63f9a49c2c1b10fULL, 0x8637bd05af6c69b5ULL }, // 1e-6
+  { 0x0fcf80dc33721d53ULL, 0xa7c5ac471b478423ULL }, // 1e-5
+  { 0xd3c36113404ea4a8ULL, 0xd1b71758e219652bULL }, // 1e-4
+  { 0x645a1cac083126e9ULL, 0x83126e978d4fdf3bULL }, // 1e-3
+  { 0x3d70a3d70a3d70a3ULL, 0xa3d70a3d70a3d70aULL }, // 1e-2
+  { 0xccccccccccccccccULL, 0xccccccccccccccccULL }, // 1e-1
+  { 0x0000000000000000ULL, 0x8000000000000000ULL }, // 1e0
+  { 0x0000000000000000ULL, 0xa000000000000000ULL }, // 1e1
+  { 0x0000000000000000ULL, 0xc800000000000000ULL }, // 1e2
+  { 0x0000000000000000ULL, 0xfa00000000000000ULL }, // 1e3
+  { 0x0000000000000000ULL, 0x9c40000000000000ULL }, // 1e4
+  { 0x0000000000000000ULL, 0xc350000000000000ULL }, // 1e5
+  { 0x0000000000000000ULL, 0xf424000000000000ULL }, // 1e6
+  { 0x0000000000000000ULL, 0x9896800000000000ULL }, // 1e7
+  { 0x0000000000000000ULL, 0xbebc200000000000ULL }, // 1e8
+  { 0x0000000000000000ULL, 0xee6b280000000000ULL }, // 1e9
+  { 0x0000000000000000ULL, 0x9502f90000000000ULL }, // 1e10
+  { 0x0000000000000000ULL, 0xba43b74000000000ULL }, // 1e11
+  { 0x0000000000000000ULL, 0xe8d4a51000000000ULL }, // 1e12
+  { 0x0000000000000000ULL, 0x9184e72a00000000ULL }, // 1e13
+  { 0x0000000000000000ULL, 0xb5e620f480000000ULL }, // 1e14
+  { 0x0000000000000000ULL, 0xe35fa931a0000000ULL }, // 1e15
+  { 0x0000000000000000ULL, 0x8e1bc9bf04000000ULL }, // 1e16
+  { 0x0000000000000000ULL, 0xb1a2bc2ec5000000ULL }, // 1e17
+  { 0x0000000000000000ULL, 0xde0b6b3a76400000ULL }, // 1e18
+  { 0x0000000000000000ULL, 0x8ac7230489e80000ULL }, // 1e19
+  { 0x0000000000000000ULL, 0xad78ebc5ac620000ULL }, // 1e20
+  { 0x0000000000000000ULL, 0xd8d726b7177a8000ULL }, // 1e21
+  { 0x0000000000000000ULL, 0x878678326eac9000ULL }, // 1e22
+  { 0x0000000000000000ULL, 0xa968163f0a57b400ULL }, // 1e23
+  { 0x0000000000000000ULL, 0xd3c21bcecceda100ULL }, // 1e24
+  { 0x0000000000000000ULL, 0x84595161401484a0ULL }, // 1e25
+  { 0x0000000000000000ULL, 0xa56fa5b99019a5c8ULL }, // 1e26
+  { 0x0000000000000000ULL, 0xcecb8f27f4200f3aULL }, // 1e27
+  { 0x4000000000000000ULL, 0x813f3978f8940984ULL }, // 1e28
+  { 0x5000000000000000ULL, 0xa18f07d736b90be5ULL }, // 1e29
+  { 0xa400000000000000ULL, 0xc9f2c9cd04674edeULL }, // 1e30
+  { 0x4d00000000000000ULL, 0xfc6f7c4045812296ULL }, // 1e31
+  { 0xf020000000000000ULL, 0x9dc5ada82b70b59dULL }, // 1e32
+  { 0x6c28000000000000ULL, 0xc5371912364ce305ULL }, // 1e33
+  { 0xc732000000000000ULL, 0xf684df56c3e01bc6ULL }, // 1e34
+  { 0x3c7f400000000000ULL, 0x9a130b963a6c115cULL }, // 1e35
+  { 0x4b9f100000000000ULL, 0xc097ce7bc90715b3ULL }, // 1e36
+  { 0x1e86d40000000000ULL, 0xf0bdc21abb48db20ULL }, // 1e37
+  { 0x1314448000000000ULL, 0x96769950b50d88f4ULL }, // 1e38
+  { 0x17d955a000000000ULL, 0xbc143fa4e250eb31ULL }, // 1e39
+  { 0x5dcfab0800000000ULL, 0xeb194f8e1ae525fdULL }, // 1e40
+  { 0x5aa1cae500000000ULL, 0x92efd1b8d0cf37beULL }, // 1e41
+  { 0xf14a3d9e40000000ULL, 0xb7abc627050305adULL }, // 1e42
+  { 0x6d9ccd05d0000000ULL, 0xe596b7b0c643c719ULL }, // 1e43
+  { 0xe4820023a2000000ULL, 0x8f7e32ce7bea5c6fULL }, // 1e44
+  { 0xdda2802c8a800000ULL, 0xb35dbf821ae4f38bULL }, // 1e45
+  { 0xd50b2037ad200000ULL, 0xe0352f62a19e306eULL }, // 1e46
+  { 0x4526f422cc340000ULL, 0x8c213d9da502de45ULL }, // 1e47
+  { 0x9670b12b7f410000ULL, 0xaf298d050e4395d6ULL }, // 1e48
+  { 0x3c0cdd765f114000ULL, 0xdaf3f04651d47b4cULL }, // 1e49
+  { 0xa5880a69fb6ac800ULL, 0x88d8762bf324cd0fULL }, // 1e50
+  { 0x8eea0d047a457a00ULL, 0xab0e93b6efee0053ULL }, // 1e51
+  { 0x72a4904598d6d880ULL, 0xd5d238a4abe98068ULL }, // 1e52
+  { 0x47a6da2b7f864750ULL, 0x85a36366eb71f041ULL }, // 1e53
+  { 0x999090b65f67d924ULL, 0xa70c3c40a64e6c51ULL }, // 1e54
+  { 0xfff4b4e3f741cf6dULL, 0xd0cf4b50cfe20765ULL }, // 1e55
+  { 0xbff8f10e7a8921a4ULL, 0x82818f1281ed449fULL }, // 1e56
+  { 0xaff72d52192b6a0dULL, 0xa321f2d7226895c7ULL }, // 1e57
+  { 0x9bf4f8a69f764490ULL, 0xcbea6f8ceb02bb39ULL }, // 1e58
+  { 0x02f236d04753d5b4ULL, 0xfee50b7025c36a08ULL }, // 1e59
+  { 0x01d762422c946590ULL, 0x9f4f2726179a2245ULL }, // 1e60
+  { 0x424d3ad2b7b97ef5ULL, 0xc722f0ef9d80aad6ULL }, // 1e61
+  { 0xd2e0898765a7deb2ULL, 0xf8ebad2b84e0d58bULL }, // 1e62
+  { 0x63cc55f49f88eb2fULL, 0x9b934c3b330c8577ULL }, // 1e63
+  { 0x3cbf6b71c76b25fbULL, 0xc2781f49ffcfa6d5ULL }, // 1e64
+  { 0x8bef464e3945ef7aULL, 0xf316271c7fc3908aULL }, // 1e65
+  { 0x97758bf0e3cbb5acULL, 0x97edd871cfda3a56ULL }, // 1e66
+  { 0x3d52eeed1cbea317ULL, 0xbde94e8e43d0c8ecULL }, // 1e67
+  { 0x4ca7aaa863ee4bddULL, 0xed63a231d4c4fb27ULL }, // 1e68
+  { 0x8fe8caa93e74ef6aULL, 0x945e455f24fb1cf8ULL }, // 1e69
+  { 0xb3e2fd538e122b44ULL, 0xb975d6b6ee39e436ULL }, // 1e70
+  { 0x60dbbca87196b616ULL, 0xe7d34c64a9c85d44ULL }, // 1e71
+  { 0xbc8955e946fe31cdULL, 0x90e40fbeea1d3a4aULL }, // 1e72
+  { 0x6babab6398bdbe41ULL, 0xb51d13aea4a488ddULL }, // 1e73
+  { 0xc696963c7eed2dd1ULL, 0xe264589a4dcdab14ULL }, // 1e74
+  { 0xfc1e1de5cf543ca2ULL, 0x8d7eb76070a08aecULL }, // 1e75
+  { 0x3b25a55f43294bcbULL, 0xb0de65388cc8ada8ULL }, // 1e76
+  { 0x49ef0eb713f39ebeULL, 0xdd15fe86affad912ULL }, // 1e77
+  { 0x6e3569326c784337ULL, 0x8a2dbf142dfcc7abULL }, // 1e78
+  { 0x49c2c37f07965404ULL, 0xacb92ed9397bf996ULL }, // 1e79
+  { 0xdc33745ec97be906ULL, 0xd7e77a8f87daf7fbULL }, // 1e80
+  { 0x69a028bb3ded71a3ULL, 0x86f0ac99b4e8dafdULL }, // 1e81
+  { 0xc40832ea0d68ce0cULL, 0xa8acd7c0222311bcULL }, // 1e82
+  { 0xf50a3fa490c30190ULL, 0xd2d80db02aabd62bULL }, // 1e83
+  { 0x792667c6da79e0faULL, 0x83c7088e1aab65dbULL }, // 1e84
+  { 0x577001b891185938ULL, 0xa4b8cab1a1563f52ULL }, // 1e85
+  { 0xed4c0226b55e6f86ULL, 0xcde6fd5e09abcf26ULL }, // 1e86
+  { 0x544f8158315b05b4ULL, 0x80b05e5ac60b6178ULL }, // 1e87
+  { 0x696361ae3db1c721ULL, 0xa0dc75f1778e39d6ULL }, // 1e88
+  { 0x03bc3a19cd1e38e9ULL, 0xc913936dd571c84cULL }, // 1e89
+  { 0x04ab48a04065c723ULL, 0xfb5878494ace3a5fULL }, // 1e90
+  { 0x62eb0d64283f9c76ULL, 0x9d174b2dcec0e47bULL }, // 1e91
+  { 0x3ba5d0bd324f8394ULL, 0xc45d1df942711d9aULL }, // 1e92
+  { 0xca8f44ec7ee36479ULL, 0xf5746577930d6500ULL }, // 1e93
+  { 0x7e998b13cf4e1ecbULL, 0x9968bf6abbe85f20ULL }, // 1e94
+  { 0x9e3fedd8c321a67eULL, 0xbfc2ef456ae276e8ULL }, // 1e95
+  { 0xc5cfe94ef3ea101eULL, 0xefb3ab16c59b14a2ULL }, // 1e96
+  { 0xbba1f1d158724a12ULL, 0x95d04aee3b80ece5ULL }, // 1e97
+  { 0x2a8a6e45ae8edc97ULL, 0xbb445da9ca61281fULL }, // 1e98
+  { 0xf52d09d71a3293bdULL, 0xea1575143cf97226ULL }, // 1e99
+  { 0x593c2626705f9c56ULL, 0x924d692ca61be758ULL }, // 1e100
+  { 0x6f8b2fb00c77836cULL, 0xb6e0c377cfa2e12eULL }, // 1e101
+  { 0x0b6dfb9c0f956447ULL, 0xe498f455c38b997aULL }, // 1e102
+  { 0x4724bd4189bd5eacULL, 0x8edf98b59a373fecULL }, // 1e103
+  { 0x58edec91ec2cb657ULL, 0xb2977ee300c50fe7ULL }, // 1e104
+  { 0x2f2967b66737e3edULL, 0xdf3d5e9bc0f653e1ULL }, // 1e105
+  { 0xbd79e0d20082ee74ULL, 0x8b865b215899f46cULL }, // 1e106
+  { 0xecd8590680a3aa11ULL, 0xae67f1e9aec07187ULL }, // 1e107
+  { 0xe80e6f4820cc9495ULL, 0xda01ee641a708de9ULL }, // 1e108
+  { 0x3109058d147fdcddULL, 0x884134fe908658b2ULL }, // 1e109
+  { 0xbd4b46f0599fd415ULL, 0xaa51823e34a7eedeULL }, // 1e110
+  { 0x6c9e18ac7007c91aULL, 0xd4e5e2cdc1d1ea96ULL }, // 1e111
+  { 0x03e2cf6bc604ddb0ULL, 0x850fadc09923329eULL }, // 1e112
+  { 0x84db8346b786151cULL, 0xa6539930bf6bff45ULL }, // 1e113
+  { 0xe612641865679a63ULL, 0xcfe87f7cef46ff16ULL }, // 1e114
+  { 0x4fcb7e8f3f60c07eULL, 0x81f14fae158c5f6eULL }, // 1e115
+  { 0xe3be5e330f38f09dULL, 0xa26da3999aef7749ULL }, // 1e116
+  { 0x5cadf5bfd3072cc5ULL, 0xcb090c8001ab551cULL }, // 1e117
+  { 0x73d9732fc7c8f7f6ULL, 0xfdcb4fa002162a63ULL }, // 1e118
+  { 0x2867e7fddcdd9afaULL, 0x9e9f11c4014dda7eULL }, // 1e119
+  { 0xb281e1fd541501b8ULL, 0xc646d63501a1511dULL }, // 1e120
+  { 0x1f225a7ca91a4226ULL, 0xf7d88bc24209a565ULL }, // 1e121
+  { 0x3375788de9b06958ULL, 0x9ae757596946075fULL }, // 1e122
+  { 0x0052d6b1641c83aeULL, 0xc1a12d2fc3978937ULL }, // 1e123
+  { 0xc0678c5dbd23a49aULL, 0xf209787bb47d6b84ULL }, // 1e124
+  { 0xf840b7ba963646e0ULL, 0x9745eb4d50ce6332ULL }, // 1e125
+  { 0xb650e5a93bc3d898ULL, 0xbd176620a501fbffULL }, // 1e126
+  { 0xa3e51f138ab4cebeULL, 0xec5d3fa8ce427affULL }, // 1e127
+  { 0xc66f336c36b10137ULL, 0x93ba47c980e98cdfULL }, // 1e128
+  { 0xb80b0047445d4184ULL, 0xb8a8d9bbe123f017ULL }, // 1e129
+  { 0xa60dc059157491e5ULL, 0xe6d3102ad96cec1dULL }, // 1e130
+  { 0x87c89837ad68db2fULL, 0x9043ea1ac7e41392ULL }, // 1e131
+  { 0x29babe4598c311fbULL, 0xb454e4a179dd1877ULL }, // 1e132
+  { 0xf4296dd6fef3d67aULL, 0xe16a1dc9d8545e94ULL }, // 1e133
+  { 0x1899e4a65f58660cULL, 0x8ce2529e2734bb1dULL }, // 1e134
+  { 0x5ec05dcff72e7f8fULL, 0xb01ae745b101e9e4ULL }, // 1e135
+  { 0x76707543f4fa1f73ULL, 0xdc21a1171d42645dULL }, // 1e136
+  { 0x6a06494a791c53a8ULL, 0x899504ae72497ebaULL }, // 1e137
+  { 0x0487db9d17636892ULL, 0xabfa45da0edbde69ULL }, // 1e138
+  { 0x45a9d2845d3c42b6ULL, 0xd6f8d7509292d603ULL }, // 1e139
+  { 0x0b8a2392ba45a9b2ULL, 0x865b86925b9bc5c2ULL }, // 1e140
+  { 0x8e6cac7768d7141eULL, 0xa7f26836f282b732ULL }, // 1e141
+  { 0x3207d795430cd926ULL, 0xd1ef0244af2364ffULL }, // 1e142
+  { 0x7f44e6bd49e807b8ULL, 0x8335616aed761f1fULL }, // 1e143
+  { 0x5f16206c9c6209a6ULL, 0xa402b9c5a8d3a6e7ULL }, // 1e144
+  { 0x36dba887c37a8c0fULL, 0xcd036837130890a1ULL }, // 1e145
+  { 0xc2494954da2c9789ULL, 0x802221226be55a64ULL }, // 1e146
+  { 0xf2db9baa10b7bd6cULL, 0xa02aa96b06deb0fdULL }, // 1e147
+  { 0x6f92829494e5acc7ULL, 0xc83553c5c8965d3dULL }, // 1e148
+  { 0xcb772339ba1f17f9ULL, 0xfa42a8b73abbf48cULL }, // 1e149
+  { 0xff2a760414536efbULL, 0x9c69a97284b578d7ULL }, // 1e150
+  { 0xfef5138519684abaULL, 0xc38413cf25e2d70dULL }, // 1e151
+  { 0x7eb258665fc25d69ULL, 0xf46518c2ef5b8cd1ULL }, // 1e152
+  { 0xef2f773ffbd97a61ULL, 0x98bf2f79d5993802ULL }, // 1e153
+  { 0xaafb550ffacfd8faULL, 0xbeeefb584aff8603ULL }, // 1e154
+  { 0x95ba2a53f983cf38ULL, 0xeeaaba2e5dbf6784ULL }, // 1e155
+  { 0xdd945a747bf26183ULL, 0x952ab45cfa97a0b2ULL }, // 1e156
+  { 0x94f971119aeef9e4ULL, 0xba756174393d88dfULL }, // 1e157
+  { 0x7a37cd5601aab85dULL, 0xe912b9d1478ceb17ULL }, // 1e158
+  { 0xac62e055c10ab33aULL, 0x91abb422ccb812eeULL }, // 1e159
+  { 0x577b986b314d6009ULL, 0xb616a12b7fe617aaULL }, // 1e160
+  { 0xed5a7e85fda0b80bULL, 0xe39c49765fdf9d94ULL }, // 1e161
+  { 0x14588f13be847307ULL, 0x8e41ade9fbebc27dULL }, // 1e162
+  { 0x596eb2d8ae258fc8ULL, 0xb1d219647ae6b31cULL }, // 1e163
+  { 0x6fca5f8ed9aef3bbULL, 0xde469fbd99a05fe3ULL }, // 1e164
+  { 0x25de7bb9480d5854ULL, 0x8aec23d680043beeULL }, // 1e165
+  { 0xaf561aa79a10ae6aULL, 0xada72ccc20054ae9ULL }, // 1e166
+  { 0x1b2ba1518094da04ULL, 0xd910f7ff28069da4ULL }, // 1e167
+  { 0x90fb44d2f05d0842ULL, 0x87aa9aff79042286ULL }, // 1e168
+  { 0x353a1607ac744a53ULL, 0xa99541bf57452b28ULL }, // 1e169
+  { 0x42889b8997915ce8ULL, 0xd3fa922f2d1675f2ULL }, // 1e170
+  { 0x69956135febada11ULL, 0x847c9b5d7c2e09b7ULL }, // 1e171
+  { 0x43fab9837e699095ULL, 0xa59bc234db398c25ULL }, // 1e172
+  { 0x94f967e45e03f4bbULL, 0xcf02b2c21207ef2eULL }, // 1e173
+  { 0x1d1be0eebac278f5ULL, 0x8161afb94b44f57dULL }, // 1e174
+  { 0x6462d92a69731732ULL, 0xa1ba1ba79e1632dcULL }, // 1e175
+  { 0x7d7b8f7503cfdcfeULL, 0xca28a291859bbf93ULL }, // 1e176
+  { 0x5cda735244c3d43eULL, 0xfcb2cb35e702af78ULL }, // 1e177
+  { 0x3a0888136afa64a7ULL, 0x9defbf01b061adabULL }, // 1e178
+  { 0x088aaa1845b8fdd0ULL, 0xc56baec21c7a1916ULL }, // 1e179
+  { 0x8aad549e57273d45ULL, 0xf6c69a72a3989f5bULL }, // 1e180
+  { 0x36ac54e2f678864bULL, 0x9a3c2087a63f6399ULL }, // 1e181
+  { 0x84576a1bb416a7ddULL, 0xc0cb28a98fcf3c7fULL }, // 1e182
+  { 0x656d44a2a11c51d5ULL, 0xf0fdf2d3f3c30b9fULL }, // 1e183
+  { 0x9f644ae5a4b1b325ULL, 0x969eb7c47859e743ULL }, // 1e184
+  { 0x873d5d9f0dde1feeULL, 0xbc4665b596706114ULL }, // 1e185
+  { 0xa90cb506d155a7eaULL, 0xeb57ff22fc0c7959ULL }, // 1e186
+  { 0x09a7f12442d588f2ULL, 0x9316ff75dd87cbd8ULL }, // 1e187
+  { 0x0c11ed6d538aeb2fULL, 0xb7dcbf5354e9beceULL }, // 1e188
+  { 0x8f1668c8a86da5faULL, 0xe5d3ef282a242e81ULL }, // 1e189
+  { 0xf96e017d694487bcULL, 0x8fa475791a569d10ULL }, // 1e190
+  { 0x37c981dcc395a9acULL, 0xb38d92d760ec4455ULL }, // 1e191
+  { 0x85bbe253f47b1417ULL, 0xe070f78d3927556aULL }, // 1e192
+  { 0x93956d7478ccec8eULL, 0x8c469ab843b89562ULL }, // 1e193
+  { 0x387ac8d1970027b2ULL, 0xaf58416654a6babbULL }, // 1e194
+  { 0x06997b05fcc0319eULL, 0xdb2e51bfe9d0696aULL }, // 1e195
+  { 0x441fece3bdf81f03ULL, 0x88fcf317f22241e2ULL }, // 1e196
+  { 0xd527e81cad7626c3ULL, 0xab3c2fddeeaad25aULL }, // 1e197
+  { 0x8a71e223d8d3b074ULL, 0xd60b3bd56a5586f1ULL }, // 1e198
+  { 0xf6872d5667844e49ULL, 0x85c7056562757456ULL }, // 1e199
+  { 0xb428f8ac016561dbULL, 0xa738c6bebb12d16cULL }, // 1e200
+  { 0xe13336d701beba52ULL, 0xd106f86e69d785c7ULL }, // 1e201
+  { 0xecc0024661173473ULL, 0x82a45b450226b39cULL }, // 1e202
+  { 0x27f002d7f95d0190ULL, 0xa34d721642b06084ULL }, // 1e203
+  { 0x31ec038df7b441f4ULL, 0xcc20ce9bd35c78a5ULL }, // 1e204
+  { 0x7e67047175a15271ULL, 0xff290242c83396ceULL }, // 1e205
+  { 0x0f0062c6e984d386ULL, 0x9f79a169bd203e41ULL }, // 1e206
+  { 0x52c07b78a3e60868ULL, 0xc75809c42c684dd1ULL }, // 1e207
+  { 0xa7709a56ccdf8a82ULL, 0xf92e0c3537826145ULL }, // 1e208
+  { 0x88a66076400bb691ULL, 0x9bbcc7a142b17ccbULL }, // 1e209
+  { 0x6acff893d00ea435ULL, 0xc2abf989935ddbfeULL }, // 1e210
+  { 0x0583f6b8c4124d43ULL, 0xf356f7ebf83552feULL }, // 1e211
+  { 0xc3727a337a8b704aULL, 0x98165af37b2153deULL }, // 1e212
+  { 0x744f18c0592e4c5cULL, 0xbe1bf1b059e9a8d6ULL }, // 1e213
+  { 0x1162def06f79df73ULL, 0xeda2ee1c7064130cULL }, // 1e214
+  { 0x8addcb5645ac2ba8ULL, 0x9485d4d1c63e8be7ULL }, // 1e215
+  { 0x6d953e2bd7173692ULL, 0xb9a74a0637ce2ee1ULL }, // 1e216
+  { 0xc8fa8db6ccdd0437ULL, 0xe8111c87c5c1ba99ULL }, // 1e217
+  { 0x1d9c9892400a22a2ULL, 0x910ab1d4db9914a0ULL }, // 1e218
+  { 0x2503beb6d00cab4bULL, 0xb54d5e4a127f59c8ULL }, // 1e219
+  { 0x2e44ae64840fd61dULL, 0xe2a0b5dc971f303aULL }, // 1e220
+  { 0x5ceaecfed289e5d2ULL, 0x8da471a9de737e24ULL }, // 1e221
+  { 0x7425a83e872c5f47ULL, 0xb10d8e1456105dadULL }, // 1e222
+  { 0xd12f124e28f77719ULL, 0xdd50f1996b947518ULL }, // 1e223
+  { 0x82bd6b70d99aaa6fULL, 0x8a5296ffe33cc92fULL }, // 1e224
+  { 0x636cc64d1001550bULL, 0xace73cbfdc0bfb7bULL }, // 1e225
+  { 0x3c47f7e05401aa4eULL, 0xd8210befd30efa5aULL }, // 1e226
+  { 0x65acfaec34810a71ULL, 0x8714a775e3e95c78ULL }, // 1e227
+  { 0x7f1839a741a14d0dULL, 0xa8d9d1535ce3b396ULL }, // 1e228
+  { 0x1ede48111209a050ULL, 0xd31045a8341ca07cULL }, // 1e229
+  { 0x934aed0aab460432ULL, 0x83ea2b892091e44dULL }, // 1e230
+  { 0xf81da84d5617853fULL, 0xa4e4b66b68b65d60ULL }, // 1e231
+  { 0x36251260ab9d668eULL, 0xce1de40642e3f4b9ULL }, // 1e232
+  { 0xc1d72b7c6b426019ULL, 0x80d2ae83e9ce78f3ULL }, // 1e233
+  { 0xb24cf65b8612f81fULL, 0xa1075a24e4421730ULL }, // 1e234
+  { 0xdee033f26797b627ULL, 0xc94930ae1d529cfcULL }, // 1e235
+  { 0x169840ef017da3b1ULL, 0xfb9b7cd9a4a7443cULL }, // 1e236
+  { 0x8e1f289560ee864eULL, 0x9d412e0806e88aa5ULL }, // 1e237
+  { 0xf1a6f2bab92a27e2ULL, 0xc491798a08a2ad4eULL }, // 1e238
+  { 0xae10af696774b1dbULL, 0xf5b5d7ec8acb58a2ULL }, // 1e239
+  { 0xacca6da1e0a8ef29ULL, 0x9991a6f3d6bf1765ULL }, // 1e240
+  { 0x17fd090a58d32af3ULL, 0xbff610b0cc6edd3fULL }, // 1e241
+  { 0xddfc4b4cef07f5b0ULL, 0xeff394dcff8a948eULL }, // 1e242
+  { 0x4abdaf101564f98eULL, 0x95f83d0a1fb69cd9ULL }, // 1e243
+  { 0x9d6d1ad41abe37f1ULL, 0xbb764c4ca7a4440fULL }, // 1e244
+  { 0x84c86189216dc5edULL, 0xea53df5fd18d5513ULL }, // 1e245
+  { 0x32fd3cf5b4e49bb4ULL, 0x92746b9be2f8552cULL }, // 1e246
+  { 0x3fbc8c33221dc2a1ULL, 0xb7118682dbb66a77ULL }, // 1e247
+  { 0x0fabaf3feaa5334aULL, 0xe4d5e82392a40515ULL }, // 1e248
+  { 0x29cb4d87f2a7400eULL, 0x8f05b1163ba6832dULL }, // 1e249
+  { 0x743e20e9ef511012ULL, 0xb2c71d5bca9023f8ULL }, // 1e250
+  { 0x914da9246b255416ULL, 0xdf78e4b2bd342cf6ULL }, // 1e251
+  { 0x1ad089b6c2f7548eULL, 0x8bab8eefb6409c1aULL }, // 1e252
+  { 0xa184ac2473b529b1ULL, 0xae9672aba3d0c320ULL }, // 1e253
+  { 0xc9e5d72d90a2741eULL, 0xda3c0f568cc4f3e8ULL }, // 1e254
+  { 0x7e2fa67c7a658892ULL, 0x8865899617fb1871ULL }, // 1e255
+  { 0xddbb901b98feeab7ULL, 0xaa7eebfb9df9de8dULL }, // 1e256
+  { 0x552a74227f3ea565ULL, 0xd51ea6fa85785631ULL }, // 1e257
+  { 0xd53a88958f87275fULL, 0x8533285c936b35deULL }, // 1e258
+  { 0x8a892abaf368f137ULL, 0xa67ff273b8460356ULL }, // 1e259
+  { 0x2d2b7569b0432d85ULL, 0xd01fef10a657842cULL }, // 1e260
+  { 0x9c3b29620e29fc73ULL, 0x8213f56a67f6b29bULL }, // 1e261
+  { 0x8349f3ba91b47b8fULL, 0xa298f2c501f45f42ULL }, // 1e262
+  { 0x241c70a936219a73ULL, 0xcb3f2f7642717713ULL }, // 1e263
+  { 0xed238cd383aa0110ULL, 0xfe0efb53d30dd4d7ULL }, // 1e264
+  { 0xf4363804324a40aaULL, 0x9ec95d1463e8a506ULL }, // 1e265
+  { 0xb143c6053edcd0d5ULL, 0xc67bb4597ce2ce48ULL }, // 1e266
+  { 0xdd94b7868e94050aULL, 0xf81aa16fdc1b81daULL }, // 1e267
+  { 0xca7cf2b4191c8326ULL, 0x9b10a4e5e9913128ULL }, // 1e268
+  { 0xfd1c2f611f63a3f0ULL, 0xc1d4ce1f63f57d72ULL }, // 1e269
+  { 0xbc633b39673c8cecULL, 0xf24a01a73cf2dccfULL }, // 1e270
+  { 0xd5be0503e085d813ULL, 0x976e41088617ca01ULL }, // 1e271
+  { 0x4b2d8644d8a74e18ULL, 0xbd49d14aa79dbc82ULL }, // 1e272
+  { 0xddf8e7d60ed1219eULL, 0xec9c459d51852ba2ULL }, // 1e273
+  { 0xcabb90e5c942b503ULL, 0x93e1ab8252f33b45ULL }, // 1e274
+  { 0x3d6a751f3b936243ULL, 0xb8da1662e7b00a17ULL }, // 1e275
+  { 0x0cc512670a783ad4ULL, 0xe7109bfba19c0c9dULL }, // 1e276
+  { 0x27fb2b80668b24c5ULL, 0x906a617d450187e2ULL }, // 1e277
+  { 0xb1f9f660802dedf6ULL, 0xb484f9dc9641e9daULL }, // 1e278
+  { 0x5e7873f8a0396973ULL, 0xe1a63853bbd26451ULL }, // 1e279
+  { 0xdb0b487b6423e1e8ULL, 0x8d07e33455637eb2ULL }, // 1e280
+  { 0x91ce1a9a3d2cda62ULL, 0xb049dc016abc5e5fULL }, // 1e281
+  { 0x7641a140cc7810fbULL, 0xdc5c5301c56b75f7ULL }, // 1e282
+  { 0xa9e904c87fcb0a9dULL, 0x89b9b3e11b6329baULL }, // 1e283
+  { 0x546345fa9fbdcd44ULL, 0xac2820d9623bf429ULL }, // 1e284
+  { 0xa97c177947ad4095ULL, 0xd732290fbacaf133ULL }, // 1e285
+  { 0x49ed8eabcccc485dULL, 0x867f59a9d4bed6c0ULL }, // 1e286
+  { 0x5c68f256bfff5a74ULL, 0xa81f301449ee8c70ULL }, // 1e287
+  { 0x73832eec6fff3111ULL, 0xd226fc195c6a2f8cULL }, // 1e288
+  { 0xc831fd53c5ff7eabULL, 0x83585d8fd9c25db7ULL }, // 1e289
+  { 0xba3e7ca8b77f5e55ULL, 0xa42e74f3d032f525ULL }, // 1e290
+  { 0x28ce1bd2e55f35ebULL, 0xcd3a1230c43fb26fULL }, // 1e291
+  { 0x7980d163cf5b81b3ULL, 0x80444b5e7aa7cf85ULL }, // 1e292
+  { 0xd7e105bcc332621fULL, 0xa0555e361951c366ULL }, // 1e293
+  { 0x8dd9472bf3fefaa7ULL, 0xc86ab5c39fa63440ULL }, // 1e294
+  { 0xb14f98f6f0feb951ULL, 0xfa856334878fc150ULL }, // 1e295
+  { 0x6ed1bf9a569f33d3ULL, 0x9c935e00d4b9d8d2ULL }, // 1e296
+  { 0x0a862f80ec4700c8ULL, 0xc3b8358109e84f07ULL }, // 1e297
+  { 0xcd27bb612758c0faULL, 0xf4a642e14c6262c8ULL }, // 1e298
+  { 0x8038d51cb897789cULL, 0x98e7e9cccfbd7dbdULL }, // 1e299
+  { 0xe0470a63e6bd56c3ULL, 0xbf21e44003acdd2cULL }, // 1e300
+  { 0x1858ccfce06cac74ULL, 0xeeea5d5004981478ULL }, // 1e301
+  { 0x0f37801e0c43ebc8ULL, 0x95527a5202df0ccbULL }, // 1e302
+  { 0xd30560258f54e6baULL, 0xbaa718e68396cffdULL }, // 1e303
+  { 0x47c6b82ef32a2069ULL, 0xe950df20247c83fdULL }, // 1e304
+  { 0x4cdc331d57fa5441ULL, 0x91d28b7416cdd27eULL }, // 1e305
+  { 0xe0133fe4adf8e952ULL, 0xb6472e511c81471dULL }, // 1e306
+  { 0x58180fddd97723a6ULL, 0xe3d8f9e563a198e5ULL }, // 1e307
+  { 0x570f09eaa7ea7648ULL, 0x8e679c2f5e44ff8fULL }, // 1e308
+  { 0x2cd2cc6551e513daULL, 0xb201833b35d63f73ULL }, // 1e309
+  { 0xf8077f7ea65e58d1ULL, 0xde81e40a034bcf4fULL }, // 1e310
+  { 0xfb04afaf27faf782ULL, 0x8b112e86420f6191ULL }, // 1e311
+  { 0x79c5db9af1f9b563ULL, 0xadd57a27d29339f6ULL }, // 1e312
+  { 0x18375281ae7822bcULL, 0xd94ad8b1c7380874ULL }, // 1e313
+  { 0x8f2293910d0b15b5ULL, 0x87cec76f1c830548ULL }, // 1e314
+  { 0xb2eb3875504ddb22ULL, 0xa9c2794ae3a3c69aULL }, // 1e315
+  { 0x5fa60692a46151ebULL, 0xd433179d9c8cb841ULL }, // 1e316
+  { 0xdbc7c41ba6bcd333ULL, 0x849feec281d7f328ULL }, // 1e317
+  { 0x12b9b522906c0800ULL, 0xa5c7ea73224deff3ULL }, // 1e318
+  { 0xd768226b34870a00ULL, 0xcf39e50feae16befULL }, // 1e319
+  { 0xe6a1158300d46640ULL, 0x81842f29f2cce375ULL }, // 1e320
+  { 0x60495ae3c1097fd0ULL, 0xa1e53af46f801c53ULL }, // 1e321
+  { 0x385bb19cb14bdfc4ULL, 0xca5e89b18b602368ULL }, // 1e322
+  { 0x46729e03dd9ed7b5ULL, 0xfcf62c1dee382c42ULL }, // 1e323
+  { 0x6c07a2c26a8346d1ULL, 0x9e19db92b4e31ba9ULL }, // 1e324
+  { 0xc7098b7305241885ULL, 0xc5a05277621be293ULL }, // 1e325
+  { 0xb8cbee4fc66d1ea7ULL, 0xf70867153aa2db38ULL }, // 1e326
+  { 0x737f74f1dc043328ULL, 0x9a65406d44a5c903ULL }, // 1e327
+  { 0x505f522e53053ff2ULL, 0xc0fe908895cf3b44ULL }, // 1e328
+  { 0x647726b9e7c68fefULL, 0xf13e34aabb430a15ULL }, // 1e329
+  { 0x5eca783430dc19f5ULL, 0x96c6e0eab509e64dULL }, // 1e330
+  { 0xb67d16413d132072ULL, 0xbc789925624c5fe0ULL }, // 1e331
+  { 0xe41c5bd18c57e88fULL, 0xeb96bf6ebadf77d8ULL }, // 1e332
+  { 0x8e91b962f7b6f159ULL, 0x933e37a534cbaae7ULL }, // 1e333
+  { 0x723627bbb5a4adb0ULL, 0xb80dc58e81fe95a1ULL }, // 1e334
+  { 0xcec3b1aaa30dd91cULL, 0xe61136f2227e3b09ULL }, // 1e335
+  { 0x213a4f0aa5e8a7b1ULL, 0x8fcac257558ee4e6ULL }, // 1e336
+  { 0xa988e2cd4f62d19dULL, 0xb3bd72ed2af29e1fULL }, // 1e337
+  { 0x93eb1b80a33b8605ULL, 0xe0accfa875af45a7ULL }, // 1e338
+  { 0xbc72f130660533c3ULL, 0x8c6c01c9498d8b88ULL }, // 1e339
+  { 0xeb8fad7c7f8680b4ULL, 0xaf87023b9bf0ee6aULL }, // 1e340
+  { 0xa67398db9f6820e1ULL, 0xdb68c2ca82ed2a05ULL }, // 1e341
+  { 0x88083f8943a1148cULL, 0x892179be91d43a43ULL }, // 1e342
+  { 0x6a0a4f6b948959b0ULL, 0xab69d82e364948d4ULL }, // 1e343
+  { 0x848ce34679abb01cULL, 0xd6444e39c3db9b09ULL }, // 1e344
+  { 0xf2d80e0c0c0b4e11ULL, 0x85eab0e41a6940e5ULL }, // 1e345
+  { 0x6f8e118f0f0e2195ULL, 0xa7655d1d2103911fULL }, // 1e346
+  { 0x4b7195f2d2d1a9fbULL, 0xd13eb46469447567ULL }, // 1e347
+};
+
+static const double g_exactPow10[] =
+{
+  1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11, 1e12, 1e13, 1e14, 1e15, 1e16,
+  1e17, 1e18, 1e19, 1e20, 1e21, 1e22
+};
+
+static JSUINT64 multiply128(JSUINT64 a, JSUINT64 b, JSUINT64 *hi)
+{
+#if defined(__SIZEOF_INT128__)
+  unsigned __int128 product = (unsigned __int128) a * b;
+  *hi = (JSUINT64) (product >> 64);
+  return (JSUINT64) product;
+#elif defined(_MSC_VER) && defined(_M_X64)
+  return _umul128(a, b, hi);
+#else
+  const JSUINT64 M32 = 0xffffffffULL;
+  JSUINT64 aLo = a & M32;
+  JSUINT64 aHi = a >> 32;
+  JSUINT64 bLo = b & M32;
+  JSUINT64 bHi = b >> 32;
+  JSUINT64 lolo = aLo * bLo;
+  JSUINT64 hilo = aHi * bLo;
+  JSUINT64 lohi = aLo * bHi;
+  JSUINT64 hihi = aHi * bHi;
+  JSUINT64 cross = (lolo >> 32) + (hilo & M32) + lohi;
+
+  *hi = hihi + (hilo >> 32) + (cross >> 32);
+  return (cross << 32) | (lolo & M32);
+#endif
+}
+
+static int countLeadingZeros64(JSUINT64 value)
+{
+#if defined(__GNUC__)
+  return __builtin_clzll(value);
+#else
+  int count = 0;
+
+  while (!(value & 0x8000000000000000ULL))
+  {
+    value <<= 1;
+    count ++;
+  }
+
+  return count;
+#endif
+}
+
+/*
+Converts mantissa * 10^exp10 to the nearest double. Returns 0 when the result can't be decided
+this way, or is subnormal or out of range. mantissa must not be 0 */
+static int eiselLemire(JSUINT64 mantissa, int exp10, int neg, double *value)
+{
+  JSUINT64 xHi;
+  JSUINT64 xLo;
+  JSUINT64 yHi;
+  JSUINT64 yLo;
+  JSUINT64 mergedHi;
+  JSUINT64 mergedLo;
+  JSUINT64 retMantissa;
+  JSUINT64 retExp2;
+  JSUINT64 bits;
+  JSUINT64 msb;
+  const JSUINT64 *pow10;
+  int clz;
+
+  if (exp10 < EISEL_LEMIRE_MIN_EXP10 || exp10 > EISEL_LEMIRE_MAX_EXP10)
+  {
+    return 0;
+  }
+
+  pow10 = g_pow10_128[exp10 - EISEL_LEMIRE_MIN_EXP10];
+
+  // Normalization
+  clz = countLeadingZeros64(mantissa);
+  mantissa <<= clz;
+  retExp2 = (JSUINT64) (((217706 * exp10) >> 16) + 64 + 1023) - (JSUINT64) clz;
+
+  // Multiplication, widened to 192 bits when the low bits might carry into the result
+  xLo = multiply128(mantissa, pow10[1], &xHi);
+
+  if ((xHi & 0x1ff) == 0x1ff && xLo + mantissa < mantissa)
+  {
+    yLo = multiply128(mantissa, pow10[0], &yHi);
+    mergedHi = xHi;
+    mergedLo = xLo + yHi;
+
+    if (mergedLo < xLo)
+    {
+      mergedHi ++;
+    }
+
+    if ((mergedHi & 0x1ff) == 0x1ff && mergedLo + 1 == 0 && yLo + mantissa < mantissa)
+    {
+      return 0;
+    }
+
+    xHi = mergedHi;
+    xLo = mergedLo;
+  }
+
+  // Shift to 54 bits
+  msb = xHi >> 63;
+  retMantissa = xHi >> (msb + 9);
+  retExp2 -= 1 ^ msb;
+
+  // Exactly halfway between two doubles, leave it to the slow path
+  if (xLo == 0 && (xHi & 0x1ff) == 0 && (retMantissa & 3) == 1)
+  {
+    return 0;
+  }
+
+  // Round to 53 bits
+  retMantissa += retMantissa & 1;
+  retMantissa >>= 1;
+
+  if (retMantissa >> 53)
+  {
+    retMantissa >>= 1;
+    retExp2 ++;
+  }
+
+  // Subnormal, infinite or NaN
+  if (retExp2 - 1 >= 0x7ff - 1)
+  {
+    return 0;
+  }
+
+  bits = (retExp2 << 52) | (retMantissa & 0x000fffffffffffffULL);
+
+  if (neg)
+  {
+    bits |= 0x8000000000000000ULL;
+  }
+
+  memcpy(value, &bits, sizeof(double));
+  return 1;
+}
+
+/*
+strtod on a copy of the number with '.' replaced by the decimal point of the current locale */
+static int strtodLocale(JSONObjectDecoder *dec, const char *start, const char *end, double *value)
+{
+  char stackBuffer[64];
+  char *buffer = stackBuffer;
+  const char *point = localeconv()->decimal_point;
+  size_t cbPoint = strlen(point);
+  size_t cbNeeded = (end - start) + cbPoint + 1;
+  char *offset;
+
+  if (cbNeeded > sizeof(stackBuffer))
+  {
+    buffer = (char *) dec->malloc(cbNeeded);
+    if (!buffer)
+    {
+      return -1;
+    }
+  }
+
+  for (offset = buffer; start < end; start ++)
+  {
+    if (*start == '.')
+    {
+      memcpy(offset, point, cbPoint);
+      offset += cbPoint;
+    }
+    else
+    {
+      *offset++ = *start;
+    }
+  }
+
+  *offset = '\0';
+
   errno = 0;
+  *value = strtod(buffer, NULL);
+
+  if (buffer != stackBuffer)
+  {
+    dec->free(buffer);
+  }
+
+  // Underflow quietly gives zero or a subnormal like it does in Python
+  return (errno == ERANGE && (*value == HUGE_VAL || *value == -HUGE_VAL)) ? 0 : 1;
+}
+
+/*
+Continues a number at offset, where mantissa and digits hold the integer digits scanned so far
+(digits may overcount leading zeros, which only makes the truncation check more careful) */
+static JSOBJ decodeExactFloat(struct DecoderState *ds, char *offset, JSUINT64 mantissa, int digits, int neg)
+{
+  int truncated = 0;
+  int exp10 = 0;
+  int expValue = 0;
+  int expNeg = 0;
+  int chr;
+  double value;
+  double upper;
+
+  // Keep the first 19 significant digits, which always fit in 64 bits
+  for (; (chr = (unsigned char) *offset - '0') >= 0 && chr <= 9; offset ++)
+  {
+    if (digits < 19)
+    {
+      mantissa = mantissa * 10 + chr;
+      digits += (mantissa != 0);
+    }
+    else
+    {
+      truncated |= chr;
+      exp10 ++;
+    }
+  }
+
+  if (*offset == '.')
+  {
+    for (offset ++; (chr = (unsigned char) *offset - '0') >= 0 && chr <= 9; offset ++)
+    {
+      if (digits < 19)
+      {
+        mantissa = mantissa * 10 + chr;
+        digits += (mantissa != 0);
+        exp10 --;
+      }
+      else
+      {
+        truncated |= chr;
+      }
+    }
+  }
+
+  if (*offset == 'e' || *offset == 'E')
+  {
+    offset ++;
+
+    if (*offset == '-')
+    {
+      expNeg = 1;
+      offset ++;
+    }
+    else
+    if (*offset == '+')
+    {
+      offset ++;
+    }
+
+    for (; (chr = (unsigned char) *offset - '0') >= 0 && chr <= 9; offset ++)
+    {
+      // Way out of range either way, stop before the int overflows
+      if (expValue < 100000)
+      {
+        expValue = expValue * 10 + chr;
+      }
+    }
+
+    exp10 += expNeg ? -expValue : expValue;
+  }
+
+  if (mantissa == 0)
+  {
+    value = neg ? -0.0 : 0.0;
+    goto DONE;
+  }
+
+  if (!truncated)
+  {
+    /*
+    Both the mantissa and the power of ten are exact doubles, so is the correctly rounded result.
+    Not with extended precision arithmetic though, which rounds twice */
+#if !defined(FLT_EVAL_METHOD) || FLT_EVAL_METHOD == 0
+    if (mantissa <= (1ULL << 53) && exp10 >= -22 && exp10 <= 22)
+    {
+      value = (double) mantissa;
+      value = exp10 < 0 ? value / g_exactPow10[-exp10] : value * g_exactPow10[exp10];
+      value = neg ? -value : value;
+      goto DONE;
+    }
+#endif
 
-  value = strtod(ds->start, &end);
+    if (eiselLemire(mantissa, exp10, neg, &value))
+    {
+      goto DONE;
+    }
+  }
+  else
+  {
+    // The dropped digits put the exact value between the mantissa and the next one up
+    if (eiselLemire(mantissa, exp10, neg, &value) && eiselLemire(mantissa + 1, exp10, neg, &upper) && value == upper)
+    {
+      goto DONE;
+    }
+  }
 
-  if (errno == ERANGE)
+  switch (strtodLocale(ds->dec, ds->start, offset, &value))
   {
-    return SetError(ds, -1, "Range error when decoding numeric as double");
+    case -1:
+      return SetError(ds, -1, "Could not reserve memory block");
+
+    case 0:
+      return SetError(ds, -1, "Range error when decoding numeric as double");
   }
 
-  ds->start = end;
+DONE:
+  ds->lastType = JT_DOUBLE;
+  ds->start = offset;
   return ds->dec->newDouble(ds->prv, value);
 }
 
+FASTCALL_ATTR JSOBJ FASTCALL_MSVC decodePreciseFloat(struct DecoderState *ds)
+{
+  int neg = (*ds->start == '-');
+  return decodeExactFloat(ds, ds->start + neg, 0, 0, neg);
+}
+
+/*
+Hands the number from ds->start to newDecimal, offset is at its decimal point or exponent */
+static JSOBJ decodeDecimal(struct DecoderState *ds, char *offset)
+{
+  char *start = ds->start;
+  char *digits;
+
+  // The text goes to the Decimal constructor, which also takes "-.5" and "-e5"
+  if (offset == start + (*start == '-'))
+  {
+    return SetError(ds, -1, "Expected digits when decoding 'numeric'");
+  }
+
+  if (*offset == '.')
+  {
+    for (digits = ++offset; *offset >= '0' && *offset <= '9'; offset ++);
+
+    if (offset == digits)
+    {
+      return SetError(ds, -1, "Expected digits after the decimal point when decoding 'numeric'");
+    }
+  }
+
+  if (*offset == 'e' || *offset == 'E')
+  {
+    offset ++;
+
+    if (*offset == '-' || *offset == '+')
+    {
+      offset ++;
+    }
+
+    for (digits = offset; *offset >= '0' && *offset <= '9'; offset ++);
+
+    if (offset == digits)
+    {
+      return SetError(ds, -1, "Expected digits in the exponent when decoding 'numeric'");
+    }
+  }
+
+  ds->lastType = JT_DOUBLE;
+  ds->start = offset;
+  return ds->dec->newDecimal(ds->prv, start, offset);
+}
+
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_numeric (struct DecoderState *ds)
 {
   int intNeg = 1;
@@ -163,11 +1226,21 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_numeric (struct DecoderState *ds)
           }
         }
 #else
-        intValue = intValue * 10ULL + (JSLONG) (chr - 48);
-        if (intValue > overflowLimit)
+        // Check before multiplying, the unsigned value would wrap around silently
+        if (intValue > (overflowLimit - (chr - 48)) / 10)
         {
+          // Fine for a float or decimal as long as it has a fraction or exponent
+          for (offset ++; *offset >= '0' && *offset <= '9'; offset ++);
+
+          if (*offset == '.' || *offset == 'e' || *offset == 'E')
+          {
+            return ds->dec->newDecimal ? decodeDecimal(ds, offset) : decodePreciseFloat(ds);
+          }
+
           return SetError(ds, -1, overflowLimit == LLONG_MAX ? "Value is too big" : "Value is too small");
         }
+
+        intValue = intValue * 10ULL + (JSLONG) (chr - 48);
 #endif
         offset ++;
         mantSize ++;
@@ -217,6 +1290,11 @@ BREAK_INT_LOOP:
   }
 
 DECODE_FRACTION:
+  if (ds->dec->newDecimal)
+  {
+    return decodeDecimal(ds, offset - 1);
+  }
+
 #if HAS_JSON_HANDLE_BIGINTS
   // If we detected an overflow, we are forced to switch to slower parsing.
   if (ds->dec->preciseFloat || intOverflow)
@@ -224,7 +1302,14 @@ DECODE_FRACTION:
   if (ds->dec->preciseFloat)
 #endif
   {
-    return decodePreciseFloat(ds);
+#if HAS_JSON_HANDLE_BIGINTS
+    if (intOverflow)
+    {
+      return decodePreciseFloat(ds);
+    }
+#endif
+    // The integer part is at most 19 digits here, pick up at the decimal point
+    return decodeExactFloat(ds, offset - 1, intValue, intValue ? mantSize : 0, intNeg < 0);
   }
 
   // Scan fraction part
@@ -275,6 +1360,11 @@ BREAK_FRC_LOOP:
   return ds->dec->newDouble (ds->prv, createDouble( (double) intNeg, (double) intValue, frcValue, decimalCount));
 
 DECODE_EXPONENT:
+  if (ds->dec->newDecimal)
+  {
+    return decodeDecimal(ds, offset - 1);
+  }
+
 #if HAS_JSON_HANDLE_BIGINTS
   // If we detected an overflow, we are forced to switch to slower parsing.
   if (ds->dec->preciseFloat || intOverflow)
@@ -282,7 +1372,14 @@ DECODE_EXPONENT:
   if (ds->dec->preciseFloat)
 #endif
   {
-    return decodePreciseFloat(ds);
+#if HAS_JSON_HANDLE_BIGINTS
+    if (intOverflow)
+    {
+      return decodePreciseFloat(ds);
+    }
+#endif
+    // Only the integer loop gets here in precise mode, pick up at the exponent
+    return decodeExactFloat(ds, offset - 1, intValue, intValue ? mantSize : 0, intNeg < 0);
   }
 
   expNeg = 1.0;
@@ -449,6 +1546,43 @@ static const JSUINT8 g_decoderLookup[256] =
   /* 0xf0 */ 4, 4, 4, 4, 4, 4, 4, 4, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR, DS_UTFLENERROR,
 };
 
+/*
+Word-at-a-time helpers for scanning 8 input bytes per step. SWAR_HASZERO is non-zero if any
+byte of the word is zero */
+#define SWAR_ONES 0x0101010101010101ULL
+#define SWAR_HIGHS 0x8080808080808080ULL
+#define SWAR_HASZERO(_v) (((_v) - SWAR_ONES) & ~(_v) & SWAR_HIGHS)
+
+/*
+Returns pointer to the first byte in [offset, end) which is a quote, a backslash, a NUL or has
+the high bit set, or end if there is no such byte */
+static FASTCALL_ATTR JSUINT8 * FASTCALL_MSVC scanPlainASCII(JSUINT8 *offset, JSUINT8 *end)
+{
+  JSUINT64 word;
+
+  while (end - offset >= 8)
+  {
+    memcpy(&word, offset, sizeof(JSUINT64));
+
+    if ((word & SWAR_HIGHS) ||
+        SWAR_HASZERO(word) ||
+        SWAR_HASZERO(word ^ (SWAR_ONES * '\"')) ||
+        SWAR_HASZERO(word ^ (SWAR_ONES * '\\')))
+    {
+      break;
+    }
+
+    offset += 8;
+  }
+
+  while (offset < end && *offset < 0x80 && g_decoderLookup[*offset] == 1)
+  {
+    offset ++;
+  }
+
+  return offset;
+}
+
 FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
 {
   JSUTF16 sur[2] = { 0 };
@@ -457,16 +1591,58 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
   wchar_t *escOffset;
   wchar_t *escStart;
   size_t escLen = (ds->escEnd - ds->escStart);
+  size_t newSize;
   JSUINT8 *inputOffset;
+  JSUINT8 *inputEnd = (JSUINT8 *) ds->end;
+  JSUINT8 *scan;
   JSUINT8 oct;
   JSUTF32 ucs;
   ds->lastType = JT_INVALID;
   ds->start ++;
 
-  if ( (size_t) (ds->end - ds->start) > escLen)
+  inputOffset = scanPlainASCII((JSUINT8 *) ds->start, inputEnd);
+
+  if (inputOffset < inputEnd && *inputOffset == '\"')
+  {
+    // Plain ASCII string without escapes, no need to go through the escape buffer
+    char *start = ds->start;
+    ds->lastType = JT_UTF8;
+    ds->start = (char *) inputOffset + 1;
+
+    if (ds->objectKey && ds->dec->newASCIIKey)
+    {
+      return ds->dec->newASCIIKey(ds->prv, start, (char *) inputOffset);
+    }
+
+    return ds->dec->newASCIIString(ds->prv, start, (char *) inputOffset);
+  }
+
+  /*
+  Each input byte produces at most one wchar_t. If the rest of the input doesn't fit in the escape
+  buffer find the closing quote so the buffer is grown to the length of this string rather than
+  the rest of the input */
+  newSize = (size_t) (inputEnd - (JSUINT8 *) ds->start);
+
+  if (newSize > escLen)
   {
-    size_t newSize = (ds->end - ds->start);
+    for (scan = inputOffset; scan < inputEnd; scan ++)
+    {
+      if (*scan == '\"' || *scan == '\0')
+      {
+        break;
+      }
+
+      if (*scan == '\\' && scan + 1 < inputEnd)
+      {
+        scan ++;
+      }
+    }
+
+    newSize = (size_t) (scan - (JSUINT8 *) ds->start);
+  }
 
+  if (newSize > escLen)
+  {
     if (ds->escHeap)
     {
       if (newSize > (UINT_MAX / sizeof(wchar_t)))
@@ -501,7 +1677,12 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
   }
 
   escOffset = ds->escStart;
-  inputOffset = (JSUINT8 *) ds->start;
+
+  // Widen the plain ASCII prefix found above
+  for (scan = (JSUINT8 *) ds->start; scan < inputOffset; scan ++)
+  {
+    *(escOffset++) = (wchar_t) *scan;
+  }
 
   for (;;)
   {
@@ -678,6 +1859,7 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
         }
 
         if (ucs < 0x10000) return SetError (ds, -1, "Overlong 4 byte UTF-8 sequence detected when decoding 'string'");
+        if (ucs > 0x10ffff) return SetError (ds, -1, "Invalid UTF-8 code point when decoding 'string'");
 
 #if WCHAR_MAX == 0xffff
         if (ucs >= 0x10000)
@@ -699,27 +1881,434 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_string ( struct DecoderState *ds)
   }
 }
 
-FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_array(struct DecoderState *ds)
-{
-  JSOBJ itemValue;
-  JSOBJ newObj;
-  int len;
-  ds->objDepth++;
-  if (ds->objDepth > JSON_MAX_OBJECT_DEPTH) {
-    return SetError(ds, -1, "Reached object decoding depth limit");
-  }
+/*
+Skipping values a filter doesn't want. Each accepts exactly what the decoders accept, but nothing
+is built: strings are checked without the escape buffer and numbers go through decode_numeric with
+callbacks which make no objects. Each returns 0 with the error set */
+static int skip_any(struct DecoderState *ds);
 
-  newObj = ds->dec->newArray(ds->prv);
-  len = 0;
+// Compact input has no white space between tokens, which saves the call
+#define SKIP_WHITESPACE(_ds) do { if (*(_ds)->start == ' ' || *(_ds)->start == '\t' || *(_ds)->start == '\r' || *(_ds)->start == '\n') SkipWhitespace(_ds); } while (0)
 
-  ds->lastType = JT_INVALID;
-  ds->start ++;
+/*
+The same checks as decode_string, errors are reported at the opening quote like it does */
+static int skip_string(struct DecoderState *ds)
+{
+  JSUINT8 *offset = (JSUINT8 *) ds->start + 1;
+  JSUINT8 *end = (JSUINT8 *) ds->end;
+  JSUTF32 ucs;
+  JSUTF16 sur;
+  int highSurrogate = 0;
+  int index;
 
   for (;;)
   {
-    SkipWhitespace(ds);
+    offset = scanPlainASCII(offset, end);
 
-    if ((*ds->start) == ']')
+    switch (g_decoderLookup[*offset])
+    {
+      case DS_ISNULL:
+        SetError(ds, 0, "Unmatched ''\"' when when decoding 'string'");
+        return 0;
+
+      case DS_ISQUOTE:
+        ds->start = (char *) offset + 1;
+        return 1;
+
+      case DS_UTFLENERROR:
+        SetError(ds, 0, "Invalid UTF-8 sequence length when decoding 'string'");
+        return 0;
+
+      case DS_ISESCAPE:
+        offset ++;
+
+        switch (*offset)
+        {
+          case '\\':
+          case '\"':
+          case '/':
+          case 'b':
+          case 'f':
+          case 'n':
+          case 'r':
+          case 't':
+            offset ++;
+            continue;
+
+          case 'u':
+            for (offset ++, sur = 0, index = 0; index < 4; index ++, offset ++)
+            {
+              if (*offset >= '0' && *offset <= '9')
+              {
+                sur = (sur << 4) + (JSUTF16) (*offset - '0');
+              }
+              else
+              if ((*offset | 0x20) >= 'a' && (*offset | 0x20) <= 'f')
+              {
+                sur = (sur << 4) + 10 + (JSUTF16) ((*offset | 0x20) - 'a');
+              }
+              else
+              {
+                SetError(ds, 0, *offset == '\0' ? "Unterminated unicode escape sequence when decoding 'string'" : "Unexpected character in unicode escape sequence when decoding 'string'");
+                return 0;
+              }
+            }
+
+            if (!highSurrogate)
+            {
+              highSurrogate = (sur & 0xfc00) == 0xd800;
+            }
+            else
+            if ((sur & 0xfc00) != 0xdc00)
+            {
+              SetError(ds, 0, "Unpaired high surrogate when decoding 'string'");
+              return 0;
+            }
+            else
+            {
+              highSurrogate = 0;
+            }
+            continue;
+
+          case '\0':
+            SetError(ds, 0, "Unterminated escape sequence when decoding 'string'");
+            return 0;
+
+          default:
+            SetError(ds, 0, "Unrecognized escape sequence when decoding 'string'");
+            return 0;
+        }
+
+      case 1:
+        offset ++;
+        continue;
+
+      case 2:
+        if ((offset[1] & 0x80) != 0x80)
+        {
+          SetError(ds, 0, "Invalid octet in UTF-8 sequence when decoding 'string'");
+          return 0;
+        }
+
+        // 0xc0 and 0xc1 only start sequences for code points below 0x80
+        if (*offset < 0xc2)
+        {
+          SetError(ds, 0, "Overlong 2 byte UTF-8 sequence detected when decoding 'string'");
+          return 0;
+        }
+
+        offset += 2;
+        continue;
+
+      case 3:
+        if ((offset[1] & 0x80) != 0x80 || (offset[2] & 0x80) != 0x80)
+        {
+          SetError(ds, 0, "Invalid octet in UTF-8 sequence when decoding 'string'");
+          return 0;
+        }
+
+        if (((*offset & 0x0f) << 12 | (offset[1] & 0x3f) << 6) < 0x800)
+        {
+          SetError(ds, 0, "Overlong 3 byte UTF-8 sequence detected when encoding string");
+          return 0;
+        }
+
+        offset += 3;
+        continue;
+
+      case 4:
+        for (index = 1; index < 4; index ++)
+        {
+          if ((offset[index] & 0x80) != 0x80)
+          {
+            SetError(ds, 0, "Invalid octet in UTF-8 sequence when decoding 'string'");
+            return 0;
+          }
+        }
+
+        ucs = (*offset & 0x07) << 18 | (offset[1] & 0x3f) << 12;
+
+        if (ucs < 0x10000 || ucs > 0x10ffff)
+        {
+          SetError(ds, 0, ucs < 0x10000 ? "Overlong 4 byte UTF-8 sequence detected when decoding 'string'" : "Invalid UTF-8 code point when decoding 'string'");
+          return 0;
+        }
+
+        offset += 4;
+        continue;
+    }
+  }
+}
+
+static char g_skippedNumber;
+
+static JSOBJ Skip_newInteger(void *prv, JSINT32 value)
+{
+  return &g_skippedNumber;
+}
+
+static JSOBJ Skip_newLong(void *prv, JSINT64 value)
+{
+  return &g_skippedNumber;
+}
+
+static JSOBJ Skip_newSpan(void *prv, char *start, char *end)
+{
+  return &g_skippedNumber;
+}
+
+static JSOBJ Skip_newDouble(void *prv, double value)
+{
+  return &g_skippedNumber;
+}
+
+static int skip_numeric(struct DecoderState *ds)
+{
+  JSONObjectDecoder *dec = ds->dec;
+  JSONObjectDecoder skipDec;
+  char *offset = ds->start + (*ds->start == '-');
+  char *digits = offset;
+  JSOBJ ret;
+
+  /*
+  Numbers with up to 18 integer digits and exponents of up to 2 digits can't overflow. Written out
+  in full, with digits in each part, every decoder takes them, which covers most numbers */
+  while (*offset >= '0' && *offset <= '9')
+  {
+    offset ++;
+  }
+
+  if (offset - digits > 18)
+  {
+    goto DECODE;
+  }
+
+  if (*offset == '.')
+  {
+    if (offset == digits || offset[1] < '0' || offset[1] > '9')
+    {
+      goto DECODE;
+    }
+
+    for (offset ++; *offset >= '0' && *offset <= '9'; offset ++);
+  }
+
+  if (*offset == 'e' || *offset == 'E')
+  {
+    if (offset == digits)
+    {
+      goto DECODE;
+    }
+
+    offset += (offset[1] == '+' || offset[1] == '-') ? 2 : 1;
+
+    for (digits = offset; *offset >= '0' && *offset <= '9'; offset ++);
+
+    if (offset == digits || offset - digits > 2)
+    {
+      goto DECODE;
+    }
+  }
+
+  ds->start = offset;
+  return 1;
+
+DECODE:
+
+  // Anything else is range checked the way the options of the decoder do it
+  skipDec = *dec;
+  skipDec.newInt = Skip_newInteger;
+  skipDec.newLong = Skip_newLong;
+  skipDec.newBigInt = Skip_newSpan;
+  skipDec.newDouble = Skip_newDouble;
+  skipDec.newDecimal = dec->newDecimal ? Skip_newSpan : NULL;
+  skipDec.errorStr = NULL;
+
+  ds->dec = &skipDec;
+  ret = decode_numeric(ds);
+  ds->dec = dec;
+
+  if (ret == NULL)
+  {
+    dec->errorStr = skipDec.errorStr;
+    dec->errorOffset = skipDec.errorOffset;
+    return 0;
+  }
+
+  return 1;
+}
+
+static int skip_literal(struct DecoderState *ds, const char *literal, size_t length, const char *message)
+{
+  if (strncmp(ds->start, literal, length) != 0)
+  {
+    SetError(ds, 0, message);
+    return 0;
+  }
+
+  ds->start += length;
+  return 1;
+}
+
+/*
+Skips an array or an object, whose items are values or keys and values */
+static int skip_container(struct DecoderState *ds, char close)
+{
+  if (++ ds->objDepth > JSON_MAX_OBJECT_DEPTH)
+  {
+    SetError(ds, -1, "Reached object decoding depth limit");
+    return 0;
+  }
+
+  ds->start ++;
+  SKIP_WHITESPACE(ds);
+
+  if (*ds->start == close)
+  {
+    ds->start ++;
+    ds->objDepth --;
+    return 1;
+  }
+
+  for (;;)
+  {
+    SKIP_WHITESPACE(ds);
+
+    if (close == '}')
+    {
+      // decode_object takes a comma before the closing brace
+      if (*ds->start == '}')
+      {
+        ds->start ++;
+        ds->objDepth --;
+        return 1;
+      }
+
+      if (*ds->start != '\"')
+      {
+        SetError(ds, 0, "Key name of object must be 'string' when decoding 'object'");
+        return 0;
+      }
+
+      if (!skip_string(ds))
+      {
+        return 0;
+      }
+
+      SKIP_WHITESPACE(ds);
+
+      if (*(ds->start++) != ':')
+      {
+        SetError(ds, -1, "No ':' found when decoding object value");
+        return 0;
+      }
+    }
+
+    if (!skip_any(ds))
+    {
+      return 0;
+    }
+
+    SKIP_WHITESPACE(ds);
+
+    if (*ds->start == close)
+    {
+      ds->start ++;
+      ds->objDepth --;
+      return 1;
+    }
+
+    if (*(ds->start++) != ',')
+    {
+      SetError(ds, -1, close == '}' ? "Unexpected character in found when decoding object value" : "Unexpected character found when decoding array value (2)");
+      return 0;
+    }
+  }
+}
+
+static int skip_any(struct DecoderState *ds)
+{
+  SKIP_WHITESPACE(ds);
+
+  switch (*ds->start)
+  {
+    case '\"':
+      return skip_string(ds);
+
+    case '0':
+    case '1':
+    case '2':
+    case '3':
+    case '4':
+    case '5':
+    case '6':
+    case '7':
+    case '8':
+    case '9':
+    case '-':
+      return skip_numeric(ds);
+
+    case '[': return skip_container(ds, ']');
+    case '{': return skip_container(ds, '}');
+    case 't': return skip_literal(ds, "true", 4, "Unexpected character found when decoding 'true'");
+    case 'f': return skip_literal(ds, "false", 5, "Unexpected character found when decoding 'false'");
+    case 'n': return skip_literal(ds, "null", 4, "Unexpected character found when decoding 'null'");
+  }
+
+  SetError(ds, 0, "Expected object or value");
+  return 0;
+}
+
+/*
+Decodes the next value as the filter asked, see JSFILTERRESULT. Returns NULL if decoding failed or
+the value was skipped, telling the two apart by *skipped */
+static JSOBJ decode_filtered(struct DecoderState *ds, int filter, int *skipped)
+{
+  JSOBJ ret;
+
+  *skipped = 0;
+
+  switch (filter)
+  {
+    case JSF_SKIP:
+      *skipped = skip_any(ds);
+      return NULL;
+
+    case JSF_KEEP:
+      ds->unfiltered = 1;
+      ret = decode_any(ds);
+      ds->unfiltered = 0;
+      return ret;
+
+    case JSF_DESCEND:
+      return decode_any(ds);
+  }
+
+  return NULL;
+}
+
+FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_array(struct DecoderState *ds)
+{
+  JSOBJ itemValue;
+  JSOBJ newObj;
+  int len;
+  int skipped = 0;
+  ds->objDepth++;
+  if (ds->objDepth > JSON_MAX_OBJECT_DEPTH) {
+    return SetError(ds, -1, "Reached object decoding depth limit");
+  }
+
+  newObj = ds->dec->newArray(ds->prv);
+  len = 0;
+
+  ds->lastType = JT_INVALID;
+  ds->start ++;
+
+  for (;;)
+  {
+    SkipWhitespace(ds);
+
+    if ((*ds->start) == ']')
     {
       ds->objDepth--;
       if (len == 0)
@@ -732,15 +2321,25 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_array(struct DecoderState *ds)
       return SetError(ds, -1, "Unexpected character found when decoding array value (1)");
     }
 
-    itemValue = decode_any(ds);
+    if (ds->dec->filterItem && !ds->unfiltered)
+    {
+      itemValue = decode_filtered(ds, ds->dec->filterItem(ds->prv, ds->objDepth, (size_t) len), &skipped);
+    }
+    else
+    {
+      itemValue = decode_any(ds);
+    }
 
-    if (itemValue == NULL)
+    if (itemValue == NULL && !skipped)
     {
       ds->dec->releaseObject(ds->prv, newObj);
       return NULL;
     }
 
-    ds->dec->arrayAddItem (ds->prv, newObj, itemValue);
+    if (itemValue)
+    {
+      ds->dec->arrayAddItem (ds->prv, newObj, itemValue);
+    }
 
     SkipWhitespace(ds);
 
@@ -768,6 +2367,7 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_object( struct DecoderState *ds)
   JSOBJ itemName;
   JSOBJ itemValue;
   JSOBJ newObj;
+  int skipped = 0;
 
   ds->objDepth++;
   if (ds->objDepth > JSON_MAX_OBJECT_DEPTH) {
@@ -789,20 +2389,22 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_object( struct DecoderState *ds)
       return newObj;
     }
 
-    ds->lastType = JT_INVALID;
-    itemName = decode_any(ds);
-
-    if (itemName == NULL)
+    // Checked before decoding, a container in its place would otherwise be decoded as a key
+    if (*ds->start != '\"')
     {
       ds->dec->releaseObject(ds->prv, newObj);
-      return NULL;
+      return SetError(ds, 0, "Key name of object must be 'string' when decoding 'object'");
     }
 
-    if (ds->lastType != JT_UTF8)
+    ds->lastType = JT_INVALID;
+    ds->objectKey = 1;
+    itemName = decode_string(ds);
+    ds->objectKey = 0;
+
+    if (itemName == NULL)
     {
       ds->dec->releaseObject(ds->prv, newObj);
-      ds->dec->releaseObject(ds->prv, itemName);
-      return SetError(ds, -1, "Key name of object must be 'string' when decoding 'object'");
+      return NULL;
     }
 
     SkipWhitespace(ds);
@@ -816,16 +2418,29 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_object( struct DecoderState *ds)
 
     SkipWhitespace(ds);
 
-    itemValue = decode_any(ds);
+    if (ds->dec->filterKey && !ds->unfiltered)
+    {
+      itemValue = decode_filtered(ds, ds->dec->filterKey(ds->prv, ds->objDepth, itemName), &skipped);
+    }
+    else
+    {
+      itemValue = decode_any(ds);
+    }
 
     if (itemValue == NULL)
     {
-      ds->dec->releaseObject(ds->prv, newObj);
       ds->dec->releaseObject(ds->prv, itemName);
-      return NULL;
-    }
 
-    ds->dec->objectAddKey (ds->prv, newObj, itemName, itemValue);
+      if (!skipped)
+      {
+        ds->dec->releaseObject(ds->prv, newObj);
+        return NULL;
+      }
+    }
+    else
+    {
+      ds->dec->objectAddKey (ds->prv, newObj, itemName, itemValue);
+    }
 
     SkipWhitespace(ds);
 
@@ -890,7 +2505,8 @@ FASTCALL_ATTR JSOBJ FASTCALL_MSVC decode_any(struct DecoderState *ds)
 JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer)
 {
   /*
-  FIXME: Base the size of escBuffer of that of cbBuffer so that the unicode escaping doesn't run into the wall each time */
+  The escape buffer is only used for strings which aren't plain ASCII and is grown to the length
+  of such a string when the stack buffer isn't enough */
   struct DecoderState ds;
   wchar_t escBuffer[(JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t))];
   JSOBJ ret;
@@ -906,6 +2522,8 @@ JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuf
   ds.dec->errorStr = NULL;
   ds.dec->errorOffset = NULL;
   ds.objDepth = 0;
+  ds.objectKey = 0;
+  ds.unfiltered = 0;
 
   ds.dec = dec;
 
@@ -931,4 +2549,644 @@ JSOBJ JSON_DecodeObject(JSONObjectDecoder *dec, const char *buffer, size_t cbBuf
   }
 
   return ret;
-}
\ No newline at end of file
+}
+JSOBJ JSON_DecodeLines(JSONObjectDecoder *dec, const char *buffer, size_t cbBuffer)
+{
+  /*
+  One decoder state and escape buffer is shared by all the lines */
+  struct DecoderState ds;
+  wchar_t escBuffer[(JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t))];
+  JSOBJ lines;
+  JSOBJ item;
+  char *lineStart;
+  char *lineEnd;
+  int failed = 0;
+
+  ds.start = (char *) buffer;
+  ds.end = ds.start + cbBuffer;
+
+  ds.escStart = escBuffer;
+  ds.escEnd = ds.escStart + (JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t));
+  ds.escHeap = 0;
+  ds.prv = dec->prv;
+  ds.dec = dec;
+  ds.dec->errorStr = NULL;
+  ds.dec->errorOffset = NULL;
+  ds.objectKey = 0;
+  ds.unfiltered = 0;
+
+  lines = dec->newArray(ds.prv);
+
+  if (!lines)
+  {
+    return NULL;
+  }
+
+  for (;;)
+  {
+    while (ds.start < ds.end && (*ds.start == ' ' || *ds.start == '\t' || *ds.start == '\r' || *ds.start == '\n'))
+    {
+      ds.start ++;
+    }
+
+    if (ds.start == ds.end)
+    {
+      break;
+    }
+
+    lineEnd = (char *) memchr(ds.start, '\n', ds.end - ds.start);
+    if (!lineEnd)
+    {
+      lineEnd = ds.end;
+    }
+
+    lineStart = ds.start;
+    ds.objDepth = 0;
+    ds.lastType = JT_INVALID;
+
+    item = decode_any (&ds);
+
+    if (item == NULL)
+    {
+      if (dec->errorStr && dec->errorOffset < lineStart)
+      {
+        dec->errorOffset = lineStart;
+      }
+
+      if (dec->errorStr && dec->errorOffset > lineEnd)
+      {
+        // The decoder ran on into the next line looking for the rest of the document
+        ds.start = lineEnd;
+        SetError(&ds, 0, "Unexpected end of line");
+      }
+
+      failed = 1;
+      break;
+    }
+
+    while (ds.start < ds.end && (*ds.start == ' ' || *ds.start == '\t' || *ds.start == '\r'))
+    {
+      ds.start ++;
+    }
+
+    if (ds.start > lineEnd)
+    {
+      dec->releaseObject(ds.prv, item);
+      ds.start = lineEnd;
+      SetError(&ds, 0, "Unexpected end of line");
+      failed = 1;
+      break;
+    }
+
+    if (ds.start != lineEnd)
+    {
+      dec->releaseObject(ds.prv, item);
+      SetError(&ds, 0, "Trailing data");
+      failed = 1;
+      break;
+    }
+
+    dec->arrayAddItem(ds.prv, lines, item);
+  }
+
+  if (ds.escHeap)
+  {
+    dec->free(ds.escStart);
+  }
+
+  if (failed)
+  {
+    dec->releaseObject(ds.prv, lines);
+    return NULL;
+  }
+
+  return lines;
+}
+
+/*
+States of the incremental decoder, named after what is expected next in the input */
+enum STREAMDECODERSTATE
+{
+  SDS_VALUE = 0,
+  SDS_VALUE_OR_CLOSE,
+  SDS_KEY,
+  SDS_COLON,
+  SDS_COMMA_OR_CLOSE,
+  SDS_DONE,
+};
+
+enum STREAMTOKENTYPE
+{
+  STT_NONE = 0,
+  STT_STRING,
+  STT_BARE,
+};
+
+void JSON_InitStreamDecoder(JSONStreamDecoder *sd, JSONObjectDecoder *dec)
+{
+  memset(sd, 0, sizeof(JSONStreamDecoder));
+  sd->dec = dec;
+}
+
+void JSON_ReleaseStreamDecoder(JSONStreamDecoder *sd)
+{
+  JSONObjectDecoder *dec = sd->dec;
+  JSONStreamFrame *frame;
+
+  while (sd->depth > 0)
+  {
+    frame = &sd->frames[--sd->depth];
+
+    if (frame->key)
+    {
+      dec->releaseObject(dec->prv, frame->key);
+    }
+
+    dec->releaseObject(dec->prv, frame->obj);
+  }
+
+  if (sd->result)
+  {
+    dec->releaseObject(dec->prv, sd->result);
+  }
+
+  if (sd->frames)
+  {
+    dec->free(sd->frames);
+  }
+
+  if (sd->pending)
+  {
+    dec->free(sd->pending);
+  }
+
+  JSON_InitStreamDecoder(sd, dec);
+}
+
+static int Stream_setError(JSONStreamDecoder *sd, char *offset, const char *message)
+{
+  sd->dec->errorOffset = offset;
+  sd->dec->errorStr = (char *) message;
+  return -1;
+}
+
+static int Stream_isBareChar(int chr)
+{
+  return (chr >= '0' && chr <= '9') || (chr >= 'a' && chr <= 'z') || (chr >= 'A' && chr <= 'Z') ||
+         chr == '+' || chr == '-' || chr == '.';
+}
+
+/*
+Returns pointer just past the end of the current token or NULL if the token continues beyond
+end. For strings offset must point past the opening quote and the escape state is kept in sd
+so scanning can resume with the next chunk */
+static char *Stream_scanToken(JSONStreamDecoder *sd, char *offset, char *end)
+{
+  if (sd->tokenType == STT_STRING)
+  {
+    while (offset < end)
+    {
+      if (sd->escape)
+      {
+        sd->escape = 0;
+        offset ++;
+        continue;
+      }
+
+      offset = (char *) scanPlainASCII((JSUINT8 *) offset, (JSUINT8 *) end);
+
+      if (offset == end)
+      {
+        break;
+      }
+
+      switch (*offset)
+      {
+        case '\"':
+          return offset + 1;
+
+        case '\\':
+          sd->escape = 1;
+          break;
+      }
+
+      offset ++;
+    }
+
+    return NULL;
+  }
+
+  while (offset < end)
+  {
+    if (!Stream_isBareChar((unsigned char) *offset))
+    {
+      return offset;
+    }
+
+    offset ++;
+  }
+
+  return NULL;
+}
+
+static int Stream_appendPending(JSONStreamDecoder *sd, const char *start, size_t cbData)
+{
+  size_t newSize;
+  char *newPending;
+
+  if (sd->cbPending + cbData + 1 > sd->cbPendingAlloc)
+  {
+    newSize = sd->cbPendingAlloc ? sd->cbPendingAlloc : 64;
+
+    while (newSize < sd->cbPending + cbData + 1)
+    {
+      newSize *= 2;
+    }
+
+    newPending = (char *) sd->dec->realloc(sd->pending, newSize);
+
+    if (!newPending)
+    {
+      return 0;
+    }
+
+    sd->pending = newPending;
+    sd->cbPendingAlloc = newSize;
+  }
+
+  memcpy(sd->pending + sd->cbPending, start, cbData);
+  sd->cbPending += cbData;
+
+  // Keep the token NUL terminated like the input buffers the decoders are used to
+  sd->pending[sd->cbPending] = '\0';
+  return 1;
+}
+
+static void Stream_addValue(JSONStreamDecoder *sd, JSOBJ value)
+{
+  JSONObjectDecoder *dec = sd->dec;
+  JSONStreamFrame *frame;
+
+  if (sd->depth == 0)
+  {
+    sd->result = value;
+    sd->state = SDS_DONE;
+    return;
+  }
+
+  frame = &sd->frames[sd->depth - 1];
+
+  if (frame->isObject)
+  {
+    dec->objectAddKey(dec->prv, frame->obj, frame->key, value);
+    frame->key = NULL;
+  }
+  else
+  {
+    dec->arrayAddItem(dec->prv, frame->obj, value);
+  }
+
+  sd->state = SDS_COMMA_OR_CLOSE;
+}
+
+static int Stream_pushFrame(JSONStreamDecoder *sd, char *offset, int isObject)
+{
+  JSONObjectDecoder *dec = sd->dec;
+  JSONStreamFrame *newFrames;
+  JSONStreamFrame *frame;
+  JSOBJ obj;
+  int newSize;
+
+  if (sd->depth >= JSON_MAX_OBJECT_DEPTH)
+  {
+    return Stream_setError(sd, offset, "Reached object decoding depth limit");
+  }
+
+  if (sd->depth == sd->cbFrames)
+  {
+    newSize = sd->cbFrames ? sd->cbFrames * 2 : 16;
+    newFrames = (JSONStreamFrame *) dec->realloc(sd->frames, newSize * sizeof(JSONStreamFrame));
+
+    if (!newFrames)
+    {
+      return Stream_setError(sd, offset, "Could not reserve memory block");
+    }
+
+    sd->frames = newFrames;
+    sd->cbFrames = newSize;
+  }
+
+  obj = isObject ? dec->newObject(dec->prv) : dec->newArray(dec->prv);
+
+  if (!obj)
+  {
+    return -1;
+  }
+
+  frame = &sd->frames[sd->depth++];
+  frame->obj = obj;
+  frame->key = NULL;
+  frame->isObject = isObject;
+
+  sd->state = isObject ? SDS_KEY : SDS_VALUE_OR_CLOSE;
+  return 0;
+}
+
+static void Stream_popFrame(JSONStreamDecoder *sd)
+{
+  sd->depth --;
+  Stream_addValue(sd, sd->frames[sd->depth].obj);
+}
+
+/*
+Decodes a complete string, number or literal token with the regular decoders */
+static int Stream_completeToken(JSONStreamDecoder *sd, struct DecoderState *ds, char *start, char *end)
+{
+  JSOBJ obj;
+
+  ds->start = start;
+  ds->end = end;
+  ds->lastType = JT_INVALID;
+  ds->objectKey = (sd->state == SDS_KEY);
+
+  obj = decode_any(ds);
+  ds->objectKey = 0;
+
+  if (!obj)
+  {
+    return -1;
+  }
+
+  if (ds->start != end)
+  {
+    sd->dec->releaseObject(sd->dec->prv, obj);
+    return Stream_setError(sd, ds->start, "Unexpected character found when decoding value");
+  }
+
+  if (sd->state == SDS_KEY)
+  {
+    sd->frames[sd->depth - 1].key = obj;
+    sd->state = SDS_COLON;
+  }
+  else
+  {
+    Stream_addValue(sd, obj);
+  }
+
+  sd->tokenType = STT_NONE;
+  sd->cbPending = 0;
+  return 0;
+}
+
+static int Stream_decode(JSONStreamDecoder *sd, struct DecoderState *ds, char *offset, char *end, int final)
+{
+  JSONStreamFrame *frame;
+  char *tokenStart;
+  char *tokenEnd;
+  int chr;
+
+  if (sd->tokenType != STT_NONE)
+  {
+    // Resume the token which was cut off at the end of the previous chunk
+    tokenEnd = Stream_scanToken(sd, offset, end);
+
+    if (!Stream_appendPending(sd, offset, (tokenEnd ? tokenEnd : end) - offset))
+    {
+      return Stream_setError(sd, offset, "Could not reserve memory block");
+    }
+
+    if (!tokenEnd)
+    {
+      if (!final)
+      {
+        return 0;
+      }
+
+      if (sd->tokenType == STT_STRING)
+      {
+        return Stream_setError(sd, end, "Unmatched ''\"' when when decoding 'string'");
+      }
+
+      tokenEnd = end;
+    }
+
+    offset = tokenEnd;
+
+    if (Stream_completeToken(sd, ds, sd->pending, sd->pending + sd->cbPending) < 0)
+    {
+      return -1;
+    }
+  }
+
+  for (;;)
+  {
+    while (offset < end && (*offset == ' ' || *offset == '\t' || *offset == '\r' || *offset == '\n'))
+    {
+      offset ++;
+    }
+
+    if (offset == end)
+    {
+      break;
+    }
+
+    chr = (unsigned char) *offset;
+
+    switch (sd->state)
+    {
+      case SDS_DONE:
+        return Stream_setError(sd, offset, "Trailing data");
+
+      case SDS_COLON:
+        if (chr != ':')
+        {
+          return Stream_setError(sd, offset, "No ':' found when decoding object value");
+        }
+
+        offset ++;
+        sd->state = SDS_VALUE;
+        continue;
+
+      case SDS_COMMA_OR_CLOSE:
+        frame = &sd->frames[sd->depth - 1];
+
+        if (chr == ',')
+        {
+          offset ++;
+          sd->state = frame->isObject ? SDS_KEY : SDS_VALUE;
+          continue;
+        }
+
+        if (chr == (frame->isObject ? '}' : ']'))
+        {
+          offset ++;
+          Stream_popFrame(sd);
+          continue;
+        }
+
+        if (frame->isObject)
+        {
+          return Stream_setError(sd, offset, "Unexpected character in found when decoding object value");
+        }
+
+        return Stream_setError(sd, offset, "Unexpected character found when decoding array value (2)");
+
+      case SDS_KEY:
+        if (chr == '}')
+        {
+          offset ++;
+          Stream_popFrame(sd);
+          continue;
+        }
+
+        if (chr != '\"')
+        {
+          return Stream_setError(sd, offset, "Key name of object must be 'string' when decoding 'object'");
+        }
+
+        sd->tokenType = STT_STRING;
+        break;
+
+      case SDS_VALUE_OR_CLOSE:
+        if (chr == ']')
+        {
+          offset ++;
+          Stream_popFrame(sd);
+          continue;
+        }
+
+      case SDS_VALUE:
+        switch (chr)
+        {
+          case '[':
+          case '{':
+            if (Stream_pushFrame(sd, offset, chr == '{') < 0)
+            {
+              return -1;
+            }
+
+            offset ++;
+            continue;
+
+          case '\"':
+            sd->tokenType = STT_STRING;
+            break;
+
+          case '0':
+          case '1':
+          case '2':
+          case '3':
+          case '4':
+          case '5':
+          case '6':
+          case '7':
+          case '8':
+          case '9':
+          case '-':
+          case 't':
+          case 'f':
+          case 'n':
+            sd->tokenType = STT_BARE;
+            break;
+
+          case ']':
+            if (sd->depth > 0 && !sd->frames[sd->depth - 1].isObject)
+            {
+              return Stream_setError(sd, offset, "Unexpected character found when decoding array value (1)");
+            }
+
+          default:
+            return Stream_setError(sd, offset, "Expected object or value");
+        }
+        break;
+    }
+
+    tokenStart = offset;
+    sd->escape = 0;
+    tokenEnd = Stream_scanToken(sd, sd->tokenType == STT_STRING ? offset + 1 : offset, end);
+
+    if (tokenEnd)
+    {
+      if (Stream_completeToken(sd, ds, tokenStart, tokenEnd) < 0)
+      {
+        return -1;
+      }
+
+      offset = tokenEnd;
+      continue;
+    }
+
+    if (sd->tokenType == STT_STRING && final)
+    {
+      return Stream_setError(sd, end, "Unmatched ''\"' when when decoding 'string'");
+    }
+
+    // The token may continue in the next chunk, keep what we have of it
+    if (!Stream_appendPending(sd, tokenStart, end - tokenStart))
+    {
+      return Stream_setError(sd, tokenStart, "Could not reserve memory block");
+    }
+
+    if (!final)
+    {
+      return 0;
+    }
+
+    if (Stream_completeToken(sd, ds, sd->pending, sd->pending + sd->cbPending) < 0)
+    {
+      return -1;
+    }
+
+    offset = end;
+  }
+
+  if (sd->state == SDS_DONE)
+  {
+    return 1;
+  }
+
+  if (!final)
+  {
+    return 0;
+  }
+
+  if (sd->depth == 0 && sd->state == SDS_VALUE)
+  {
+    return Stream_setError(sd, end, "Expected object or value");
+  }
+
+  return Stream_setError(sd, end, "Unexpected end of input");
+}
+
+int JSON_DecodeChunk(JSONStreamDecoder *sd, const char *buffer, size_t cbBuffer, int final)
+{
+  struct DecoderState ds;
+  wchar_t escBuffer[(JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t))];
+  JSONObjectDecoder *dec = sd->dec;
+  int ret;
+
+  ds.escStart = escBuffer;
+  ds.escEnd = ds.escStart + (JSON_MAX_STACK_BUFFER_SIZE / sizeof(wchar_t));
+  ds.escHeap = 0;
+  ds.prv = dec->prv;
+  ds.dec = dec;
+  ds.objDepth = 0;
+  ds.objectKey = 0;
+  ds.unfiltered = 0;
+  dec->errorStr = NULL;
+  dec->errorOffset = NULL;
+
+  ret = Stream_decode(sd, &ds, (char *) buffer, (char *) buffer + cbBuffer, final);
+
+  if (ds.escHeap)
+  {
+    dec->free(ds.escStart);
+  }
+
+  if (ret < 0)
+  {
+    JSON_ReleaseStreamDecoder(sd);
+  }
+
+  return ret;
+}
@@ -43,6 +43,10 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 #include <math.h>
 
 #include <float.h>
+#if defined(__SSE2__) || (defined(_MSC_VER) && defined(_M_X64))
+#include <emmintrin.h>
+#define HAS_SSE2_SCAN 1
+#endif
 
 #ifndef TRUE
 #define TRUE 1
@@ -113,9 +117,27 @@ FIXME: Keep track of how big these get across several encoder calls and try to m
 That way we won't run our head into the wall each call */
 void Buffer_Realloc (JSONObjectEncoder *enc, size_t cbNeeded)
 {
-  size_t curSize = enc->end - enc->start;
-  size_t newSize = curSize * 2;
-  size_t offset = enc->offset - enc->start;
+  size_t curSize;
+  size_t newSize;
+  size_t offset;
+
+  if (enc->flush && enc->offset > enc->start)
+  {
+    if (!enc->flush(enc))
+    {
+      SetError (NULL, enc, "Could not flush buffer");
+      return;
+    }
+
+    if ((size_t) (enc->end - enc->offset) >= cbNeeded)
+    {
+      return;
+    }
+  }
+
+  curSize = enc->end - enc->start;
+  newSize = curSize * 2;
+  offset = enc->offset - enc->start;
 
   while (newSize < curSize + cbNeeded)
   {
@@ -155,6 +177,184 @@ FASTCALL_ATTR INLINE_PREFIX void FASTCALL_MSVC Buffer_AppendShortHexUnchecked (c
   *(outputOffset++) = g_hexChars[(value & 0x000f) >> 0];
 }
 
+/*
+Returns non-zero if the escape routines copy chr to the output as is. With validate set, bytes
+above 127 are left to the UTF-8 validation */
+static FASTCALL_ATTR INLINE_PREFIX int FASTCALL_MSVC Buffer_IsPlainChar(JSUINT8 chr, int validate, int encodeHTMLChars)
+{
+  if (chr >= 0x80)
+  {
+    return !validate && !(HAS_JSON_ESCAPE_UNICODE_CONTROL_CHARACTERS && chr == 0xc2);
+  }
+
+  switch (g_asciiOutputTable[chr])
+  {
+    case 1: return !(HAS_JSON_ESCAPE_UNICODE_CONTROL_CHARACTERS && !validate && chr == 0x7f);
+    case 29: return !encodeHTMLChars;
+    default: return 0;
+  }
+}
+
+/*
+Word-at-a-time helpers for scanning 8 bytes per step. SWAR_HASZERO is non-zero if any byte of the
+word is zero, SWAR_HASLESS if any byte is below _n (at most 128) */
+#define SWAR_ONES 0x0101010101010101ULL
+#define SWAR_HIGHS 0x8080808080808080ULL
+#define SWAR_HASZERO(_v) (((_v) - SWAR_ONES) & ~(_v) & SWAR_HIGHS)
+#define SWAR_HASLESS(_v, _n) (((_v) - SWAR_ONES * (_n)) & ~(_v) & SWAR_HIGHS)
+
+static FASTCALL_ATTR INLINE_PREFIX int FASTCALL_MSVC countTrailingZeros64(JSUINT64 value)
+{
+#if defined(__GNUC__)
+  return __builtin_ctzll(value);
+#else
+  int count = 0;
+
+  while (!(value & 1))
+  {
+    value >>= 1;
+    count ++;
+  }
+
+  return count;
+#endif
+}
+
+/*
+Copies the bytes from *_io up to the first one which Buffer_IsPlainChar doesn't pass to of, moving
+*_io to that byte or end, and returns the new output offset. Most strings need no escaping at all,
+so they're checked 16 bytes per step with SSE2 where available and 8 bytes per step otherwise.
+Each block is stored whole and the offsets move past its plain bytes only, the output always has
+room for 6 bytes per input byte left (see RESERVE_STRING) */
+static FASTCALL_ATTR INLINE_PREFIX char * FASTCALL_MSVC Buffer_CopyPlain(char *of, const char **_io, const char *end, int validate, int encodeHTMLChars)
+{
+  const char *io = *_io;
+  JSUINT64 word;
+  JSUINT64 special;
+  int count;
+#if HAS_SSE2_SCAN
+  __m128i controls;
+  __m128i quotes;
+  __m128i backslashes;
+  __m128i slashes;
+  __m128i chunk;
+  __m128i found;
+  int mask;
+#endif
+
+  // Characters needing escapes tend to come close together, blocks only pay off after a few plain ones
+  for (count = 0; count < 4; count ++)
+  {
+    if (io == end || !Buffer_IsPlainChar((JSUINT8) *io, validate, encodeHTMLChars))
+    {
+      *_io = io;
+      return of;
+    }
+
+    *(of++) = *(io++);
+  }
+
+#if HAS_SSE2_SCAN
+  controls = _mm_set1_epi8(0x1f);
+  quotes = _mm_set1_epi8('\"');
+  backslashes = _mm_set1_epi8('\\');
+  slashes = _mm_set1_epi8('/');
+
+  while (end - io >= 16)
+  {
+    chunk = _mm_loadu_si128((const __m128i *) io);
+
+    // Bytes up to 0x1f are the ones which the unsigned maximum with 0x1f leaves at 0x1f
+    found = _mm_cmpeq_epi8(_mm_max_epu8(chunk, controls), controls);
+    found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, quotes));
+    found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, backslashes));
+    found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, slashes));
+
+    if (encodeHTMLChars)
+    {
+      found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, _mm_set1_epi8('&')));
+      found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, _mm_set1_epi8('<')));
+      found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, _mm_set1_epi8('>')));
+    }
+
+#if HAS_JSON_ESCAPE_UNICODE_CONTROL_CHARACTERS
+    found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, _mm_set1_epi8(0x7f)));
+    found = _mm_or_si128(found, _mm_cmpeq_epi8(chunk, _mm_set1_epi8((char) 0xc2)));
+#endif
+
+    mask = _mm_movemask_epi8(found);
+
+    if (validate)
+    {
+      mask |= _mm_movemask_epi8(chunk);
+    }
+
+    _mm_storeu_si128((__m128i *) of, chunk);
+
+    if (mask)
+    {
+      count = countTrailingZeros64((JSUINT64) mask);
+      *_io = io + count;
+      return of + count;
+    }
+
+    io += 16;
+    of += 16;
+  }
+#endif
+
+  while (end - io >= 8)
+  {
+    memcpy(&word, io, sizeof(JSUINT64));
+
+    special = SWAR_HASLESS(word, 0x20) |
+              SWAR_HASZERO(word ^ (SWAR_ONES * '\"')) |
+              SWAR_HASZERO(word ^ (SWAR_ONES * '\\')) |
+              SWAR_HASZERO(word ^ (SWAR_ONES * '/'));
+
+    if (validate)
+    {
+      special |= word & SWAR_HIGHS;
+    }
+
+    if (encodeHTMLChars)
+    {
+      special |= SWAR_HASZERO(word ^ (SWAR_ONES * '&')) |
+                 SWAR_HASZERO(word ^ (SWAR_ONES * '<')) |
+                 SWAR_HASZERO(word ^ (SWAR_ONES * '>'));
+    }
+
+#if HAS_JSON_ESCAPE_UNICODE_CONTROL_CHARACTERS
+    special |= SWAR_HASZERO(word ^ (SWAR_ONES * 0x7f)) | SWAR_HASZERO(word ^ (SWAR_ONES * 0xc2));
+#endif
+
+    if (special)
+    {
+#ifdef __LITTLE_ENDIAN__
+      // Only bytes above a flagged one can be flagged falsely, the lowest one is always right
+      memcpy(of, io, sizeof(JSUINT64));
+      count = countTrailingZeros64(special) / 8;
+      *_io = io + count;
+      return of + count;
+#else
+      break;
+#endif
+    }
+
+    memcpy(of, io, sizeof(JSUINT64));
+    io += 8;
+    of += 8;
+  }
+
+  while (io < end && Buffer_IsPlainChar((JSUINT8) *io, validate, encodeHTMLChars))
+  {
+    *(of++) = *(io++);
+  }
+
+  *_io = io;
+  return of;
+}
+
 int Buffer_EscapeStringUnvalidated (JSOBJ obj, JSONObjectEncoder *enc, const char *io, const char *end)
 {
 #if HAS_JSON_ESCAPE_UNICODE_CONTROL_CHARACTERS
@@ -164,6 +364,9 @@ int Buffer_EscapeStringUnvalidated (JSOBJ obj, JSONObjectEncoder *enc, const cha
 
   for (;;)
   {
+  // Copy the characters up to the next one needing a closer look in one go
+  of = Buffer_CopyPlain(of, &io, end, 0, enc->encodeHTMLChars);
+
   switch (*io)
     {
       case 0x00:
@@ -284,7 +487,12 @@ int Buffer_EscapeStringValidated (JSOBJ obj, JSONObjectEncoder *enc, const char
 
   for (;;)
   {
-    JSUINT8 utflen = g_asciiOutputTable[(unsigned char) *io];
+    JSUINT8 utflen;
+
+    // Copy the characters up to the next one needing a closer look in one go
+    of = Buffer_CopyPlain(of, &io, end, 1, enc->encodeHTMLChars);
+
+    utflen = g_asciiOutputTable[(unsigned char) *io];
 
     switch (utflen)
     {
@@ -680,6 +888,402 @@ int Buffer_AppendDoubleUnchecked(JSOBJ obj, JSONObjectEncoder *enc, double value
     return TRUE;
 }
 
+/*
+Shortest round trip double formatting after Florian Loitsch's Grisu2, "Printing Floating-Point
+Numbers Quickly and Accurately with Integers" (PLDI 2010). The digits always read back as the same
+double and are the shortest such digits for all but about 0.1% of values, which get a few digits
+more. Uses 64 bit integer arithmetic only */
+typedef struct __DiyFp
+{
+  JSUINT64 f;
+  int e;
+} DiyFp;
+
+#define DIYFP_SIGNIFICAND_SIZE 52
+#define DIYFP_HIDDEN_BIT 0x0010000000000000ULL
+#define DIYFP_SIGNIFICAND_MASK 0x000fffffffffffffULL
+
+/*
+Normalized 64 bit approximations of 10^-348, 10^-340 ... 10^340, rounded to nearest */
+static const DiyFp g_cachedPowers[] =
+{
+  { 0xfa8fd5a0081c0288ULL, -1220 }, { 0xbaaee17fa23ebf76ULL, -1193 }, { 0x8b16fb203055ac76ULL, -1166 },
+  { 0xcf42894a5dce35eaULL, -1140 }, { 0x9a6bb0aa55653b2dULL, -1113 }, { 0xe61acf033d1a45dfULL, -1087 },
+  { 0xab70fe17c79ac6caULL, -1060 }, { 0xff77b1fcbebcdc4fULL, -1034 }, { 0xbe5691ef416bd60cULL, -1007 },
+  { 0x8dd01fad907ffc3cULL, -980 }, { 0xd3515c2831559a83ULL, -954 }, { 0x9d71ac8fada6c9b5ULL, -927 },
+  { 0xea9c227723ee8bcbULL, -901 }, { 0xaecc49914078536dULL, -874 }, { 0x823c12795db6ce57ULL, -847 },
+  { 0xc21094364dfb5637ULL, -821 }, { 0x9096ea6f3848984fULL, -794 }, { 0xd77485cb25823ac7ULL, -768 },
+  { 0xa086cfcd97bf97f4ULL, -741 }, { 0xef340a98172aace5ULL, -715 }, { 0xb23867fb2a35b28eULL, -688 },
+  { 0x84c8d4dfd2c63f3bULL, -661 }, { 0xc5dd44271ad3cdbaULL, -635 }, { 0x936b9fcebb25c996ULL, -608 },
+  { 0xdbac6c247d62a584ULL, -582 }, { 0xa3ab66580d5fdaf6ULL, -555 }, { 0xf3e2f893dec3f126ULL, -529 },
+  { 0xb5b5ada8aaff80b8ULL, -502 }, { 0x87625f056c7c4a8bULL, -475 }, { 0xc9bcff6034c13053ULL, -449 },
+  { 0x964e858c91ba2655ULL, -422 }, { 0xdff9772470297ebdULL, -396 }, { 0xa6dfbd9fb8e5b88fULL, -369 },
+  { 0xf8a95fcf88747d94ULL, -343 }, { 0xb94470938fa89bcfULL, -316 }, { 0x8a08f0f8bf0f156bULL, -289 },
+  { 0xcdb02555653131b6ULL, -263 }, { 0x993fe2c6d07b7facULL, -236 }, { 0xe45c10c42a2b3b06ULL, -210 },
+  { 0xaa242499697392d3ULL, -183 }, { 0xfd87b5f28300ca0eULL, -157 }, { 0xbce5086492111aebULL, -130 },
+  { 0x8cbccc096f5088ccULL, -103 }, { 0xd1b71758e219652cULL, -77 }, { 0x9c40000000000000ULL, -50 },
+  { 0xe8d4a51000000000ULL, -24 }, { 0xad78ebc5ac620000ULL, 3 }, { 0x813f3978f8940984ULL, 30 },
+  { 0xc097ce7bc90715b3ULL, 56 }, { 0x8f7e32ce7bea5c70ULL, 83 }, { 0xd5d238a4abe98068ULL, 109 },
+  { 0x9f4f2726179a2245ULL, 136 }, { 0xed63a231d4c4fb27ULL, 162 }, { 0xb0de65388cc8ada8ULL, 189 },
+  { 0x83c7088e1aab65dbULL, 216 }, { 0xc45d1df942711d9aULL, 242 }, { 0x924d692ca61be758ULL, 269 },
+  { 0xda01ee641a708deaULL, 295 }, { 0xa26da3999aef774aULL, 322 }, { 0xf209787bb47d6b85ULL, 348 },
+  { 0xb454e4a179dd1877ULL, 375 }, { 0x865b86925b9bc5c2ULL, 402 }, { 0xc83553c5c8965d3dULL, 428 },
+  { 0x952ab45cfa97a0b3ULL, 455 }, { 0xde469fbd99a05fe3ULL, 481 }, { 0xa59bc234db398c25ULL, 508 },
+  { 0xf6c69a72a3989f5cULL, 534 }, { 0xb7dcbf5354e9beceULL, 561 }, { 0x88fcf317f22241e2ULL, 588 },
+  { 0xcc20ce9bd35c78a5ULL, 614 }, { 0x98165af37b2153dfULL, 641 }, { 0xe2a0b5dc971f303aULL, 667 },
+  { 0xa8d9d1535ce3b396ULL, 694 }, { 0xfb9b7cd9a4a7443cULL, 720 }, { 0xbb764c4ca7a44410ULL, 747 },
+  { 0x8bab8eefb6409c1aULL, 774 }, { 0xd01fef10a657842cULL, 800 }, { 0x9b10a4e5e9913129ULL, 827 },
+  { 0xe7109bfba19c0c9dULL, 853 }, { 0xac2820d9623bf429ULL, 880 }, { 0x80444b5e7aa7cf85ULL, 907 },
+  { 0xbf21e44003acdd2dULL, 933 }, { 0x8e679c2f5e44ff8fULL, 960 }, { 0xd433179d9c8cb841ULL, 986 },
+  { 0x9e19db92b4e31ba9ULL, 1013 }, { 0xeb96bf6ebadf77d9ULL, 1039 }, { 0xaf87023b9bf0ee6bULL, 1066 },
+};
+
+static const JSUINT32 g_pow10_32[] = {1, 10, 100, 1000, 10000, 100000, 1000000, 10000000, 100000000, 1000000000};
+
+static const JSUINT64 g_pow10_64[] =
+{
+  1ULL, 10ULL, 100ULL, 1000ULL, 10000ULL, 100000ULL, 1000000ULL, 10000000ULL, 100000000ULL,
+  1000000000ULL, 10000000000ULL, 100000000000ULL, 1000000000000ULL, 10000000000000ULL,
+  100000000000000ULL, 1000000000000000ULL, 10000000000000000ULL, 100000000000000000ULL,
+  1000000000000000000ULL, 10000000000000000000ULL
+};
+
+static DiyFp DiyFp_fromDouble(double value)
+{
+  DiyFp ret;
+  JSUINT64 bits;
+  int biasedExponent;
+
+  memcpy(&bits, &value, sizeof(double));
+  biasedExponent = (int) ((bits >> DIYFP_SIGNIFICAND_SIZE) & 0x7ff);
+  ret.f = bits & DIYFP_SIGNIFICAND_MASK;
+
+  if (biasedExponent)
+  {
+    ret.f += DIYFP_HIDDEN_BIT;
+    ret.e = biasedExponent - 1075;
+  }
+  else
+  {
+    ret.e = -1074;
+  }
+
+  return ret;
+}
+
+static DiyFp DiyFp_multiply(DiyFp x, DiyFp y)
+{
+  const JSUINT64 M32 = 0xffffffffULL;
+  JSUINT64 a = x.f >> 32;
+  JSUINT64 b = x.f & M32;
+  JSUINT64 c = y.f >> 32;
+  JSUINT64 d = y.f & M32;
+  JSUINT64 ac = a * c;
+  JSUINT64 bc = b * c;
+  JSUINT64 ad = a * d;
+  JSUINT64 bd = b * d;
+  JSUINT64 tmp = (bd >> 32) + (ad & M32) + (bc & M32);
+  DiyFp ret;
+
+  // Round the lower half into the upper one
+  tmp += 1ULL << 31;
+  ret.f = ac + (ad >> 32) + (bc >> 32) + (tmp >> 32);
+  ret.e = x.e + y.e + 64;
+  return ret;
+}
+
+static DiyFp DiyFp_normalize(DiyFp x)
+{
+  while (!(x.f & 0x8000000000000000ULL))
+  {
+    x.f <<= 1;
+    x.e --;
+  }
+
+  return x;
+}
+
+/*
+The boundaries halfway to the neighbouring doubles, normalized to the same exponent */
+static void DiyFp_boundaries(DiyFp v, DiyFp *minus, DiyFp *plus)
+{
+  DiyFp pl;
+  DiyFp mi;
+
+  pl.f = (v.f << 1) + 1;
+  pl.e = v.e - 1;
+
+  while (!(pl.f & (DIYFP_HIDDEN_BIT << 1)))
+  {
+    pl.f <<= 1;
+    pl.e --;
+  }
+
+  pl.f <<= 64 - DIYFP_SIGNIFICAND_SIZE - 2;
+  pl.e -= 64 - DIYFP_SIGNIFICAND_SIZE - 2;
+
+  // The lower neighbour is closer when v is a power of two
+  if (v.f == DIYFP_HIDDEN_BIT)
+  {
+    mi.f = (v.f << 2) - 1;
+    mi.e = v.e - 2;
+  }
+  else
+  {
+    mi.f = (v.f << 1) - 1;
+    mi.e = v.e - 1;
+  }
+
+  mi.f <<= mi.e - pl.e;
+  mi.e = pl.e;
+
+  *minus = mi;
+  *plus = pl;
+}
+
+/*
+Picks the cached power 10^K which scales a number with binary exponent e into [2^-60, 2^-32) */
+static DiyFp Grisu_cachedPower(int e, int *K)
+{
+  double dk = (-61 - e) * 0.30102999566398114 + 347;
+  int k = (int) dk;
+  unsigned int index;
+
+  if (dk - k > 0.0)
+  {
+    k ++;
+  }
+
+  index = (unsigned int) ((k >> 3) + 1);
+  *K = -(-348 + (int) (index << 3));
+  return g_cachedPowers[index];
+}
+
+static int Grisu_countDigits(JSUINT32 n)
+{
+  int count = 1;
+
+  while (count < 10 && n >= g_pow10_32[count])
+  {
+    count ++;
+  }
+
+  return count;
+}
+
+static void Grisu_round(char *buffer, int length, JSUINT64 delta, JSUINT64 rest, JSUINT64 tenKappa, JSUINT64 wpw)
+{
+  // Step the last digit down while that brings the number closer to the exact value
+  while (rest < wpw && delta - rest >= tenKappa && (rest + tenKappa < wpw || wpw - rest > rest + tenKappa - wpw))
+  {
+    buffer[length - 1] --;
+    rest += tenKappa;
+  }
+}
+
+static int Grisu_digits(DiyFp w, DiyFp mp, JSUINT64 delta, char *buffer, int *K)
+{
+  int shift = -mp.e;
+  JSUINT64 one = 1ULL << shift;
+  JSUINT64 wpw = mp.f - w.f;
+  JSUINT32 p1 = (JSUINT32) (mp.f >> shift);
+  JSUINT64 p2 = mp.f & (one - 1);
+  int kappa = Grisu_countDigits(p1);
+  int length = 0;
+  JSUINT32 d;
+  JSUINT64 rest;
+
+  // Integral part
+  while (kappa > 0)
+  {
+    d = p1 / g_pow10_32[kappa - 1];
+    p1 %= g_pow10_32[kappa - 1];
+
+    if (d || length)
+    {
+      buffer[length ++] = (char) ('0' + d);
+    }
+
+    kappa --;
+    rest = ((JSUINT64) p1 << shift) + p2;
+
+    if (rest <= delta)
+    {
+      *K += kappa;
+      Grisu_round(buffer, length, delta, rest, ((JSUINT64) g_pow10_32[kappa]) << shift, wpw);
+      return length;
+    }
+  }
+
+  // Fractional part
+  for (;;)
+  {
+    p2 *= 10;
+    delta *= 10;
+    d = (JSUINT32) (p2 >> shift);
+
+    if (d || length)
+    {
+      buffer[length ++] = (char) ('0' + d);
+    }
+
+    p2 &= one - 1;
+    kappa --;
+
+    if (p2 < delta)
+    {
+      *K += kappa;
+      Grisu_round(buffer, length, delta, p2, one, -kappa < 20 ? wpw * g_pow10_64[-kappa] : 0);
+      return length;
+    }
+  }
+}
+
+/*
+Writes the digits of a positive, finite double to buffer and returns their count. The value is
+0.DIGITS * 10^decimalPoint */
+static int Grisu2(double value, char *buffer, int *decimalPoint)
+{
+  DiyFp v = DiyFp_fromDouble(value);
+  DiyFp minus;
+  DiyFp plus;
+  DiyFp cached;
+  DiyFp w;
+  DiyFp wp;
+  DiyFp wm;
+  int K;
+  int length;
+
+  DiyFp_boundaries(v, &minus, &plus);
+  cached = Grisu_cachedPower(plus.e, &K);
+
+  w = DiyFp_multiply(DiyFp_normalize(v), cached);
+  wp = DiyFp_multiply(plus, cached);
+  wm = DiyFp_multiply(minus, cached);
+
+  // Stay inside the boundaries despite the rounding of the multiplications
+  wm.f ++;
+  wp.f --;
+
+  length = Grisu_digits(w, wp, wp.f - wm.f, buffer, &K);
+  *decimalPoint = length + K;
+  return length;
+}
+
+/*
+Appends the shortest digits which read back as value, formatted like Python's repr of a float:
+positional notation for 1e-4 <= |value| < 1e16 and exponential notation otherwise */
+int Buffer_AppendShortestDoubleUnchecked(JSOBJ obj, JSONObjectEncoder *enc, double value)
+{
+  char digits[20];
+  char *wstr = enc->offset;
+  int length;
+  int decimalPoint;
+  int exponent;
+  int index;
+
+  if (value == HUGE_VAL || value == -HUGE_VAL)
+  {
+    SetError (obj, enc, "Invalid Inf value when encoding double");
+    return FALSE;
+  }
+
+  if (!(value == value))
+  {
+    SetError (obj, enc, "Invalid Nan value when encoding double");
+    return FALSE;
+  }
+
+  // Negative zero keeps its sign too
+  if (value < 0.0 || (value == 0.0 && 1.0 / value < 0.0))
+  {
+    *wstr++ = '-';
+    value = -value;
+  }
+
+  if (value == 0.0)
+  {
+    digits[0] = '0';
+    length = 1;
+    decimalPoint = 1;
+  }
+  else
+  {
+    length = Grisu2(value, digits, &decimalPoint);
+  }
+
+  if (decimalPoint > -4 && decimalPoint <= 16)
+  {
+    if (decimalPoint <= 0)
+    {
+      // 0.000DIGITS
+      *wstr++ = '0';
+      *wstr++ = '.';
+
+      for (index = decimalPoint; index < 0; index ++)
+      {
+        *wstr++ = '0';
+      }
+
+      memcpy(wstr, digits, length);
+      wstr += length;
+    }
+    else
+    if (decimalPoint >= length)
+    {
+      // DIGITS000.0
+      memcpy(wstr, digits, length);
+      wstr += length;
+
+      for (index = length; index < decimalPoint; index ++)
+      {
+        *wstr++ = '0';
+      }
+
+      *wstr++ = '.';
+      *wstr++ = '0';
+    }
+    else
+    {
+      // DIG.ITS
+      memcpy(wstr, digits, decimalPoint);
+      wstr += decimalPoint;
+      *wstr++ = '.';
+      memcpy(wstr, digits + decimalPoint, length - decimalPoint);
+      wstr += length - decimalPoint;
+    }
+  }
+  else
+  {
+    // D.IGITSe+XX
+    *wstr++ = digits[0];
+
+    if (length > 1)
+    {
+      *wstr++ = '.';
+      memcpy(wstr, digits + 1, length - 1);
+      wstr += length - 1;
+    }
+
+    exponent = decimalPoint - 1;
+    *wstr++ = 'e';
+    *wstr++ = exponent < 0 ? '-' : '+';
+    exponent = exponent < 0 ? -exponent : exponent;
+
+    if (exponent >= 100)
+    {
+      *wstr++ = (char) ('0' + exponent / 100);
+      exponent %= 100;
+    }
+
+    *wstr++ = (char) ('0' + exponent / 10);
+    *wstr++ = (char) ('0' + exponent % 10);
+  }
+
+  enc->offset = wstr;
+  return TRUE;
+}
+
 /*
 FIXME:
 Handle integration functions returning NULL here */
@@ -743,8 +1347,16 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
 #endif
     }
 
+    tc.prv = enc->typeContexts ? enc->typeContexts + enc->level * enc->cbTypeContext : NULL;
+    tc.encoder = enc;
+    tc.substitute = NULL;
     enc->beginTypeContext(obj, &tc);
 
+    if (tc.substitute)
+    {
+      obj = tc.substitute;
+    }
+
     switch (tc.type)
     {
       case JT_INVALID:
@@ -774,6 +1386,13 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
           enc->level ++;
           encode (iterObj, enc, NULL, 0);
           count ++;
+
+          if (enc->errorMsg)
+          {
+            enc->iterEnd(obj, &tc);
+            enc->endTypeContext(obj, &tc);
+            return;
+          }
       }
 
       enc->iterEnd(obj, &tc);
@@ -804,6 +1423,13 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
       enc->level ++;
       encode (iterObj, enc, objName, szlen);
       count ++;
+
+      if (enc->errorMsg)
+      {
+        enc->iterEnd(obj, &tc);
+        enc->endTypeContext(obj, &tc);
+        return;
+      }
     }
 
     enc->iterEnd(obj, &tc);
@@ -872,7 +1498,7 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
 
   case JT_DOUBLE:
   {
-    if (!Buffer_AppendDoubleUnchecked (obj, enc, enc->getDoubleValue(obj, &tc)))
+    if (!(enc->shortestFloat ? Buffer_AppendShortestDoubleUnchecked : Buffer_AppendDoubleUnchecked) (obj, enc, enc->getDoubleValue(obj, &tc)))
     {
       enc->endTypeContext(obj, &tc);
       enc->level --;
@@ -881,6 +1507,20 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
     break;
   }
 
+  case JT_RAW:
+  {
+    value = enc->getStringValue(obj, &tc, &szlen);
+    Buffer_Reserve(enc, szlen);
+    if (enc->errorMsg)
+    {
+      enc->endTypeContext(obj, &tc);
+      return;
+    }
+    memcpy(enc->offset, value, szlen);
+    enc->offset += szlen;
+    break;
+  }
+
   case JT_UTF8:
   {
       value = enc->getStringValue(obj, &tc, &szlen);
@@ -920,7 +1560,13 @@ void encode(JSOBJ obj, JSONObjectEncoder *enc, const char *name, size_t cbName)
   enc->level --;
 }
 
-char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
+static void Encoder_release(JSONObjectEncoder *enc)
+{
+  free(enc->typeContexts);
+  enc->typeContexts = NULL;
+}
+
+static int Encoder_init(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
 {
   enc->malloc = enc->malloc ? enc->malloc : malloc;
   enc->free =  enc->free ? enc->free : free;
@@ -940,14 +1586,30 @@ char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t
     enc->doublePrecision = JSON_DOUBLE_MAX_DECIMALS;
   }
 
+  /*
+  One type context for every level up to recursionMax and one more for JSON_EncodeLines' outer array.
+  Not from enc->malloc, which the implementor may have tied to the output buffer */
+  enc->typeContexts = NULL;
+
+  if (enc->cbTypeContext)
+  {
+    enc->typeContexts = (char *) malloc ((enc->recursionMax + 2) * enc->cbTypeContext);
+    if (!enc->typeContexts)
+    {
+      SetError(obj, enc, "Could not reserve memory block");
+      return 0;
+    }
+  }
+
   if (_buffer == NULL)
   {
     _cbBuffer = 32768;
     enc->start = (char *) enc->malloc (_cbBuffer);
     if (!enc->start)
     {
+      Encoder_release(enc);
       SetError(obj, enc, "Could not reserve memory block");
-      return NULL;
+      return 0;
     }
     enc->heap = 1;
   }
@@ -959,8 +1621,95 @@ char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t
 
   enc->end = enc->start + _cbBuffer;
   enc->offset = enc->start;
+  return 1;
+}
+
+char *JSON_EncodeObject(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
+{
+  if (!Encoder_init(obj, enc, _buffer, _cbBuffer))
+  {
+    return NULL;
+  }
 
   encode (obj, enc, NULL, 0);
+  Encoder_release(enc);
+
+  Buffer_Reserve(enc, 1);
+  if (enc->errorMsg)
+  {
+    return NULL;
+  }
+  Buffer_AppendCharUnchecked(enc, '\0');
+
+  return enc->start;
+}
+
+char *JSON_EncodeLines(JSOBJ obj, JSONObjectEncoder *enc, char *_buffer, size_t _cbBuffer)
+{
+  JSONTypeContext tc;
+  JSOBJ iterObj;
+
+  if (!Encoder_init(obj, enc, _buffer, _cbBuffer))
+  {
+    return NULL;
+  }
+
+  tc.prv = enc->typeContexts ? enc->typeContexts + (enc->recursionMax + 1) * enc->cbTypeContext : NULL;
+  tc.encoder = enc;
+  tc.substitute = NULL;
+  enc->beginTypeContext(obj, &tc);
+
+  if (tc.substitute)
+  {
+    obj = tc.substitute;
+  }
+
+  switch (tc.type)
+  {
+    case JT_ARRAY:
+      break;
+
+    case JT_INVALID:
+      Encoder_release(enc);
+      return NULL;
+
+    default:
+      enc->endTypeContext(obj, &tc);
+      Encoder_release(enc);
+      SetError(obj, enc, "Expected an array of objects to encode as lines");
+      return NULL;
+  }
+
+  enc->iterBegin(obj, &tc);
+
+  while (enc->iterNext(obj, &tc))
+  {
+    iterObj = enc->iterGetValue(obj, &tc);
+
+    enc->level = 0;
+    encode (iterObj, enc, NULL, 0);
+
+    if (enc->errorMsg)
+    {
+      break;
+    }
+
+    Buffer_Reserve(enc, 1);
+    if (enc->errorMsg)
+    {
+      break;
+    }
+    Buffer_AppendCharUnchecked(enc, '\n');
+  }
+
+  enc->iterEnd(obj, &tc);
+  enc->endTypeContext(obj, &tc);
+  Encoder_release(enc);
+
+  if (enc->errorMsg)
+  {
+    return NULL;
+  }
 
   Buffer_Reserve(enc, 1);
   if (enc->errorMsg)
@@ -0,0 +1,424 @@
+/*
+Copyright (c) 2011-2013, ESN Social Software AB and Jonas Tarnstrom
+All rights reserved.
+
+Redistribution and use in source and binary forms, with or without
+modification, are permitted provided that the following conditions are met:
+* Redistributions of source code must retain the above copyright
+notice, this list of conditions and the following disclaimer.
+* Redistributions in binary form must reproduce the above copyright
+notice, this list of conditions and the following disclaimer in the
+documentation and/or other materials provided with the distribution.
+* Neither the name of the ESN Social Software AB nor the
+names of its contributors may be used to endorse or promote products
+derived from this software without specific prior written permission.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL ESN SOCIAL SOFTWARE AB OR JONAS TARNSTROM BE LIABLE
+FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+*/
+
+#include "ultrajson.h"
+#include <string.h>
+#include <stdlib.h>
+
+/*
+Objects handed to the decoder are tape indexes offset by one, so that the first entry isn't NULL */
+#define TAPE_OBJ(_index) ((JSOBJ) ((_index) + 1))
+#define TAPE_INDEX(_obj) ((size_t) (_obj) - 1)
+
+/*
+Set for entries holding an ASCII span which doesn't lie in the input buffer */
+#define TAPE_IS_COPIED(_entry, _buffer, _cbBuffer) (((_entry)->type == JT_UTF8 || (_entry)->type == JT_BIGINT || (_entry)->type == JT_DOUBLE) && \
+  !((_entry)->flags & JTF_WIDE) && ((_entry)->type != JT_DOUBLE || ((_entry)->flags & JTF_DECIMAL)) && \
+  ((_entry)->value.ascii.start < (_buffer) || (_entry)->value.ascii.start > (_buffer) + (_cbBuffer)))
+
+static JSONTapeEntry *Tape_append(JSONTape *tape, int type)
+{
+  JSONTapeEntry *entry;
+  JSONTapeEntry *newEntries;
+  size_t newSize;
+
+  if (tape->cbEntries == tape->cbEntriesAlloc)
+  {
+    newSize = tape->cbEntriesAlloc ? tape->cbEntriesAlloc * 2 : 256;
+    newEntries = (JSONTapeEntry *) tape->realloc(tape->entries, newSize * sizeof(JSONTapeEntry));
+
+    if (!newEntries)
+    {
+      return NULL;
+    }
+
+    tape->entries = newEntries;
+    tape->cbEntriesAlloc = newSize;
+  }
+
+  entry = &tape->entries[tape->cbEntries++];
+  entry->type = type;
+  entry->flags = 0;
+  return entry;
+}
+
+static JSOBJ Tape_newString(void *prv, wchar_t *start, wchar_t *end)
+{
+  JSONTape *tape = (JSONTape *) prv;
+  JSONTapeEntry *entry;
+  wchar_t *newStrings;
+  size_t length = end - start;
+  size_t newSize;
+
+  if (tape->cbStrings + length > tape->cbStringsAlloc)
+  {
+    newSize = tape->cbStringsAlloc ? tape->cbStringsAlloc : 64;
+
+    while (newSize < tape->cbStrings + length)
+    {
+      newSize *= 2;
+    }
+
+    newStrings = (wchar_t *) tape->realloc(tape->strings, newSize * sizeof(wchar_t));
+
+    if (!newStrings)
+    {
+      return NULL;
+    }
+
+    tape->strings = newStrings;
+    tape->cbStringsAlloc = newSize;
+  }
+
+  entry = Tape_append(tape, JT_UTF8);
+
+  if (!entry)
+  {
+    return NULL;
+  }
+
+  memcpy(tape->strings + tape->cbStrings, start, length * sizeof(wchar_t));
+  entry->flags = JTF_WIDE;
+  entry->value.wide.offset = tape->cbStrings;
+  entry->value.wide.length = length;
+  tape->cbStrings += length;
+
+  return TAPE_OBJ(tape->cbEntries - 1);
+}
+
+static JSOBJ Tape_newSpan(JSONTape *tape, int type, int flags, char *start, char *end)
+{
+  JSONTapeEntry *entry = Tape_append(tape, type);
+
+  if (!entry)
+  {
+    return NULL;
+  }
+
+  entry->flags = flags;
+  entry->value.ascii.start = start;
+  entry->value.ascii.length = end - start;
+  return TAPE_OBJ(tape->cbEntries - 1);
+}
+
+static JSOBJ Tape_newASCIIString(void *prv, char *start, char *end)
+{
+  return Tape_newSpan((JSONTape *) prv, JT_UTF8, 0, start, end);
+}
+
+static JSOBJ Tape_newASCIIKey(void *prv, char *start, char *end)
+{
+  return Tape_newSpan((JSONTape *) prv, JT_UTF8, JTF_KEY, start, end);
+}
+
+static JSOBJ Tape_newBigInt(void *prv, char *start, char *end)
+{
+  return Tape_newSpan((JSONTape *) prv, JT_BIGINT, 0, start, end);
+}
+
+static JSOBJ Tape_newDecimal(void *prv, char *start, char *end)
+{
+  return Tape_newSpan((JSONTape *) prv, JT_DOUBLE, JTF_DECIMAL, start, end);
+}
+
+static void Tape_addItem(void *prv, JSOBJ obj)
+{
+  JSONTape *tape = (JSONTape *) prv;
+  JSONTapeEntry *container = &tape->entries[TAPE_INDEX(obj)];
+
+  // The item is complete by now, so everything up to the end of the tape belongs to the container
+  container->value.container.count ++;
+  container->value.container.end = tape->cbEntries;
+}
+
+static void Tape_objectAddKey(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value)
+{
+  Tape_addItem(prv, obj);
+}
+
+static void Tape_arrayAddItem(void *prv, JSOBJ obj, JSOBJ value)
+{
+  Tape_addItem(prv, obj);
+}
+
+static JSOBJ Tape_newValue(JSONTape *tape, int type)
+{
+  if (!Tape_append(tape, type))
+  {
+    return NULL;
+  }
+
+  return TAPE_OBJ(tape->cbEntries - 1);
+}
+
+static JSOBJ Tape_newTrue(void *prv)
+{
+  return Tape_newValue((JSONTape *) prv, JT_TRUE);
+}
+
+static JSOBJ Tape_newFalse(void *prv)
+{
+  return Tape_newValue((JSONTape *) prv, JT_FALSE);
+}
+
+static JSOBJ Tape_newNull(void *prv)
+{
+  return Tape_newValue((JSONTape *) prv, JT_NULL);
+}
+
+static JSOBJ Tape_newContainer(JSONTape *tape, int type)
+{
+  JSONTapeEntry *entry = Tape_append(tape, type);
+
+  if (!entry)
+  {
+    return NULL;
+  }
+
+  entry->value.container.count = 0;
+  entry->value.container.end = tape->cbEntries;
+  return TAPE_OBJ(tape->cbEntries - 1);
+}
+
+static JSOBJ Tape_newObject(void *prv)
+{
+  return Tape_newContainer((JSONTape *) prv, JT_OBJECT);
+}
+
+static JSOBJ Tape_newArray(void *prv)
+{
+  return Tape_newContainer((JSONTape *) prv, JT_ARRAY);
+}
+
+static JSOBJ Tape_newLongValue(JSONTape *tape, int type, JSINT64 value)
+{
+  JSONTapeEntry *entry = Tape_append(tape, type);
+
+  if (!entry)
+  {
+    return NULL;
+  }
+
+  entry->value.longValue = value;
+  return TAPE_OBJ(tape->cbEntries - 1);
+}
+
+static JSOBJ Tape_newInt(void *prv, JSINT32 value)
+{
+  return Tape_newLongValue((JSONTape *) prv, JT_INT, value);
+}
+
+static JSOBJ Tape_newLong(void *prv, JSINT64 value)
+{
+  return Tape_newLongValue((JSONTape *) prv, JT_LONG, value);
+}
+
+static JSOBJ Tape_newDouble(void *prv, double value)
+{
+  JSONTape *tape = (JSONTape *) prv;
+  JSONTapeEntry *entry = Tape_append(tape, JT_DOUBLE);
+
+  if (!entry)
+  {
+    return NULL;
+  }
+
+  entry->value.doubleValue = value;
+  return TAPE_OBJ(tape->cbEntries - 1);
+}
+
+static void Tape_releaseObject(void *prv, JSOBJ obj)
+{
+  // Entries live in the tape and are dropped with it
+}
+
+/*
+Copies the spans which don't point into buffer to tape->spans, so that they outlive the buffers of
+the stream decoder. Returns 0 if out of memory */
+static int Tape_copySpans(JSONTape *tape, const char *buffer, size_t cbBuffer)
+{
+  JSONTapeEntry *entry;
+  JSONTapeEntry *end = tape->entries + tape->cbEntries;
+  size_t cbSpans = 0;
+  char *spans;
+
+  for (entry = tape->entries; entry < end; entry ++)
+  {
+    if (TAPE_IS_COPIED(entry, buffer, cbBuffer))
+    {
+      cbSpans += entry->value.ascii.length;
+    }
+  }
+
+  if (cbSpans == 0)
+  {
+    return 1;
+  }
+
+  spans = tape->spans = (char *) tape->malloc(cbSpans);
+  if (!spans)
+  {
+    return 0;
+  }
+
+  for (entry = tape->entries; entry < end; entry ++)
+  {
+    if (TAPE_IS_COPIED(entry, buffer, cbBuffer))
+    {
+      memcpy(spans, entry->value.ascii.start, entry->value.ascii.length);
+      entry->value.ascii.start = spans;
+      spans += entry->value.ascii.length;
+    }
+  }
+
+  return 1;
+}
+
+void JSON_InitTape(JSONTape *tape)
+{
+  memset(tape, 0, sizeof(JSONTape));
+}
+
+int JSON_DecodeTape(JSONTape *tape, const char *buffer, size_t cbBuffer)
+{
+  JSONObjectDecoder dec =
+  {
+    Tape_newString,
+    Tape_newASCIIString,
+    Tape_newASCIIKey,
+    Tape_objectAddKey,
+    Tape_arrayAddItem,
+    Tape_newTrue,
+    Tape_newFalse,
+    Tape_newNull,
+    Tape_newObject,
+    Tape_newArray,
+    Tape_newInt,
+    Tape_newLong,
+    Tape_newBigInt,
+    Tape_newDouble,
+    Tape_releaseObject,
+  };
+  JSONStreamDecoder sd;
+  int success;
+
+  tape->malloc = tape->malloc ? tape->malloc : malloc;
+  tape->free = tape->free ? tape->free : free;
+  tape->realloc = tape->realloc ? tape->realloc : realloc;
+  tape->cbEntries = 0;
+  tape->cbStrings = 0;
+  tape->errorStr = NULL;
+
+  if (tape->spans)
+  {
+    tape->free(tape->spans);
+    tape->spans = NULL;
+  }
+
+  tape->errorOffset = NULL;
+
+  if (!tape->entries)
+  {
+    /*
+    Every entry takes at least two bytes of input, a value and a separator, so small documents get
+    an exactly big enough tape right away. Matters when many tapes are kept at once */
+    tape->cbEntriesAlloc = cbBuffer / 2 + 2;
+    if (tape->cbEntriesAlloc > 256)
+    {
+      tape->cbEntriesAlloc = 256;
+    }
+
+    tape->entries = (JSONTapeEntry *) tape->malloc(tape->cbEntriesAlloc * sizeof(JSONTapeEntry));
+    if (!tape->entries)
+    {
+      tape->cbEntriesAlloc = 0;
+      tape->errorStr = (char *) "Could not reserve memory block";
+      return 0;
+    }
+  }
+
+  dec.malloc = tape->malloc;
+  dec.free = tape->free;
+  dec.realloc = tape->realloc;
+  dec.preciseFloat = tape->preciseFloat;
+  dec.newDecimal = tape->decimal ? Tape_newDecimal : NULL;
+  dec.prv = tape;
+
+  if (tape->unterminated)
+  {
+    JSON_InitStreamDecoder(&sd, &dec);
+    success = (JSON_DecodeChunk(&sd, buffer, cbBuffer, 1) == 1);
+
+    if (success && !Tape_copySpans(tape, buffer, cbBuffer))
+    {
+      dec.errorStr = (char *) "Could not reserve memory block";
+      success = 0;
+    }
+
+    JSON_ReleaseStreamDecoder(&sd);
+  }
+  else
+  {
+    success = (JSON_DecodeObject(&dec, buffer, cbBuffer) != NULL);
+  }
+
+  if (!success)
+  {
+    tape->errorStr = dec.errorStr ? dec.errorStr : (char *) "Could not reserve memory block";
+    tape->errorOffset = dec.errorOffset;
+    return 0;
+  }
+
+  return 1;
+}
+
+void JSON_FreeTape(JSONTape *tape)
+{
+  JSPFN_FREE pfnFree = tape->free ? tape->free : free;
+
+  if (tape->entries)
+  {
+    pfnFree(tape->entries);
+  }
+
+  if (tape->strings)
+  {
+    pfnFree(tape->strings);
+  }
+
+  if (tape->spans)
+  {
+    pfnFree(tape->spans);
+  }
+
+  tape->entries = NULL;
+  tape->strings = NULL;
+  tape->spans = NULL;
+  tape->cbEntries = tape->cbEntriesAlloc = 0;
+  tape->cbStrings = tape->cbStringsAlloc = 0;
+}
@@ -36,12 +36,34 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 */
 
 #include "py_defines.h"
+#include "pythread.h"
+#include <datetime.h>
 #include <ultrajson.h>
 
 
 //#define PRINTMARK() fprintf(stderr, "%s: MARK(%d)\n", __FILE__, __LINE__)
 #define PRINTMARK()
 
+/*
+Object keys up to KEY_CACHE_MAX_LENGTH bytes are kept in a direct mapped cache of KEY_CACHE_SIZE
+entries when decoding with cache_keys=True, so repeated keys share one str object with its hash
+already computed. Colliding keys simply evict each other */
+#define KEY_CACHE_SIZE 256
+#define KEY_CACHE_MAX_LENGTH 64
+
+typedef struct __KeyCacheEntry
+{
+  PyObject *key;
+  size_t len;
+  char data[KEY_CACHE_MAX_LENGTH];
+} KeyCacheEntry;
+
+typedef struct __PyObjectDecoder
+{
+  JSONObjectDecoder dec;
+  KeyCacheEntry *keyCache;
+} PyObjectDecoder;
+
 void Object_objectAddKey(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value)
 {
   PyDict_SetItem (obj, name, value);
@@ -62,6 +84,281 @@ JSOBJ Object_newString(void *prv, wchar_t *start, wchar_t *end)
   return PyUnicode_FromWideChar (start, (end - start));
 }
 
+JSOBJ Object_newASCIIString(void *prv, char *start, char *end)
+{
+#if PY_VERSION_HEX >= 0x03030000
+  Py_ssize_t len = end - start;
+  PyObject *ret = PyUnicode_New(len, 127);
+
+  if (ret)
+  {
+    memcpy(PyUnicode_1BYTE_DATA(ret), start, len);
+  }
+
+  return ret;
+#else
+  return PyUnicode_DecodeASCII (start, (end - start), NULL);
+#endif
+}
+
+static int parseDigits(const char *ptr, int count, int *value)
+{
+  *value = 0;
+
+  while (count--)
+  {
+    if (*ptr < '0' || *ptr > '9')
+    {
+      return 0;
+    }
+
+    *value = *value * 10 + (*ptr++ - '0');
+  }
+
+  return 1;
+}
+
+/*
+Parses HH:MM:SS[.f[fffff]] and an optional Z or +HH:MM[:SS] offset up to end. *tzinfo is set to a
+new reference, Py_None without an offset. Returns 0 if it doesn't match and -1 on error */
+static int parseISOTime(const char *ptr, const char *end, int *h, int *mn, int *sec, int *us, PyObject **tzinfo)
+{
+  int digits;
+#if PY_VERSION_HEX >= 0x03070000
+  int offsetH, offsetM, offsetS = 0;
+  int sign;
+  PyObject *delta;
+#endif
+
+  if (end - ptr < 8 || ptr[2] != ':' || ptr[5] != ':' ||
+      !parseDigits(ptr, 2, h) || !parseDigits(ptr + 3, 2, mn) || !parseDigits(ptr + 6, 2, sec) ||
+      *h > 23 || *mn > 59 || *sec > 59)
+  {
+    return 0;
+  }
+
+  ptr += 8;
+  *us = 0;
+
+  if (ptr < end && *ptr == '.')
+  {
+    for (ptr ++, digits = 0; ptr < end && *ptr >= '0' && *ptr <= '9' && digits < 6; ptr ++, digits ++)
+    {
+      *us = *us * 10 + (*ptr - '0');
+    }
+
+    if (digits == 0)
+    {
+      return 0;
+    }
+
+    for (; digits < 6; digits ++)
+    {
+      *us *= 10;
+    }
+  }
+
+  if (ptr == end)
+  {
+    Py_INCREF(Py_None);
+    *tzinfo = Py_None;
+    return 1;
+  }
+
+#if PY_VERSION_HEX >= 0x03070000
+  if (*ptr == 'Z' && ptr + 1 == end)
+  {
+    Py_INCREF(PyDateTime_TimeZone_UTC);
+    *tzinfo = PyDateTime_TimeZone_UTC;
+    return 1;
+  }
+
+  if ((*ptr != '+' && *ptr != '-') || (end - ptr != 6 && end - ptr != 9) || ptr[3] != ':' ||
+      !parseDigits(ptr + 1, 2, &offsetH) || !parseDigits(ptr + 4, 2, &offsetM) || offsetH > 23 || offsetM > 59 ||
+      (end - ptr == 9 && (ptr[6] != ':' || !parseDigits(ptr + 7, 2, &offsetS) || offsetS > 59)))
+  {
+    return 0;
+  }
+
+  sign = *ptr == '-' ? -1 : 1;
+
+  if (offsetH == 0 && offsetM == 0 && offsetS == 0)
+  {
+    Py_INCREF(PyDateTime_TimeZone_UTC);
+    *tzinfo = PyDateTime_TimeZone_UTC;
+    return 1;
+  }
+
+  delta = PyDelta_FromDSU(0, sign * ((offsetH * 60 + offsetM) * 60 + offsetS), 0);
+  if (delta == NULL)
+  {
+    return -1;
+  }
+
+  *tzinfo = PyTimeZone_FromOffset(delta);
+  Py_DECREF(delta);
+  return *tzinfo ? 1 : -1;
+#else
+  // No datetime.timezone to hold the offset, keep the string
+  return 0;
+#endif
+}
+
+/*
+Returns the date, datetime or time for an ISO 8601 string as written by isoformat(), NULL without an
+exception set for anything else */
+static PyObject *parseISODate(const char *start, const char *end)
+{
+  static const int daysInMonth[] = { 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31 };
+  PyObject *tzinfo;
+  PyObject *ret;
+  int y, m, d, h, mn, sec, us;
+  int leap;
+  int match;
+
+  if (end - start < 8 || start[0] < '0' || start[0] > '9' || start[1] < '0' || start[1] > '9')
+  {
+    return NULL;
+  }
+
+  if (start[2] == ':')
+  {
+    match = parseISOTime(start, end, &h, &mn, &sec, &us, &tzinfo);
+    if (match != 1)
+    {
+      return NULL;
+    }
+
+    ret = PyDateTimeAPI->Time_FromTime(h, mn, sec, us, tzinfo, PyDateTimeAPI->TimeType);
+    Py_DECREF(tzinfo);
+    return ret;
+  }
+
+  if (end - start < 10 || start[4] != '-' || start[7] != '-' ||
+      !parseDigits(start, 4, &y) || !parseDigits(start + 5, 2, &m) || !parseDigits(start + 8, 2, &d) ||
+      y < 1 || m < 1 || m > 12 || d < 1)
+  {
+    return NULL;
+  }
+
+  leap = (y % 4 == 0 && y % 100 != 0) || y % 400 == 0;
+  if (d > daysInMonth[m - 1] + (m == 2 && leap))
+  {
+    return NULL;
+  }
+
+  if (end - start == 10)
+  {
+    return PyDate_FromDate(y, m, d);
+  }
+
+  if (start[10] != 'T' && start[10] != ' ')
+  {
+    return NULL;
+  }
+
+  match = parseISOTime(start + 11, end, &h, &mn, &sec, &us, &tzinfo);
+  if (match != 1)
+  {
+    return NULL;
+  }
+
+  ret = PyDateTimeAPI->DateTime_FromDateAndTime(y, m, d, h, mn, sec, us, tzinfo, PyDateTimeAPI->DateTimeType);
+  Py_DECREF(tzinfo);
+  return ret;
+}
+
+/*
+newASCIIString for date_mode="iso", only values are parsed as object keys use newASCIIKey */
+JSOBJ Object_newASCIIStringOrDate(void *prv, char *start, char *end)
+{
+  PyObject *ret = parseISODate(start, end);
+
+  if (ret || PyErr_Occurred())
+  {
+    return ret;
+  }
+
+  return Object_newASCIIString(prv, start, end);
+}
+
+JSOBJ Object_newCachedKey(void *prv, char *start, char *end)
+{
+  PyObjectDecoder *decoder = (PyObjectDecoder *) prv;
+  KeyCacheEntry *entry;
+  size_t len = end - start;
+  JSUINT32 hash = 2166136261U;
+  PyObject *key;
+  char *ptr;
+
+  if (len > KEY_CACHE_MAX_LENGTH)
+  {
+    return Object_newASCIIString(prv, start, end);
+  }
+
+  if (!decoder->keyCache)
+  {
+    decoder->keyCache = (KeyCacheEntry *) PyObject_Malloc(KEY_CACHE_SIZE * sizeof(KeyCacheEntry));
+    if (!decoder->keyCache)
+    {
+      PyErr_NoMemory();
+      return NULL;
+    }
+    memset(decoder->keyCache, 0, KEY_CACHE_SIZE * sizeof(KeyCacheEntry));
+  }
+
+  // FNV-1a
+  for (ptr = start; ptr < end; ptr ++)
+  {
+    hash = (hash ^ (JSUINT8) *ptr) * 16777619U;
+  }
+
+  entry = &decoder->keyCache[hash & (KEY_CACHE_SIZE - 1)];
+
+  if (entry->key && entry->len == len && memcmp(entry->data, start, len) == 0)
+  {
+    Py_INCREF(entry->key);
+    return entry->key;
+  }
+
+  key = Object_newASCIIString(prv, start, end);
+  if (!key)
+  {
+    return NULL;
+  }
+
+  if (PyObject_Hash(key) == -1)
+  {
+    Py_DECREF(key);
+    return NULL;
+  }
+
+  Py_XDECREF(entry->key);
+  Py_INCREF(key);
+  entry->key = key;
+  entry->len = len;
+  memcpy(entry->data, start, len);
+  return key;
+}
+
+static void Object_releaseKeyCache(PyObjectDecoder *decoder)
+{
+  int index;
+
+  if (!decoder->keyCache)
+  {
+    return;
+  }
+
+  for (index = 0; index < KEY_CACHE_SIZE; index ++)
+  {
+    Py_XDECREF(decoder->keyCache[index].key);
+  }
+
+  PyObject_Free(decoder->keyCache);
+  decoder->keyCache = NULL;
+}
+
 JSOBJ Object_newTrue(void *prv)
 {
   Py_RETURN_TRUE;
@@ -131,145 +428,2750 @@ JSOBJ Object_newDouble(void *prv, double value)
   return PyFloat_FromDouble(value);
 }
 
+static PyObject *type_decimal = NULL;
+
+JSOBJ Object_newDecimal(void *prv, char *start, char *end)
+{
+  PyObject *text = Object_newASCIIString(prv, start, end);
+  PyObject *ret;
+
+  if (text == NULL)
+  {
+    return NULL;
+  }
+
+#if PY_VERSION_HEX >= 0x03090000
+  ret = PyObject_CallOneArg(type_decimal, text);
+#else
+  ret = PyObject_CallFunctionObjArgs(type_decimal, text, NULL);
+#endif
+  Py_DECREF(text);
+  return ret;
+}
+
 static void Object_releaseObject(void *prv, JSOBJ obj)
 {
   Py_DECREF( ((PyObject *)obj));
 }
 
-static char *g_kwlist[] = {"obj", "precise_float", NULL};
-
-PyObject* JSONToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+/*
+Sets up the decoder options. Returns 0 with an exception set for invalid options */
+static int initPyObjectDecoder(PyObjectDecoder *pyDecoder, PyObject *opreciseFloat, PyObject *ocacheKeys, PyObject *odateMode, PyObject *ouseDecimal)
 {
-  PyObject *ret;
-  PyObject *sarg;
-  PyObject *arg;
-  PyObject *opreciseFloat = NULL;
-  JSONObjectDecoder decoder =
-  {
-    Object_newString,
-    Object_objectAddKey,
-    Object_arrayAddItem,
-    Object_newTrue,
-    Object_newFalse,
-    Object_newNull,
-    Object_newObject,
-    Object_newArray,
-    Object_newInteger,
-    Object_newLong,
-    Object_newBigInt,
-    Object_newDouble,
-    Object_releaseObject,
-    PyObject_Malloc,
-    PyObject_Free,
-    PyObject_Realloc
+  PyObject *mod_decimal;
+
+  PyObjectDecoder defaults =
+  {
+    {
+      Object_newString,
+      Object_newASCIIString,
+      Object_newASCIIString,
+      Object_objectAddKey,
+      Object_arrayAddItem,
+      Object_newTrue,
+      Object_newFalse,
+      Object_newNull,
+      Object_newObject,
+      Object_newArray,
+      Object_newInteger,
+      Object_newLong,
+      Object_newBigInt,
+      Object_newDouble,
+      Object_releaseObject,
+      PyObject_Malloc,
+      PyObject_Free,
+      PyObject_Realloc
+    }
   };
 
-  decoder.preciseFloat = 0;
-  decoder.prv = NULL;
+  *pyDecoder = defaults;
+  pyDecoder->dec.preciseFloat = 1;
+  pyDecoder->dec.prv = pyDecoder;
+  pyDecoder->keyCache = NULL;
 
-  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", g_kwlist, &arg, &opreciseFloat))
+  // precise_float=False picks the old decoder, which is off in the last digits
+  if (opreciseFloat && !PyObject_IsTrue(opreciseFloat))
   {
-      return NULL;
+    pyDecoder->dec.preciseFloat = 0;
   }
 
-  if (opreciseFloat && PyObject_IsTrue(opreciseFloat))
+  if (ocacheKeys && PyObject_IsTrue(ocacheKeys))
   {
-      decoder.preciseFloat = 1;
+    pyDecoder->dec.newASCIIKey = Object_newCachedKey;
   }
 
-  if (PyString_Check(arg))
-  {
-      sarg = arg;
-  }
-  else
-  if (PyUnicode_Check(arg))
+  if (odateMode && odateMode != Py_None)
   {
-    sarg = PyUnicode_AsUTF8String(arg);
-    if (sarg == NULL)
+#if PY_MAJOR_VERSION >= 3
+    if (!PyUnicode_Check(odateMode) || PyUnicode_CompareWithASCIIString(odateMode, "iso") != 0)
+#else
+    if (!PyString_Check(odateMode) || strcmp(PyString_AS_STRING(odateMode), "iso") != 0)
+#endif
     {
-      //Exception raised above us by codec according to docs
-      return NULL;
+      PyErr_Format (PyExc_ValueError, "date_mode must be 'iso' or None");
+      return 0;
+    }
+
+    if (!PyDateTimeAPI)
+    {
+      PyDateTime_IMPORT;
+      if (!PyDateTimeAPI)
+      {
+        return 0;
+      }
     }
+
+    pyDecoder->dec.newASCIIString = Object_newASCIIStringOrDate;
   }
-  else
+
+  if (ouseDecimal && PyObject_IsTrue(ouseDecimal))
   {
-    PyErr_Format(PyExc_TypeError, "Expected String or Unicode");
-    return NULL;
+    if (!type_decimal)
+    {
+      mod_decimal = PyImport_ImportModule("decimal");
+      if (!mod_decimal)
+      {
+        return 0;
+      }
+
+      type_decimal = PyObject_GetAttrString(mod_decimal, "Decimal");
+      Py_DECREF(mod_decimal);
+      if (!type_decimal)
+      {
+        return 0;
+      }
+    }
+
+    pyDecoder->dec.newDecimal = Object_newDecimal;
   }
 
-  decoder.errorStr = NULL;
-  decoder.errorOffset = NULL;
+  return 1;
+}
 
-  ret = JSON_DecodeObject(&decoder, PyString_AS_STRING(sarg), PyString_GET_SIZE(sarg));
+/*
+Builds the Python object for the tape entry at *index and its descendants, advancing *index past them */
+static PyObject *Object_fromTape(PyObjectDecoder *decoder, JSONTape *tape, size_t *index)
+{
+  JSONTapeEntry *entry = &tape->entries[(*index)++];
+  PyObject *ret;
+  PyObject *name;
+  PyObject *value;
+  size_t item;
+  char *start;
 
-  if (sarg != arg)
+  switch (entry->type)
   {
-    Py_DECREF(sarg);
-  }
+    case JT_NULL:
+      Py_RETURN_NONE;
 
-  if (decoder.errorStr)
-  {
-    /*
-    FIXME: It's possible to give a much nicer error message here with actual failing element in input etc*/
+    case JT_TRUE:
+      Py_RETURN_TRUE;
 
-    PyErr_Format (PyExc_ValueError, "%s", decoder.errorStr);
+    case JT_FALSE:
+      Py_RETURN_FALSE;
 
-    if (ret)
-    {
-        Py_DECREF( (PyObject *) ret);
-    }
+    case JT_INT:
+      return PyInt_FromLong((long) entry->value.longValue);
 
-    return NULL;
+    case JT_LONG:
+      return PyLong_FromLongLong(entry->value.longValue);
+
+    case JT_DOUBLE:
+      if (entry->flags & JTF_DECIMAL)
+      {
+        start = (char *) entry->value.ascii.start;
+        return Object_newDecimal(decoder, start, start + entry->value.ascii.length);
+      }
+
+      return PyFloat_FromDouble(entry->value.doubleValue);
+
+    case JT_BIGINT:
+      start = (char *) entry->value.ascii.start;
+      return Object_newBigInt(decoder, start, start + entry->value.ascii.length);
+
+    case JT_UTF8:
+      if (entry->flags & JTF_WIDE)
+      {
+        return PyUnicode_FromWideChar(tape->strings + entry->value.wide.offset, entry->value.wide.length);
+      }
+
+      start = (char *) entry->value.ascii.start;
+
+      if (entry->flags & JTF_KEY)
+      {
+        return decoder->dec.newASCIIKey(decoder, start, start + entry->value.ascii.length);
+      }
+
+      return decoder->dec.newASCIIString(decoder, start, start + entry->value.ascii.length);
+
+    case JT_ARRAY:
+      ret = PyList_New(entry->value.container.count);
+
+      if (ret == NULL)
+      {
+        return NULL;
+      }
+
+      for (item = 0; item < entry->value.container.count; item ++)
+      {
+        value = Object_fromTape(decoder, tape, index);
+
+        if (value == NULL)
+        {
+          Py_DECREF(ret);
+          return NULL;
+        }
+
+        PyList_SET_ITEM(ret, item, value);
+      }
+
+      return ret;
+
+    case JT_OBJECT:
+      ret = PyDict_New();
+
+      if (ret == NULL)
+      {
+        return NULL;
+      }
+
+      for (item = 0; item < entry->value.container.count; item ++)
+      {
+        name = Object_fromTape(decoder, tape, index);
+
+        if (name == NULL)
+        {
+          Py_DECREF(ret);
+          return NULL;
+        }
+
+        value = Object_fromTape(decoder, tape, index);
+
+        if (value == NULL || PyDict_SetItem(ret, name, value) == -1)
+        {
+          Py_XDECREF(value);
+          Py_DECREF(name);
+          Py_DECREF(ret);
+          return NULL;
+        }
+
+        Py_DECREF(name);
+        Py_DECREF(value);
+      }
+
+      return ret;
   }
 
-  return ret;
+  PyErr_Format (PyExc_SystemError, "Invalid tape entry");
+  return NULL;
 }
 
-PyObject* JSONFileToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+/*
+Decodes into a tape with the GIL released and then builds the Python objects from the tape */
+static PyObject *Object_decodeTape(PyObjectDecoder *decoder, const char *buffer, size_t cbBuffer, int unterminated)
 {
-  PyObject *read;
-  PyObject *string;
-  PyObject *result;
-  PyObject *file = NULL;
-  PyObject *argtuple;
+  JSONTape tape;
+  PyObject *ret = NULL;
+  size_t index = 0;
+  int success;
 
-  if (!PyArg_ParseTuple (args, "O", &file))
+  JSON_InitTape(&tape);
+  tape.preciseFloat = decoder->dec.preciseFloat;
+  tape.decimal = decoder->dec.newDecimal != NULL;
+  tape.unterminated = unterminated;
+
+  Py_BEGIN_ALLOW_THREADS
+  success = JSON_DecodeTape(&tape, buffer, cbBuffer);
+  Py_END_ALLOW_THREADS
+
+  if (success)
   {
-    return NULL;
+    ret = Object_fromTape(decoder, &tape, &index);
   }
-
-  if (!PyObject_HasAttrString (file, "read"))
+  else
   {
-    PyErr_Format (PyExc_TypeError, "expected file");
-    return NULL;
+    decoder->dec.errorStr = tape.errorStr;
+    decoder->dec.errorOffset = tape.errorOffset;
   }
 
-  read = PyObject_GetAttrString (file, "read");
+  JSON_FreeTape(&tape);
+  return ret;
+}
 
-  if (!PyCallable_Check (read)) {
-    Py_XDECREF(read);
-    PyErr_Format (PyExc_TypeError, "expected file");
-    return NULL;
-  }
+/*
+Decodes in place without reading past the end of the buffer, for input which isn't followed by a
+NUL byte. The stream decoder checks every read against the end of the buffer */
+static PyObject *Object_decodeUnterminated(PyObjectDecoder *decoder, const char *buffer, size_t cbBuffer)
+{
+  JSONStreamDecoder sd;
+  PyObject *ret = NULL;
 
-  string = PyObject_CallObject (read, NULL);
-  Py_XDECREF(read);
+  JSON_InitStreamDecoder(&sd, (JSONObjectDecoder *) decoder);
 
-  if (string == NULL)
+  if (JSON_DecodeChunk(&sd, buffer, cbBuffer, 1) == 1)
   {
-    return NULL;
+    ret = (PyObject *) sd.result;
+    sd.result = NULL;
+    JSON_ReleaseStreamDecoder(&sd);
   }
 
-  argtuple = PyTuple_Pack(1, string);
+  return ret;
+}
 
-  result = JSONToObj (self, argtuple, kwargs);
+/*
+The input of a decode call. bytes, ASCII only str and any object supporting the buffer protocol
+(bytearray, memoryview, mmap, array...) are decoded in place. Other str objects are encoded to UTF-8 */
+typedef struct __DecoderInput
+{
+  PyObject *obj;
+  Py_buffer view;
+  int hasView;
+  const char *data;
+  Py_ssize_t size;
 
-  Py_XDECREF(argtuple);
+  // Set if data[size] is a readable NUL byte
+  int terminated;
+} DecoderInput;
+
+static void DecoderInput_release(DecoderInput *input)
+{
+  if (input->hasView)
+  {
+    PyBuffer_Release(&input->view);
+    input->hasView = 0;
+  }
+
+  Py_CLEAR(input->obj);
+}
+
+static int DecoderInput_get(DecoderInput *input, PyObject *arg, int requireTerminated)
+{
+  memset(input, 0, sizeof(DecoderInput));
+
+  if (PyString_Check(arg))
+  {
+    Py_INCREF(arg);
+    input->obj = arg;
+    input->data = PyString_AS_STRING(arg);
+    input->size = PyString_GET_SIZE(arg);
+    input->terminated = 1;
+    return 0;
+  }
+
+  if (PyUnicode_Check(arg))
+  {
+#if PY_MAJOR_VERSION >= 3 && PY_MINOR_VERSION >= 3
+#if PY_MINOR_VERSION < 12
+    if (PyUnicode_READY(arg) == -1)
+    {
+      return -1;
+    }
+#endif
+
+    // The UTF-8 form of an ASCII only str is its own NUL terminated data
+    if (PyUnicode_IS_ASCII(arg))
+    {
+      input->data = PyUnicode_AsUTF8AndSize(arg, &input->size);
+      if (input->data == NULL)
+      {
+        return -1;
+      }
+
+      Py_INCREF(arg);
+      input->obj = arg;
+      input->terminated = 1;
+      return 0;
+    }
+#endif
+
+    input->obj = PyUnicode_AsUTF8String(arg);
+    if (input->obj == NULL)
+    {
+      //Exception raised above us by codec according to docs
+      return -1;
+    }
+
+    input->data = PyString_AS_STRING(input->obj);
+    input->size = PyString_GET_SIZE(input->obj);
+    input->terminated = 1;
+    return 0;
+  }
+
+  if (PyObject_CheckBuffer(arg))
+  {
+    if (PyObject_GetBuffer(arg, &input->view, PyBUF_SIMPLE) == -1)
+    {
+      return -1;
+    }
+
+    input->hasView = 1;
+    input->data = (const char *) input->view.buf;
+    input->size = input->view.len;
+
+    // bytearray keeps a NUL byte after its data, other exporters make no such promise
+    input->terminated = PyByteArray_Check(arg) && input->view.len == PyByteArray_GET_SIZE(arg);
+  }
+#if PY_MAJOR_VERSION < 3
+  else
+  if (PyObject_CheckReadBuffer(arg))
+  {
+    if (PyObject_AsReadBuffer(arg, (const void **) &input->data, &input->size) == -1)
+    {
+      return -1;
+    }
+
+    Py_INCREF(arg);
+    input->obj = arg;
+  }
+#endif
+  else
+  {
+    PyErr_Format(PyExc_TypeError, "Expected String, Unicode or buffer");
+    return -1;
+  }
+
+  if (requireTerminated && !input->terminated)
+  {
+    arg = PyBytes_FromStringAndSize(input->data, input->size);
+    DecoderInput_release(input);
+
+    if (arg == NULL)
+    {
+      return -1;
+    }
+
+    input->obj = arg;
+    input->data = PyString_AS_STRING(arg);
+    input->size = PyString_GET_SIZE(arg);
+    input->terminated = 1;
+  }
+
+  return 0;
+}
+
+static PyObject *Object_decodeInput(PyObjectDecoder *pyDecoder, DecoderInput *input, int releaseGIL)
+{
+  JSONObjectDecoder *decoder = (JSONObjectDecoder *) pyDecoder;
+  PyObject *ret;
+
+  decoder->errorStr = NULL;
+  decoder->errorOffset = NULL;
+
+  if (releaseGIL)
+  {
+    ret = Object_decodeTape(pyDecoder, input->data, input->size, !input->terminated);
+  }
+  else
+  if (input->terminated)
+  {
+    ret = JSON_DecodeObject(decoder, input->data, input->size);
+  }
+  else
+  {
+    ret = Object_decodeUnterminated(pyDecoder, input->data, input->size);
+  }
+
+  if (decoder->errorStr)
+  {
+    /*
+    FIXME: It's possible to give a much nicer error message here with actual failing element in input etc*/
+
+    PyErr_Format (PyExc_ValueError, "%s", decoder->errorStr);
+
+    if (ret)
+    {
+        Py_DECREF( (PyObject *) ret);
+    }
+
+    return NULL;
+  }
+
+  return ret;
+}
+
+/*
+keep= projects decoded objects onto a spec of the keys to keep, a dict mapping each key to True to
+keep its value whole or to the spec for its value. The spec of an array applies to each of its
+items. The values of other keys are skipped over with the decoder filters, see
+JSONObjectDecoder.filterKey, without making any Python objects for them */
+typedef struct __PyKeepDecoder
+{
+  PyObjectDecoder pyDecoder;
+
+  // Spec by depth of the container being decoded, specs[0] is unused. NULL without keep=
+  PyObject **specs;
+} PyKeepDecoder;
+
+static int Keep_filterKey(void *prv, JSUINT32 depth, JSOBJ name)
+{
+  PyKeepDecoder *kd = (PyKeepDecoder *) prv;
+  PyObject *spec = PyDict_GetItem(kd->specs[depth], (PyObject *) name);
+
+  if (spec == NULL)
+  {
+    return JSF_SKIP;
+  }
+
+  if (PyDict_Check(spec))
+  {
+    kd->specs[depth + 1] = spec;
+    return JSF_DESCEND;
+  }
+
+  switch (PyObject_IsTrue(spec))
+  {
+    case -1:
+      return JSF_ERROR;
+
+    case 0:
+      return JSF_SKIP;
+  }
+
+  return JSF_KEEP;
+}
+
+static int Keep_filterItem(void *prv, JSUINT32 depth, size_t index)
+{
+  PyKeepDecoder *kd = (PyKeepDecoder *) prv;
+  kd->specs[depth + 1] = kd->specs[depth];
+  return JSF_DESCEND;
+}
+
+/*
+Sets up the filters for keep, nothing if it's NULL or None. Returns 0 with an exception set on
+failure */
+static int Keep_init(PyKeepDecoder *kd, PyObject *okeep)
+{
+  kd->specs = NULL;
+
+  if (okeep == NULL || okeep == Py_None)
+  {
+    return 1;
+  }
+
+  if (!PyDict_Check(okeep))
+  {
+    PyErr_Format (PyExc_TypeError, "keep must be a dict");
+    return 0;
+  }
+
+  // Arrays carry their spec down to their items, so any depth may need one
+  kd->specs = (PyObject **) PyMem_Malloc((JSON_MAX_OBJECT_DEPTH + 2) * sizeof(PyObject *));
+  if (kd->specs == NULL)
+  {
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  memset(kd->specs, 0, (JSON_MAX_OBJECT_DEPTH + 2) * sizeof(PyObject *));
+  kd->specs[1] = okeep;
+
+  // Every key is looked up in a spec, cached keys save making most of them and hashing them again
+  kd->pyDecoder.dec.newASCIIKey = Object_newCachedKey;
+  kd->pyDecoder.dec.filterKey = Keep_filterKey;
+  kd->pyDecoder.dec.filterItem = Keep_filterItem;
+  kd->pyDecoder.dec.prv = kd;
+  return 1;
+}
+
+static void Keep_free(PyKeepDecoder *kd)
+{
+  PyMem_Free(kd->specs);
+}
+
+static char *g_kwlist[] = {"obj", "precise_float", "cache_keys", "release_gil", "date_mode", "use_decimal", "keep", NULL};
+
+PyObject* JSONToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *ret;
+  PyObject *arg;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *oreleaseGIL = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+  PyObject *okeep = NULL;
+  PyKeepDecoder kd;
+  DecoderInput input;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOOOOO", g_kwlist, &arg, &opreciseFloat, &ocacheKeys, &oreleaseGIL, &odateMode, &ouseDecimal, &okeep))
+  {
+      return NULL;
+  }
+
+  if (!initPyObjectDecoder(&kd.pyDecoder, opreciseFloat, ocacheKeys, odateMode, ouseDecimal) || !Keep_init(&kd, okeep))
+  {
+    return NULL;
+  }
+
+  // The filters are only called by the in place decoder, which needs a NUL byte after the input
+  if (DecoderInput_get(&input, arg, kd.specs != NULL) == -1)
+  {
+    Keep_free(&kd);
+    return NULL;
+  }
+
+  ret = Object_decodeInput(&kd.pyDecoder, &input, kd.specs == NULL && oreleaseGIL && PyObject_IsTrue(oreleaseGIL));
+  Object_releaseKeyCache(&kd.pyDecoder);
+  Keep_free(&kd);
+  DecoderInput_release(&input);
+  return ret;
+}
+
+static char *g_linesKwlist[] = {"obj", "precise_float", "cache_keys", "date_mode", "use_decimal", "keep", NULL};
+
+PyObject* JSONLinesToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *ret;
+  PyObject *arg;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+  PyObject *okeep = NULL;
+  JSONObjectDecoder *decoder;
+  PyKeepDecoder kd;
+  DecoderInput input;
+  const char *start;
+  const char *lineStart;
+  const char *ptr;
+  Py_ssize_t line;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOOOO", g_linesKwlist, &arg, &opreciseFloat, &ocacheKeys, &odateMode, &ouseDecimal, &okeep))
+  {
+      return NULL;
+  }
+
+  if (!initPyObjectDecoder(&kd.pyDecoder, opreciseFloat, ocacheKeys, odateMode, ouseDecimal) || !Keep_init(&kd, okeep))
+  {
+    return NULL;
+  }
+  decoder = (JSONObjectDecoder *) &kd.pyDecoder;
+
+  // Lines are decoded in place, which needs a NUL byte after the last one
+  if (DecoderInput_get(&input, arg, 1) == -1)
+  {
+    Keep_free(&kd);
+    return NULL;
+  }
+
+  start = input.data;
+  ret = JSON_DecodeLines(decoder, start, input.size);
+
+  Object_releaseKeyCache(&kd.pyDecoder);
+  Keep_free(&kd);
+
+  if (decoder->errorStr)
+  {
+    // Report the line (counting from 1) and the byte offset inside it
+    line = 1;
+    lineStart = start;
+
+    for (ptr = start; ptr < decoder->errorOffset; ptr ++)
+    {
+      if (*ptr == '\n')
+      {
+        line ++;
+        lineStart = ptr + 1;
+      }
+    }
+
+    PyErr_Format (PyExc_ValueError, "%s (line %zd, offset %zd)", decoder->errorStr, line, (Py_ssize_t) (decoder->errorOffset - lineStart));
+  }
+
+  DecoderInput_release(&input);
+  return ret;
+}
+
+/*
+ujson.loads_many decodes every document into a tape of its own on native worker threads which take
+the next document from a shared counter. The Python objects are built afterwards with the GIL held */
+typedef struct __TapeJob
+{
+  DecoderInput input;
+  JSONTape tape;
+  int success;
+} TapeJob;
+
+typedef struct __TapeWorkers
+{
+  TapeJob *jobs;
+  Py_ssize_t cbJobs;
+  Py_ssize_t next;
+  int running;
+  PyThread_type_lock lock;
+  PyThread_type_lock done;
+} TapeWorkers;
+
+static void TapeWorkers_run(void *arg)
+{
+  TapeWorkers *workers = (TapeWorkers *) arg;
+  TapeJob *job;
+  Py_ssize_t index;
+  int last;
+
+  for (;;)
+  {
+    PyThread_acquire_lock(workers->lock, WAIT_LOCK);
+    index = workers->next++;
+    PyThread_release_lock(workers->lock);
+
+    if (index >= workers->cbJobs)
+    {
+      break;
+    }
+
+    job = &workers->jobs[index];
+    job->success = JSON_DecodeTape(&job->tape, job->input.data, job->input.size);
+  }
+
+  PyThread_acquire_lock(workers->lock, WAIT_LOCK);
+  last = (--workers->running == 0);
+  PyThread_release_lock(workers->lock);
+
+  // The caller frees the locks once done is released, so that must be the last thing touched here
+  if (last)
+  {
+    PyThread_release_lock(workers->done);
+  }
+}
+
+static char *g_manyKwlist[] = {"obj", "workers", "precise_float", "cache_keys", "date_mode", "use_decimal", NULL};
+
+PyObject* JSONManyToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *seq;
+  PyObject *ret = NULL;
+  PyObject *value;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+  PyObjectDecoder pyDecoder;
+  TapeWorkers workers;
+  TapeJob *job;
+  Py_ssize_t index;
+  Py_ssize_t cbWorkers = 1;
+  Py_ssize_t started;
+  size_t tapeIndex;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|nOOOO", g_manyKwlist, &arg, &cbWorkers, &opreciseFloat, &ocacheKeys, &odateMode, &ouseDecimal))
+  {
+    return NULL;
+  }
+
+  if (cbWorkers < 1)
+  {
+    PyErr_Format (PyExc_ValueError, "workers must be positive");
+    return NULL;
+  }
+
+  seq = PySequence_Fast(arg, "Expected a sequence of strings");
+  if (seq == NULL)
+  {
+    return NULL;
+  }
+
+  if (!initPyObjectDecoder(&pyDecoder, opreciseFloat, ocacheKeys, odateMode, ouseDecimal))
+  {
+    Py_DECREF(seq);
+    return NULL;
+  }
+
+  memset(&workers, 0, sizeof(TapeWorkers));
+  workers.cbJobs = PySequence_Fast_GET_SIZE(seq);
+  workers.jobs = (TapeJob *) PyMem_Malloc((workers.cbJobs ? workers.cbJobs : 1) * sizeof(TapeJob));
+
+  if (workers.jobs == NULL)
+  {
+    PyErr_NoMemory();
+    workers.cbJobs = 0;
+    goto END;
+  }
+
+  // Hold on to the data of every document while the workers run
+  for (index = 0; index < workers.cbJobs; index ++)
+  {
+    job = &workers.jobs[index];
+
+    if (DecoderInput_get(&job->input, PySequence_Fast_GET_ITEM(seq, index), 0) == -1)
+    {
+      workers.cbJobs = index;
+      goto END;
+    }
+
+    job->success = 0;
+    JSON_InitTape(&job->tape);
+    job->tape.preciseFloat = pyDecoder.dec.preciseFloat;
+    job->tape.decimal = pyDecoder.dec.newDecimal != NULL;
+    job->tape.unterminated = !job->input.terminated;
+  }
+
+  if (cbWorkers > workers.cbJobs)
+  {
+    cbWorkers = workers.cbJobs ? workers.cbJobs : 1;
+  }
+
+  workers.lock = PyThread_allocate_lock();
+  workers.done = PyThread_allocate_lock();
+
+  if (workers.lock == NULL || workers.done == NULL)
+  {
+    PyErr_Format (PyExc_RuntimeError, "Could not allocate lock");
+    goto END;
+  }
+
+  PyThread_acquire_lock(workers.done, WAIT_LOCK);
+
+  Py_BEGIN_ALLOW_THREADS
+
+  // The calling thread is a worker too, so it's fine if fewer threads could be started
+  workers.running = 1;
+
+  for (started = 1; started < cbWorkers; started ++)
+  {
+    PyThread_acquire_lock(workers.lock, WAIT_LOCK);
+    workers.running ++;
+    PyThread_release_lock(workers.lock);
+
+    if ((long) PyThread_start_new_thread(TapeWorkers_run, &workers) == -1)
+    {
+      PyThread_acquire_lock(workers.lock, WAIT_LOCK);
+      workers.running --;
+      PyThread_release_lock(workers.lock);
+      break;
+    }
+  }
+
+  TapeWorkers_run(&workers);
+  PyThread_acquire_lock(workers.done, WAIT_LOCK);
+  PyThread_release_lock(workers.done);
+
+  Py_END_ALLOW_THREADS
+
+  ret = PyList_New(workers.cbJobs);
+  if (ret == NULL)
+  {
+    goto END;
+  }
+
+  for (index = 0; index < workers.cbJobs; index ++)
+  {
+    job = &workers.jobs[index];
+
+    if (!job->success)
+    {
+      PyErr_Format (PyExc_ValueError, "%s (document %zd)", job->tape.errorStr, index);
+      Py_CLEAR(ret);
+      goto END;
+    }
+
+    tapeIndex = 0;
+    value = Object_fromTape(&pyDecoder, &job->tape, &tapeIndex);
+
+    if (value == NULL)
+    {
+      Py_CLEAR(ret);
+      goto END;
+    }
+
+    PyList_SET_ITEM(ret, index, value);
+
+    // Drop each tape as soon as it's used to keep the peak memory down
+    JSON_FreeTape(&job->tape);
+  }
+
+END:
+  if (workers.jobs)
+  {
+    for (index = 0; index < workers.cbJobs; index ++)
+    {
+      JSON_FreeTape(&workers.jobs[index].tape);
+      DecoderInput_release(&workers.jobs[index].input);
+    }
+
+    PyMem_Free(workers.jobs);
+  }
+
+  if (workers.lock)
+  {
+    PyThread_free_lock(workers.lock);
+  }
+
+  if (workers.done)
+  {
+    PyThread_free_lock(workers.done);
+  }
+
+  Object_releaseKeyCache(&pyDecoder);
+  Py_DECREF(seq);
+  return ret;
+}
+
+/*
+ujson.Decoder, decodes a document which arrives in pieces through feed(). Open containers and any
+string or number cut off at the end of a piece are kept in the stream decoder between calls */
+typedef struct __DecoderObject
+{
+  PyObject_HEAD
+  PyObjectDecoder pyDecoder;
+  JSONStreamDecoder stream;
+  PyObject *result;
+} DecoderObject;
+
+static void Decoder_reset(DecoderObject *self)
+{
+  if (self->stream.dec)
+  {
+    JSON_ReleaseStreamDecoder(&self->stream);
+  }
+
+  Object_releaseKeyCache(&self->pyDecoder);
+  Py_CLEAR(self->result);
+}
+
+static char *g_decoderKwlist[] = {"precise_float", "cache_keys", "date_mode", "use_decimal", NULL};
+
+static int Decoder_init(DecoderObject *self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|OOOO", g_decoderKwlist, &opreciseFloat, &ocacheKeys, &odateMode, &ouseDecimal))
+  {
+    return -1;
+  }
+
+  Decoder_reset(self);
+  if (!initPyObjectDecoder(&self->pyDecoder, opreciseFloat, ocacheKeys, odateMode, ouseDecimal))
+  {
+    return -1;
+  }
+  JSON_InitStreamDecoder(&self->stream, (JSONObjectDecoder *) &self->pyDecoder);
+  return 0;
+}
+
+static void Decoder_dealloc(DecoderObject *self)
+{
+  Decoder_reset(self);
+  Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static int Decoder_decodeChunk(DecoderObject *self, const char *buffer, size_t cbBuffer, int final)
+{
+  int ret;
+
+  if (!self->stream.dec)
+  {
+    PyErr_Format (PyExc_ValueError, "Decoder is not initialized");
+    return -1;
+  }
+
+  ret = JSON_DecodeChunk(&self->stream, buffer, cbBuffer, final);
+
+  if (ret < 0)
+  {
+    if (self->pyDecoder.dec.errorStr)
+    {
+      PyErr_Format (PyExc_ValueError, "%s", self->pyDecoder.dec.errorStr);
+    }
+
+    Decoder_reset(self);
+    return -1;
+  }
+
+  if (self->stream.result)
+  {
+    self->result = (PyObject *) self->stream.result;
+    self->stream.result = NULL;
+    return 1;
+  }
+
+  return 0;
+}
+
+static PyObject *Decoder_feed(DecoderObject *self, PyObject *arg)
+{
+  DecoderInput input;
+  int ret;
+
+  // The stream decoder never reads past the end of a piece
+  if (DecoderInput_get(&input, arg, 0) == -1)
+  {
+    return NULL;
+  }
+
+  ret = Decoder_decodeChunk(self, input.data, input.size, 0);
+  DecoderInput_release(&input);
+
+  if (ret < 0)
+  {
+    return NULL;
+  }
+
+  if (ret == 0)
+  {
+    Py_RETURN_NONE;
+  }
+
+  Py_INCREF(self->result);
+  return self->result;
+}
+
+/*
+Decodes a complete document with the decoder's options. The key cache is kept between calls, so
+documents with the same keys share the key objects */
+static PyObject *Decoder_decode(DecoderObject *self, PyObject *arg)
+{
+  DecoderInput input;
+  PyObject *ret;
+
+  if (!self->stream.dec)
+  {
+    PyErr_Format (PyExc_ValueError, "Decoder is not initialized");
+    return NULL;
+  }
+
+  if (DecoderInput_get(&input, arg, 0) == -1)
+  {
+    return NULL;
+  }
+
+  ret = Object_decodeInput(&self->pyDecoder, &input, 0);
+  DecoderInput_release(&input);
+  return ret;
+}
+
+static PyObject *Decoder_close(DecoderObject *self)
+{
+  PyObject *result;
+
+  if (Decoder_decodeChunk(self, "", 0, 1) < 0)
+  {
+    return NULL;
+  }
+
+  result = self->result;
+  self->result = NULL;
+  Decoder_reset(self);
+  return result;
+}
+
+static PyMethodDef Decoder_methods[] = {
+  {"feed", (PyCFunction) Decoder_feed, METH_O, "Decodes the next piece of a JSON document. Returns the decoded object once the document is complete, otherwise None."},
+  {"decode", (PyCFunction) Decoder_decode, METH_O, "Converts a complete JSON document as string or buffer to dict object structure. Doesn't affect a document being fed."},
+  {"close", (PyCFunction) Decoder_close, METH_NOARGS, "Ends the input and returns the decoded object. Raises ValueError if the document is incomplete. The decoder can then be fed the next document."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+PyTypeObject DecoderType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ujson.Decoder",                /* tp_name */
+  sizeof(DecoderObject),          /* tp_basicsize */
+  0,                              /* tp_itemsize */
+  (destructor) Decoder_dealloc,   /* tp_dealloc */
+  0,                              /* tp_print */
+  0,                              /* tp_getattr */
+  0,                              /* tp_setattr */
+  0,                              /* tp_compare */
+  0,                              /* tp_repr */
+  0,                              /* tp_as_number */
+  0,                              /* tp_as_sequence */
+  0,                              /* tp_as_mapping */
+  0,                              /* tp_hash */
+  0,                              /* tp_call */
+  0,                              /* tp_str */
+  0,                              /* tp_getattro */
+  0,                              /* tp_setattro */
+  0,                              /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,             /* tp_flags */
+  "Reusable and incremental JSON decoder. Decode complete documents or feed it a document in pieces as they arrive. Floats are decoded exactly; use precise_float=False for the older, less precise float decoder. Set cache_keys=True to share one string object between repeated object keys. Set date_mode='iso' to decode ISO 8601 strings to dates and times. Set use_decimal=True to decode non-integer numbers exactly as Decimal.", /* tp_doc */
+  0,                              /* tp_traverse */
+  0,                              /* tp_clear */
+  0,                              /* tp_richcompare */
+  0,                              /* tp_weaklistoffset */
+  0,                              /* tp_iter */
+  0,                              /* tp_iternext */
+  Decoder_methods,                /* tp_methods */
+  0,                              /* tp_members */
+  0,                              /* tp_getset */
+  0,                              /* tp_base */
+  0,                              /* tp_dict */
+  0,                              /* tp_descr_get */
+  0,                              /* tp_descr_set */
+  0,                              /* tp_dictoffset */
+  (initproc) Decoder_init,        /* tp_init */
+  0,                              /* tp_alloc */
+  PyType_GenericNew,              /* tp_new */
+};
+
+static PyObject *JSONFileToObjChunked(PyObject *read, PyObject *kwargs, Py_ssize_t chunkSize)
+{
+  PyObject *args;
+  PyObject *string;
+  DecoderObject *decoder;
+  PyObject *result;
+
+  args = PyTuple_New(0);
+  if (args == NULL)
+  {
+    return NULL;
+  }
+
+  decoder = (DecoderObject *) PyObject_Call((PyObject *) &DecoderType, args, kwargs);
+  Py_DECREF(args);
+
+  if (decoder == NULL)
+  {
+    return NULL;
+  }
+
+  for (;;)
+  {
+    string = PyObject_CallFunction (read, "n", chunkSize);
+
+    if (string == NULL)
+    {
+      Py_DECREF(decoder);
+      return NULL;
+    }
+
+    if (PyObject_Size(string) <= 0)
+    {
+      Py_DECREF(string);
+      break;
+    }
+
+    result = Decoder_feed(decoder, string);
+    Py_DECREF(string);
+
+    if (result == NULL)
+    {
+      Py_DECREF(decoder);
+      return NULL;
+    }
+
+    Py_DECREF(result);
+  }
+
+  if (PyErr_Occurred())
+  {
+    Py_DECREF(decoder);
+    return NULL;
+  }
+
+  result = Decoder_close(decoder);
+  Py_DECREF(decoder);
+  return result;
+}
+
+PyObject* JSONFileToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *read;
+  PyObject *string;
+  PyObject *result;
+  PyObject *file = NULL;
+  PyObject *argtuple;
+  PyObject *ochunkSize = NULL;
+  Py_ssize_t chunkSize;
+
+  if (!PyArg_ParseTuple (args, "O", &file))
+  {
+    return NULL;
+  }
+
+  if (!PyObject_HasAttrString (file, "read"))
+  {
+    PyErr_Format (PyExc_TypeError, "expected file");
+    return NULL;
+  }
+
+  read = PyObject_GetAttrString (file, "read");
+
+  if (!PyCallable_Check (read)) {
+    Py_XDECREF(read);
+    PyErr_Format (PyExc_TypeError, "expected file");
+    return NULL;
+  }
+
+  if (kwargs)
+  {
+    ochunkSize = PyDict_GetItemString (kwargs, "chunk_size");
+  }
+
+  if (ochunkSize)
+  {
+    chunkSize = PyNumber_AsSsize_t (ochunkSize, PyExc_OverflowError);
+
+    if (chunkSize == -1 && PyErr_Occurred())
+    {
+      Py_XDECREF(read);
+      return NULL;
+    }
+
+    if (chunkSize < 1)
+    {
+      Py_XDECREF(read);
+      PyErr_Format (PyExc_ValueError, "chunk_size must be positive");
+      return NULL;
+    }
+
+    // The remaining keyword arguments are decoder options
+    kwargs = PyDict_Copy (kwargs);
+    if (kwargs == NULL || PyDict_DelItemString (kwargs, "chunk_size") == -1)
+    {
+      Py_XDECREF(kwargs);
+      Py_XDECREF(read);
+      return NULL;
+    }
+
+    result = JSONFileToObjChunked (read, kwargs, chunkSize);
+
+    Py_DECREF(kwargs);
+    Py_XDECREF(read);
+    return result;
+  }
+
+  string = PyObject_CallObject (read, NULL);
+  Py_XDECREF(read);
+
+  if (string == NULL)
+  {
+    return NULL;
+  }
+
+  argtuple = PyTuple_Pack(1, string);
+
+  result = JSONToObj (self, argtuple, kwargs);
+
+  Py_XDECREF(argtuple);
   Py_XDECREF(string);
 
-  if (result == NULL) {
+  if (result == NULL) {
+    return NULL;
+  }
+
+  return result;
+}
+
+/*
+Calls obj.close() and returns ret, or NULL if close() failed. An exception raised before keeps
+precedence over one raised by close() */
+static PyObject *Object_closeAfter(PyObject *obj, PyObject *ret)
+{
+  PyObject *type;
+  PyObject *value;
+  PyObject *traceback;
+  PyObject *result;
+
+  if (ret == NULL)
+  {
+    PyErr_Fetch(&type, &value, &traceback);
+    result = PyObject_CallMethod(obj, "close", NULL);
+    Py_XDECREF(result);
+    PyErr_Clear();
+    PyErr_Restore(type, value, traceback);
+    return NULL;
+  }
+
+  result = PyObject_CallMethod(obj, "close", NULL);
+
+  if (result == NULL)
+  {
+    Py_DECREF(ret);
+    return NULL;
+  }
+
+  Py_DECREF(result);
+  return ret;
+}
+
+static char *g_pathKwlist[] = {"path", "precise_float", "cache_keys", "release_gil", "date_mode", "use_decimal", NULL};
+
+/*
+ujson.load_file maps the file into memory and decodes it in place. Past the end of the file the
+last page of a mapping reads as zero, so a file which doesn't fill its last page is NUL terminated */
+PyObject* JSONPathToObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *path;
+  PyObject *opreciseFloat = NULL;
+  PyObject *ocacheKeys = NULL;
+  PyObject *oreleaseGIL = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+  PyObject *io = NULL;
+  PyObject *mmap = NULL;
+  PyObject *file = NULL;
+  PyObject *mapped = NULL;
+  PyObject *mapArgs = NULL;
+  PyObject *mapKwargs = NULL;
+  PyObject *value;
+  PyObject *ret = NULL;
+  PyObjectDecoder pyDecoder;
+  DecoderInput input;
+  Py_ssize_t size;
+  Py_ssize_t pageSize;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOOOO", g_pathKwlist, &path, &opreciseFloat, &ocacheKeys, &oreleaseGIL, &odateMode, &ouseDecimal))
+  {
+    return NULL;
+  }
+
+  if (!initPyObjectDecoder(&pyDecoder, opreciseFloat, ocacheKeys, odateMode, ouseDecimal))
+  {
+    return NULL;
+  }
+  memset(&input, 0, sizeof(DecoderInput));
+
+  io = PyImport_ImportModule("io");
+  mmap = PyImport_ImportModule("mmap");
+  if (io == NULL || mmap == NULL)
+  {
+    goto END;
+  }
+
+  file = PyObject_CallMethod(io, "open", "Os", path, "rb");
+  if (file == NULL)
+  {
+    goto END;
+  }
+
+  value = PyObject_CallMethod(file, "seek", "ii", 0, 2);
+  if (value == NULL)
+  {
+    goto END;
+  }
+
+  size = PyNumber_AsSsize_t(value, PyExc_OverflowError);
+  Py_DECREF(value);
+
+  if (size == -1 && PyErr_Occurred())
+  {
+    goto END;
+  }
+
+  // An empty file can't be mapped, decode it as empty input
+  if (size == 0)
+  {
+    input.data = "";
+    input.terminated = 1;
+    ret = Object_decodeInput(&pyDecoder, &input, 0);
+    goto END;
+  }
+
+  value = PyObject_GetAttrString(mmap, "PAGESIZE");
+  if (value == NULL)
+  {
+    goto END;
+  }
+
+  pageSize = PyNumber_AsSsize_t(value, PyExc_OverflowError);
+  Py_DECREF(value);
+
+  if (pageSize == -1 && PyErr_Occurred())
+  {
+    goto END;
+  }
+
+  mapArgs = Py_BuildValue("(Ni)", PyObject_CallMethod(file, "fileno", NULL), 0);
+  mapKwargs = PyDict_New();
+  value = PyObject_GetAttrString(mmap, "ACCESS_READ");
+
+  if (mapArgs == NULL || mapKwargs == NULL || value == NULL || PyDict_SetItemString(mapKwargs, "access", value) == -1)
+  {
+    Py_XDECREF(value);
+    goto END;
+  }
+
+  Py_DECREF(value);
+
+  value = PyObject_GetAttrString(mmap, "mmap");
+  if (value == NULL)
+  {
+    goto END;
+  }
+
+  mapped = PyObject_Call(value, mapArgs, mapKwargs);
+  Py_DECREF(value);
+
+  if (mapped == NULL || DecoderInput_get(&input, mapped, 0) == -1)
+  {
+    goto END;
+  }
+
+  input.terminated = (input.size % pageSize) != 0;
+  ret = Object_decodeInput(&pyDecoder, &input, oreleaseGIL && PyObject_IsTrue(oreleaseGIL));
+
+END:
+  Object_releaseKeyCache(&pyDecoder);
+
+  // The view has to go before the mapping can be closed
+  DecoderInput_release(&input);
+
+  if (mapped)
+  {
+    ret = Object_closeAfter(mapped, ret);
+  }
+
+  if (file)
+  {
+    ret = Object_closeAfter(file, ret);
+  }
+
+  Py_XDECREF(mapped);
+  Py_XDECREF(mapArgs);
+  Py_XDECREF(mapKwargs);
+  Py_XDECREF(file);
+  Py_XDECREF(mmap);
+  Py_XDECREF(io);
+  return ret;
+}
+
+/*
+ujson.loads_lazy decodes a document into a tape, see JSON_DecodeTape, and returns read-only
+LazyObject and LazyArray proxies over its containers. An item is built from the tape the first time
+it's accessed and kept, containers as further proxies, so only the parts of a document which are used
+become Python objects. The proxies of a document share the tape and the input, which the tape points
+into, and the last one to go frees them */
+typedef struct __LazyDocument
+{
+  JSONTape tape;
+  PyObjectDecoder decoder;
+  PyObject *input;
+  size_t refs;
+} LazyDocument;
+
+typedef struct __LazyObject
+{
+  PyObject_HEAD
+  LazyDocument *doc;
+
+  // Tape entry of the container and the number of items in it
+  size_t index;
+  size_t count;
+
+  // Tape entries of the items, or the values of an object, and the ones built so far
+  size_t *offsets;
+  PyObject **items;
+
+  // The position of each key of an object in offsets
+  PyObject *names;
+} LazyObject;
+
+extern PyTypeObject LazyObjectType;
+extern PyTypeObject LazyArrayType;
+
+static void LazyDocument_release(LazyDocument *doc)
+{
+  if (-- doc->refs == 0)
+  {
+    JSON_FreeTape(&doc->tape);
+    Object_releaseKeyCache(&doc->decoder);
+    Py_XDECREF(doc->input);
+    PyMem_Free(doc);
+  }
+}
+
+static PyObject *Lazy_new(LazyDocument *doc, size_t index)
+{
+  JSONTapeEntry *entry = &doc->tape.entries[index];
+  LazyObject *self = PyObject_New(LazyObject, entry->type == JT_OBJECT ? &LazyObjectType : &LazyArrayType);
+
+  if (self == NULL)
+  {
+    return NULL;
+  }
+
+  doc->refs ++;
+  self->doc = doc;
+  self->index = index;
+  self->count = entry->value.container.count;
+  self->offsets = NULL;
+  self->items = NULL;
+  self->names = NULL;
+  return (PyObject *) self;
+}
+
+static void Lazy_dealloc(LazyObject *self)
+{
+  size_t item;
+
+  if (self->items)
+  {
+    for (item = 0; item < self->count; item ++)
+    {
+      Py_XDECREF(self->items[item]);
+    }
+  }
+
+  PyMem_Free(self->items);
+  PyMem_Free(self->offsets);
+  Py_XDECREF(self->names);
+  LazyDocument_release(self->doc);
+  PyObject_Del(self);
+}
+
+/*
+Finds the tape entries of the items, skipping over nested containers, and the keys of an object.
+Returns 0 with an exception set on failure */
+static int Lazy_index(LazyObject *self)
+{
+  JSONTape *tape = &self->doc->tape;
+  JSONTapeEntry *entry;
+  PyObject *name;
+  PyObject *position;
+  size_t next = self->index + 1;
+  size_t keyIndex;
+  size_t item;
+
+  self->offsets = (size_t *) PyMem_Malloc((self->count ? self->count : 1) * sizeof(size_t));
+  self->items = (PyObject **) PyMem_Malloc((self->count ? self->count : 1) * sizeof(PyObject *));
+  self->names = Py_TYPE(self) == &LazyObjectType ? PyDict_New() : NULL;
+
+  if (self->offsets == NULL || self->items == NULL || (Py_TYPE(self) == &LazyObjectType && self->names == NULL))
+  {
+    if (!PyErr_Occurred())
+    {
+      PyErr_NoMemory();
+    }
+    goto FAIL;
+  }
+
+  memset(self->items, 0, self->count * sizeof(PyObject *));
+
+  for (item = 0; item < self->count; item ++)
+  {
+    if (self->names)
+    {
+      // As with a dict, the last of repeated keys wins
+      keyIndex = next ++;
+      name = Object_fromTape(&self->doc->decoder, tape, &keyIndex);
+      position = PyInt_FromLong((long) item);
+
+      if (name == NULL || position == NULL || PyDict_SetItem(self->names, name, position) == -1)
+      {
+        Py_XDECREF(name);
+        Py_XDECREF(position);
+        goto FAIL;
+      }
+
+      Py_DECREF(name);
+      Py_DECREF(position);
+    }
+
+    self->offsets[item] = next;
+    entry = &tape->entries[next];
+    next = (entry->type == JT_OBJECT || entry->type == JT_ARRAY) ? entry->value.container.end : next + 1;
+  }
+
+  return 1;
+
+FAIL:
+  PyMem_Free(self->offsets);
+  PyMem_Free(self->items);
+  Py_CLEAR(self->names);
+  self->offsets = NULL;
+  self->items = NULL;
+  return 0;
+}
+
+/*
+Returns a new reference to the item at position, building it on first access */
+static PyObject *Lazy_item(LazyObject *self, size_t item)
+{
+  JSONTapeEntry *entry;
+  PyObject *value;
+  size_t index;
+
+  if (self->offsets == NULL && !Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  value = self->items[item];
+
+  if (value == NULL)
+  {
+    index = self->offsets[item];
+    entry = &self->doc->tape.entries[index];
+
+    if (entry->type == JT_OBJECT || entry->type == JT_ARRAY)
+    {
+      value = Lazy_new(self->doc, index);
+    }
+    else
+    {
+      value = Object_fromTape(&self->doc->decoder, &self->doc->tape, &index);
+    }
+
+    if (value == NULL)
+    {
+      return NULL;
+    }
+
+    self->items[item] = value;
+  }
+
+  Py_INCREF(value);
+  return value;
+}
+
+static PyObject *Lazy_materialize(LazyObject *self, PyObject *unused)
+{
+  size_t index = self->index;
+  return Object_fromTape(&self->doc->decoder, &self->doc->tape, &index);
+}
+
+static Py_ssize_t Lazy_length(LazyObject *self)
+{
+  if (Py_TYPE(self) == &LazyObjectType)
+  {
+    // Repeated keys only count once
+    if (self->offsets == NULL && !Lazy_index(self))
+    {
+      return -1;
+    }
+
+    return PyDict_Size(self->names);
+  }
+
+  return (Py_ssize_t) self->count;
+}
+
+static PyObject *Lazy_repr(LazyObject *self)
+{
+  Py_ssize_t length = Lazy_length(self);
+
+  if (length == -1)
+  {
+    return NULL;
+  }
+
+#if PY_MAJOR_VERSION >= 3
+  return PyUnicode_FromFormat("<%s of %zd items>", Py_TYPE(self)->tp_name, length);
+#else
+  return PyString_FromFormat("<%s of %zd items>", Py_TYPE(self)->tp_name, length);
+#endif
+}
+
+static PyObject *LazyArray_item(LazyObject *self, Py_ssize_t item)
+{
+  if (item < 0 || (size_t) item >= self->count)
+  {
+    PyErr_Format (PyExc_IndexError, "LazyArray index out of range");
+    return NULL;
+  }
+
+  return Lazy_item(self, (size_t) item);
+}
+
+static PyObject *LazyArray_subscript(LazyObject *self, PyObject *key)
+{
+  Py_ssize_t item;
+  Py_ssize_t start, stop, step, length, index;
+  PyObject *ret;
+  PyObject *value;
+
+  if (PyIndex_Check(key))
+  {
+    item = PyNumber_AsSsize_t(key, PyExc_IndexError);
+    if (item == -1 && PyErr_Occurred())
+    {
+      return NULL;
+    }
+
+    return LazyArray_item(self, item < 0 ? item + (Py_ssize_t) self->count : item);
+  }
+
+  if (PySlice_Check(key))
+  {
+#if PY_MAJOR_VERSION >= 3
+    if (PySlice_GetIndicesEx(key, (Py_ssize_t) self->count, &start, &stop, &step, &length) == -1)
+#else
+    if (PySlice_GetIndicesEx((PySliceObject *) key, (Py_ssize_t) self->count, &start, &stop, &step, &length) == -1)
+#endif
+    {
+      return NULL;
+    }
+
+    ret = PyList_New(length);
+    if (ret == NULL)
+    {
+      return NULL;
+    }
+
+    for (index = 0; index < length; index ++, start += step)
+    {
+      value = Lazy_item(self, (size_t) start);
+      if (value == NULL)
+      {
+        Py_DECREF(ret);
+        return NULL;
+      }
+
+      PyList_SET_ITEM(ret, index, value);
+    }
+
+    return ret;
+  }
+
+  PyErr_Format (PyExc_TypeError, "LazyArray indices must be integers or slices");
+  return NULL;
+}
+
+/*
+Returns the position of a key of a LazyObject, -1 if it isn't there or -2 with an exception set */
+static Py_ssize_t LazyObject_find(LazyObject *self, PyObject *key)
+{
+  PyObject *position;
+
+  if (self->offsets == NULL && !Lazy_index(self))
+  {
+    return -2;
+  }
+
+  position = PyDict_GetItem(self->names, key);
+  return position ? (Py_ssize_t) PyInt_AS_LONG(position) : -1;
+}
+
+static PyObject *LazyObject_subscript(LazyObject *self, PyObject *key)
+{
+  Py_ssize_t item = LazyObject_find(self, key);
+
+  if (item == -1)
+  {
+    PyErr_SetObject(PyExc_KeyError, key);
+  }
+
+  return item < 0 ? NULL : Lazy_item(self, (size_t) item);
+}
+
+static int LazyObject_contains(LazyObject *self, PyObject *key)
+{
+  if (self->offsets == NULL && !Lazy_index(self))
+  {
+    return -1;
+  }
+
+  return PyDict_Contains(self->names, key);
+}
+
+static PyObject *LazyObject_iter(LazyObject *self)
+{
+  if (self->offsets == NULL && !Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  return PyObject_GetIter(self->names);
+}
+
+static PyObject *LazyObject_get(LazyObject *self, PyObject *args)
+{
+  PyObject *key;
+  PyObject *defaultValue = Py_None;
+  Py_ssize_t item;
+
+  if (!PyArg_ParseTuple(args, "O|O", &key, &defaultValue))
+  {
+    return NULL;
+  }
+
+  item = LazyObject_find(self, key);
+
+  if (item == -1)
+  {
+    Py_INCREF(defaultValue);
+    return defaultValue;
+  }
+
+  return item < 0 ? NULL : Lazy_item(self, (size_t) item);
+}
+
+/*
+Lists the keys, values or (key, value) pairs of a LazyObject, in the order of its keys */
+static PyObject *LazyObject_list(LazyObject *self, int keys, int values)
+{
+  PyObject *ret;
+  PyObject *name;
+  PyObject *position;
+  PyObject *value;
+  PyObject *entry;
+  Py_ssize_t pos = 0;
+
+  if (self->offsets == NULL && !Lazy_index(self))
+  {
+    return NULL;
+  }
+
+  ret = PyList_New(0);
+  if (ret == NULL)
+  {
+    return NULL;
+  }
+
+  while (PyDict_Next(self->names, &pos, &name, &position))
+  {
+    value = values ? Lazy_item(self, (size_t) PyInt_AS_LONG(position)) : NULL;
+
+    if (values && value == NULL)
+    {
+      Py_DECREF(ret);
+      return NULL;
+    }
+
+    if (keys && values)
+    {
+      entry = PyTuple_Pack(2, name, value);
+      Py_DECREF(value);
+    }
+    else
+    if (values)
+    {
+      entry = value;
+    }
+    else
+    {
+      entry = name;
+      Py_INCREF(entry);
+    }
+
+    if (entry == NULL || PyList_Append(ret, entry) == -1)
+    {
+      Py_XDECREF(entry);
+      Py_DECREF(ret);
+      return NULL;
+    }
+
+    Py_DECREF(entry);
+  }
+
+  return ret;
+}
+
+static PyObject *LazyObject_keys(LazyObject *self, PyObject *unused)
+{
+  return LazyObject_list(self, 1, 0);
+}
+
+static PyObject *LazyObject_values(LazyObject *self, PyObject *unused)
+{
+  return LazyObject_list(self, 0, 1);
+}
+
+static PyObject *LazyObject_items(LazyObject *self, PyObject *unused)
+{
+  return LazyObject_list(self, 1, 1);
+}
+
+static PyMethodDef LazyObject_methods[] = {
+  {"get", (PyCFunction) LazyObject_get, METH_VARARGS, "Returns the value of key, or default if the object has no such key."},
+  {"keys", (PyCFunction) LazyObject_keys, METH_NOARGS, "Returns a list of the keys of the object."},
+  {"values", (PyCFunction) LazyObject_values, METH_NOARGS, "Returns a list of the values of the object."},
+  {"items", (PyCFunction) LazyObject_items, METH_NOARGS, "Returns a list of the (key, value) pairs of the object."},
+  {"materialize", (PyCFunction) Lazy_materialize, METH_NOARGS, "Decodes the whole object into a dict."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+static PyMethodDef LazyArray_methods[] = {
+  {"materialize", (PyCFunction) Lazy_materialize, METH_NOARGS, "Decodes the whole array into a list."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
+
+static PyMappingMethods LazyObject_as_mapping = {
+  (lenfunc) Lazy_length,                /* mp_length */
+  (binaryfunc) LazyObject_subscript,    /* mp_subscript */
+  0,                                    /* mp_ass_subscript */
+};
+
+static PySequenceMethods LazyObject_as_sequence = {
+  0,                                    /* sq_length */
+  0,                                    /* sq_concat */
+  0,                                    /* sq_repeat */
+  0,                                    /* sq_item */
+  0,                                    /* sq_slice */
+  0,                                    /* sq_ass_item */
+  0,                                    /* sq_ass_slice */
+  (objobjproc) LazyObject_contains,     /* sq_contains */
+};
+
+static PyMappingMethods LazyArray_as_mapping = {
+  (lenfunc) Lazy_length,                /* mp_length */
+  (binaryfunc) LazyArray_subscript,     /* mp_subscript */
+  0,                                    /* mp_ass_subscript */
+};
+
+static PySequenceMethods LazyArray_as_sequence = {
+  (lenfunc) Lazy_length,                /* sq_length */
+  0,                                    /* sq_concat */
+  0,                                    /* sq_repeat */
+  (ssizeargfunc) LazyArray_item,        /* sq_item */
+};
+
+PyTypeObject LazyObjectType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ujson.LazyObject",             /* tp_name */
+  sizeof(LazyObject),             /* tp_basicsize */
+  0,                              /* tp_itemsize */
+  (destructor) Lazy_dealloc,      /* tp_dealloc */
+  0,                              /* tp_print */
+  0,                              /* tp_getattr */
+  0,                              /* tp_setattr */
+  0,                              /* tp_compare */
+  (reprfunc) Lazy_repr,           /* tp_repr */
+  0,                              /* tp_as_number */
+  &LazyObject_as_sequence,        /* tp_as_sequence */
+  &LazyObject_as_mapping,         /* tp_as_mapping */
+  PyObject_HashNotImplemented,    /* tp_hash */
+  0,                              /* tp_call */
+  0,                              /* tp_str */
+  0,                              /* tp_getattro */
+  0,                              /* tp_setattro */
+  0,                              /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,             /* tp_flags */
+  "Read-only view of a JSON object returned by ujson.loads_lazy. Values are decoded when first accessed and kept. Use materialize() to decode all of it into a dict.", /* tp_doc */
+  0,                              /* tp_traverse */
+  0,                              /* tp_clear */
+  0,                              /* tp_richcompare */
+  0,                              /* tp_weaklistoffset */
+  (getiterfunc) LazyObject_iter,  /* tp_iter */
+  0,                              /* tp_iternext */
+  LazyObject_methods,             /* tp_methods */
+};
+
+PyTypeObject LazyArrayType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ujson.LazyArray",              /* tp_name */
+  sizeof(LazyObject),             /* tp_basicsize */
+  0,                              /* tp_itemsize */
+  (destructor) Lazy_dealloc,      /* tp_dealloc */
+  0,                              /* tp_print */
+  0,                              /* tp_getattr */
+  0,                              /* tp_setattr */
+  0,                              /* tp_compare */
+  (reprfunc) Lazy_repr,           /* tp_repr */
+  0,                              /* tp_as_number */
+  &LazyArray_as_sequence,         /* tp_as_sequence */
+  &LazyArray_as_mapping,          /* tp_as_mapping */
+  PyObject_HashNotImplemented,    /* tp_hash */
+  0,                              /* tp_call */
+  0,                              /* tp_str */
+  0,                              /* tp_getattro */
+  0,                              /* tp_setattro */
+  0,                              /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,             /* tp_flags */
+  "Read-only view of a JSON array returned by ujson.loads_lazy. Items are decoded when first accessed and kept. Use materialize() to decode all of it into a list.", /* tp_doc */
+  0,                              /* tp_traverse */
+  0,                              /* tp_clear */
+  0,                              /* tp_richcompare */
+  0,                              /* tp_weaklistoffset */
+  0,                              /* tp_iter */
+  0,                              /* tp_iternext */
+  LazyArray_methods,              /* tp_methods */
+};
+
+static char *g_lazyKwlist[] = {"obj", "precise_float", "date_mode", "use_decimal", NULL};
+
+PyObject* JSONToLazyObj(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *opreciseFloat = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+  PyObject *ret = NULL;
+  LazyDocument *doc;
+  DecoderInput input;
+  size_t index = 0;
+  int success;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOO", g_lazyKwlist, &arg, &opreciseFloat, &odateMode, &ouseDecimal))
+  {
+    return NULL;
+  }
+
+  doc = (LazyDocument *) PyMem_Malloc(sizeof(LazyDocument));
+  if (doc == NULL)
+  {
+    return PyErr_NoMemory();
+  }
+
+  memset(doc, 0, sizeof(LazyDocument));
+  doc->refs = 1;
+  JSON_InitTape(&doc->tape);
+
+  if (!initPyObjectDecoder(&doc->decoder, opreciseFloat, NULL, odateMode, ouseDecimal) || DecoderInput_get(&input, arg, 1) == -1)
+  {
+    LazyDocument_release(doc);
+    return NULL;
+  }
+
+  // The tape points into the input, so the proxies keep a copy of anything which may change
+  if (input.hasView)
+  {
+    doc->input = PyBytes_FromStringAndSize(input.data, input.size);
+    DecoderInput_release(&input);
+
+    if (doc->input == NULL)
+    {
+      LazyDocument_release(doc);
+      return NULL;
+    }
+
+    input.data = PyString_AS_STRING(doc->input);
+    input.size = PyString_GET_SIZE(doc->input);
+  }
+  else
+  {
+    doc->input = input.obj;
+    input.obj = NULL;
+  }
+
+  doc->tape.preciseFloat = doc->decoder.dec.preciseFloat;
+  doc->tape.decimal = doc->decoder.dec.newDecimal != NULL;
+
+  Py_BEGIN_ALLOW_THREADS
+  success = JSON_DecodeTape(&doc->tape, input.data, input.size);
+  Py_END_ALLOW_THREADS
+
+  if (!success)
+  {
+    PyErr_Format (PyExc_ValueError, "%s", doc->tape.errorStr);
+  }
+  else
+  if (doc->tape.entries[0].type == JT_OBJECT || doc->tape.entries[0].type == JT_ARRAY)
+  {
+    ret = Lazy_new(doc, 0);
+  }
+  else
+  {
+    ret = Object_fromTape(&doc->decoder, &doc->tape, &index);
+  }
+
+  LazyDocument_release(doc);
+  return ret;
+}
+
+/*
+ujson.extract decodes only the values at the given paths and skips over the rest of the document
+with the decoder filters, see JSONObjectDecoder.filterKey. Paths are JSON Pointers such as
+"/items/0/sku" or simple JSONPath expressions such as "$.items[*].sku", made of keys, indices and
+wildcards. The containers on the way to the values aren't built, the decoder gets the frame for
+their depth instead, which holds the paths still matching there */
+typedef struct __ExtractStep
+{
+  PyObject *key;        // Matches this object key, NULL to match no key
+  Py_ssize_t index;     // Matches this array index, -1 to match no index
+  int wildcard;         // Matches any key or index
+} ExtractStep;
+
+typedef struct __ExtractPath
+{
+  ExtractStep *steps;
+  Py_ssize_t cbSteps;
+  int wildcard;         // Set if any step is a wildcard, the path then gives a list of values
+  PyObject *values;
+} ExtractPath;
+
+typedef struct __ExtractFrame
+{
+  // Paths matching the container at this depth, ending at its current value and going on past it
+  Py_ssize_t *alive;
+  Py_ssize_t cbAlive;
+  Py_ssize_t *found;
+  Py_ssize_t cbFound;
+  Py_ssize_t *beyond;
+  Py_ssize_t cbBeyond;
+} ExtractFrame;
+
+typedef struct __PyExtractDecoder
+{
+  PyObjectDecoder pyDecoder;
+  ExtractPath *paths;
+  Py_ssize_t cbPaths;
+
+  // Frames by depth, frames[0] is unused
+  ExtractFrame *frames;
+  Py_ssize_t cbFrames;
+
+  // Depth of the next container begun outside of a found value, and set while one is decoded
+  JSUINT32 nextDepth;
+  int found;
+} PyExtractDecoder;
+
+#define EXTRACT_IS_FRAME(_ed, _obj) ((ExtractFrame *) (_obj) >= (_ed)->frames && (ExtractFrame *) (_obj) < (_ed)->frames + (_ed)->cbFrames)
+
+static void Extract_release(PyExtractDecoder *ed, JSOBJ obj)
+{
+  if (!EXTRACT_IS_FRAME(ed, obj))
+  {
+    Py_DECREF((PyObject *) obj);
+  }
+}
+
+/*
+Collects the values at the rest of path, from step on, within a value decoded in full. Returns 0
+with an exception set on failure */
+static int Extract_walk(ExtractPath *path, Py_ssize_t step, PyObject *value)
+{
+  ExtractStep *current;
+  PyObject *key;
+  PyObject *item;
+  Py_ssize_t pos = 0;
+  Py_ssize_t index;
+
+  if (step == path->cbSteps)
+  {
+    return PyList_Append(path->values, value) == 0;
+  }
+
+  current = &path->steps[step];
+
+  if (PyDict_Check(value))
+  {
+    if (current->wildcard)
+    {
+      while (PyDict_Next(value, &pos, &key, &item))
+      {
+        if (!Extract_walk(path, step + 1, item))
+        {
+          return 0;
+        }
+      }
+
+      return 1;
+    }
+
+    item = current->key ? PyDict_GetItem(value, current->key) : NULL;
+    return item ? Extract_walk(path, step + 1, item) : 1;
+  }
+
+  if (PyList_Check(value))
+  {
+    for (index = 0; index < PyList_GET_SIZE(value); index ++)
+    {
+      if ((current->wildcard || current->index == index) && !Extract_walk(path, step + 1, PyList_GET_ITEM(value, index)))
+      {
+        return 0;
+      }
+    }
+  }
+
+  return 1;
+}
+
+/*
+Sorts the paths matching the container at depth into the ones ending at its next value and the ones
+going on past it, for which the next frame is set up */
+static int Extract_filter(PyExtractDecoder *ed, JSUINT32 depth, PyObject *name, size_t index)
+{
+  ExtractFrame *frame = &ed->frames[depth];
+  ExtractFrame *next = &ed->frames[depth + 1];
+  ExtractPath *path;
+  ExtractStep *step;
+  Py_ssize_t alive;
+  int match;
+
+  if (PyErr_Occurred())
+  {
+    return JSF_ERROR;
+  }
+
+  frame->cbFound = 0;
+  frame->cbBeyond = 0;
+
+  for (alive = 0; alive < frame->cbAlive; alive ++)
+  {
+    path = &ed->paths[frame->alive[alive]];
+    step = &path->steps[depth - 1];
+
+    if (step->wildcard)
+    {
+      match = 1;
+    }
+    else
+    if (name)
+    {
+      match = step->key ? PyObject_RichCompareBool(name, step->key, Py_EQ) : 0;
+      if (match == -1)
+      {
+        return JSF_ERROR;
+      }
+    }
+    else
+    {
+      match = step->index == (Py_ssize_t) index;
+    }
+
+    if (match && (Py_ssize_t) depth == path->cbSteps)
+    {
+      frame->found[frame->cbFound ++] = frame->alive[alive];
+    }
+    else
+    if (match)
+    {
+      frame->beyond[frame->cbBeyond ++] = frame->alive[alive];
+    }
+  }
+
+  // A value some path ends at is decoded in full, the paths going on past it are walked afterwards
+  if (frame->cbFound)
+  {
+    ed->found = 1;
+    return JSF_KEEP;
+  }
+
+  if (frame->cbBeyond)
+  {
+    memcpy(next->alive, frame->beyond, frame->cbBeyond * sizeof(Py_ssize_t));
+    next->cbAlive = frame->cbBeyond;
+    frame->cbBeyond = 0;
+    ed->nextDepth = depth + 1;
+    return JSF_DESCEND;
+  }
+
+  return JSF_SKIP;
+}
+
+static int Extract_filterKey(void *prv, JSUINT32 depth, JSOBJ name)
+{
+  return Extract_filter((PyExtractDecoder *) prv, depth, (PyObject *) name, 0);
+}
+
+static int Extract_filterItem(void *prv, JSUINT32 depth, size_t index)
+{
+  return Extract_filter((PyExtractDecoder *) prv, depth, NULL, index);
+}
+
+/*
+Collects a value added to a frame if any path ends at it. Failures are left for the next filter
+call or the end of decoding to find */
+static void Extract_addValue(PyExtractDecoder *ed, ExtractFrame *frame, JSOBJ value)
+{
+  Py_ssize_t index;
+
+  if (ed->found)
+  {
+    ed->found = 0;
+
+    for (index = 0; index < frame->cbFound && !PyErr_Occurred(); index ++)
+    {
+      PyList_Append(ed->paths[frame->found[index]].values, (PyObject *) value);
+    }
+
+    for (index = 0; index < frame->cbBeyond && !PyErr_Occurred(); index ++)
+    {
+      Extract_walk(&ed->paths[frame->beyond[index]], (Py_ssize_t) (frame - ed->frames), (PyObject *) value);
+    }
+  }
+
+  Extract_release(ed, value);
+}
+
+static JSOBJ Extract_newObject(void *prv)
+{
+  PyExtractDecoder *ed = (PyExtractDecoder *) prv;
+  return ed->found ? PyDict_New() : (JSOBJ) &ed->frames[ed->nextDepth];
+}
+
+static JSOBJ Extract_newArray(void *prv)
+{
+  PyExtractDecoder *ed = (PyExtractDecoder *) prv;
+  return ed->found ? PyList_New(0) : (JSOBJ) &ed->frames[ed->nextDepth];
+}
+
+static void Extract_objectAddKey(void *prv, JSOBJ obj, JSOBJ name, JSOBJ value)
+{
+  PyExtractDecoder *ed = (PyExtractDecoder *) prv;
+
+  if (!EXTRACT_IS_FRAME(ed, obj))
+  {
+    Object_objectAddKey(prv, obj, name, value);
+    return;
+  }
+
+  Py_DECREF((PyObject *) name);
+  Extract_addValue(ed, (ExtractFrame *) obj, value);
+}
+
+static void Extract_arrayAddItem(void *prv, JSOBJ obj, JSOBJ value)
+{
+  PyExtractDecoder *ed = (PyExtractDecoder *) prv;
+
+  if (!EXTRACT_IS_FRAME(ed, obj))
+  {
+    Object_arrayAddItem(prv, obj, value);
+    return;
+  }
+
+  Extract_addValue(ed, (ExtractFrame *) obj, value);
+}
+
+static void Extract_releaseObject(void *prv, JSOBJ obj)
+{
+  Extract_release((PyExtractDecoder *) prv, obj);
+}
+
+/*
+Adds a key step, or a step matching both the key and the index for a JSON Pointer token which is a
+number. Returns 0 with an exception set on failure */
+static int Extract_addKey(ExtractPath *path, const char *start, size_t length, int pointer)
+{
+  ExtractStep *step = &path->steps[path->cbSteps];
+  size_t offset;
+
+  step->key = PyUnicode_DecodeUTF8(start, (Py_ssize_t) length, NULL);
+  step->index = -1;
+  step->wildcard = 0;
+
+  if (step->key == NULL)
+  {
+    return 0;
+  }
+
+  // A JSON Pointer token such as 0 or 12 also indexes arrays, 01 doesn't
+  if (pointer && length > 0 && length < 19 && (start[0] != '0' || length == 1))
+  {
+    for (offset = 0, step->index = 0; offset < length && start[offset] >= '0' && start[offset] <= '9'; offset ++)
+    {
+      step->index = step->index * 10 + (start[offset] - '0');
+    }
+
+    if (offset < length)
+    {
+      step->index = -1;
+    }
+  }
+
+  path->cbSteps ++;
+  return 1;
+}
+
+/*
+Parses a JSON Pointer, RFC 6901, into steps. Returns 0 with an exception set for invalid ones */
+static int Extract_parsePointer(ExtractPath *path, const char *input, const char *end)
+{
+  char *token = (char *) PyMem_Malloc(end - input + 1);
+  size_t length;
+  int success = 1;
+
+  if (token == NULL)
+  {
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  while (success && input < end)
+  {
+    // Skip the '/' before the token, ~1 and ~0 stand for '/' and '~'
+    for (input ++, length = 0; input < end && *input != '/'; input ++)
+    {
+      if (*input == '~' && input + 1 < end && (input[1] == '0' || input[1] == '1'))
+      {
+        token[length ++] = input[1] == '0' ? '~' : '/';
+        input ++;
+      }
+      else
+      if (*input == '~')
+      {
+        PyErr_Format (PyExc_ValueError, "Invalid escape in JSON Pointer");
+        success = 0;
+        break;
+      }
+      else
+      {
+        token[length ++] = *input;
+      }
+    }
+
+    success = success && Extract_addKey(path, token, length, 1);
+  }
+
+  PyMem_Free(token);
+  return success;
+}
+
+/*
+Parses a JSONPath expression made of .key, ['key'], [index], .* and [*] steps. Returns 0 with an
+exception set for invalid or unsupported ones */
+static int Extract_parseJSONPath(ExtractPath *path, const char *input, const char *end)
+{
+  ExtractStep *step;
+  const char *begin = input;
+  const char *start;
+  char quote;
+
+  for (input ++; input < end; )
+  {
+    step = &path->steps[path->cbSteps];
+
+    if (*input == '.' && input + 1 < end && input[1] == '*')
+    {
+      input += 2;
+    }
+    else
+    if (input + 2 < end && input[0] == '[' && input[1] == '*' && input[2] == ']')
+    {
+      input += 3;
+    }
+    else
+    if (*input == '.' && input + 1 < end && input[1] != '.' && input[1] != '[')
+    {
+      for (start = ++ input; input < end && *input != '.' && *input != '['; input ++);
+
+      if (!Extract_addKey(path, start, input - start, 0))
+      {
+        return 0;
+      }
+      continue;
+    }
+    else
+    if (*input == '[' && input + 1 < end && (input[1] == '\'' || input[1] == '\"'))
+    {
+      quote = input[1];
+      for (start = input += 2; input < end && *input != quote; input ++);
+
+      if (input + 1 >= end || input[1] != ']')
+      {
+        break;
+      }
+
+      if (!Extract_addKey(path, start, input - start, 0))
+      {
+        return 0;
+      }
+      input += 2;
+      continue;
+    }
+    else
+    if (*input == '[' && input + 1 < end && input[1] >= '0' && input[1] <= '9')
+    {
+      step->key = NULL;
+      step->wildcard = 0;
+      for (input ++, step->index = 0; input < end && *input >= '0' && *input <= '9' && step->index < PY_SSIZE_T_MAX / 10 - 10; input ++)
+      {
+        step->index = step->index * 10 + (*input - '0');
+      }
+
+      if (input >= end || *input != ']')
+      {
+        break;
+      }
+
+      input ++;
+      path->cbSteps ++;
+      continue;
+    }
+    else
+    {
+      break;
+    }
+
+    step->key = NULL;
+    step->index = -1;
+    step->wildcard = 1;
+    path->wildcard = 1;
+    path->cbSteps ++;
+  }
+
+  if (input < end)
+  {
+    PyErr_Format (PyExc_ValueError, "Unsupported JSONPath expression at offset %d", (int) (input - begin));
+    return 0;
+  }
+
+  return 1;
+}
+
+static int Extract_parsePath(ExtractPath *path, PyObject *opath)
+{
+  PyObject *utf8;
+  const char *input;
+  Py_ssize_t length;
+  int success;
+
+  if (!PyUnicode_Check(opath) && !PyString_Check(opath))
+  {
+    PyErr_Format (PyExc_TypeError, "Paths must be strings");
+    return 0;
+  }
+
+  utf8 = PyUnicode_Check(opath) ? PyUnicode_AsUTF8String(opath) : (Py_INCREF(opath), opath);
+  if (utf8 == NULL)
+  {
+    return 0;
+  }
+
+  input = PyBytes_AS_STRING(utf8);
+  length = PyBytes_GET_SIZE(utf8);
+
+  // Each step takes at least one character
+  path->steps = (ExtractStep *) PyMem_Malloc((length + 1) * sizeof(ExtractStep));
+  path->values = PyList_New(0);
+
+  if (path->steps == NULL || path->values == NULL)
+  {
+    Py_DECREF(utf8);
+    if (!PyErr_Occurred())
+    {
+      PyErr_NoMemory();
+    }
+    return 0;
+  }
+
+  if (length == 0 || input[0] == '/')
+  {
+    success = Extract_parsePointer(path, input, input + length);
+  }
+  else
+  if (input[0] == '$')
+  {
+    success = Extract_parseJSONPath(path, input, input + length);
+  }
+  else
+  {
+    PyErr_Format (PyExc_ValueError, "Paths must be JSON Pointers starting with '/' or JSONPath expressions starting with '$'");
+    success = 0;
+  }
+
+  Py_DECREF(utf8);
+  return success;
+}
+
+static void Extract_free(PyExtractDecoder *ed)
+{
+  Py_ssize_t index;
+
+  for (index = 0; index < ed->cbPaths; index ++)
+  {
+    while (ed->paths[index].cbSteps > 0)
+    {
+      // Py_XDECREF evaluates its argument more than once on Python 2
+      ed->paths[index].cbSteps --;
+      Py_XDECREF(ed->paths[index].steps[ed->paths[index].cbSteps].key);
+    }
+
+    PyMem_Free(ed->paths[index].steps);
+    Py_XDECREF(ed->paths[index].values);
+  }
+
+  for (index = 0; index < ed->cbFrames; index ++)
+  {
+    PyMem_Free(ed->frames[index].alive);
+  }
+
+  PyMem_Free(ed->paths);
+  PyMem_Free(ed->frames);
+}
+
+/*
+Sets up the paths and a frame for each depth up to the longest one. The frames hold room for all
+the paths three times over, for their alive, found and beyond lists. Returns 0 with an exception
+set on failure */
+static int Extract_init(PyExtractDecoder *ed, PyObject *opaths)
+{
+  Py_ssize_t index;
+  Py_ssize_t maxSteps = 0;
+
+  ed->cbPaths = PySequence_Fast_GET_SIZE(opaths);
+  ed->paths = (ExtractPath *) PyMem_Malloc((ed->cbPaths ? ed->cbPaths : 1) * sizeof(ExtractPath));
+
+  if (ed->paths == NULL)
+  {
+    ed->cbPaths = 0;
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  memset(ed->paths, 0, (ed->cbPaths ? ed->cbPaths : 1) * sizeof(ExtractPath));
+
+  for (index = 0; index < ed->cbPaths; index ++)
+  {
+    if (!Extract_parsePath(&ed->paths[index], PySequence_Fast_GET_ITEM(opaths, index)))
+    {
+      return 0;
+    }
+
+    if (ed->paths[index].cbSteps > maxSteps)
+    {
+      maxSteps = ed->paths[index].cbSteps;
+    }
+  }
+
+  ed->cbFrames = maxSteps + 2;
+  ed->frames = (ExtractFrame *) PyMem_Malloc(ed->cbFrames * sizeof(ExtractFrame));
+
+  if (ed->frames == NULL)
+  {
+    ed->cbFrames = 0;
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  memset(ed->frames, 0, ed->cbFrames * sizeof(ExtractFrame));
+
+  for (index = 0; index < ed->cbFrames; index ++)
+  {
+    ed->frames[index].alive = (Py_ssize_t *) PyMem_Malloc((ed->cbPaths ? ed->cbPaths : 1) * 3 * sizeof(Py_ssize_t));
+
+    if (ed->frames[index].alive == NULL)
+    {
+      PyErr_NoMemory();
+      return 0;
+    }
+
+    ed->frames[index].found = ed->frames[index].alive + ed->cbPaths;
+    ed->frames[index].beyond = ed->frames[index].found + ed->cbPaths;
+  }
+
+  // The root is matched by all paths which have steps
+  for (index = 0; index < ed->cbPaths; index ++)
+  {
+    if (ed->paths[index].cbSteps)
+    {
+      ed->frames[1].alive[ed->frames[1].cbAlive ++] = index;
+    }
+  }
+
+  ed->nextDepth = 1;
+  return 1;
+}
+
+static char *g_extractKwlist[] = {"obj", "paths", "default", "precise_float", "date_mode", "use_decimal", NULL};
+
+PyObject* JSONExtract(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *arg;
+  PyObject *opaths;
+  PyObject *odefault = Py_None;
+  PyObject *opreciseFloat = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *ouseDecimal = NULL;
+  PyObject *paths = NULL;
+  PyObject *ret = NULL;
+  PyObject *value;
+  PyExtractDecoder ed;
+  DecoderInput input;
+  JSOBJ root;
+  Py_ssize_t index;
+  int single;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|OOOO", g_extractKwlist, &arg, &opaths, &odefault, &opreciseFloat, &odateMode, &ouseDecimal))
+  {
     return NULL;
   }
 
-  return result;
-}
\ No newline at end of file
+  memset(&ed, 0, sizeof(PyExtractDecoder));
+
+  // Every key on the way to the values is compared, cached keys save making most of them
+  if (!initPyObjectDecoder(&ed.pyDecoder, opreciseFloat, Py_True, odateMode, ouseDecimal))
+  {
+    return NULL;
+  }
+
+  // A single path gives a single result
+  single = PyUnicode_Check(opaths) || PyString_Check(opaths);
+  paths = single ? PyTuple_Pack(1, opaths) : PySequence_Fast(opaths, "paths must be a string or a sequence of strings");
+
+  if (paths == NULL || !Extract_init(&ed, paths))
+  {
+    goto END;
+  }
+
+  ed.pyDecoder.dec.newObject = Extract_newObject;
+  ed.pyDecoder.dec.newArray = Extract_newArray;
+  ed.pyDecoder.dec.objectAddKey = Extract_objectAddKey;
+  ed.pyDecoder.dec.arrayAddItem = Extract_arrayAddItem;
+  ed.pyDecoder.dec.releaseObject = Extract_releaseObject;
+  ed.pyDecoder.dec.filterKey = Extract_filterKey;
+  ed.pyDecoder.dec.filterItem = Extract_filterItem;
+  ed.pyDecoder.dec.prv = &ed;
+
+  // A path to the whole document needs all of it, the other paths are then walked through it
+  for (index = 0; index < ed.cbPaths; index ++)
+  {
+    if (ed.paths[index].cbSteps == 0)
+    {
+      ed.pyDecoder.dec.filterKey = NULL;
+      ed.pyDecoder.dec.filterItem = NULL;
+      ed.found = 1;
+    }
+  }
+
+  if (DecoderInput_get(&input, arg, 1) == -1)
+  {
+    goto END;
+  }
+
+  root = JSON_DecodeObject((JSONObjectDecoder *) &ed.pyDecoder, input.data, input.size);
+  DecoderInput_release(&input);
+
+  if (ed.pyDecoder.dec.errorStr)
+  {
+    PyErr_Format (PyExc_ValueError, "%s", ed.pyDecoder.dec.errorStr);
+  }
+
+  if (root == NULL || PyErr_Occurred())
+  {
+    if (root)
+    {
+      Extract_release(&ed, root);
+    }
+    goto END;
+  }
+
+  if (!EXTRACT_IS_FRAME(&ed, root))
+  {
+    for (index = 0; index < ed.cbPaths && ed.found; index ++)
+    {
+      if (!Extract_walk(&ed.paths[index], 0, (PyObject *) root))
+      {
+        break;
+      }
+    }
+
+    Py_DECREF((PyObject *) root);
+
+    if (PyErr_Occurred())
+    {
+      goto END;
+    }
+  }
+
+  ret = PyList_New(ed.cbPaths);
+  if (ret == NULL)
+  {
+    goto END;
+  }
+
+  for (index = 0; index < ed.cbPaths; index ++)
+  {
+    if (ed.paths[index].wildcard)
+    {
+      value = ed.paths[index].values;
+    }
+    else
+    {
+      value = PyList_GET_SIZE(ed.paths[index].values) ? PyList_GET_ITEM(ed.paths[index].values, 0) : odefault;
+    }
+
+    Py_INCREF(value);
+    PyList_SET_ITEM(ret, index, value);
+  }
+
+  if (single)
+  {
+    value = PyList_GET_ITEM(ret, 0);
+    Py_INCREF(value);
+    Py_DECREF(ret);
+    ret = value;
+  }
+
+END:
+  Extract_free(&ed);
+  Object_releaseKeyCache(&ed.pyDecoder);
+  Py_XDECREF(paths);
+  return ret;
+}
@@ -37,11 +37,34 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 
 #include "py_defines.h"
 #include <stdio.h>
+#include <stddef.h>
 #include <datetime.h>
+#include <structmember.h>
 #include <ultrajson.h>
 
-#define EPOCH_ORD 719163
 static PyObject* type_decimal = NULL;
+static PyObject* decimal_str = NULL;
+
+#if PY_VERSION_HEX >= 0x03030000
+#define DELTA_GET_DAYS PyDateTime_DELTA_GET_DAYS
+#define DELTA_GET_SECONDS PyDateTime_DELTA_GET_SECONDS
+#define DELTA_GET_MICROSECONDS PyDateTime_DELTA_GET_MICROSECONDS
+#else
+#define DELTA_GET_DAYS(o) (((PyDateTime_Delta *) (o))->days)
+#define DELTA_GET_SECONDS(o) (((PyDateTime_Delta *) (o))->seconds)
+#define DELTA_GET_MICROSECONDS(o) (((PyDateTime_Delta *) (o))->microseconds)
+#endif
+
+#define DATETIME_GET_TZINFO(o) (((PyDateTime_DateTime *) (o))->hastzinfo ? ((PyDateTime_DateTime *) (o))->tzinfo : NULL)
+#define TIME_GET_TZINFO(o) (((PyDateTime_Time *) (o))->hastzinfo ? ((PyDateTime_Time *) (o))->tzinfo : NULL)
+
+enum DATE_MODES
+{
+  DATE_MODE_S,    // Seconds since the epoch, the default
+  DATE_MODE_MS,   // Milliseconds since the epoch
+  DATE_MODE_US,   // Microseconds since the epoch
+  DATE_MODE_ISO,  // ISO 8601 string like datetime.isoformat()
+};
 
 typedef void *(*PFN_PyTypeToJSON)(JSOBJ obj, JSONTypeContext *ti, void *outValue, size_t *_outLen);
 
@@ -66,11 +89,60 @@ typedef struct __TypeContext
   PyObject *attrList;
   PyObject *iterator;
 
+  // What the default or a handler returned for the value, encoded in its place
+  PyObject *substitute;
+
+  // Set while the output of the value is recorded for the encode cache, see beginCachedContext
+  int cacheCandidate;
+  size_t cacheStart;
+  size_t cacheMutables;
+  size_t cachePins;
+  size_t cacheFlushes;
+
   JSINT64 longValue;
 } TypeContext;
 
+typedef struct __PyObjectEncoder
+{
+  JSONObjectEncoder enc;
+
+  // Bound write method of the file object when streaming through ujson.dump
+  PyObject *write;
+
+  // One of DATE_MODES, with the ISO string of the date being encoded
+  int dateMode;
+  char dateBuffer[64];
+  size_t dateLength;
+
+  // The default and handlers options, with what was resolved for each type encoded so far
+  PyObject *defaultFn;
+  PyObject *handlers;
+  PyObject *handlerCache;
+
+  /*
+  Set if the encode cache is used. The counts of mutable and pinned values begun and of flushes so
+  far tell whether a value recorded for the cache held any of them or had its output flushed.
+  cacheSkip keeps the outer array of JSON Lines out of the cache */
+  int cache;
+  int cacheSkip;
+  size_t mutables;
+  size_t pins;
+  size_t flushes;
+} PyObjectEncoder;
+
 #define GET_TC(__ptrtc) ((TypeContext *)((__ptrtc)->prv))
 
+/*
+ujson.RawJSON holds already encoded JSON as bytes or str, which the encoder copies into the output
+as it is instead of decoding and encoding it again */
+typedef struct __RawJSONObject
+{
+  PyObject_HEAD
+  PyObject *data;
+} RawJSONObject;
+
+extern PyTypeObject RawJSONType;
+
 struct PyDictIterState
 {
   PyObject *keys;
@@ -88,6 +160,7 @@ void initObjToJSON(void)
   {
     type_decimal = PyObject_GetAttrString(mod_decimal, "Decimal");
     Py_INCREF(type_decimal);
+    decimal_str = PyObject_GetAttrString(type_decimal, "__str__");
     Py_DECREF(mod_decimal);
   }
   else
@@ -132,6 +205,129 @@ static void *PyFloatToDOUBLE(JSOBJ _obj, JSONTypeContext *tc, void *outValue, si
   return NULL;
 }
 
+static void *PyDecimalToRAW(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
+{
+  PyObject *obj = GET_TC(tc)->newObj;
+#if PY_MAJOR_VERSION >= 3
+  Py_ssize_t len;
+  const char *ret = PyUnicode_AsUTF8AndSize(obj, &len);
+  *_outLen = len;
+  return (void *) ret;
+#else
+  *_outLen = PyString_GET_SIZE(obj);
+  return PyString_AS_STRING(obj);
+#endif
+}
+
+/*
+Returns 1 if the NUL terminated string at ptr is a whole JSON number */
+static int isJSONNumber(const char *ptr)
+{
+  ptr += (*ptr == '-');
+
+  if (*ptr == '0')
+  {
+    ptr ++;
+  }
+  else
+  if (*ptr >= '1' && *ptr <= '9')
+  {
+    while (*ptr >= '0' && *ptr <= '9')
+    {
+      ptr ++;
+    }
+  }
+  else
+  {
+    return 0;
+  }
+
+  if (*ptr == '.')
+  {
+    ptr ++;
+    if (*ptr < '0' || *ptr > '9')
+    {
+      return 0;
+    }
+    while (*ptr >= '0' && *ptr <= '9')
+    {
+      ptr ++;
+    }
+  }
+
+  if (*ptr == 'e' || *ptr == 'E')
+  {
+    ptr ++;
+    ptr += (*ptr == '+' || *ptr == '-');
+    if (*ptr < '0' || *ptr > '9')
+    {
+      return 0;
+    }
+    while (*ptr >= '0' && *ptr <= '9')
+    {
+      ptr ++;
+    }
+  }
+
+  return *ptr == '\0';
+}
+
+/*
+A finite Decimal's str() is already a valid JSON number holding all of its digits, like 1.10,
+-0 or 1E+3. Decimal's own str() is used, not the one of a subclass, and the output is still checked
+since it goes into the JSON as it is. It's looked up on the Decimal type and called unbound, the
+tp_str slot would dispatch to a subclass __str__ on the pure Python decimal module of Python 2.
+Returns 0 with an exception set on failure */
+static int beginDecimalContext(PyObject *obj, JSONTypeContext *tc)
+{
+  TypeContext *pc = GET_TC(tc);
+  const char *ptr;
+
+  pc->newObj = PyObject_CallFunctionObjArgs(decimal_str, obj, NULL);
+  if (pc->newObj == NULL)
+  {
+    return 0;
+  }
+
+#if PY_MAJOR_VERSION >= 3
+  if (!PyUnicode_Check(pc->newObj))
+#else
+  if (!PyString_Check(pc->newObj))
+#endif
+  {
+    PyErr_Format (PyExc_TypeError, "Decimal str() must return a string");
+    return 0;
+  }
+
+#if PY_MAJOR_VERSION >= 3
+  ptr = PyUnicode_AsUTF8(pc->newObj);
+  if (ptr == NULL)
+  {
+    return 0;
+  }
+#else
+  ptr = PyString_AS_STRING(pc->newObj);
+#endif
+
+  if (!isJSONNumber(ptr))
+  {
+    ptr += (*ptr == '-');
+    if (*ptr == 'I' || *ptr == 'N' || *ptr == 's')
+    {
+      PyErr_Format (PyExc_OverflowError, "Invalid %s value when encoding Decimal", *ptr == 'I' ? "Inf" : "Nan");
+    }
+    else
+    {
+      PyErr_Format (PyExc_ValueError, "Decimal str() gave an invalid JSON number");
+    }
+    return 0;
+  }
+
+  pc->PyTypeToJSON = PyDecimalToRAW;
+  tc->type = JT_RAW;
+  return 1;
+}
+
 static void *PyStringToUTF8(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
 {
   PyObject *obj = (PyObject *) _obj;
@@ -139,57 +335,275 @@ static void *PyStringToUTF8(JSOBJ _obj, JSONTypeContext *tc, void *outValue, siz
   return PyString_AS_STRING(obj);
 }
 
+#if PY_VERSION_HEX >= 0x03030000
+/*
+The UTF-8 of a str without making a new object. Compact ASCII strings are their own UTF-8, other
+strings keep the UTF-8 made on the first call cached in the object. Returns NULL with an exception set
+for strings which can't be encoded, like ones with lone surrogates */
+static const char *unicodeAsUTF8(PyObject *obj, size_t *_outLen)
+{
+  Py_ssize_t len;
+  const char *ret;
+
+  if (PyUnicode_IS_COMPACT_ASCII(obj))
+  {
+    *_outLen = PyUnicode_GET_LENGTH(obj);
+    return (const char *) PyUnicode_DATA(obj);
+  }
+
+  ret = PyUnicode_AsUTF8AndSize(obj, &len);
+  *_outLen = (size_t) len;
+  return ret;
+}
+#endif
+
+/*
+The UTF-8 of the data of a RawJSON object. RawJSON_new made sure a str has one */
+static const char *rawJSONData(PyObject *data, size_t *_outLen)
+{
+#if PY_VERSION_HEX >= 0x03030000
+  if (PyUnicode_Check(data))
+  {
+    return unicodeAsUTF8(data, _outLen);
+  }
+#endif
+  *_outLen = PyString_GET_SIZE(data);
+  return PyString_AS_STRING(data);
+}
+
+static void *PyRawJSONToRAW(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
+{
+  return (void *) rawJSONData(((RawJSONObject *) _obj)->data, _outLen);
+}
+
 static void *PyUnicodeToUTF8(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
 {
   PyObject *obj = (PyObject *) _obj;
+#if PY_VERSION_HEX >= 0x03030000
+  // Can't fail, Object_beginTypeContext made sure the UTF-8 is there
+  return (void *) unicodeAsUTF8(obj, _outLen);
+#else
   PyObject *newObj = PyUnicode_EncodeUTF8 (PyUnicode_AS_UNICODE(obj), PyUnicode_GET_SIZE(obj), NULL);
 
   GET_TC(tc)->newObj = newObj;
 
   *_outLen = PyString_GET_SIZE(newObj);
   return PyString_AS_STRING(newObj);
+#endif
 }
 
-static void *PyDateTimeToINT64(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
+/*
+Days from 1970-01-01 to the given proleptic Gregorian date, from Howard Hinnant's days_from_civil */
+static JSINT64 daysFromCivil(int y, int m, int d)
 {
-  PyObject *obj = (PyObject *) _obj;
-  PyObject *date, *ord;
-  int y, m, d, h, mn, s, days;
-
-  y = PyDateTime_GET_YEAR(obj);
-  m = PyDateTime_GET_MONTH(obj);
-  d = PyDateTime_GET_DAY(obj);
-  h = PyDateTime_DATE_GET_HOUR(obj);
-  mn = PyDateTime_DATE_GET_MINUTE(obj);
-  s = PyDateTime_DATE_GET_SECOND(obj);
-
-  date = PyDate_FromDate(y, m, 1);
-  ord = PyObject_CallMethod(date, "toordinal", NULL);
-  days = PyInt_AS_LONG(ord) - EPOCH_ORD + d - 1;
-  Py_DECREF(date);
-  Py_DECREF(ord);
-  *( (JSINT64 *) outValue) = (((JSINT64) ((days * 24 + h) * 60 + mn)) * 60 + s);
-  return NULL;
+  int era;
+  unsigned int yoe, doy, doe;
+
+  y -= m <= 2;
+  era = (y >= 0 ? y : y - 399) / 400;
+  yoe = (unsigned int) (y - era * 400);
+  doy = (153 * (m > 2 ? m - 3 : m + 9) + 2) / 5 + d - 1;
+  doe = yoe * 365 + yoe / 4 - yoe / 100 + doy;
+  return (JSINT64) era * 146097 + (JSINT64) doe - 719468;
 }
 
-static void *PyDateToINT64(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
+/*
+Calls tzinfo.utcoffset(arg) for an aware datetime or time. Returns 1 with the offset in microseconds,
+0 if there is no offset and -1 with an exception set on failure */
+static int getUTCOffset(PyObject *tzinfo, PyObject *arg, JSINT64 *offset)
 {
-  PyObject *obj = (PyObject *) _obj;
-  PyObject *date, *ord;
-  int y, m, d, days;
+  PyObject *delta;
+
+  if (tzinfo == NULL || tzinfo == Py_None)
+  {
+    return 0;
+  }
 
-  y = PyDateTime_GET_YEAR(obj);
-  m = PyDateTime_GET_MONTH(obj);
-  d = PyDateTime_GET_DAY(obj);
+  delta = PyObject_CallMethod(tzinfo, "utcoffset", "O", arg);
+  if (delta == NULL)
+  {
+    return -1;
+  }
 
-  date = PyDate_FromDate(y, m, 1);
-  ord = PyObject_CallMethod(date, "toordinal", NULL);
-  days = PyInt_AS_LONG(ord) - EPOCH_ORD + d - 1;
-  Py_DECREF(date);
-  Py_DECREF(ord);
-  *( (JSINT64 *) outValue) = ((JSINT64) days * 86400);
+  if (delta == Py_None)
+  {
+    Py_DECREF(delta);
+    return 0;
+  }
 
-  return NULL;
+  if (!PyDelta_Check(delta))
+  {
+    PyErr_Format (PyExc_TypeError, "utcoffset() should return a timedelta");
+    Py_DECREF(delta);
+    return -1;
+  }
+
+  *offset = (((JSINT64) DELTA_GET_DAYS(delta)) * 86400 + DELTA_GET_SECONDS(delta)) * 1000000 + DELTA_GET_MICROSECONDS(delta);
+  Py_DECREF(delta);
+  return 1;
+}
+
+static char *appendDigits(char *offset, int value, int count)
+{
+  char *end = offset + count;
+
+  while (count--)
+  {
+    offset[count] = (char) ('0' + value % 10);
+    value /= 10;
+  }
+
+  return end;
+}
+
+static char *appendISODate(char *offset, int y, int m, int d)
+{
+  offset = appendDigits(offset, y, 4);
+  *offset++ = '-';
+  offset = appendDigits(offset, m, 2);
+  *offset++ = '-';
+  return appendDigits(offset, d, 2);
+}
+
+// HH:MM:SS[.ffffff] the way isoformat() leaves out zero microseconds
+static char *appendISOTime(char *offset, int h, int mn, int s, int us)
+{
+  offset = appendDigits(offset, h, 2);
+  *offset++ = ':';
+  offset = appendDigits(offset, mn, 2);
+  *offset++ = ':';
+  offset = appendDigits(offset, s, 2);
+
+  if (us)
+  {
+    *offset++ = '.';
+    offset = appendDigits(offset, us, 6);
+  }
+
+  return offset;
+}
+
+// +HH:MM[:SS[.ffffff]] for an offset in microseconds
+static char *appendISOOffset(char *offset, JSINT64 utcOffset)
+{
+  *offset++ = utcOffset < 0 ? '-' : '+';
+  utcOffset = utcOffset < 0 ? -utcOffset : utcOffset;
+
+  offset = appendDigits(offset, (int) (utcOffset / 3600000000LL), 2);
+  *offset++ = ':';
+  offset = appendDigits(offset, (int) (utcOffset / 60000000LL % 60), 2);
+
+  if (utcOffset % 60000000LL)
+  {
+    *offset++ = ':';
+    offset = appendDigits(offset, (int) (utcOffset / 1000000LL % 60), 2);
+
+    if (utcOffset % 1000000LL)
+    {
+      *offset++ = '.';
+      offset = appendDigits(offset, (int) (utcOffset % 1000000LL), 6);
+    }
+  }
+
+  return offset;
+}
+
+static void *PyDateToISO(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
+{
+  PyObjectEncoder *pyEncoder = (PyObjectEncoder *) tc->encoder;
+  *_outLen = pyEncoder->dateLength;
+  return pyEncoder->dateBuffer;
+}
+
+/*
+Sets up the type context for a datetime, date or time in the encoder's date mode. Epoch modes encode
+the time since 1970-01-01 UTC as a JT_LONG, times the time since midnight. DATE_MODE_ISO writes the
+isoformat() string as JT_RAW. Returns 0 with an exception set on failure */
+static int beginDateContext(PyObject *obj, JSONTypeContext *tc)
+{
+  PyObjectEncoder *pyEncoder = (PyObjectEncoder *) tc->encoder;
+  TypeContext *pc = GET_TC(tc);
+  JSINT64 value = 0;
+  JSINT64 utcOffset = 0;
+  int hasOffset = 0;
+  int us = 0;
+  char *offset = pyEncoder->dateBuffer;
+
+  if (pyEncoder->dateMode == DATE_MODE_ISO)
+  {
+    *offset++ = '\"';
+  }
+
+  if (PyDate_Check(obj))
+  {
+    value = daysFromCivil(PyDateTime_GET_YEAR(obj), PyDateTime_GET_MONTH(obj), PyDateTime_GET_DAY(obj)) * 86400;
+
+    if (pyEncoder->dateMode == DATE_MODE_ISO)
+    {
+      offset = appendISODate(offset, PyDateTime_GET_YEAR(obj), PyDateTime_GET_MONTH(obj), PyDateTime_GET_DAY(obj));
+    }
+  }
+
+  if (PyDateTime_Check(obj))
+  {
+    value += (PyDateTime_DATE_GET_HOUR(obj) * 60 + PyDateTime_DATE_GET_MINUTE(obj)) * 60 + PyDateTime_DATE_GET_SECOND(obj);
+    us = PyDateTime_DATE_GET_MICROSECOND(obj);
+    hasOffset = getUTCOffset(DATETIME_GET_TZINFO(obj), obj, &utcOffset);
+
+    if (pyEncoder->dateMode == DATE_MODE_ISO)
+    {
+      *offset++ = 'T';
+      offset = appendISOTime(offset, PyDateTime_DATE_GET_HOUR(obj), PyDateTime_DATE_GET_MINUTE(obj), PyDateTime_DATE_GET_SECOND(obj), us);
+    }
+  }
+  else
+  if (PyTime_Check(obj))
+  {
+    value = (PyDateTime_TIME_GET_HOUR(obj) * 60 + PyDateTime_TIME_GET_MINUTE(obj)) * 60 + PyDateTime_TIME_GET_SECOND(obj);
+    us = PyDateTime_TIME_GET_MICROSECOND(obj);
+
+    if (pyEncoder->dateMode == DATE_MODE_ISO)
+    {
+      hasOffset = getUTCOffset(TIME_GET_TZINFO(obj), Py_None, &utcOffset);
+      offset = appendISOTime(offset, PyDateTime_TIME_GET_HOUR(obj), PyDateTime_TIME_GET_MINUTE(obj), PyDateTime_TIME_GET_SECOND(obj), us);
+    }
+  }
+
+  if (hasOffset == -1)
+  {
+    return 0;
+  }
+
+  switch (pyEncoder->dateMode)
+  {
+    case DATE_MODE_ISO:
+      if (hasOffset)
+      {
+        offset = appendISOOffset(offset, utcOffset);
+      }
+      *offset++ = '\"';
+      pyEncoder->dateLength = offset - pyEncoder->dateBuffer;
+      pc->PyTypeToJSON = PyDateToISO;
+      tc->type = JT_RAW;
+      return 1;
+
+    case DATE_MODE_MS:
+      value = value * 1000 + us / 1000 - utcOffset / 1000;
+      break;
+
+    case DATE_MODE_US:
+      value = value * 1000000 + us - utcOffset;
+      break;
+
+    default:
+      value -= utcOffset / 1000000;
+      break;
+  }
+
+  pc->longValue = value;
+  pc->PyTypeToJSON = PyLongToINT64;
+  tc->type = JT_LONG;
+  return 1;
 }
 
 //=============================================================================
@@ -460,7 +874,9 @@ void Dict_iterBegin(JSOBJ obj, JSONTypeContext *tc)
 
 int Dict_iterNext(JSOBJ obj, JSONTypeContext *tc)
 {
-#if PY_MAJOR_VERSION >= 3
+#if PY_VERSION_HEX >= 0x03030000
+  size_t len;
+#elif PY_MAJOR_VERSION >= 3
   PyObject* itemNameTmp;
 #endif
 
@@ -477,6 +893,34 @@ int Dict_iterNext(JSOBJ obj, JSONTypeContext *tc)
     return 0;
   }
 
+#if PY_VERSION_HEX >= 0x03030000
+  // str keys are kept as they are, Dict_iterGetName reads their UTF-8 in place
+  if (PyUnicode_Check(GET_TC(tc)->itemName))
+  {
+    Py_INCREF(GET_TC(tc)->itemName);
+  }
+  else
+  if (!PyString_Check(GET_TC(tc)->itemName))
+  {
+    GET_TC(tc)->itemName = PyObject_Str(GET_TC(tc)->itemName);
+  }
+  else
+  {
+    Py_INCREF(GET_TC(tc)->itemName);
+  }
+
+  if (GET_TC(tc)->itemName == NULL)
+  {
+    return 0;
+  }
+
+  if (PyUnicode_Check(GET_TC(tc)->itemName) && unicodeAsUTF8(GET_TC(tc)->itemName, &len) == NULL)
+  {
+    Py_DECREF(GET_TC(tc)->itemName);
+    GET_TC(tc)->itemName = NULL;
+    return 0;
+  }
+#else
   if (PyUnicode_Check(GET_TC(tc)->itemName))
   {
     GET_TC(tc)->itemName = PyUnicode_AsUTF8String (GET_TC(tc)->itemName);
@@ -495,6 +939,7 @@ int Dict_iterNext(JSOBJ obj, JSONTypeContext *tc)
     {
       Py_INCREF(GET_TC(tc)->itemName);
     }
+#endif
     PRINTMARK();
     return 1;
 }
@@ -517,48 +962,570 @@ JSOBJ Dict_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
 
 char *Dict_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
 {
+#if PY_VERSION_HEX >= 0x03030000
+  if (PyUnicode_Check(GET_TC(tc)->itemName))
+  {
+    return (char *) unicodeAsUTF8(GET_TC(tc)->itemName, outLen);
+  }
+#endif
   *outLen = PyString_GET_SIZE(GET_TC(tc)->itemName);
   return PyString_AS_STRING(GET_TC(tc)->itemName);
 }
 
 
-void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
+/*
+The encode cache keeps the output of values which are encoded over and over again, so it can be
+copied into the output instead of encoding the value again. Only calls with cache=True use it.
+Frozen values, tuples and frozensets which turn out to hold only immutable values, are cached once
+encoded. Other objects, like a dict of settings, once they're pinned with ujson.pin, after which they
+must not change without a call to ujson.invalidate.
+
+Entries are found by the address of their object in an open addressing table and hold a reference
+to it, so the address can't be reused while the entry is there. Entries with output are kept in least
+recently used order and the oldest outputs are dropped when the total size goes over maxSize */
+#define CACHE_MIN_OUTPUT 64               // Frozen values with shorter output are quicker to encode again
+#define CACHE_ENTRY_SIZE 64               // Counted for each output on top of its length
+#define CACHE_DEFAULT_MAX_SIZE (8 * 1024 * 1024)
+
+typedef struct __CacheEntry
 {
-  PyObject *obj, *exc, *toDictFunc;
-  TypeContext *pc;
-  PRINTMARK();
-  if (!_obj) {
-    tc->type = JT_INVALID;
-    return;
-  }
+  PyObject *obj;
+  PyObject *output;   // bytes, or NULL for a pinned object which wasn't encoded yet
+  int options;        // Encoder options the output was made with, see cacheOptions
+  int pinned;
+  int nested;         // The output holds pinned values, so it's dropped when any is invalidated
+  struct __CacheEntry *newer;
+  struct __CacheEntry *older;
+} CacheEntry;
+
+typedef struct __EncodeCache
+{
+  CacheEntry **slots;
+  size_t cbSlots;
+  size_t used;        // Slots which aren't empty, including the ones of removed entries
+  size_t count;
+  size_t pinned;
+  CacheEntry *newest;
+  CacheEntry *oldest;
+  size_t size;
+  size_t maxSize;
+  size_t hits;
+  size_t misses;
+} EncodeCache;
+
+static EncodeCache g_cache = { NULL, 0, 0, 0, 0, NULL, NULL, 0, CACHE_DEFAULT_MAX_SIZE, 0, 0 };
+
+// Marks the slot of a removed entry, which lookups have to probe past
+static CacheEntry g_cacheRemoved;
+
+static size_t Cache_slot(PyObject *obj)
+{
+  JSUINT64 value = (JSUINT64) (size_t) obj * 0x9e3779b97f4a7c15ULL;
+  return (size_t) (value >> 32) & (g_cache.cbSlots - 1);
+}
 
-  obj = (PyObject*) _obj;
+static CacheEntry *Cache_find(PyObject *obj)
+{
+  CacheEntry *entry;
+  size_t index;
 
-  tc->prv = PyObject_Malloc(sizeof(TypeContext));
-  pc = (TypeContext *) tc->prv;
-  if (!pc)
+  if (g_cache.count == 0)
   {
-    tc->type = JT_INVALID;
-    PyErr_NoMemory();
-    return;
+    return NULL;
   }
-  pc->newObj = NULL;
-  pc->dictObj = NULL;
-  pc->itemValue = NULL;
-  pc->itemName = NULL;
-  pc->attrList = NULL;
-  pc->index = 0;
-  pc->size = 0;
-  pc->longValue = 0;
 
-  if (PyIter_Check(obj))
+  for (index = Cache_slot(obj); (entry = g_cache.slots[index]) != NULL; index = (index + 1) & (g_cache.cbSlots - 1))
   {
-    PRINTMARK();
-    goto ISITERABLE;
+    if (entry != &g_cacheRemoved && entry->obj == obj)
+    {
+      return entry;
+    }
   }
 
-  if (PyBool_Check(obj))
+  return NULL;
+}
+
+/*
+Puts the entry in the first free slot for its object. The table must have one */
+static void Cache_place(CacheEntry *entry)
+{
+  size_t index = Cache_slot(entry->obj);
+
+  while (g_cache.slots[index] != NULL && g_cache.slots[index] != &g_cacheRemoved)
+  {
+    index = (index + 1) & (g_cache.cbSlots - 1);
+  }
+
+  if (g_cache.slots[index] == NULL)
+  {
+    g_cache.used ++;
+  }
+
+  g_cache.slots[index] = entry;
+}
+
+/*
+Makes the table at least four times the number of entries, dropping the slots of removed entries.
+Returns 0 with an exception set on failure */
+static int Cache_resize(void)
+{
+  CacheEntry **oldSlots = g_cache.slots;
+  size_t cbOldSlots = g_cache.cbSlots;
+  size_t cbSlots = 64;
+  size_t index;
+
+  while (cbSlots < (g_cache.count + 1) * 4)
+  {
+    cbSlots *= 2;
+  }
+
+  g_cache.slots = (CacheEntry **) PyMem_Malloc(cbSlots * sizeof(CacheEntry *));
+  if (g_cache.slots == NULL)
+  {
+    g_cache.slots = oldSlots;
+    PyErr_NoMemory();
+    return 0;
+  }
+
+  memset(g_cache.slots, 0, cbSlots * sizeof(CacheEntry *));
+  g_cache.cbSlots = cbSlots;
+  g_cache.used = 0;
+
+  for (index = 0; index < cbOldSlots; index ++)
+  {
+    if (oldSlots[index] != NULL && oldSlots[index] != &g_cacheRemoved)
+    {
+      Cache_place(oldSlots[index]);
+    }
+  }
+
+  PyMem_Free(oldSlots);
+  return 1;
+}
+
+/*
+Adds an entry for obj, which must not have one yet. Returns NULL with an exception set on failure */
+static CacheEntry *Cache_insert(PyObject *obj)
+{
+  CacheEntry *entry;
+
+  // Keep at least half of the slots empty so probing stays short
+  if ((g_cache.used + 1) * 2 > g_cache.cbSlots && !Cache_resize())
+  {
+    return NULL;
+  }
+
+  entry = (CacheEntry *) PyMem_Malloc(sizeof(CacheEntry));
+  if (entry == NULL)
+  {
+    PyErr_NoMemory();
+    return NULL;
+  }
+
+  memset(entry, 0, sizeof(CacheEntry));
+  Py_INCREF(obj);
+  entry->obj = obj;
+  Cache_place(entry);
+  g_cache.count ++;
+  return entry;
+}
+
+static void Cache_unlink(CacheEntry *entry)
+{
+  if (entry->newer)
+  {
+    entry->newer->older = entry->older;
+  }
+  else
+  {
+    g_cache.newest = entry->older;
+  }
+
+  if (entry->older)
+  {
+    entry->older->newer = entry->newer;
+  }
+  else
+  {
+    g_cache.oldest = entry->newer;
+  }
+
+  entry->newer = NULL;
+  entry->older = NULL;
+}
+
+static void Cache_linkNewest(CacheEntry *entry)
+{
+  entry->newer = NULL;
+  entry->older = g_cache.newest;
+
+  if (g_cache.newest)
+  {
+    g_cache.newest->newer = entry;
+  }
+  else
+  {
+    g_cache.oldest = entry;
+  }
+
+  g_cache.newest = entry;
+}
+
+/*
+Drops the output of the entry and the entry itself unless its object is pinned. The references are
+released last, once the cache is consistent again, as releasing the object may run any code */
+static void Cache_drop(CacheEntry *entry)
+{
+  PyObject *output = entry->output;
+  PyObject *obj = NULL;
+  size_t index;
+
+  if (output)
+  {
+    Cache_unlink(entry);
+    g_cache.size -= PyBytes_GET_SIZE(output) + CACHE_ENTRY_SIZE;
+    entry->output = NULL;
+  }
+
+  if (!entry->pinned)
+  {
+    for (index = Cache_slot(entry->obj); g_cache.slots[index] != entry; index = (index + 1) & (g_cache.cbSlots - 1));
+    g_cache.slots[index] = &g_cacheRemoved;
+    g_cache.count --;
+    obj = entry->obj;
+    PyMem_Free(entry);
+  }
+
+  Py_XDECREF(output);
+  Py_XDECREF(obj);
+}
+
+/*
+Drops the least recently used outputs until the cache fits in maxSize */
+static void Cache_trim(void)
+{
+  while (g_cache.size > g_cache.maxSize && g_cache.oldest)
+  {
+    Cache_drop(g_cache.oldest);
+  }
+}
+
+/*
+Keeps cbData bytes at data as the output of obj. Returns 0 with an exception set on failure */
+static int Cache_store(PyObject *obj, const char *data, size_t cbData, int options, int nested)
+{
+  CacheEntry *entry;
+  PyObject *output;
+
+  if (cbData + CACHE_ENTRY_SIZE > g_cache.maxSize)
+  {
+    return 1;
+  }
+
+  output = PyBytes_FromStringAndSize(data, cbData);
+  if (output == NULL)
+  {
+    return 0;
+  }
+
+  entry = Cache_find(obj);
+
+  if (entry == NULL)
+  {
+    entry = Cache_insert(obj);
+    if (entry == NULL)
+    {
+      Py_DECREF(output);
+      return 0;
+    }
+  }
+  else
+  if (entry->output)
+  {
+    Cache_unlink(entry);
+    g_cache.size -= PyBytes_GET_SIZE(entry->output) + CACHE_ENTRY_SIZE;
+    Py_CLEAR(entry->output);
+  }
+
+  entry->output = output;
+  entry->options = options;
+  entry->nested = nested;
+  Cache_linkNewest(entry);
+  g_cache.size += cbData + CACHE_ENTRY_SIZE;
+
+  Cache_trim();
+  return 1;
+}
+
+/*
+The encoder options which change the output of a value */
+static int cacheOptions(PyObjectEncoder *pyEncoder)
+{
+  JSONObjectEncoder *enc = (JSONObjectEncoder *) pyEncoder;
+  return enc->forceASCII | (enc->encodeHTMLChars << 1) | (enc->shortestFloat << 2) | (pyEncoder->dateMode << 3) | (enc->doublePrecision << 5);
+}
+
+static void *PyCachedToRAW(JSOBJ _obj, JSONTypeContext *tc, void *outValue, size_t *_outLen)
+{
+  PyObject *obj = GET_TC(tc)->newObj;
+  *_outLen = PyBytes_GET_SIZE(obj);
+  return PyBytes_AS_STRING(obj);
+}
+
+/*
+Looks up a value which isn't a scalar in the encode cache. Returns 1 if its output was found, which
+is then copied in as JT_RAW. Otherwise a frozen or pinned value has its output recorded and kept by
+endCachedContext */
+static int beginCachedContext(PyObjectEncoder *pyEncoder, PyObject *obj, JSONTypeContext *tc, int frozen)
+{
+  TypeContext *pc = GET_TC(tc);
+  CacheEntry *entry = Cache_find(obj);
+
+  if (entry == NULL && !frozen)
+  {
+    return 0;
+  }
+
+  if (entry && entry->pinned)
   {
+    // Pinned values may change before they're invalidated, frozen values holding them aren't kept
+    pyEncoder->mutables ++;
+    pyEncoder->pins ++;
+  }
+
+  if (entry && entry->output && entry->options == cacheOptions(pyEncoder))
+  {
+    g_cache.hits ++;
+    Cache_unlink(entry);
+    Cache_linkNewest(entry);
+
+    Py_INCREF(entry->output);
+    pc->newObj = entry->output;
+    pc->PyTypeToJSON = PyCachedToRAW;
+    tc->type = JT_RAW;
+    return 1;
+  }
+
+  pc->cacheCandidate = 1;
+  pc->cacheStart = tc->encoder->offset - tc->encoder->start;
+  pc->cacheMutables = pyEncoder->mutables;
+  pc->cachePins = pyEncoder->pins;
+  pc->cacheFlushes = pyEncoder->flushes;
+  return 0;
+}
+
+/*
+Keeps the output of a value begun by beginCachedContext unless it failed, was flushed to the file
+already or, for a frozen value, held a mutable one or was too short to be worth it. Only values kept
+count as misses. Caching is best effort, failing to keep the output
+doesn't fail the call */
+static void endCachedContext(PyObject *obj, JSONTypeContext *tc)
+{
+  TypeContext *pc = GET_TC(tc);
+  PyObjectEncoder *pyEncoder = (PyObjectEncoder *) tc->encoder;
+  JSONObjectEncoder *enc = tc->encoder;
+  size_t cbOutput = (enc->offset - enc->start) - pc->cacheStart;
+  CacheEntry *entry;
+
+  if (enc->errorMsg || PyErr_Occurred() || pyEncoder->flushes != pc->cacheFlushes)
+  {
+    return;
+  }
+
+  entry = Cache_find(obj);
+
+  if (!(entry && entry->pinned) && (pyEncoder->mutables != pc->cacheMutables || cbOutput < CACHE_MIN_OUTPUT))
+  {
+    return;
+  }
+
+  g_cache.misses ++;
+
+  if (!Cache_store(obj, enc->start + pc->cacheStart, cbOutput, cacheOptions(pyEncoder), pyEncoder->pins != pc->cachePins))
+  {
+    PyErr_Clear();
+  }
+}
+
+/*
+The handler for an object is resolved once per type and kept in handlerCache, which maps the type to
+the handler registered for it or its nearest base, to True if the type has a toDict method, to False
+if its instances could still have one of their own, through their __dict__ or __getattr__, or to
+None. Returns a borrowed reference or NULL with an exception set */
+#define HANDLER_CACHE_MAX 1024
+
+static PyObject *resolveHandler(PyObjectEncoder *pyEncoder, PyObject *obj)
+{
+  PyObject *key = (PyObject *) Py_TYPE(obj);
+  PyObject *handler = NULL;
+  PyObject *mro;
+  Py_ssize_t index;
+
+#if PY_MAJOR_VERSION < 3
+  // Instances of old style classes all share one type
+  if (PyInstance_Check(obj))
+  {
+    key = (PyObject *) ((PyInstanceObject *) obj)->in_class;
+  }
+#endif
+
+  if (pyEncoder->handlerCache == NULL)
+  {
+    pyEncoder->handlerCache = PyDict_New();
+    if (pyEncoder->handlerCache == NULL)
+    {
+      return NULL;
+    }
+  }
+  else
+  {
+    handler = PyDict_GetItem(pyEncoder->handlerCache, key);
+    if (handler)
+    {
+      return handler;
+    }
+
+    // Types made on the fly shouldn't pile up in a long lived Encoder
+    if (PyDict_Size(pyEncoder->handlerCache) >= HANDLER_CACHE_MAX)
+    {
+      PyDict_Clear(pyEncoder->handlerCache);
+    }
+  }
+
+  if (pyEncoder->handlers)
+  {
+    mro = PyType_Check(key) ? ((PyTypeObject *) key)->tp_mro : NULL;
+
+    if (mro)
+    {
+      for (index = 0; index < PyTuple_GET_SIZE(mro) && handler == NULL; index ++)
+      {
+        handler = PyDict_GetItem(pyEncoder->handlers, PyTuple_GET_ITEM(mro, index));
+      }
+    }
+    else
+    {
+      handler = PyDict_GetItem(pyEncoder->handlers, key);
+    }
+  }
+
+  if (handler == NULL && PyObject_HasAttrString(key, "toDict"))
+  {
+    handler = Py_True;
+  }
+  else
+  if (handler == NULL)
+  {
+#if PY_MAJOR_VERSION < 3
+    handler = PyInstance_Check(obj) || Py_TYPE(obj)->tp_dictoffset || Py_TYPE(obj)->tp_getattro != PyObject_GenericGetAttr ? Py_False : Py_None;
+#else
+    handler = Py_TYPE(obj)->tp_dictoffset || Py_TYPE(obj)->tp_getattro != PyObject_GenericGetAttr ? Py_False : Py_None;
+#endif
+  }
+
+  if (PyDict_SetItem(pyEncoder->handlerCache, key, handler) == -1)
+  {
+    return NULL;
+  }
+
+  return handler;
+}
+
+void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
+{
+  PyObject *obj, *exc, *toDictFunc, *result;
+  PyObject *handler = NULL;
+  PyTypeObject *type;
+  TypeContext *pc;
+  PyObjectEncoder *pyEncoder = (PyObjectEncoder *) tc->encoder;
+  int substitutions = 0;
+  PRINTMARK();
+  if (!_obj) {
+    tc->type = JT_INVALID;
+    return;
+  }
+
+  obj = (PyObject*) _obj;
+
+  // The encoder's slot for this level, see cbTypeContext in setupEncoder
+  pc = (TypeContext *) tc->prv;
+  pc->newObj = NULL;
+  pc->dictObj = NULL;
+  pc->itemValue = NULL;
+  pc->itemName = NULL;
+  pc->attrList = NULL;
+  pc->index = 0;
+  pc->size = 0;
+  pc->longValue = 0;
+  pc->substitute = NULL;
+  pc->cacheCandidate = 0;
+
+DISPATCH:
+  /*
+  Most values are of an exact builtin type, pointer compares on the type send those straight to
+  their handler and only subclasses and other objects pay for the checks further down */
+  type = Py_TYPE(obj);
+
+  if (type == &PyUnicode_Type) goto ISUNICODE;
+
+  // Scalars aren't worth a cache lookup
+#if PY_MAJOR_VERSION < 3
+  if (pyEncoder->cache && type != &PyLong_Type && type != &PyFloat_Type && type != &PyBool_Type && obj != Py_None && type != &PyInt_Type)
+#else
+  if (pyEncoder->cache && type != &PyLong_Type && type != &PyFloat_Type && type != &PyBool_Type && obj != Py_None)
+#endif
+  {
+    if (pyEncoder->cacheSkip)
+    {
+      pyEncoder->cacheSkip = 0;
+    }
+    else
+    if (beginCachedContext(pyEncoder, obj, tc, PyTuple_Check(obj) || PyFrozenSet_Check(obj)))
+    {
+      return;
+    }
+  }
+
+  if (type == &PyDict_Type) goto ISDICT;
+  if (type == &PyLong_Type) goto ISLONG;
+  if (type == &PyFloat_Type) goto ISFLOAT;
+  if (type == &PyList_Type) goto ISLIST;
+  if (type == &PyBool_Type) goto ISBOOL;
+  if (obj == Py_None) goto ISNULL;
+#if PY_MAJOR_VERSION < 3
+  if (type == &PyString_Type) goto ISSTRING;
+  if (type == &PyInt_Type) goto ISINT;
+#endif
+  if (type == &PyTuple_Type) goto ISTUPLE;
+  if (type == PyDateTimeAPI->DateTimeType) goto ISDATE;
+  if (type == (PyTypeObject *) type_decimal) goto ISDECIMAL;
+  if (type == &RawJSONType) goto ISRAW;
+
+  // Handlers take precedence over the checks below, so they apply to subclasses of builtin types too
+  if (pyEncoder->handlers)
+  {
+    handler = resolveHandler(pyEncoder, obj);
+    if (handler == NULL)
+    {
+      goto INVALID;
+    }
+
+    if (handler != Py_True && handler != Py_False && handler != Py_None)
+    {
+      goto ISHANDLED;
+    }
+  }
+
+  if (PyIter_Check(obj))
+  {
+    PRINTMARK();
+    pyEncoder->mutables ++;
+    goto ISITERABLE;
+  }
+
+  if (PyBool_Check(obj))
+  {
+ISBOOL:
     PRINTMARK();
     tc->type = (obj == Py_True) ? JT_TRUE : JT_FALSE;
     return;
@@ -566,6 +1533,7 @@ void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
   else
   if (PyLong_Check(obj))
   {
+ISLONG:
     PRINTMARK();
     pc->PyTypeToJSON = PyLongToINT64;
     tc->type = JT_LONG;
@@ -591,6 +1559,9 @@ void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
   else
   if (PyInt_Check(obj))
   {
+#if PY_MAJOR_VERSION < 3
+ISINT:
+#endif
     PRINTMARK();
 #ifdef _LP64
     pc->PyTypeToJSON = PyIntToINT64; tc->type = JT_LONG;
@@ -602,6 +1573,9 @@ void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
   else
   if (PyString_Check(obj))
   {
+#if PY_MAJOR_VERSION < 3
+ISSTRING:
+#endif
     PRINTMARK();
     pc->PyTypeToJSON = PyStringToUTF8; tc->type = JT_UTF8;
     return;
@@ -609,34 +1583,60 @@ void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
   else
   if (PyUnicode_Check(obj))
   {
+ISUNICODE:
     PRINTMARK();
-    pc->PyTypeToJSON = PyUnicodeToUTF8; tc->type = JT_UTF8;
-    return;
+#if PY_VERSION_HEX >= 0x03030000
+    // Makes and caches the UTF-8 of non ASCII strings now, while failing can still be reported
+    if (!PyUnicode_IS_COMPACT_ASCII(obj) && PyUnicode_AsUTF8AndSize(obj, NULL) == NULL)
+    {
+      goto INVALID;
+    }
+#endif
+    pc->PyTypeToJSON = PyUnicodeToUTF8; tc->type = JT_UTF8;
+    return;
   }
   else
-  if (PyFloat_Check(obj) || (type_decimal && PyObject_IsInstance(obj, type_decimal)))
+  if (PyFloat_Check(obj))
   {
+ISFLOAT:
     PRINTMARK();
     pc->PyTypeToJSON = PyFloatToDOUBLE; tc->type = JT_DOUBLE;
     return;
   }
   else
-  if (PyDateTime_Check(obj))
+  if (type_decimal && PyObject_IsInstance(obj, type_decimal))
   {
+ISDECIMAL:
     PRINTMARK();
-    pc->PyTypeToJSON = PyDateTimeToINT64; tc->type = JT_LONG;
+    if (!beginDecimalContext(obj, tc))
+    {
+      goto INVALID;
+    }
     return;
   }
   else
-  if (PyDate_Check(obj))
+  if (PyDate_Check(obj) || PyTime_Check(obj))
+  {
+ISDATE:
+    PRINTMARK();
+    if (!beginDateContext(obj, tc))
+    {
+      goto INVALID;
+    }
+    return;
+  }
+  else
+  if (PyObject_TypeCheck(obj, &RawJSONType))
   {
+ISRAW:
     PRINTMARK();
-    pc->PyTypeToJSON = PyDateToINT64; tc->type = JT_LONG;
+    pc->PyTypeToJSON = PyRawJSONToRAW; tc->type = JT_RAW;
     return;
   }
   else
   if (obj == Py_None)
   {
+ISNULL:
     PRINTMARK();
     tc->type = JT_NULL;
     return;
@@ -645,7 +1645,9 @@ void Object_beginTypeContext (JSOBJ _obj, JSONTypeContext *tc)
 ISITERABLE:
   if (PyDict_Check(obj))
   {
+ISDICT:
     PRINTMARK();
+    pyEncoder->mutables ++;
     tc->type = JT_OBJECT;
     pc->iterBegin = Dict_iterBegin;
     pc->iterEnd = Dict_iterEnd;
@@ -659,7 +1661,9 @@ ISITERABLE:
   else
   if (PyList_Check(obj))
   {
+ISLIST:
     PRINTMARK();
+    pyEncoder->mutables ++;
     tc->type = JT_ARRAY;
     pc->iterBegin = List_iterBegin;
     pc->iterEnd = List_iterEnd;
@@ -671,6 +1675,7 @@ ISITERABLE:
   else
   if (PyTuple_Check(obj))
   {
+ISTUPLE:
     PRINTMARK();
     tc->type = JT_ARRAY;
     pc->iterBegin = Tuple_iterBegin;
@@ -684,6 +1689,7 @@ ISITERABLE:
   if (PyAnySet_Check(obj))
   {
     PRINTMARK();
+    pyEncoder->mutables += !PyFrozenSet_Check(obj);
     tc->type = JT_ARRAY;
     pc->iterBegin = Iter_iterBegin;
     pc->iterEnd = Iter_iterEnd;
@@ -693,7 +1699,16 @@ ISITERABLE:
     return;
   }
 
-  toDictFunc = PyObject_GetAttrString(obj, "toDict");
+  if (handler == NULL)
+  {
+    handler = resolveHandler(pyEncoder, obj);
+    if (handler == NULL)
+    {
+      goto INVALID;
+    }
+  }
+
+  toDictFunc = handler != Py_None ? PyObject_GetAttrString(obj, "toDict") : NULL;
 
   if (toDictFunc)
   {
@@ -701,6 +1716,7 @@ ISITERABLE:
     PyObject* toDictResult = PyObject_Call(toDictFunc, tuple, NULL);
     Py_DECREF(tuple);
     Py_DECREF(toDictFunc);
+    pyEncoder->mutables ++;
 
     if (toDictResult == NULL)
     {
@@ -715,248 +1731,1340 @@ ISITERABLE:
       tc->type = JT_NULL;
       return;
     }
-
-    PRINTMARK();
-    tc->type = JT_OBJECT;
-    pc->iterBegin = Dict_iterBegin;
-    pc->iterEnd = Dict_iterEnd;
-    pc->iterNext = Dict_iterNext;
-    pc->iterGetValue = Dict_iterGetValue;
-    pc->iterGetName = Dict_iterGetName;
-    pc->dictObj = toDictResult;
-    return;
+
+    PRINTMARK();
+    tc->type = JT_OBJECT;
+    pc->iterBegin = Dict_iterBegin;
+    pc->iterEnd = Dict_iterEnd;
+    pc->iterNext = Dict_iterNext;
+    pc->iterGetValue = Dict_iterGetValue;
+    pc->iterGetName = Dict_iterGetName;
+    pc->dictObj = toDictResult;
+    return;
+  }
+
+  PyErr_Clear();
+
+  if (pyEncoder->defaultFn)
+  {
+    handler = pyEncoder->defaultFn;
+ISHANDLED:
+    PRINTMARK();
+    // Whatever the handler returns is encoded in place of the object, it may need a handler as well
+    if (++ substitutions > tc->encoder->recursionMax)
+    {
+      PyErr_Format (PyExc_OverflowError, "Maximum recursion level reached");
+      goto INVALID;
+    }
+
+#if PY_VERSION_HEX >= 0x03090000
+    result = PyObject_CallOneArg(handler, obj);
+#else
+    result = PyObject_CallFunctionObjArgs(handler, obj, NULL);
+#endif
+    if (result == NULL)
+    {
+      goto INVALID;
+    }
+
+    Py_XDECREF(pc->substitute);
+    pc->substitute = result;
+    tc->substitute = result;
+    obj = result;
+    handler = NULL;
+    goto DISPATCH;
+  }
+
+  PRINTMARK();
+  // Falling to INVALID case as this type of object(class instance, module,
+  // class, function, etc..) can't be serialized.
+  PyErr_Format (PyExc_TypeError, "%s", "Object is not JSON serializable");
+
+INVALID:
+  tc->type = JT_INVALID;
+  Py_CLEAR(pc->newObj);
+  Py_CLEAR(pc->substitute);
+  return;
+}
+
+void Object_endTypeContext(JSOBJ obj, JSONTypeContext *tc)
+{
+  if (GET_TC(tc)->cacheCandidate)
+  {
+    endCachedContext((PyObject *) obj, tc);
+  }
+
+  Py_XDECREF(GET_TC(tc)->newObj);
+  Py_XDECREF(GET_TC(tc)->substitute);
+}
+
+const char *Object_getStringValue(JSOBJ obj, JSONTypeContext *tc, size_t *_outLen)
+{
+  return GET_TC(tc)->PyTypeToJSON (obj, tc, NULL, _outLen);
+}
+
+JSINT64 Object_getLongValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  JSINT64 ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+JSINT32 Object_getIntValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  JSINT32 ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+double Object_getDoubleValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  double ret;
+  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
+  return ret;
+}
+
+static void Object_releaseObject(JSOBJ _obj)
+{
+  Py_DECREF( (PyObject *) _obj);
+}
+
+void Object_iterBegin(JSOBJ obj, JSONTypeContext *tc)
+{
+  GET_TC(tc)->iterBegin(obj, tc);
+}
+
+int Object_iterNext(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->iterNext(obj, tc);
+}
+
+void Object_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+{
+  GET_TC(tc)->iterEnd(obj, tc);
+}
+
+JSOBJ Object_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+{
+  return GET_TC(tc)->iterGetValue(obj, tc);
+}
+
+char *Object_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+{
+  return GET_TC(tc)->iterGetName(obj, tc, outLen);
+}
+
+static char *g_kwlist[] = { "obj", "ensure_ascii", "double_precision", "encode_html_chars", "shortest_float", "date_mode", "default", "handlers", "cache", NULL};
+
+/*
+Sets up pyEncoder with the given options */
+static const char *g_dateModes[] = { "s", "ms", "us", "iso", NULL };
+
+/*
+Sets up the encoder options, keeping any output hooks already set on pyEncoder.
+Returns 0 with an exception set for invalid options */
+static int setupEncoder(PyObjectEncoder *pyEncoder, PyObject *oensureAscii, int idoublePrecision, PyObject *oencodeHTMLChars, PyObject *oshortestFloat, PyObject *odateMode, PyObject *odefault, PyObject *ohandlers, PyObject *ocache)
+{
+  const char *dateMode = NULL;
+  int index;
+
+  JSONObjectEncoder *encoder = (JSONObjectEncoder *) pyEncoder;
+
+  JSONObjectEncoder defaults =
+  {
+    Object_beginTypeContext,
+    Object_endTypeContext,
+    Object_getStringValue,
+    Object_getLongValue,
+    Object_getIntValue,
+    Object_getDoubleValue,
+    Object_iterBegin,
+    Object_iterNext,
+    Object_iterEnd,
+    Object_iterGetValue,
+    Object_iterGetName,
+    Object_releaseObject,
+    PyObject_Malloc,
+    PyObject_Realloc,
+    PyObject_Free,
+    -1, //recursionMax
+    10, // default double precision setting
+    1, //forceAscii
+#if HAS_JSON_ENCODE_HTML_CHARS_DEFAULT_TRUE
+    1, //encodeHTMLChars
+#else
+    0, //encodeHTMLChars
+#endif
+  };
+
+  // The lib keeps one TypeContext per nesting level, Object_beginTypeContext never allocates one
+  defaults.cbTypeContext = sizeof(TypeContext);
+
+  // Keep the output hooks the caller set up
+  defaults.flush = encoder->flush;
+  if (encoder->malloc)
+  {
+    defaults.malloc = encoder->malloc;
+    defaults.realloc = encoder->realloc;
+    defaults.free = encoder->free;
+  }
+  *encoder = defaults;
+
+  if (oensureAscii != NULL && !PyObject_IsTrue(oensureAscii))
+  {
+    encoder->forceASCII = 0;
+  }
+
+  if (oencodeHTMLChars != NULL && PyObject_IsTrue(oencodeHTMLChars))
+  {
+    encoder->encodeHTMLChars = 1;
+  }
+
+  if (oshortestFloat != NULL && PyObject_IsTrue(oshortestFloat))
+  {
+    encoder->shortestFloat = 1;
+  }
+
+  encoder->doublePrecision = idoublePrecision;
+
+  // Borrowed, the caller keeps them alive for as long as the encoder is used
+  pyEncoder->defaultFn = odefault != Py_None ? odefault : NULL;
+  pyEncoder->handlers = ohandlers != Py_None ? ohandlers : NULL;
+
+  if (pyEncoder->defaultFn && !PyCallable_Check(pyEncoder->defaultFn))
+  {
+    PyErr_Format (PyExc_TypeError, "default must be callable");
+    return 0;
+  }
+
+  if (pyEncoder->handlers && !PyDict_Check(pyEncoder->handlers))
+  {
+    PyErr_Format (PyExc_TypeError, "handlers must be a dict");
+    return 0;
+  }
+
+  pyEncoder->cache = ocache != NULL && PyObject_IsTrue(ocache);
+
+  // The output of a value must only depend on the value and the options to be kept
+  if (pyEncoder->cache && (pyEncoder->defaultFn || pyEncoder->handlers))
+  {
+    PyErr_Format (PyExc_ValueError, "cache can't be used with default or handlers");
+    return 0;
+  }
+
+  pyEncoder->dateMode = DATE_MODE_S;
+
+  if (odateMode != NULL && odateMode != Py_None)
+  {
+#if PY_MAJOR_VERSION >= 3
+    if (PyUnicode_Check(odateMode))
+    {
+      dateMode = PyUnicode_AsUTF8(odateMode);
+    }
+#else
+    if (PyString_Check(odateMode))
+    {
+      dateMode = PyString_AS_STRING(odateMode);
+    }
+#endif
+
+    for (index = 0; dateMode && g_dateModes[index]; index ++)
+    {
+      if (strcmp(dateMode, g_dateModes[index]) == 0)
+      {
+        pyEncoder->dateMode = index;
+        return 1;
+      }
+    }
+
+    PyErr_Format (PyExc_ValueError, "date_mode must be one of 's', 'ms', 'us' or 'iso'");
+    return 0;
+  }
+
+  return 1;
+}
+
+/*
+Encodes the object into buffer with an encoder set up by setupEncoder.
+Returns the NUL terminated output or NULL with an exception set. If the returned pointer isn't
+buffer it must be released with pyEncoder->enc.free */
+static char *encodeObject(PyObjectEncoder *pyEncoder, PyObject *oinput, char *buffer, size_t cbBuffer, int lines)
+{
+  char *ret;
+  JSONObjectEncoder *encoder = (JSONObjectEncoder *) pyEncoder;
+
+  PRINTMARK();
+  if (lines)
+  {
+    oinput = PySequence_Fast (oinput, "Expected an iterable of objects");
+    if (oinput == NULL)
+    {
+      return NULL;
+    }
+
+    // Only the records are looked up in the encode cache, not the sequence holding them
+    pyEncoder->cacheSkip = 1;
+    ret = JSON_EncodeLines (oinput, encoder, buffer, cbBuffer);
+    Py_DECREF(oinput);
+  }
+  else
+  {
+    ret = JSON_EncodeObject (oinput, encoder, buffer, cbBuffer);
+  }
+  PRINTMARK();
+
+  if (PyErr_Occurred() || encoder->errorMsg)
+  {
+    if (encoder->heap && encoder->start)
+    {
+      encoder->free (encoder->start);
+    }
+
+    if (!PyErr_Occurred())
+    {
+      PyErr_Format (PyExc_OverflowError, "%s", encoder->errorMsg);
+    }
+    return NULL;
+  }
+
+  return ret;
+}
+
+/*
+Parses the encoder arguments into pyEncoder and encodes the object into buffer, see encodeObject */
+static char *encodeArgs(PyObject *args, PyObject *kwargs, PyObjectEncoder *pyEncoder, char *buffer, size_t cbBuffer, int lines)
+{
+  PyObject *oinput = NULL;
+  PyObject *oensureAscii = NULL;
+  int idoublePrecision = 10; // default double precision setting
+  PyObject *oencodeHTMLChars = NULL;
+  PyObject *oshortestFloat = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *odefault = NULL;
+  PyObject *ohandlers = NULL;
+  PyObject *ocache = NULL;
+  char *ret;
+
+  PRINTMARK();
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OiOOOOOO", g_kwlist, &oinput, &oensureAscii, &idoublePrecision, &oencodeHTMLChars, &oshortestFloat, &odateMode, &odefault, &ohandlers, &ocache))
+  {
+    return NULL;
+  }
+
+  if (!setupEncoder(pyEncoder, oensureAscii, idoublePrecision, oencodeHTMLChars, oshortestFloat, odateMode, odefault, ohandlers, ocache))
+  {
+    return NULL;
+  }
+  ret = encodeObject(pyEncoder, oinput, buffer, cbBuffer, lines);
+
+  // The handlers resolved for this call are of no use to the next one
+  Py_CLEAR(pyEncoder->handlerCache);
+  return ret;
+}
+
+PyObject* objToJSON(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  char buffer[65536];
+  char *ret;
+  PyObject *newobj;
+  PyObjectEncoder pyEncoder;
+
+  memset (&pyEncoder, 0, sizeof (PyObjectEncoder));
+
+  ret = encodeArgs (args, kwargs, &pyEncoder, buffer, sizeof (buffer), 0);
+
+  if (ret == NULL)
+  {
+    return NULL;
+  }
+
+  // The length is known, don't scan the output for the NUL terminator
+  newobj = PyString_FromStringAndSize (ret, pyEncoder.enc.offset - pyEncoder.enc.start - 1);
+
+  if (ret != buffer)
+  {
+    pyEncoder.enc.free (ret);
+  }
+
+  PRINTMARK();
+
+  return newobj;
+}
+
+/*
+Heap hooks for dumps_bytes. Output which outgrows the stack buffer is kept in a bytes object which
+grows in place, so it becomes the result without a final copy. size includes the NUL terminator
+which bytes objects reserve room for anyway */
+#define BYTES_FROM_DATA(__ptr) ((PyObject *) ((char *) (__ptr) - offsetof(PyBytesObject, ob_sval)))
+
+static void *Bytes_malloc(size_t size)
+{
+  PyObject *obj = PyBytes_FromStringAndSize (NULL, size - 1);
+  return obj ? PyBytes_AS_STRING (obj) : NULL;
+}
+
+static void *Bytes_realloc(void *ptr, size_t size)
+{
+  PyObject *obj = BYTES_FROM_DATA(ptr);
+
+  if (_PyBytes_Resize (&obj, size - 1) == -1)
+  {
+    return NULL;
+  }
+
+  return PyBytes_AS_STRING (obj);
+}
+
+static void Bytes_free(void *ptr)
+{
+  Py_DECREF(BYTES_FROM_DATA(ptr));
+}
+
+PyObject* objToJSONBytes(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  char buffer[65536];
+  char *ret;
+  PyObject *newobj;
+  PyObjectEncoder pyEncoder;
+  Py_ssize_t length;
+
+  memset (&pyEncoder, 0, sizeof (PyObjectEncoder));
+  pyEncoder.enc.malloc = Bytes_malloc;
+  pyEncoder.enc.realloc = Bytes_realloc;
+  pyEncoder.enc.free = Bytes_free;
+
+  ret = encodeArgs (args, kwargs, &pyEncoder, buffer, sizeof (buffer), 0);
+
+  if (ret == NULL)
+  {
+    return NULL;
+  }
+
+  length = pyEncoder.enc.offset - pyEncoder.enc.start - 1;
+
+  if (ret == buffer)
+  {
+    return PyBytes_FromStringAndSize (ret, length);
+  }
+
+  newobj = BYTES_FROM_DATA(ret);
+
+  if (_PyBytes_Resize (&newobj, length) == -1)
+  {
+    return NULL;
+  }
+
+  PRINTMARK();
+
+  return newobj;
+}
+
+/*
+Writes out the encoder buffer to the file being dumped to */
+static int Object_flushBuffer(JSONObjectEncoder *enc)
+{
+  PyObjectEncoder *pyEncoder = (PyObjectEncoder *) enc;
+  char *end = enc->offset;
+  PyObject *chunk;
+  PyObject *result;
+  size_t remaining;
+#if PY_MAJOR_VERSION >= 3
+  char *lead = end;
+  int index;
+#endif
+
+  if (PyErr_Occurred())
+  {
+    return 0;
+  }
+
+  pyEncoder->flushes ++;
+
+#if PY_MAJOR_VERSION >= 3
+  /*
+  Chunks are written as str so keep a trailing UTF-8 sequence which isn't complete yet in the
+  buffer until the next flush */
+  for (index = 0; index < 3 && lead > enc->start && (*(lead - 1) & 0xc0) == 0x80; index ++)
+  {
+    lead --;
+  }
+
+  if (lead > enc->start)
+  {
+    JSUINT8 chr = (JSUINT8) *(lead - 1);
+    int seqLen = (chr >= 0xf0) ? 4 : (chr >= 0xe0) ? 3 : (chr >= 0xc0) ? 2 : 1;
+
+    if (end - (lead - 1) < seqLen)
+    {
+      end = lead - 1;
+    }
+  }
+
+  chunk = PyUnicode_FromStringAndSize (enc->start, end - enc->start);
+#else
+  chunk = PyString_FromStringAndSize (enc->start, end - enc->start);
+#endif
+
+  if (chunk == NULL)
+  {
+    return 0;
+  }
+
+  result = PyObject_CallFunctionObjArgs (pyEncoder->write, chunk, NULL);
+  Py_DECREF(chunk);
+
+  if (result == NULL)
+  {
+    return 0;
+  }
+
+  Py_DECREF(result);
+
+  remaining = enc->offset - end;
+  memmove (enc->start, end, remaining);
+  enc->offset = enc->start + remaining;
+  return 1;
+}
+
+PyObject* objToJSONLines(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  char buffer[65536];
+  char *ret;
+  PyObject *newobj;
+  PyObjectEncoder pyEncoder;
+
+  memset (&pyEncoder, 0, sizeof (PyObjectEncoder));
+
+  ret = encodeArgs (args, kwargs, &pyEncoder, buffer, sizeof (buffer), 1);
+
+  if (ret == NULL)
+  {
+    return NULL;
+  }
+
+  // The length is known, don't scan the output for the NUL terminator
+  newobj = PyString_FromStringAndSize (ret, pyEncoder.enc.offset - pyEncoder.enc.start - 1);
+
+  if (ret != buffer)
+  {
+    pyEncoder.enc.free (ret);
+  }
+
+  PRINTMARK();
+
+  return newobj;
+}
+
+PyObject* objToJSONFile(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *data;
+  PyObject *file;
+  PyObject *write;
+  PyObject *argtuple;
+  PyObject *ochunkSize = NULL;
+  Py_ssize_t chunkSize = 65536;
+  PyObjectEncoder pyEncoder;
+  char *buffer;
+  char *ret;
+  int success;
+
+  PRINTMARK();
+
+  if (!PyArg_ParseTuple (args, "OO", &data, &file))
+  {
+    return NULL;
+  }
+
+  if (!PyObject_HasAttrString (file, "write"))
+  {
+    PyErr_Format (PyExc_TypeError, "expected file");
+    return NULL;
+  }
+
+  write = PyObject_GetAttrString (file, "write");
+
+  if (!PyCallable_Check (write))
+  {
+    Py_XDECREF(write);
+    PyErr_Format (PyExc_TypeError, "expected file");
+    return NULL;
+  }
+
+  if (kwargs)
+  {
+    ochunkSize = PyDict_GetItemString (kwargs, "chunk_size");
+  }
+
+  if (ochunkSize)
+  {
+    chunkSize = PyNumber_AsSsize_t (ochunkSize, PyExc_OverflowError);
+
+    if (chunkSize == -1 && PyErr_Occurred())
+    {
+      Py_XDECREF(write);
+      return NULL;
+    }
+
+    if (chunkSize < 1)
+    {
+      Py_XDECREF(write);
+      PyErr_Format (PyExc_ValueError, "chunk_size must be positive");
+      return NULL;
+    }
+
+    // The remaining keyword arguments are encoder options
+    kwargs = PyDict_Copy (kwargs);
+    if (kwargs == NULL || PyDict_DelItemString (kwargs, "chunk_size") == -1)
+    {
+      Py_XDECREF(kwargs);
+      Py_XDECREF(write);
+      return NULL;
+    }
+  }
+  else
+  {
+    Py_XINCREF(kwargs);
+  }
+
+  argtuple = PyTuple_Pack(1, data);
+  buffer = (char *) PyObject_Malloc (chunkSize);
+
+  if (argtuple == NULL || buffer == NULL)
+  {
+    if (buffer == NULL)
+    {
+      PyErr_NoMemory();
+    }
+    PyObject_Free(buffer);
+    Py_XDECREF(argtuple);
+    Py_XDECREF(kwargs);
+    Py_XDECREF(write);
+    return NULL;
+  }
+
+  memset (&pyEncoder, 0, sizeof (PyObjectEncoder));
+  pyEncoder.enc.flush = Object_flushBuffer;
+  pyEncoder.write = write;
+
+  ret = encodeArgs (argtuple, kwargs, &pyEncoder, buffer, chunkSize, 0);
+
+  Py_XDECREF(argtuple);
+  Py_XDECREF(kwargs);
+
+  if (ret == NULL)
+  {
+    PyObject_Free(buffer);
+    Py_XDECREF(write);
+    return NULL;
+  }
+
+  // Write out what's left in the buffer without the NUL terminator
+  pyEncoder.enc.offset --;
+  success = pyEncoder.enc.offset == pyEncoder.enc.start || Object_flushBuffer ((JSONObjectEncoder *) &pyEncoder);
+
+  if (ret != buffer)
+  {
+    pyEncoder.enc.free (ret);
+  }
+
+  PyObject_Free(buffer);
+  Py_XDECREF(write);
+
+  if (!success)
+  {
+    return NULL;
+  }
+
+  PRINTMARK();
+
+  Py_RETURN_NONE;
+}
+
+/*
+ujson.dumps_into encodes straight into the memory of a writable buffer object. Output which doesn't
+fit spills to the heap as usual and is copied in afterwards, growing the buffer if it's a bytearray */
+PyObject* objToJSONInto(PyObject* self, PyObject *args, PyObject *kwargs)
+{
+  PyObject *data;
+  PyObject *target;
+  PyObject *argtuple;
+  PyObject *ooffset = NULL;
+  Py_ssize_t offset = 0;
+  Py_ssize_t cbBuffer;
+  Py_ssize_t written;
+  PyObjectEncoder pyEncoder;
+  Py_buffer view;
+  char *buffer;
+  char *ret;
+
+  PRINTMARK();
+
+  if (!PyArg_ParseTuple (args, "OO|n", &data, &target, &offset))
+  {
+    return NULL;
+  }
+
+  if (kwargs)
+  {
+    ooffset = PyDict_GetItemString (kwargs, "offset");
+  }
+
+  if (ooffset)
+  {
+    offset = PyNumber_AsSsize_t (ooffset, PyExc_OverflowError);
+
+    if (offset == -1 && PyErr_Occurred())
+    {
+      return NULL;
+    }
+
+    // The remaining keyword arguments are encoder options
+    kwargs = PyDict_Copy (kwargs);
+    if (kwargs == NULL || PyDict_DelItemString (kwargs, "offset") == -1)
+    {
+      Py_XDECREF(kwargs);
+      return NULL;
+    }
+  }
+  else
+  {
+    Py_XINCREF(kwargs);
+  }
+
+#if PY_MAJOR_VERSION < 3
+  if (!PyObject_CheckBuffer (target))
+  {
+    void *writeBuffer;
+    Py_ssize_t cbWriteBuffer;
+
+    if (PyObject_AsWriteBuffer (target, &writeBuffer, &cbWriteBuffer) == -1)
+    {
+      Py_XDECREF(kwargs);
+      return NULL;
+    }
+
+    // Old-style buffers hold no export, so releasing this view does nothing
+    PyBuffer_FillInfo (&view, NULL, writeBuffer, cbWriteBuffer, 0, PyBUF_WRITABLE);
+  }
+  else
+#endif
+  if (PyObject_GetBuffer (target, &view, PyBUF_WRITABLE) == -1)
+  {
+    Py_XDECREF(kwargs);
+    return NULL;
+  }
+
+  if (offset < 0 || offset > view.len)
+  {
+    PyBuffer_Release (&view);
+    Py_XDECREF(kwargs);
+    PyErr_Format (PyExc_ValueError, "offset out of range");
+    return NULL;
+  }
+
+  argtuple = PyTuple_Pack(1, data);
+  if (argtuple == NULL)
+  {
+    PyBuffer_Release (&view);
+    Py_XDECREF(kwargs);
+    return NULL;
+  }
+
+  // The encoder can't grow an empty buffer, let it start out on the heap instead
+  buffer = (char *) view.buf + offset;
+  cbBuffer = view.len - offset;
+
+  memset (&pyEncoder, 0, sizeof (PyObjectEncoder));
+
+  ret = encodeArgs (argtuple, kwargs, &pyEncoder, cbBuffer ? buffer : NULL, cbBuffer, 0);
+
+  Py_DECREF(argtuple);
+  Py_XDECREF(kwargs);
+
+  if (ret == NULL)
+  {
+    PyBuffer_Release (&view);
+    return NULL;
+  }
+
+  // Don't count the NUL terminator, it's written after the output when it fits
+  written = pyEncoder.enc.offset - pyEncoder.enc.start - 1;
+
+  if (ret == buffer)
+  {
+    PyBuffer_Release (&view);
+    return PyLong_FromSsize_t (written);
+  }
+
+  if (written <= cbBuffer)
+  {
+    memcpy (buffer, ret, written);
+    PyBuffer_Release (&view);
+  }
+  else
+  {
+    // A bytearray can only be resized once nothing holds a view of it
+    PyBuffer_Release (&view);
+
+    if (!PyByteArray_Check (target))
+    {
+      PyErr_Format (PyExc_ValueError, "Output of %zd bytes does not fit in buffer", written);
+      written = -1;
+    }
+    else
+    if (PyByteArray_Resize (target, offset + written) == -1)
+    {
+      written = -1;
+    }
+    else
+    {
+      memcpy (PyByteArray_AS_STRING (target) + offset, ret, written);
+    }
   }
 
-  PyErr_Clear();
+  pyEncoder.enc.free (ret);
+
+  if (written == -1)
+  {
+    return NULL;
+  }
 
   PRINTMARK();
-  // Falling to INVALID case as this type of object(class instance, module,
-  // class, function, etc..) can't be serialized.
-  PyErr_Format (PyExc_TypeError, "%s", "Object is not JSON serializable");
 
-INVALID:
-  tc->type = JT_INVALID;
-  PyObject_Free(tc->prv);
-  tc->prv = NULL;
-  return;
+  return PyLong_FromSsize_t (written);
 }
 
-void Object_endTypeContext(JSOBJ obj, JSONTypeContext *tc)
+/*
+ujson.pin marks an object for the encode cache and returns it */
+PyObject* cachePin(PyObject* self, PyObject *obj)
 {
-  Py_XDECREF(GET_TC(tc)->newObj);
+  CacheEntry *entry = Cache_find(obj);
 
-  PyObject_Free(tc->prv);
-  tc->prv = NULL;
-}
+  if (entry == NULL)
+  {
+    entry = Cache_insert(obj);
+    if (entry == NULL)
+    {
+      return NULL;
+    }
+  }
 
-const char *Object_getStringValue(JSOBJ obj, JSONTypeContext *tc, size_t *_outLen)
-{
-  return GET_TC(tc)->PyTypeToJSON (obj, tc, NULL, _outLen);
+  if (!entry->pinned)
+  {
+    entry->pinned = 1;
+    g_cache.pinned ++;
+  }
+
+  Py_INCREF(obj);
+  return obj;
 }
 
-JSINT64 Object_getLongValue(JSOBJ obj, JSONTypeContext *tc)
+/*
+Drops the outputs which hold pinned values. Those entries are all pinned themselves, see
+beginCachedContext, so only their outputs are released here and no other code gets to run */
+static void Cache_dropNested(void)
 {
-  JSINT64 ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
+  CacheEntry *entry = g_cache.oldest;
+  CacheEntry *newer;
+
+  for (; entry; entry = newer)
+  {
+    newer = entry->newer;
+    if (entry->nested)
+    {
+      Cache_drop(entry);
+    }
+  }
 }
 
-JSINT32 Object_getIntValue(JSOBJ obj, JSONTypeContext *tc)
+/*
+ujson.invalidate drops the output kept for an object which changed, along with the outputs of pinned
+values holding pinned values, as those may hold the object */
+PyObject* cacheInvalidate(PyObject* self, PyObject *obj)
 {
-  JSINT32 ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
+  CacheEntry *entry;
+
+  Cache_dropNested();
+
+  entry = Cache_find(obj);
+  if (entry)
+  {
+    Cache_drop(entry);
+  }
+
+  Py_RETURN_NONE;
 }
 
-double Object_getDoubleValue(JSOBJ obj, JSONTypeContext *tc)
+/*
+ujson.unpin releases a pinned object, dropping anything kept for it */
+PyObject* cacheUnpin(PyObject* self, PyObject *obj)
 {
-  double ret;
-  GET_TC(tc)->PyTypeToJSON (obj, tc, &ret, NULL);
-  return ret;
+  CacheEntry *entry;
+
+  Cache_dropNested();
+
+  entry = Cache_find(obj);
+  if (entry)
+  {
+    if (entry->pinned)
+    {
+      entry->pinned = 0;
+      g_cache.pinned --;
+    }
+    Cache_drop(entry);
+  }
+
+  Py_RETURN_NONE;
 }
 
-static void Object_releaseObject(JSOBJ _obj)
+/*
+ujson.cache_clear drops every output kept and resets the counts. Pinned objects stay pinned */
+PyObject* cacheClear(PyObject* self, PyObject *unused)
 {
-  Py_DECREF( (PyObject *) _obj);
+  while (g_cache.oldest)
+  {
+    Cache_drop(g_cache.oldest);
+  }
+
+  g_cache.hits = 0;
+  g_cache.misses = 0;
+  Py_RETURN_NONE;
 }
 
-void Object_iterBegin(JSOBJ obj, JSONTypeContext *tc)
+PyObject* cacheInfo(PyObject* self, PyObject *unused)
 {
-  GET_TC(tc)->iterBegin(obj, tc);
+  return Py_BuildValue("{s:n,s:n,s:n,s:n,s:n,s:n}",
+    "hits", (Py_ssize_t) g_cache.hits,
+    "misses", (Py_ssize_t) g_cache.misses,
+    "entries", (Py_ssize_t) g_cache.count,
+    "pinned", (Py_ssize_t) g_cache.pinned,
+    "size", (Py_ssize_t) g_cache.size,
+    "max_size", (Py_ssize_t) g_cache.maxSize);
 }
 
-int Object_iterNext(JSOBJ obj, JSONTypeContext *tc)
+/*
+ujson.set_cache_size sets how many bytes of output the encode cache keeps at most */
+PyObject* cacheSetSize(PyObject* self, PyObject *args)
 {
-  return GET_TC(tc)->iterNext(obj, tc);
+  Py_ssize_t maxSize;
+
+  if (!PyArg_ParseTuple(args, "n", &maxSize))
+  {
+    return NULL;
+  }
+
+  if (maxSize < 0)
+  {
+    PyErr_Format (PyExc_ValueError, "Cache size must not be negative");
+    return NULL;
+  }
+
+  g_cache.maxSize = (size_t) maxSize;
+  Cache_trim();
+  Py_RETURN_NONE;
 }
 
-void Object_iterEnd(JSOBJ obj, JSONTypeContext *tc)
+/*
+ujson.Encoder keeps its parsed options and a heap buffer between calls. The buffer is sized from a
+running estimate of recent output sizes, so repeated large outputs are encoded without growing the
+buffer through Buffer_Realloc each time */
+#define ENCODER_MIN_BUFFER 4096
+
+typedef struct __EncoderObject
 {
-  GET_TC(tc)->iterEnd(obj, tc);
-}
+  PyObject_HEAD
+  PyObjectEncoder pyEncoder;
+  char *buffer;
+  size_t cbBuffer;
+  size_t estimate;
+  int busy;
+} EncoderObject;
 
-JSOBJ Object_iterGetValue(JSOBJ obj, JSONTypeContext *tc)
+static char *g_encoderKwlist[] = { "ensure_ascii", "double_precision", "encode_html_chars", "shortest_float", "date_mode", "default", "handlers", "cache", NULL};
+
+static int Encoder_clear(EncoderObject *self)
 {
-  return GET_TC(tc)->iterGetValue(obj, tc);
+  Py_CLEAR(self->pyEncoder.defaultFn);
+  Py_CLEAR(self->pyEncoder.handlers);
+  Py_CLEAR(self->pyEncoder.handlerCache);
+  return 0;
 }
 
-char *Object_iterGetName(JSOBJ obj, JSONTypeContext *tc, size_t *outLen)
+static int Encoder_traverse(EncoderObject *self, visitproc visit, void *arg)
 {
-  return GET_TC(tc)->iterGetName(obj, tc, outLen);
+  Py_VISIT(self->pyEncoder.defaultFn);
+  Py_VISIT(self->pyEncoder.handlers);
+  Py_VISIT(self->pyEncoder.handlerCache);
+  return 0;
 }
 
-PyObject* objToJSON(PyObject* self, PyObject *args, PyObject *kwargs)
+static int Encoder_init(EncoderObject *self, PyObject *args, PyObject *kwargs)
 {
-  static char *kwlist[] = { "obj", "ensure_ascii", "double_precision", "encode_html_chars", NULL};
-
-  char buffer[65536];
-  char *ret;
-  PyObject *newobj;
-  PyObject *oinput = NULL;
   PyObject *oensureAscii = NULL;
-  static const int idoublePrecision = 10; // default double precision setting
+  int idoublePrecision = 10; // default double precision setting
   PyObject *oencodeHTMLChars = NULL;
+  PyObject *oshortestFloat = NULL;
+  PyObject *odateMode = NULL;
+  PyObject *odefault = NULL;
+  PyObject *ohandlers = NULL;
+  PyObject *ocache = NULL;
 
-  JSONObjectEncoder encoder =
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|OiOOOOOO", g_encoderKwlist, &oensureAscii, &idoublePrecision, &oencodeHTMLChars, &oshortestFloat, &odateMode, &odefault, &ohandlers, &ocache))
   {
-    Object_beginTypeContext,
-    Object_endTypeContext,
-    Object_getStringValue,
-    Object_getLongValue,
-    Object_getIntValue,
-    Object_getDoubleValue,
-    Object_iterBegin,
-    Object_iterNext,
-    Object_iterEnd,
-    Object_iterGetValue,
-    Object_iterGetName,
-    Object_releaseObject,
-    PyObject_Malloc,
-    PyObject_Realloc,
-    PyObject_Free,
-    -1, //recursionMax
-    idoublePrecision,
-    1, //forceAscii
-#if HAS_JSON_ENCODE_HTML_CHARS_DEFAULT_TRUE
-    1, //encodeHTMLChars
-#else
-    0, //encodeHTMLChars
-#endif
-  };
+    return -1;
+  }
 
+  Encoder_clear(self);
+  memset (&self->pyEncoder, 0, sizeof (PyObjectEncoder));
 
-  PRINTMARK();
+  if (!setupEncoder(&self->pyEncoder, oensureAscii, idoublePrecision, oencodeHTMLChars, oshortestFloat, odateMode, odefault, ohandlers, ocache))
+  {
+    memset (&self->pyEncoder, 0, sizeof (PyObjectEncoder));
+    return -1;
+  }
 
-  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OiO", kwlist, &oinput, &oensureAscii, &idoublePrecision, &oencodeHTMLChars))
+  // Unlike a single call, the encoder keeps the handlers resolved for each type between calls
+  self->pyEncoder.handlerCache = PyDict_New();
+  if (self->pyEncoder.handlerCache == NULL)
   {
-    return NULL;
+    memset (&self->pyEncoder, 0, sizeof (PyObjectEncoder));
+    return -1;
   }
 
-  if (oensureAscii != NULL && !PyObject_IsTrue(oensureAscii))
+  // A copy, so that handlers changed afterwards can't disagree with the ones already resolved
+  if (self->pyEncoder.handlers)
   {
-    encoder.forceASCII = 0;
+    self->pyEncoder.handlers = PyDict_Copy(self->pyEncoder.handlers);
+    if (self->pyEncoder.handlers == NULL)
+    {
+      Py_CLEAR(self->pyEncoder.handlerCache);
+      memset (&self->pyEncoder, 0, sizeof (PyObjectEncoder));
+      return -1;
+    }
   }
 
-  if (oencodeHTMLChars != NULL && PyObject_IsTrue(oencodeHTMLChars))
+  Py_XINCREF(self->pyEncoder.defaultFn);
+  return 0;
+}
+
+static void Encoder_dealloc(EncoderObject *self)
+{
+  PyObject_GC_UnTrack(self);
+  Encoder_clear(self);
+  PyObject_Free(self->buffer);
+  Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+/*
+Makes the buffer about one and a half times the estimate. A buffer much larger than that is given
+back, so one huge output doesn't hold on to its memory for good */
+static void Encoder_reserve(EncoderObject *self)
+{
+  size_t wanted = self->estimate + self->estimate / 2;
+
+  if (wanted < ENCODER_MIN_BUFFER)
+  {
+    wanted = ENCODER_MIN_BUFFER;
+  }
+
+  if (self->cbBuffer >= wanted && self->cbBuffer / 4 <= wanted)
   {
-    encoder.encodeHTMLChars = 1;
+    return;
   }
 
-  encoder.doublePrecision = idoublePrecision;
+  PyObject_Free(self->buffer);
+  self->buffer = (char *) PyObject_Malloc(wanted);
+  self->cbBuffer = self->buffer ? wanted : 0;
+}
 
-  PRINTMARK();
-  ret = JSON_EncodeObject (oinput, &encoder, buffer, sizeof (buffer));
-  PRINTMARK();
+static PyObject *Encoder_encodeObject(EncoderObject *self, PyObject *obj, int asBytes)
+{
+  PyObjectEncoder pyEncoder;
+  PyObject *newobj;
+  char *buffer = NULL;
+  size_t cbBuffer = 0;
+  size_t length;
+  char *ret;
 
-  if (PyErr_Occurred())
+  if (self->pyEncoder.enc.beginTypeContext == NULL)
   {
+    PyErr_Format (PyExc_ValueError, "Encoder is not initialized");
     return NULL;
   }
 
-  if (encoder.errorMsg)
+  // A nested call on the same encoder, from inside an object being encoded, gets a buffer of its own
+  if (!self->busy)
   {
-    if (ret != buffer)
-    {
-      encoder.free (ret);
-    }
+    Encoder_reserve(self);
+    buffer = self->buffer;
+    cbBuffer = self->cbBuffer;
+  }
 
-    PyErr_Format (PyExc_OverflowError, "%s", encoder.errorMsg);
+  // Held for the call, a handler could initialize the encoder anew while it runs
+  pyEncoder = self->pyEncoder;
+  Py_XINCREF(pyEncoder.defaultFn);
+  Py_XINCREF(pyEncoder.handlers);
+  Py_XINCREF(pyEncoder.handlerCache);
+  self->busy ++;
+  ret = encodeObject (&pyEncoder, obj, buffer, cbBuffer, 0);
+  self->busy --;
+  Py_XDECREF(pyEncoder.defaultFn);
+  Py_XDECREF(pyEncoder.handlers);
+  Py_XDECREF(pyEncoder.handlerCache);
+
+  if (ret == NULL)
+  {
     return NULL;
   }
 
-  newobj = PyString_FromString (ret);
+  length = pyEncoder.enc.offset - pyEncoder.enc.start - 1;
+
+  if (asBytes)
+  {
+    newobj = PyBytes_FromStringAndSize (ret, length);
+  }
+  else
+  {
+    newobj = PyString_FromStringAndSize (ret, length);
+  }
 
   if (ret != buffer)
   {
-    encoder.free (ret);
+    if (buffer)
+    {
+      // The output outgrew the buffer, keep the grown one for the next call
+      PyObject_Free(self->buffer);
+      self->buffer = ret;
+      self->cbBuffer = pyEncoder.enc.end - pyEncoder.enc.start;
+    }
+    else
+    {
+      pyEncoder.enc.free (ret);
+    }
   }
 
-  PRINTMARK();
+  if (buffer)
+  {
+    // Weigh in each output at a quarter, so the estimate follows the recent sizes
+    length ++;
+    self->estimate = self->estimate ? self->estimate - self->estimate / 4 + length / 4 : length;
+  }
 
   return newobj;
 }
 
-PyObject* objToJSONFile(PyObject* self, PyObject *args, PyObject *kwargs)
+static PyObject *Encoder_encode(EncoderObject *self, PyObject *obj)
 {
-  PyObject *data;
-  PyObject *file;
-  PyObject *string;
-  PyObject *write;
-  PyObject *argtuple;
+  return Encoder_encodeObject(self, obj, 0);
+}
 
-  PRINTMARK();
+static PyObject *Encoder_encodeBytes(EncoderObject *self, PyObject *obj)
+{
+  return Encoder_encodeObject(self, obj, 1);
+}
 
-  if (!PyArg_ParseTuple (args, "OO", &data, &file))
-  {
-    return NULL;
-  }
+static PyMethodDef Encoder_methods[] = {
+  {"encode", (PyCFunction) Encoder_encode, METH_O, "Converts arbitrary object recursively into JSON."},
+  {"encode_bytes", (PyCFunction) Encoder_encodeBytes, METH_O, "Converts arbitrary object recursively into JSON as bytes."},
+  {NULL, NULL, 0, NULL}       /* Sentinel */
+};
 
-  if (!PyObject_HasAttrString (file, "write"))
+PyTypeObject EncoderType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ujson.Encoder",                /* tp_name */
+  sizeof(EncoderObject),          /* tp_basicsize */
+  0,                              /* tp_itemsize */
+  (destructor) Encoder_dealloc,   /* tp_dealloc */
+  0,                              /* tp_print */
+  0,                              /* tp_getattr */
+  0,                              /* tp_setattr */
+  0,                              /* tp_compare */
+  0,                              /* tp_repr */
+  0,                              /* tp_as_number */
+  0,                              /* tp_as_sequence */
+  0,                              /* tp_as_mapping */
+  0,                              /* tp_hash */
+  0,                              /* tp_call */
+  0,                              /* tp_str */
+  0,                              /* tp_getattro */
+  0,                              /* tp_setattro */
+  0,                              /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /* tp_flags */
+  "Reusable JSON encoder. Keeps its options and output buffer between calls. Use ensure_ascii=false to output UTF-8. Pass in double_precision to alter the maximum digit precision of doubles. Set encode_html_chars=True to encode < > & as unicode escape sequences. Set shortest_float=True to encode floats with the shortest digits which read back as the same float. Set date_mode to 's', 'ms', 'us' or 'iso' to choose how dates and times are encoded. Pass in default to convert objects which can't be encoded otherwise and handlers to map types to such conversions. Set cache=True to reuse the output of frozen and pinned values, see ujson.pin.", /* tp_doc */
+  (traverseproc) Encoder_traverse, /* tp_traverse */
+  (inquiry) Encoder_clear,        /* tp_clear */
+  0,                              /* tp_richcompare */
+  0,                              /* tp_weaklistoffset */
+  0,                              /* tp_iter */
+  0,                              /* tp_iternext */
+  Encoder_methods,                /* tp_methods */
+  0,                              /* tp_members */
+  0,                              /* tp_getset */
+  0,                              /* tp_base */
+  0,                              /* tp_dict */
+  0,                              /* tp_descr_get */
+  0,                              /* tp_descr_set */
+  0,                              /* tp_dictoffset */
+  (initproc) Encoder_init,        /* tp_init */
+  0,                              /* tp_alloc */
+  PyType_GenericNew,              /* tp_new */
+};
+
+static char *g_rawJSONKwlist[] = { "data", "validate", NULL};
+
+/*
+Decodes data into a tape and throws it away, raising ValueError if it isn't a single JSON value */
+static int RawJSON_validate(const char *data, size_t cbData)
+{
+  JSONTape tape;
+  int success;
+
+  JSON_InitTape(&tape);
+
+  Py_BEGIN_ALLOW_THREADS
+  success = JSON_DecodeTape(&tape, data, cbData);
+  Py_END_ALLOW_THREADS
+
+  if (!success)
   {
-    PyErr_Format (PyExc_TypeError, "expected file");
-    return NULL;
+    PyErr_Format (PyExc_ValueError, "%s", tape.errorStr);
   }
 
-  write = PyObject_GetAttrString (file, "write");
+  JSON_FreeTape(&tape);
+  return success;
+}
 
-  if (!PyCallable_Check (write))
+static PyObject *RawJSON_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+  PyObject *data;
+  PyObject *ovalidate = NULL;
+  RawJSONObject *self;
+  const char *ptr;
+  size_t len;
+
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", g_rawJSONKwlist, &data, &ovalidate))
   {
-    Py_XDECREF(write);
-    PyErr_Format (PyExc_TypeError, "expected file");
     return NULL;
   }
 
-  argtuple = PyTuple_Pack(1, data);
-
-  string = objToJSON (self, argtuple, kwargs);
-
-  if (string == NULL)
+  if (PyUnicode_Check(data))
   {
-    Py_XDECREF(write);
-    Py_XDECREF(argtuple);
+#if PY_VERSION_HEX >= 0x03030000
+    // Makes and caches the UTF-8 of non ASCII strings now, so encoding can't fail
+    if (unicodeAsUTF8(data, &len) == NULL)
+    {
+      return NULL;
+    }
+    Py_INCREF(data);
+#else
+    data = PyUnicode_AsUTF8String(data);
+    if (data == NULL)
+    {
+      return NULL;
+    }
+#endif
+  }
+  else
+  if (PyString_Check(data))
+  {
+    Py_INCREF(data);
+  }
+  else
+  {
+    PyErr_Format (PyExc_TypeError, "RawJSON data must be bytes or str");
     return NULL;
   }
 
-  Py_XDECREF(argtuple);
+  if (ovalidate != NULL && PyObject_IsTrue(ovalidate))
+  {
+    // bytes and str data are followed by a NUL byte, as the decoder needs
+    ptr = rawJSONData(data, &len);
+    if (!RawJSON_validate(ptr, len))
+    {
+      Py_DECREF(data);
+      return NULL;
+    }
+  }
 
-  argtuple = PyTuple_Pack (1, string);
-  if (argtuple == NULL)
+  self = (RawJSONObject *) type->tp_alloc(type, 0);
+  if (self == NULL)
   {
-    Py_XDECREF(write);
+    Py_DECREF(data);
     return NULL;
   }
-  if (PyObject_CallObject (write, argtuple) == NULL)
+
+  self->data = data;
+  return (PyObject *) self;
+}
+
+static void RawJSON_dealloc(RawJSONObject *self)
+{
+  Py_XDECREF(self->data);
+  Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static PyObject *RawJSON_repr(RawJSONObject *self)
+{
+#if PY_MAJOR_VERSION >= 3
+  return PyUnicode_FromFormat("ujson.RawJSON(%R)", self->data);
+#else
+  PyObject *repr = PyObject_Repr(self->data);
+  PyObject *ret;
+
+  if (repr == NULL)
   {
-    Py_XDECREF(write);
-    Py_XDECREF(argtuple);
     return NULL;
   }
 
-  Py_XDECREF(write);
-  Py_DECREF(argtuple);
-  Py_XDECREF(string);
+  ret = PyString_FromFormat("ujson.RawJSON(%s)", PyString_AS_STRING(repr));
+  Py_DECREF(repr);
+  return ret;
+#endif
+}
 
-  PRINTMARK();
+static PyMemberDef RawJSON_members[] = {
+  {"data", T_OBJECT, offsetof(RawJSONObject, data), READONLY, "The encoded JSON, as given."},
+  {NULL}  /* Sentinel */
+};
 
-  Py_RETURN_NONE;
-}
\ No newline at end of file
+PyTypeObject RawJSONType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  "ujson.RawJSON",                /* tp_name */
+  sizeof(RawJSONObject),          /* tp_basicsize */
+  0,                              /* tp_itemsize */
+  (destructor) RawJSON_dealloc,   /* tp_dealloc */
+  0,                              /* tp_print */
+  0,                              /* tp_getattr */
+  0,                              /* tp_setattr */
+  0,                              /* tp_compare */
+  (reprfunc) RawJSON_repr,        /* tp_repr */
+  0,                              /* tp_as_number */
+  0,                              /* tp_as_sequence */
+  0,                              /* tp_as_mapping */
+  0,                              /* tp_hash */
+  0,                              /* tp_call */
+  0,                              /* tp_str */
+  0,                              /* tp_getattro */
+  0,                              /* tp_setattro */
+  0,                              /* tp_as_buffer */
+  Py_TPFLAGS_DEFAULT,             /* tp_flags */
+  "Already encoded JSON as bytes or str, which the encoders copy into their output as it is. ensure_ascii and encode_html_chars don't apply to it. Set validate=True to check that it holds a single JSON value.", /* tp_doc */
+  0,                              /* tp_traverse */
+  0,                              /* tp_clear */
+  0,                              /* tp_richcompare */
+  0,                              /* tp_weaklistoffset */
+  0,                              /* tp_iter */
+  0,                              /* tp_iternext */
+  0,                              /* tp_methods */
+  RawJSON_members,                /* tp_members */
+  0,                              /* tp_getset */
+  0,                              /* tp_base */
+  0,                              /* tp_dict */
+  0,                              /* tp_descr_get */
+  0,                              /* tp_descr_set */
+  0,                              /* tp_dictoffset */
+  0,                              /* tp_init */
+  0,                              /* tp_alloc */
+  RawJSON_new,                    /* tp_new */
+};
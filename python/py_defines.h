@@ -48,5 +48,6 @@ http://www.opensource.apple.com/source/tcl/tcl-14/tcl/license.terms
 #define PyString_AS_STRING      PyBytes_AS_STRING
 
 #define PyString_FromString     PyUnicode_FromString
+#define PyString_FromStringAndSize PyUnicode_FromStringAndSize
 
 #endif
@@ -51,16 +51,74 @@ PyObject* objToJSONFile(PyObject* self, PyObject *args, PyObject *kwargs);
 /* JSONFileToObj */
 PyObject* JSONFileToObj(PyObject* self, PyObject *args, PyObject *kwargs);
 
+PyObject* objToJSONLines(PyObject* self, PyObject *args, PyObject *kwargs);
 
-#define ENCODER_HELP_TEXT "Use ensure_ascii=false to output UTF-8. Pass in double_precision to alter the maximum digit precision of doubles. Set encode_html_chars=True to encode < > & as unicode escape sequences."
+PyObject* objToJSONBytes(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* objToJSONInto(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* JSONLinesToObj(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* JSONManyToObj(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* JSONPathToObj(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* JSONToLazyObj(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* JSONExtract(PyObject* self, PyObject *args, PyObject *kwargs);
+
+PyObject* cachePin(PyObject* self, PyObject *obj);
+
+PyObject* cacheUnpin(PyObject* self, PyObject *obj);
+
+PyObject* cacheInvalidate(PyObject* self, PyObject *obj);
+
+PyObject* cacheClear(PyObject* self, PyObject *unused);
+
+PyObject* cacheInfo(PyObject* self, PyObject *unused);
+
+PyObject* cacheSetSize(PyObject* self, PyObject *args);
+
+extern PyTypeObject DecoderType;
+
+extern PyTypeObject EncoderType;
+
+extern PyTypeObject RawJSONType;
+
+extern PyTypeObject LazyObjectType;
+
+extern PyTypeObject LazyArrayType;
+
+
+#define ENCODER_HELP_TEXT "Use ensure_ascii=false to output UTF-8. Pass in double_precision to alter the maximum digit precision of doubles. Set encode_html_chars=True to encode < > & as unicode escape sequences. Set shortest_float=True to encode floats with the shortest digits which read back as the same float. Set date_mode to 's', 'ms', 'us' or 'iso' to choose how dates and times are encoded. Pass in default to convert objects which can't be encoded otherwise and handlers to map types to such conversions. Set cache=True to reuse the output of frozen and pinned values, see pin."
+
+#define RELEASE_GIL_HELP_TEXT " Set release_gil=True to let other threads run while the input is parsed."
+
+#define KEEP_HELP_TEXT " Pass in keep, a dict mapping keys to True or to a nested dict, to decode only those keys of objects and skip over the rest."
+
+#define DECODER_HELP_TEXT "Floats are decoded exactly; use precise_float=False for the older, less precise float decoder. Set cache_keys=True to share one string object between repeated object keys. Set date_mode='iso' to decode ISO 8601 strings to dates and times. Set use_decimal=True to decode non-integer numbers exactly as Decimal."
 
 static PyMethodDef ujsonMethods[] = {
   {"encode", (PyCFunction) objToJSON, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursivly into JSON. " ENCODER_HELP_TEXT},
-  {"decode", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string to dict object structure. Use precise_float=True to use high precision float decoder."},
+  {"decode", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string or buffer to dict object structure. " DECODER_HELP_TEXT RELEASE_GIL_HELP_TEXT KEEP_HELP_TEXT},
   {"dumps", (PyCFunction) objToJSON, METH_VARARGS | METH_KEYWORDS,  "Converts arbitrary object recursivly into JSON. " ENCODER_HELP_TEXT},
-  {"loads", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS,  "Converts JSON as string to dict object structure. Use precise_float=True to use high precision float decoder."},
-  {"dump", (PyCFunction) objToJSONFile, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON file. " ENCODER_HELP_TEXT},
-  {"load", (PyCFunction) JSONFileToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as file to dict object structure. Use precise_float=True to use high precision float decoder."},
+  {"loads", (PyCFunction) JSONToObj, METH_VARARGS | METH_KEYWORDS,  "Converts JSON as string or buffer to dict object structure. " DECODER_HELP_TEXT RELEASE_GIL_HELP_TEXT KEEP_HELP_TEXT},
+  {"dump", (PyCFunction) objToJSONFile, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON file. " ENCODER_HELP_TEXT " Pass in chunk_size to set how many bytes are written to the file at a time."},
+  {"load", (PyCFunction) JSONFileToObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as file to dict object structure. " DECODER_HELP_TEXT " Pass in chunk_size to read and decode the file that many bytes at a time."},
+  {"dumps_bytes", (PyCFunction) objToJSONBytes, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON as bytes. " ENCODER_HELP_TEXT},
+  {"dumps_into", (PyCFunction) objToJSONInto, METH_VARARGS | METH_KEYWORDS, "Converts arbitrary object recursively into JSON written into a writable buffer such as a bytearray, starting at offset. Returns the number of bytes written. A bytearray grows to fit the output. " ENCODER_HELP_TEXT},
+  {"dumps_lines", (PyCFunction) objToJSONLines, METH_VARARGS | METH_KEYWORDS, "Converts each object of an iterable into JSON on a line of its own (JSON Lines). " ENCODER_HELP_TEXT},
+  {"loads_lines", (PyCFunction) JSONLinesToObj, METH_VARARGS | METH_KEYWORDS, "Converts newline delimited JSON (JSON Lines) to a list of objects, one per line. " DECODER_HELP_TEXT KEEP_HELP_TEXT},
+  {"loads_many", (PyCFunction) JSONManyToObj, METH_VARARGS | METH_KEYWORDS, "Converts a sequence of JSON strings to a list of objects. Pass in workers to parse the documents on that many threads. " DECODER_HELP_TEXT},
+  {"load_file", (PyCFunction) JSONPathToObj, METH_VARARGS | METH_KEYWORDS, "Converts the JSON file at path to dict object structure. The file is memory mapped and decoded without copying. " DECODER_HELP_TEXT RELEASE_GIL_HELP_TEXT},
+  {"loads_lazy", (PyCFunction) JSONToLazyObj, METH_VARARGS | METH_KEYWORDS, "Converts JSON as string or buffer to read-only LazyObject and LazyArray views which decode their items when first accessed. Scalar documents are decoded as usual. Floats are decoded exactly; use precise_float=False for the older, less precise float decoder. Set date_mode='iso' to decode ISO 8601 strings to dates and times. Set use_decimal=True to decode non-integer numbers exactly as Decimal."},
+  {"extract", (PyCFunction) JSONExtract, METH_VARARGS | METH_KEYWORDS, "Decodes only the values at paths in JSON as string or buffer, skipping over the rest. Paths are JSON Pointers such as '/user/id' or JSONPath expressions such as '$.items[*].sku' made of keys, indices and wildcards. Returns the value at a single path, or a list with one for each path of a sequence. Paths with a wildcard give a list of all the values they match, other paths give default if there is no such value. Takes precise_float, date_mode and use_decimal like loads."},
+  {"pin", (PyCFunction) cachePin, METH_O, "Marks an object for the encode cache and returns it. Its output is kept by encoding calls with cache=True until the object is invalidated or unpinned. The object must not change in between."},
+  {"unpin", (PyCFunction) cacheUnpin, METH_O, "Releases a pinned object and drops its kept output."},
+  {"invalidate", (PyCFunction) cacheInvalidate, METH_O, "Drops the output kept for an object, to be called after a pinned object changed."},
+  {"cache_clear", (PyCFunction) cacheClear, METH_NOARGS, "Drops all output kept by the encode cache and resets its counts. Pinned objects stay pinned."},
+  {"cache_info", (PyCFunction) cacheInfo, METH_NOARGS, "Returns a dict with the hits, misses, entries, pinned objects, size and max_size of the encode cache."},
+  {"set_cache_size", (PyCFunction) cacheSetSize, METH_VARARGS, "Sets how many bytes of output the encode cache keeps at most, dropping the least recently used output to fit."},
   {NULL, NULL, 0, NULL}       /* Sentinel */
 };
 
@@ -96,6 +154,12 @@ PYMODINITFUNC
   PyObject *version_string;
 
   initObjToJSON();
+
+  if (PyType_Ready(&DecoderType) < 0 || PyType_Ready(&EncoderType) < 0 || PyType_Ready(&RawJSONType) < 0 || PyType_Ready(&LazyObjectType) < 0 || PyType_Ready(&LazyArrayType) < 0)
+  {
+    MODINITERROR;
+  }
+
   module = PYMODULE_CREATE();
 
   if (module == NULL)
@@ -103,6 +167,21 @@ PYMODINITFUNC
     MODINITERROR;
   }
 
+  Py_INCREF(&DecoderType);
+  PyModule_AddObject (module, "Decoder", (PyObject *) &DecoderType);
+
+  Py_INCREF(&EncoderType);
+  PyModule_AddObject (module, "Encoder", (PyObject *) &EncoderType);
+
+  Py_INCREF(&RawJSONType);
+  PyModule_AddObject (module, "RawJSON", (PyObject *) &RawJSONType);
+
+  Py_INCREF(&LazyObjectType);
+  PyModule_AddObject (module, "LazyObject", (PyObject *) &LazyObjectType);
+
+  Py_INCREF(&LazyArrayType);
+  PyModule_AddObject (module, "LazyArray", (PyObject *) &LazyArrayType);
+
   version_string = PyString_FromString (UJSON_VERSION);
   PyModule_AddObject (module, "__version__", version_string);
 
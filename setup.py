@@ -32,7 +32,8 @@ module1 = Extension('ujson',
                                './python/objToJSON.c', 
                                './python/JSONtoObj.c', 
                                './lib/ultrajsonenc.c', 
-                               './lib/ultrajsondec.c'],
+                               './lib/ultrajsondec.c',
+                               './lib/ultrajsontape.c'],
                     include_dirs = ['./python', './lib'],
                     extra_compile_args=['-D_GNU_SOURCE'])
 
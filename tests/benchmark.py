@@ -45,6 +45,10 @@ def ujsonDec():
     x = ujson.decode(decodeData)
     #print "ujsonDec: ", x
 
+def ujsonDecCacheKeys():
+    x = ujson.decode(decodeData, cache_keys=True)
+    #print "ujsonDecCacheKeys: ", x
+
 def simplejsonDec():
     x = simplejson.loads(decodeData)
     #print "simplejsonDec: ", x
@@ -133,6 +137,7 @@ print "yajl  encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlEn
 decodeData = json.dumps(testObject)
 
 print "ujson decode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ujsonDec()", "from __main__ import ujsonDec", gettime,10, COUNT)), )
+print "ujson decode (cache_keys) : %.05f calls/sec" % (COUNT / min(timeit.repeat("ujsonDecCacheKeys()", "from __main__ import ujsonDecCacheKeys", gettime,10, COUNT)), )
 print "simplejson decode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonDec()", "from __main__ import simplejsonDec", gettime,10, COUNT)), )
 print "yajl decode       : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlDec()", "from __main__ import yajlDec", gettime,10, COUNT)), )
 
@@ -155,6 +160,25 @@ print "simplejson decode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simple
 print "yajl decode       : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlDec()", "from __main__ import yajlDec", gettime,10, COUNT)), )
 
 
+print "Array with 256 long strings:"
+testObject = []
+
+for x in xrange(256):
+    testObject.append("A pretty long string which is in a list " * 64)
+
+COUNT = 2000
+
+print "ujson encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ujsonEnc()", "from __main__ import ujsonEnc", gettime,10, COUNT)), )
+print "simplejson encode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonEnc()", "from __main__ import simplejsonEnc", gettime,10, COUNT)), )
+print "yajl  encode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlEnc()", "from __main__ import yajlEnc", gettime, 10, COUNT)), )
+
+decodeData = json.dumps(testObject)
+
+print "ujson decode      : %.05f calls/sec" % (COUNT / min(timeit.repeat("ujsonDec()", "from __main__ import ujsonDec", gettime,10, COUNT)), )
+print "simplejson decode : %.05f calls/sec" % (COUNT / min(timeit.repeat("simplejsonDec()", "from __main__ import simplejsonDec", gettime,10, COUNT)), )
+print "yajl decode       : %.05f calls/sec" % (COUNT / min(timeit.repeat("yajlDec()", "from __main__ import yajlDec", gettime,10, COUNT)), )
+
+
 print "Array with 256 True values:"
 testObject = []
 
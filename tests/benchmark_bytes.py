@@ -0,0 +1,41 @@
+# coding=UTF-8
+import ujson
+import sys
+from time import time as gettime
+
+REPEAT = 5
+
+def makeDocument(size):
+    record = {"id": 12345, "name": u"item åäö", "price": 19.95, "tags": ["alpha", "beta", "gamma"], "active": True}
+    count = max(1, size // len(ujson.dumps(record)))
+    return [record] * count
+
+def timeIt(func, count):
+    best = None
+    for i in xrange(REPEAT):
+        start = gettime()
+        for j in xrange(count):
+            func()
+        elapsed = gettime() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / count
+
+def bench(name, data, count):
+    size = len(ujson.dumps_bytes(data))
+    buf = bytearray(size + 65536)
+    print "%s (%d bytes of output)" % (name, size)
+
+    for label, func in (
+        ("dumps", lambda: ujson.dumps(data)),
+        ("dumps + encode to bytes", lambda: ujson.dumps(data).encode("utf-8")),
+        ("dumps_bytes", lambda: ujson.dumps_bytes(data)),
+        ("dumps_into reused bytearray", lambda: ujson.dumps_into(data, buf))):
+        elapsed = timeIt(func, count)
+        print "  %-30s: %10.2f calls/sec %10.2f MB/sec" % (label, 1.0 / elapsed, size / elapsed / (1024 * 1024))
+
+if __name__ == "__main__":
+    bench("Small", makeDocument(1000), 10000)
+    bench("Fits the 64 KB stack buffer", makeDocument(60000), 1000)
+    bench("Large", makeDocument(1024 * 1024), 50)
+    bench("Huge", makeDocument(32 * 1024 * 1024), 3)
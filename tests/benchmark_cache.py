@@ -0,0 +1,27 @@
+# coding=UTF-8
+import ujson
+import sys
+from time import time as gettime
+import timeit
+
+COUNT = 1000
+
+def ujsonEnc():
+    x = ujson.dumps({"page": 1, "user": "user1", "countries": countries, "codes": codes})
+
+def ujsonEncCache():
+    x = ujson.dumps({"page": 1, "user": "user1", "countries": countries, "codes": codes}, cache=True)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "%-35s: %10.2f calls/sec" % (name, calls)
+
+if __name__ == "__main__":
+    countries = ujson.pin(dict((u"c%03d" % i, {"name": u"Country åäö %d" % i, "population": i * 100003, "area": i * 1.5}) for i in xrange(250)))
+    codes = tuple((u"code%d" % i, i, i * 0.25) for i in xrange(500))
+
+    print "Response with a pinned dict of %d bytes and a tuple of %d bytes" % (len(ujson.dumps(countries)), len(ujson.dumps(codes)))
+
+    bench("ujson dumps", "ujsonEnc")
+    bench("ujson dumps cache=True", "ujsonEncCache")
+    print ujson.cache_info()
@@ -0,0 +1,55 @@
+# coding=UTF-8
+import ujson
+import sys
+import datetime
+import calendar
+try:
+    import json
+except ImportError:
+    import simplejson as json
+from time import time as gettime
+import timeit
+
+COUNT = 10
+RECORDS = 100000
+
+def ujsonEnc():
+    x = ujson.dumps(encodeData)
+
+def ujsonEncMs():
+    x = ujson.dumps(encodeData, date_mode="ms")
+
+def ujsonEncISO():
+    x = ujson.dumps(encodeData, date_mode="iso")
+
+def jsonEncISO():
+    x = json.dumps(encodeData, default=lambda value: value.isoformat())
+
+def ujsonDec():
+    x = ujson.loads(decodeData)
+
+def ujsonDecISO():
+    x = ujson.loads(decodeData, date_mode="iso")
+
+def pythonDecISO():
+    x = [[datetime.datetime.strptime(record[0], "%Y-%m-%dT%H:%M:%S.%f"), record[1]] for record in ujson.loads(decodeData)]
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "%-40s: %10.2f calls/sec %12.0f timestamps/sec" % (name, calls, calls * RECORDS)
+
+if __name__ == "__main__":
+    start = datetime.datetime(2020, 1, 1)
+    encodeData = [[start + datetime.timedelta(seconds=i, microseconds=1 + i * 7 % 999999), i * 0.5] for i in xrange(RECORDS)]
+    decodeData = ujson.dumps(encodeData, date_mode="iso")
+
+    print "%d [datetime, float] records" % RECORDS
+
+    bench("ujson dumps", "ujsonEnc")
+    bench("ujson dumps date_mode=ms", "ujsonEncMs")
+    bench("ujson dumps date_mode=iso", "ujsonEncISO")
+    bench("json dumps default=isoformat", "jsonEncISO")
+
+    bench("ujson loads", "ujsonDec")
+    bench("ujson loads date_mode=iso", "ujsonDecISO")
+    bench("ujson loads + strptime", "pythonDecISO")
@@ -0,0 +1,71 @@
+# coding=UTF-8
+import ujson
+import sys
+import random
+try:
+    import json
+except ImportError:
+    import simplejson as json
+from time import time as gettime
+import timeit
+
+COUNT = 10
+RECORDS = 5000
+
+WORDS = u"the quick brown fox jumps over lazy dog json encoder string escape buffer scan fast".split()
+NONASCII = u"café naïve smörgåsbord 東京 日本語 привет 😀".split()
+
+def makeText(rnd, nonASCII):
+    words = [rnd.choice(WORDS) for i in xrange(rnd.randint(8, 40))]
+    if rnd.random() < 0.3:
+        words.insert(rnd.randint(0, len(words)), u"https://t.co/%08d" % rnd.randint(0, 99999999))
+    if rnd.random() < 0.2:
+        words.insert(rnd.randint(0, len(words)), u"\"quoted\"")
+    if rnd.random() < 0.1:
+        words.insert(rnd.randint(0, len(words)), u"line\nbreak")
+    if nonASCII:
+        words.insert(rnd.randint(0, len(words)), rnd.choice(NONASCII))
+    return u" ".join(words)
+
+def makeTweets(nonASCII):
+    rnd = random.Random(42)
+    tweets = []
+    for i in xrange(RECORDS):
+        tweets.append({
+            u"id_str": u"%d" % (1000000000000000000 + i),
+            u"text": makeText(rnd, nonASCII),
+            u"user": {u"screen_name": u"user_%d" % rnd.randint(0, 1000), u"description": makeText(rnd, nonASCII)},
+            u"lang": u"en",
+        })
+    return tweets
+
+def ujsonEnc():
+    x = ujson.dumps(encodeData, ensure_ascii=False)
+
+def ujsonEncASCII():
+    x = ujson.dumps(encodeData)
+
+def ujsonEncHTML():
+    x = ujson.dumps(encodeData, ensure_ascii=False, encode_html_chars=True)
+
+def jsonEnc():
+    x = json.dumps(encodeData, ensure_ascii=False)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "  %-45s: %10.2f calls/sec %10.1f MB/sec" % (name, calls, calls * size / 1e6)
+
+def run(name, data):
+    global encodeData, size
+    encodeData = data
+    size = len(ujson.dumps_bytes(data, ensure_ascii=False))
+    print "%s: %d bytes" % (name, size)
+    bench("ujson dumps ensure_ascii=False", "ujsonEnc")
+    bench("ujson dumps", "ujsonEncASCII")
+    bench("ujson dumps ensure_ascii=False, html chars", "ujsonEncHTML")
+    bench("json dumps ensure_ascii=False", "jsonEnc")
+
+if __name__ == "__main__":
+    run("%d ASCII tweets" % RECORDS, makeTweets(False))
+    run("%d tweets with some non-ASCII words" % RECORDS, makeTweets(True))
+    run("Array of 64 strings of 16 kB plain text", [u"lorem ipsum dolor sit amet " * 600] * 64)
@@ -0,0 +1,40 @@
+# coding=UTF-8
+import ujson
+import sys
+from time import time as gettime
+import timeit
+
+COUNT = 10
+
+def ujsonLoads():
+    doc = ujson.loads(data)
+    x = [doc["meta"]["route"], doc["user"]["id"]]
+
+def ujsonExtract():
+    x = ujson.extract(data, ["$.meta.route", "$.user.id"])
+
+def ujsonLoadsItems():
+    doc = ujson.loads(data)
+    x = [item["sku"] for item in doc["items"]]
+
+def ujsonExtractItems():
+    x = ujson.extract(data, "$.items[*].sku")
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "%-35s: %10.2f calls/sec" % (name, calls)
+
+if __name__ == "__main__":
+    items = []
+    for i in xrange(10000):
+        items.append({"sku": "sku%d" % i, "name": u"item åäö %d" % i, "price": i * 1.25, "tags": ["alpha", "beta", "gamma"], "stock": {"warehouse": "w%d" % (i % 7), "count": i}})
+
+    # The routing fields come after a large payload, so nothing can stop early
+    data = ujson.dumps({"items": items, "user": {"id": 42, "name": "user"}, "meta": {"route": "orders"}})
+
+    print "Document of %d bytes" % len(data)
+
+    bench("ujson loads two fields", "ujsonLoads")
+    bench("ujson extract two fields", "ujsonExtract")
+    bench("ujson loads all item skus", "ujsonLoadsItems")
+    bench("ujson extract all item skus", "ujsonExtractItems")
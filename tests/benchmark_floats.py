@@ -0,0 +1,55 @@
+# coding=UTF-8
+import ujson
+import sys
+import random
+try:
+    import json
+except ImportError:
+    import simplejson as json
+from time import time as gettime
+import timeit
+
+COUNT = 20
+
+def ujsonEnc():
+    x = ujson.dumps(data)
+
+def ujsonEncShortest():
+    x = ujson.dumps(data, shortest_float=True)
+
+def jsonEnc():
+    x = json.dumps(data)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "  %-30s: %10.2f calls/sec" % (name, calls)
+
+def roundTrips(kwargs):
+    output = ujson.dumps(data, **kwargs)
+    return json.loads(output) == data
+
+def run(name):
+    print "%s (%d floats)" % (name, len(ujson.dumps(data).split(",")))
+    print "  round trips: ujson %s, ujson shortest_float %s" % (roundTrips({}), roundTrips({"shortest_float": True}))
+    bench("ujson", "ujsonEnc")
+    bench("ujson shortest_float=True", "ujsonEncShortest")
+    bench("json", "jsonEnc")
+
+if __name__ == "__main__":
+    rnd = random.Random(42)
+
+    # GPS coordinates with six decimals, the typical geo payload
+    data = [[round(rnd.uniform(-180, 180), 6), round(rnd.uniform(-90, 90), 6)] for i in xrange(50000)]
+    run("Coordinate pairs")
+
+    # Telemetry readings with full double precision
+    data = [rnd.random() * 1000 for i in xrange(100000)]
+    run("Full precision doubles")
+
+    # Large magnitudes which the default formatter writes with snprintf
+    data = [rnd.uniform(1, 10) * 10 ** rnd.randint(16, 300) for i in xrange(100000)]
+    run("Doubles above 1e16")
+
+    # Small magnitudes which the default formatter rounds to zero
+    data = [rnd.uniform(1, 10) * 10 ** -rnd.randint(5, 300) for i in xrange(100000)]
+    run("Doubles below 1e-4")
@@ -0,0 +1,45 @@
+# coding=UTF-8
+import ujson
+import sys
+from time import time as gettime
+import timeit
+
+COUNT = 10
+RECORDS = 5000
+COLUMNS = 40
+
+def ujsonLoads():
+    x = [{"id": record["id"], "ts": record["meta"]["ts"]} for record in ujson.loads(data)]
+
+def ujsonLoadsKeep():
+    x = ujson.loads(data, keep=keep)
+
+def ujsonLoadsLines():
+    x = [{"id": record["id"], "ts": record["meta"]["ts"]} for record in ujson.loads_lines(lines)]
+
+def ujsonLoadsLinesKeep():
+    x = ujson.loads_lines(lines, keep=keep)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "%-35s: %10.2f calls/sec %12.0f records/sec" % (name, calls, calls * RECORDS)
+
+if __name__ == "__main__":
+    records = []
+    for i in xrange(RECORDS):
+        record = {"id": i, "meta": {"ts": 1600000000 + i, "source": "sensor %d" % (i % 13), "labels": ["a", "b", "c"]}}
+        for column in xrange(COLUMNS):
+            record["column%d" % column] = [u"value åäö %d" % i, i * 0.5, column][column % 3]
+        records.append(record)
+
+    # Wide records of which only two fields are used
+    keep = {"id": True, "meta": {"ts": True}}
+    data = ujson.dumps(records)
+    lines = ujson.dumps_lines(records)
+
+    print "%d records of %d columns, %d bytes" % (RECORDS, COLUMNS + 2, len(data))
+
+    bench("ujson loads", "ujsonLoads")
+    bench("ujson loads keep", "ujsonLoadsKeep")
+    bench("ujson loads_lines", "ujsonLoadsLines")
+    bench("ujson loads_lines keep", "ujsonLoadsLinesKeep")
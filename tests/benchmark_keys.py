@@ -0,0 +1,38 @@
+# coding=UTF-8
+import ujson
+import sys
+try:
+    import json
+except ImportError:
+    import simplejson as json
+from time import time as gettime
+import timeit
+
+COUNT = 10
+RECORDS = 10000
+FIELDS = 20
+
+def ujsonEnc():
+    x = ujson.dumps(encodeData, ensure_ascii=False)
+
+def ujsonEncASCII():
+    x = ujson.dumps(encodeData)
+
+def jsonEnc():
+    x = json.dumps(encodeData, ensure_ascii=False)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "  %-35s: %10.2f calls/sec %12.0f strings/sec" % (name, calls, calls * RECORDS * FIELDS * 2)
+
+def run(name, data):
+    global encodeData
+    encodeData = data
+    print "%s: %d records of %d fields, %d bytes" % (name, RECORDS, FIELDS, len(ujson.dumps(data, ensure_ascii=False)))
+    bench("ujson dumps ensure_ascii=False", "ujsonEnc")
+    bench("ujson dumps", "ujsonEncASCII")
+    bench("json dumps ensure_ascii=False", "jsonEnc")
+
+if __name__ == "__main__":
+    run("ASCII keys and values", [dict((u"field_%d" % k, u"value %d" % i) for k in xrange(FIELDS)) for i in xrange(RECORDS)])
+    run("Non-ASCII keys and values", [dict((u"fält_%d" % k, u"värde %d" % i) for k in xrange(FIELDS)) for i in xrange(RECORDS)])
@@ -0,0 +1,58 @@
+# coding=UTF-8
+import ujson
+import sys
+from time import time as gettime
+import timeit
+
+COUNT = 10
+
+def leafPaths(value, path, paths):
+    if isinstance(value, dict):
+        for key in value:
+            leafPaths(value[key], path + (key,), paths)
+    elif isinstance(value, list):
+        for index in xrange(len(value)):
+            leafPaths(value[index], path + (index,), paths)
+    else:
+        paths.append(path)
+    return paths
+
+def touch(doc, paths):
+    for path in paths:
+        value = doc
+        for step in path:
+            value = value[step]
+
+def ujsonLoads():
+    touch(ujson.loads(data), touched)
+
+def ujsonLoadsLazy():
+    touch(ujson.loads_lazy(data), touched)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "  %-33s: %10.2f calls/sec" % (name, calls)
+
+def benchCorpus(name, document):
+    global data, touched
+
+    data = document
+    paths = leafPaths(ujson.loads(data), (), [])
+    print "%s: %d bytes, %d fields" % (name, len(data), len(paths))
+
+    for percent in (1, 10, 100):
+        # Spread the touched fields over the whole document
+        touched = paths[::100 // percent]
+        print " touching %d%% of the fields" % percent
+        bench("ujson loads", "ujsonLoads")
+        bench("ujson loads_lazy", "ujsonLoadsLazy")
+
+if __name__ == "__main__":
+    f = open("sample.json", "rb")
+    benchCorpus("sample.json", f.read())
+    f.close()
+
+    records = []
+    for i in xrange(5000):
+        records.append({"id": i, "name": u"user åäö %d" % i, "email": "user%d@example.com" % i, "score": i * 0.25, "tags": ["alpha", "beta", "gamma"], "address": {"street": "Main Street %d" % i, "zip": "%05d" % i}})
+    benchCorpus("5000 records", ujson.dumps(records))
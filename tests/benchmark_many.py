@@ -0,0 +1,54 @@
+# coding=UTF-8
+import ujson
+import sys
+import multiprocessing
+from time import time as gettime
+
+REPEAT = 3
+
+def makeDocument(size):
+    items = []
+    i = 0
+    while len(ujson.dumps(items)) < size:
+        items.append({"id": i, "name": u"item åäö %d" % i, "price": i * 1.25, "tags": ["a", "b", "c"], "active": i % 2 == 0})
+        i += 1
+    return ujson.dumps(items)
+
+def loadsChunk(documents):
+    return [ujson.loads(document) for document in documents]
+
+def timeIt(func):
+    best = None
+    for i in xrange(REPEAT):
+        start = gettime()
+        func()
+        elapsed = gettime() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench(name, documents, pool, processes):
+    print "%s: %d documents of %d bytes" % (name, len(documents), len(documents[0]))
+
+    elapsed = timeIt(lambda: [ujson.loads(document) for document in documents])
+    print "  %-28s: %10.0f documents/sec" % ("loop over ujson.loads", len(documents) / elapsed)
+
+    for workers in (1, 2, 4, 8):
+        elapsed = timeIt(lambda: ujson.loads_many(documents, workers=workers))
+        print "  %-28s: %10.0f documents/sec" % ("loads_many workers=%d" % workers, len(documents) / elapsed)
+
+    chunkSize = max(1, len(documents) // (processes * 4))
+    chunks = [documents[i:i + chunkSize] for i in xrange(0, len(documents), chunkSize)]
+    elapsed = timeIt(lambda: pool.map(loadsChunk, chunks))
+    print "  %-28s: %10.0f documents/sec" % ("multiprocessing %d processes" % processes, len(documents) / elapsed)
+
+if __name__ == "__main__":
+    processes = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+
+    bench("Small", [makeDocument(100)] * 100000, pool, processes)
+    bench("Medium", [makeDocument(5000)] * 5000, pool, processes)
+    bench("Large", [makeDocument(500000)] * 50, pool, processes)
+
+    pool.close()
+    pool.join()
@@ -0,0 +1,64 @@
+# coding=UTF-8
+import ujson
+import sys
+try:
+    import json
+except ImportError:
+    import simplejson as json
+from time import time as gettime
+import timeit
+
+COUNT = 10
+RECORDS = 10000
+
+def ujsonDecLoop():
+    x = [ujson.loads(line) for line in decodeData.splitlines() if line.strip()]
+
+def ujsonDecLines():
+    x = ujson.loads_lines(decodeData)
+
+def ujsonDecLinesCacheKeys():
+    x = ujson.loads_lines(decodeData, cache_keys=True)
+
+def jsonDecLoop():
+    x = [json.loads(line) for line in decodeData.splitlines() if line.strip()]
+
+def ujsonEncLoop():
+    x = "".join([ujson.dumps(record) + "\n" for record in encodeData])
+
+def ujsonEncLines():
+    x = ujson.dumps_lines(encodeData)
+
+def jsonEncLoop():
+    x = "".join([json.dumps(record) + "\n" for record in encodeData])
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "%-35s: %10.2f calls/sec %12.0f records/sec" % (name, calls, calls * RECORDS)
+
+if __name__ == "__main__":
+    encodeData = []
+
+    for i in xrange(RECORDS):
+        encodeData.append({
+            "id": i,
+            "name": "user%d" % i,
+            "email": "user%d@example.com" % i,
+            "active": (i % 3) == 0,
+            "score": i * 0.25,
+            "tags": ["alpha", "beta", "gamma"][:i % 4],
+            "address": {"street": "Main Street %d" % i, "zip": "%05d" % i},
+        })
+
+    decodeData = ujson.dumps_lines(encodeData)
+
+    print "%d records, %d bytes of NDJSON" % (RECORDS, len(decodeData))
+
+    bench("ujson loads per line", "ujsonDecLoop")
+    bench("ujson loads_lines", "ujsonDecLines")
+    bench("ujson loads_lines cache_keys", "ujsonDecLinesCacheKeys")
+    bench("json loads per line", "jsonDecLoop")
+
+    bench("ujson dumps per record", "ujsonEncLoop")
+    bench("ujson dumps_lines", "ujsonEncLines")
+    bench("json dumps per record", "jsonEncLoop")
@@ -0,0 +1,40 @@
+# coding=UTF-8
+import ujson
+import sys
+import random
+try:
+    import json
+except ImportError:
+    import simplejson as json
+from time import time as gettime
+import timeit
+
+COUNT = 10
+
+def ujsonDec():
+    x = ujson.loads(decodeData)
+
+def ujsonDecImprecise():
+    x = ujson.loads(decodeData, precise_float=False)
+
+def jsonDec():
+    x = json.loads(decodeData)
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "%-40s: %10.2f calls/sec" % (name, calls)
+
+def run(name, values):
+    global decodeData
+    decodeData = "[" + ",".join(values) + "]"
+    print "%s (%d values, %d bytes)" % (name, len(values), len(decodeData))
+    bench("  ujson loads", "ujsonDec")
+    bench("  ujson loads precise_float=False", "ujsonDecImprecise")
+    bench("  json loads", "jsonDec")
+
+if __name__ == "__main__":
+    rnd = random.Random(1)
+
+    run("Short decimals", ["%d.%02d" % (rnd.randint(0, 10000), rnd.randint(0, 99)) for i in xrange(100000)])
+    run("Full precision doubles", [repr(rnd.random() * 10 ** rnd.randint(-20, 20)) for i in xrange(100000)])
+    run("Exponent notation", ["%.10e" % rnd.uniform(-1e300, 1e300) for i in xrange(100000)])
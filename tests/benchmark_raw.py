@@ -0,0 +1,30 @@
+# coding=UTF-8
+import ujson
+import sys
+from time import time as gettime
+import timeit
+
+COUNT = 100
+DOCUMENTS = 20
+
+def ujsonReencode():
+    x = ujson.dumps({"status": "ok", "items": [ujson.loads(document) for document in cache]})
+
+def ujsonRaw():
+    x = ujson.dumps({"status": "ok", "items": [ujson.RawJSON(document) for document in cache]})
+
+def ujsonRawValidate():
+    x = ujson.dumps({"status": "ok", "items": [ujson.RawJSON(document, validate=True) for document in cache]})
+
+def bench(name, func):
+    calls = COUNT / min(timeit.repeat(func + "()", "from __main__ import " + func, gettime, 5, COUNT))
+    print "  %-35s: %10.2f calls/sec" % (name, calls)
+
+if __name__ == "__main__":
+    for size in (10, 100, 1000):
+        document = ujson.dumps_bytes([{"id": i, "name": u"item åäö %d" % i, "price": i * 1.25, "tags": ["a", "b", "c"]} for i in xrange(size)], ensure_ascii=False)
+        cache = [document] * DOCUMENTS
+        print "Response with %d cached documents of %d bytes" % (DOCUMENTS, len(document))
+        bench("loads and dumps again", "ujsonReencode")
+        bench("RawJSON", "ujsonRaw")
+        bench("RawJSON validate=True", "ujsonRawValidate")
@@ -0,0 +1,47 @@
+# coding=UTF-8
+import ujson
+import sys
+import threading
+from time import time as gettime
+
+DURATION = 2.0
+
+def worker(data, kwargs, counts, index, stop):
+    count = 0
+    while not stop:
+        ujson.loads(data, **kwargs)
+        count += 1
+    counts[index] = count
+
+def run(data, threadCount, kwargs):
+    counts = [0] * threadCount
+    stop = []
+    threads = [threading.Thread(target=worker, args=(data, kwargs, counts, i, stop)) for i in xrange(threadCount)]
+    start = gettime()
+    for thread in threads:
+        thread.start()
+    while gettime() - start < DURATION:
+        threading.Event().wait(0.05)
+    stop.append(True)
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (gettime() - start)
+
+def bench(name, data):
+    print "%s (%d bytes)" % (name, len(data))
+    for threadCount in (1, 2, 4, 8):
+        plain = run(data, threadCount, {})
+        released = run(data, threadCount, {"release_gil": True})
+        print "  %d threads: loads %10.2f calls/sec   release_gil=True %10.2f calls/sec" % (threadCount, plain, released)
+
+if __name__ == "__main__":
+    f = open("sample.json", "rb")
+    sample = f.read()
+    f.close()
+
+    strings = ujson.dumps([u"Lorem ipsum dolor sit amet, consectetur adipiscing elit åäö " * 10] * 512)
+    numbers = ujson.dumps([[i * 1.5, i, -i * 1000003] for i in xrange(20000)])
+
+    bench("sample.json", sample)
+    bench("Array with 512 long strings", strings)
+    bench("Array with 20000 number triples", numbers)
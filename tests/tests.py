@@ -19,8 +19,12 @@ import datetime
 import calendar
 import StringIO
 import re
+import struct
 import random
 import decimal
+import mmap
+import os
+import tempfile
 from functools import partial
 
 PY3 = (sys.version_info[0] >= 3)
@@ -40,6 +44,42 @@ class UltraJSONTests(TestCase):
         decoded = ujson.decode(encoded)
         self.assertEquals(decoded, 1337.1337)
 
+    def test_encodeDecimalExact(self):
+        input = [decimal.Decimal("1.10"), decimal.Decimal("-0"), decimal.Decimal("1E+3"), decimal.Decimal("123456789012345678901234567890.123456789")]
+        self.assertEquals("[1.10,-0,1E+3,123456789012345678901234567890.123456789]", ujson.encode(input))
+        self.assertEquals("0.1", ujson.encode(decimal.Decimal("0.1"), double_precision=0))
+
+        for input in (decimal.Decimal("NaN"), decimal.Decimal("-Infinity")):
+            self.assertRaises(OverflowError, ujson.encode, input)
+
+        # The output goes into the JSON as it is, so a subclass can't replace it
+        class InjectingDecimal(decimal.Decimal):
+            def __str__(self):
+                return '1, "injected": 2'
+
+        self.assertEquals('{"a":1.5}', ujson.encode({"a": InjectingDecimal("1.5")}))
+
+    def test_decodeUseDecimal(self):
+        input = '{"a": [1.10, 2, -0.0, 1e5, 1.5E-3, 123456789012345678901234567890.123456789]}'
+        expected = {u"a": [decimal.Decimal("1.10"), 2, decimal.Decimal("-0.0"), decimal.Decimal("1e5"), decimal.Decimal("0.0015"), decimal.Decimal("123456789012345678901234567890.123456789")]}
+
+        for output in (ujson.decode(input, use_decimal=True), ujson.decode(input, use_decimal=True, release_gil=True),
+                       ujson.loads_many([input], use_decimal=True)[0], ujson.Decoder(use_decimal=True).decode(input)):
+            self.assertEquals(expected, output)
+            self.assertEquals(str(output[u"a"][0]), "1.10")
+            self.assertTrue(isinstance(output[u"a"][1], int))
+
+        self.assertEquals(ujson.decode(ujson.encode(expected), use_decimal=True), expected)
+        self.assertRaises(ValueError, ujson.decode, "[1.]", use_decimal=True)
+        self.assertRaises(ValueError, ujson.decode, "[1e+]", use_decimal=True)
+        self.assertRaises(ValueError, ujson.decode, "[-e5]", use_decimal=True)
+        self.assertRaises(ValueError, ujson.decode, "[-.5]", use_decimal=True)
+
+        # A number at the very end of unterminated input is completed in a buffer of the decoder
+        input = memoryview(b"1.25x")[:4]
+        self.assertEquals(decimal.Decimal("1.25"), ujson.decode(input, use_decimal=True, release_gil=True))
+        self.assertEquals([decimal.Decimal("1.25")], ujson.loads_many([input], use_decimal=True))
+
     def test_encodeStringConversion(self):
         input = "A string \\ / \b \f \n \r \t </script> &"
         not_html_encoded = '"A string \\\\ \\/ \\b \\f \\n \\r \\t <\\/script> &"'
@@ -92,7 +132,7 @@ class UltraJSONTests(TestCase):
     def test_decimalDecodeTest(self):
         sut = {u'a': 4.56}
         encoded = ujson.encode(sut)
-        decoded = ujson.decode(encoded)
+        decoded = ujson.decode(encoded, precise_float=False)
         self.assertNotEqual(sut, decoded)
 
     def test_decimalDecodeTestPrecise(self):
@@ -101,6 +141,40 @@ class UltraJSONTests(TestCase):
         decoded = ujson.decode(encoded, precise_float=True)
         self.assertEqual(sut, decoded)
 
+    def test_decimalDecodeTestDefault(self):
+        sut = {u'a': 4.56}
+        encoded = ujson.encode(sut)
+        decoded = ujson.decode(encoded)
+        self.assertEqual(sut, decoded)
+
+    def test_decodeFloatExact(self):
+        inputs = ["0.1", "-0.0", "1e-400", "5e-324", "2.2250738585072011e-308", "1.7976931348623157e308",
+                  "9007199254740993.0", "922337203685477580.75e3", "1.00000000000000011102230246251565404236316680908203125",
+                  "1.00000000000000011102230246251565404236316680908203126", "0." + "0" * 400 + "1e400", "7.038531e-26"]
+        for input in inputs:
+            self.assertEqual(repr(float(input)), repr(ujson.decode(input)))
+
+        rnd = random.Random(1)
+        for i in range(10000):
+            value = struct.unpack("d", struct.pack("Q", rnd.getrandbits(64)))[0]
+            if value != value or value in (float("inf"), float("-inf")):
+                continue
+            for input in (repr(value), "%.17e" % value, "%.25e" % value, "%.3e" % value):
+                self.assertEqual(float(input), ujson.decode(input))
+
+        self.assertRaises(ValueError, ujson.decode, "1e400")
+
+    def test_encodeBuiltinSubclasses(self):
+        class MyInt(int): pass
+        class MyFloat(float): pass
+        class MyUnicode(unicode): pass
+        class MyDict(dict): pass
+        class MyList(list): pass
+        class MyTuple(tuple): pass
+
+        input = MyDict(a=MyList([MyInt(1), MyFloat(2.5), MyUnicode(u"x")]), b=MyTuple((True, None)))
+        self.assertEqual({"a": [1, 2.5, "x"], "b": [True, None]}, ujson.decode(ujson.encode(input)))
+
     def test_encodeDictWithUnicodeKeys(self):
         input = { u"key1": u"value1", u"key1": u"value1", u"key1": u"value1", u"key1": u"value1", u"key1": u"value1", u"key1": u"value1" }
         output = ujson.encode(input)
@@ -154,6 +228,28 @@ class UltraJSONTests(TestCase):
         self.assertEquals(round(input, 3), json.loads(output))
         self.assertEquals(round(input, 3), ujson.decode(output))
 
+    def test_encodeShortestFloat(self):
+        for input in (0.0, 0.1, 1.0, 1e16, 1e15, 123.456, 1e-4, 1e-5, 5e-324, 1.7976931348623157e308,
+                      2.2250738585072014e-308, 1 / 3.0, -2.5, 100.0, 1e22, 12345678901234567890.0, math.pi):
+            self.assertEquals(repr(input), ujson.encode(input, shortest_float=True))
+            self.assertEquals(repr(-input), ujson.encode(-input, shortest_float=True))
+
+        self.assertEquals("[1.5,2,1e+100]", ujson.encode([1.5, 2, 1e100], shortest_float=True, double_precision=1))
+        self.assertRaises(OverflowError, ujson.encode, float("inf"), shortest_float=True)
+        self.assertRaises(OverflowError, ujson.encode, float("nan"), shortest_float=True)
+        self.assertEquals("0.1", ujson.Encoder(shortest_float=True).encode(0.1))
+
+    def test_encodeShortestFloatRoundTrip(self):
+        rnd = random.Random(7)
+        for i in range(20000):
+            input = struct.unpack("d", struct.pack("Q", rnd.getrandbits(64)))[0]
+            if input != input or input in (float("inf"), float("-inf")):
+                continue
+            output = ujson.encode(input, shortest_float=True)
+            self.assertEquals(input, float(output))
+            # Never more than 17 significant digits
+            self.assertTrue(len(output.lstrip("-").split("e")[0].replace(".", "").strip("0")) <= 17)
+
     def test_invalidDoublePrecision(self):
         input = 30.12345678901234567890
         output = ujson.encode(input, double_precision = 20)
@@ -355,6 +451,50 @@ class UltraJSONTests(TestCase):
         self.assertEquals(int(expected), json.loads(output))
         self.assertEquals(int(expected), ujson.decode(output))
 
+    def test_encodeDateModes(self):
+        class FixedOffset(datetime.tzinfo):
+            def utcoffset(self, dt):
+                return datetime.timedelta(hours=-5, minutes=-30)
+            def dst(self, dt):
+                return datetime.timedelta(0)
+
+        input = datetime.datetime(2020, 2, 29, 12, 34, 56, 789012)
+        self.assertEquals("1582979696", ujson.encode(input))
+        self.assertEquals("1582979696789", ujson.encode(input, date_mode="ms"))
+        self.assertEquals("1582979696789012", ujson.encode(input, date_mode="us"))
+        self.assertEquals('"2020-02-29T12:34:56.789012"', ujson.encode(input, date_mode="iso"))
+
+        input = datetime.datetime(1969, 12, 31, 23, 59, 59, 500000)
+        self.assertEquals("-1", ujson.encode(input))
+        self.assertEquals("-500", ujson.encode(input, date_mode="ms"))
+
+        input = datetime.datetime(2020, 1, 1, 1, 0, tzinfo=FixedOffset())
+        self.assertEquals(str(calendar.timegm(input.utctimetuple())), ujson.encode(input))
+        self.assertEquals('"%s"' % input.isoformat(), ujson.encode(input, date_mode="iso"))
+
+        self.assertEquals('"0001-01-01"', ujson.encode(datetime.date(1, 1, 1), date_mode="iso"))
+        self.assertEquals("253402214400000", ujson.encode(datetime.date(9999, 12, 31), date_mode="ms"))
+        self.assertEquals('"01:02:03.000004"', ujson.encode(datetime.time(1, 2, 3, 4), date_mode="iso"))
+        self.assertEquals("3723", ujson.encode(datetime.time(1, 2, 3, 4)))
+        self.assertEquals('["12:00:00-05:30"]', ujson.Encoder(date_mode="iso").encode([datetime.time(12, tzinfo=FixedOffset())]))
+
+        self.assertRaises(ValueError, ujson.encode, input, date_mode="days")
+
+    def test_decodeDateModeISO(self):
+        input = [datetime.datetime(2020, 2, 29, 12, 34, 56, 789012), datetime.datetime(2020, 1, 1), datetime.date(2020, 1, 2), datetime.time(23, 59, 59, 1)]
+        output = ujson.encode(input, date_mode="iso")
+        self.assertEquals(input, ujson.decode(output, date_mode="iso"))
+        self.assertEquals(input, ujson.loads_many([output], date_mode="iso")[0])
+        self.assertEquals(input, ujson.Decoder(date_mode="iso").decode(output))
+        self.assertEquals(ujson.decode(output), [value.isoformat() for value in input])
+
+        input = '{"2020-01-01": ["2020-02-30", "2020-01-01T24:00:00", "12:00", "2020-01-01 10:00:00.5", "2020-01-01x"]}'
+        output = ujson.decode(input, date_mode="iso")
+        self.assertEquals(["2020-01-01"], list(output.keys()))
+        self.assertEquals(["2020-02-30", "2020-01-01T24:00:00", "12:00", datetime.datetime(2020, 1, 1, 10, 0, 0, 500000), "2020-01-01x"], output["2020-01-01"])
+
+        self.assertRaises(ValueError, ujson.decode, "[]", date_mode="ms")
+
     def test_encodeToUTF8(self):
         input = "\xe6\x97\xa5\xd1\x88"
         enc = ujson.encode(input, ensure_ascii=False)
@@ -478,6 +618,19 @@ class UltraJSONTests(TestCase):
         input = "\xfd\xbf\xbf\xbf\xbf\xbf"
         self.assertRaises(OverflowError, ujson.encode, input)
 
+    def test_encodeLoneSurrogate(self):
+        if sys.version_info < (3, 3):
+            return
+        for input in (u"\ud800", {u"\udfff": 1}, [u"ok", {u"a": u"x\ud800"}]):
+            self.assertRaises(UnicodeEncodeError, ujson.encode, input)
+
+    def test_encodeNonASCIIKeysAndValues(self):
+        input = {u"fält": u"värde", u"日本": [u"語", {u"å": u"ö"}], 1: u"ä"}
+        output = ujson.encode(input, ensure_ascii=False)
+        self.assertEquals(ujson.encode(input, ensure_ascii=False), output)
+        self.assertEquals(json.loads(output), {u"fält": u"värde", u"日本": [u"語", {u"å": u"ö"}], u"1": u"ä"})
+        self.assertEquals(json.loads(ujson.encode(input)), json.loads(output))
+
     def test_encodeNullCharacter(self):
         input = "31337 \x00 1337"
         output = ujson.encode(input)
@@ -574,6 +727,30 @@ class UltraJSONTests(TestCase):
         else:
             assert False, 'expected TypeError'
 
+    def test_dumpChunkSize(self):
+        input = [u"a\u00e5\u20ac\U0001d11e" * 10, range(100), {"key": "value" * 50}] * 20
+        for chunkSize in (1, 7, 64, 4096):
+            class filelike:
+                def __init__(self):
+                    self.chunks = []
+                def write(self, chunk):
+                    self.chunks.append(chunk)
+            f = filelike()
+            ujson.dump(input, f, chunk_size=chunkSize, ensure_ascii=False)
+            self.assertEquals(ujson.dumps(input, ensure_ascii=False), "".join(f.chunks))
+            if chunkSize == 64:
+                self.assertTrue(len(f.chunks) > 1)
+
+    def test_dumpChunkSizeError(self):
+        f = StringIO.StringIO()
+        self.assertRaises(ValueError, ujson.dump, [], f, chunk_size=0)
+
+    def test_dumpWriteError(self):
+        class filelike:
+            def write(self, chunk):
+                raise IOError("disk full")
+        self.assertRaises(IOError, ujson.dump, ["x" * 100] * 1000, filelike(), chunk_size=256)
+
     def test_loadFile(self):
         f = StringIO.StringIO("[1,2,3,4]")
         self.assertEquals([1, 2, 3, 4], ujson.load(f))
@@ -589,6 +766,162 @@ class UltraJSONTests(TestCase):
         f = filelike()
         self.assertEquals([1, 2, 3, 4], ujson.load(f))
 
+    def test_loadFileChunkSize(self):
+        input = '{"key": ["value", 1.5, -10, true, null], "other": "\\u00e5\\""}'
+        for chunkSize in (1, 3, 1024):
+            f = StringIO.StringIO(input)
+            self.assertEquals(ujson.loads(input), ujson.load(f, chunk_size=chunkSize))
+
+    def test_encoderObject(self):
+        encoder = ujson.Encoder(ensure_ascii=False, double_precision=3)
+        for input in (1, [1.23456] * 3, {"a": u"\u00e5" * 100000}, [1] * 10, "x" * 1000000, None, "x" * 100):
+            self.assertEquals(ujson.dumps(input, ensure_ascii=False, double_precision=3), encoder.encode(input))
+            self.assertEquals(ujson.dumps_bytes(input, ensure_ascii=False, double_precision=3), encoder.encode_bytes(input))
+
+        self.assertRaises(OverflowError, encoder.encode, [float("nan")])
+        self.assertRaises(TypeError, encoder.encode, object())
+        self.assertEquals('{"ok":1}', encoder.encode({"ok": 1}))
+
+    def test_encoderObjectNested(self):
+        encoder = ujson.Encoder()
+
+        class Inner:
+            def toDict(self):
+                return {"inner": encoder.encode([1, 2])}
+
+        self.assertEquals('[{"inner":"[1,2]"},"%s"]' % ("x" * 10000), encoder.encode([Inner(), "x" * 10000]))
+
+    def test_decoderDecode(self):
+        decoder = ujson.Decoder(cache_keys=True)
+        self.assertEquals({"a": 1}, decoder.decode('{"a": 1}'))
+        self.assertEquals([{"a": 2}], decoder.decode(b'[{"a": 2}]'))
+        self.assertEquals({"a": 3}, decoder.decode(memoryview(b'{"a": 3}xx')[:8]))
+        self.assertRaises(ValueError, decoder.decode, "[1,")
+
+        # Complete documents don't disturb one being fed
+        self.assertEquals(None, decoder.feed("[1, "))
+        self.assertEquals(5, decoder.decode("5"))
+        self.assertEquals([1, 2], decoder.feed("2]"))
+
+    def test_dumpsBytes(self):
+        self.assertEquals(b'{"key":"value"}', ujson.dumps_bytes({"key": "value"}))
+        self.assertEquals(b'"\\u00e5"', ujson.dumps_bytes(u"\u00e5"))
+        self.assertEquals(b'"\xc3\xa5"', ujson.dumps_bytes(u"\u00e5", ensure_ascii=False))
+        self.assertTrue(isinstance(ujson.dumps_bytes([]), bytes))
+
+        # Larger than the stack buffer, built in the bytes object itself
+        input = [u"\u00e5" * 100, 1.5, None] * 5000
+        output = ujson.dumps_bytes(input, ensure_ascii=False)
+        self.assertTrue(isinstance(output, bytes))
+        self.assertEquals(input, ujson.loads(output))
+        self.assertEquals(ujson.dumps(input), ujson.dumps_bytes(input).decode("ascii"))
+
+        self.assertRaises(OverflowError, ujson.dumps_bytes, [1] * 100000 + [float("inf")])
+
+    def test_dumpsInto(self):
+        buf = bytearray(64)
+        self.assertEquals(15, ujson.dumps_into({"key": "value"}, buf))
+        self.assertEquals(5, ujson.dumps_into([1, 2], buf, 15))
+        self.assertEquals(bytearray(b'{"key":"value"}[1,2]'), buf[:20])
+        self.assertEquals(64, len(buf))
+
+        # Output exactly filling the buffer
+        buf = bytearray(b"xx12345")
+        self.assertEquals(5, ujson.dumps_into([1, 2], buf, offset=2))
+        self.assertEquals(bytearray(b"xx[1,2]"), buf)
+
+        view = memoryview(bytearray(16))
+        self.assertEquals(7, ujson.dumps_into([1, 2, 3], view, 1))
+        self.assertEquals(b"[1,2,3]", view[1:8].tobytes())
+
+        mapped = mmap.mmap(-1, 64)
+        self.assertEquals(7, ujson.dumps_into({"k": 1}, mapped))
+        self.assertEquals(b'{"k":1}', mapped[:7])
+        mapped.close()
+
+        self.assertEquals(4, ujson.dumps_into(u"\u00e5", bytearray(8), ensure_ascii=False))
+
+    def test_dumpsIntoGrow(self):
+        input = [u"x" * 100] * 1000
+        buf = bytearray(b"ab")
+        written = ujson.dumps_into(input, buf, 2)
+        self.assertEquals(len(ujson.dumps(input)), written)
+        self.assertEquals(2 + written, len(buf))
+        self.assertEquals(b"ab", bytes(buf[:2]))
+        self.assertEquals(input, ujson.loads(bytes(buf[2:])))
+
+        self.assertEquals(2, ujson.dumps_into([], bytearray()))
+        self.assertRaises(ValueError, ujson.dumps_into, input, memoryview(bytearray(64)))
+        self.assertRaises(ValueError, ujson.dumps_into, [], bytearray(2), 3)
+        self.assertRaises(ValueError, ujson.dumps_into, [], bytearray(2), -1)
+        self.assertRaises(TypeError, ujson.dumps_into, [], u"not a buffer")
+        self.assertRaises(OverflowError, ujson.dumps_into, [float("inf")], bytearray(64))
+
+    def test_dumpsLines(self):
+        self.assertEquals('{"a":1}\n[1,2]\n"x"\nnull\n', ujson.dumps_lines([{"a": 1}, [1, 2], "x", None]))
+        self.assertEquals('0\n1\n2\n', ujson.dumps_lines(iter(range(3))))
+        self.assertEquals('', ujson.dumps_lines([]))
+        self.assertEquals('"\\u00e5"\n', ujson.dumps_lines([u"\u00e5"]))
+        self.assertRaises(TypeError, ujson.dumps_lines, 5)
+
+    def test_loadsLines(self):
+        input = '{"a": 1}\n[1, 2]\r\n\n  "x"  \nnull'
+        self.assertEquals([{"a": 1}, [1, 2], "x", None], ujson.loads_lines(input))
+        self.assertEquals([], ujson.loads_lines(""))
+        records = [{"key": i, "value": "x" * i} for i in range(100)]
+        self.assertEquals(records, ujson.loads_lines(ujson.dumps_lines(records), cache_keys=True))
+
+    def test_loadsLinesErrorPosition(self):
+        for input, message in (('1\n2 3\n', "Trailing data (line 2, offset 2)"),
+                               ('1\n\n  @', "Expected object or value (line 3, offset 2)"),
+                               ('{"a": 1}\n{"b":\n{"c": 3}', "Unexpected end of line (line 2, offset 5)"),
+                               ('[1,\n2]', "Unexpected end of line (line 1, offset 3)")):
+            try:
+                ujson.loads_lines(input)
+            except ValueError, e:
+                self.assertEquals(message, str(e))
+            else:
+                assert False, "expected ValueError for %r" % input
+
+    def test_decoderFeed(self):
+        decoder = ujson.Decoder()
+        self.assertEquals(None, decoder.feed('{"key": ["val'))
+        self.assertEquals(None, decoder.feed('ue", 1'))
+        self.assertEquals(None, decoder.feed('2.5e1, "\\u00'))
+        self.assertEquals({"key": ["value", 125.0, u"\u00e5"]}, decoder.feed('e5"]}  '))
+        self.assertEquals({"key": ["value", 125.0, u"\u00e5"]}, decoder.close())
+
+    def test_decoderFeedBytewise(self):
+        input = ujson.dumps([{"key": u"\u00e5\u20ac\U0001d11e", "number": -1.25e-3, "list": [True, False, None, 10 ** 15]}] * 20, ensure_ascii=False)
+        decoder = ujson.Decoder(cache_keys=True)
+        for i in range(len(input)):
+            decoder.feed(input[i:i + 1])
+        self.assertEquals(ujson.loads(input), decoder.close())
+
+    def test_decoderFeedTopLevelNumber(self):
+        decoder = ujson.Decoder()
+        self.assertEquals(None, decoder.feed("12"))
+        self.assertEquals(None, decoder.feed("34"))
+        self.assertEquals(1234, decoder.close())
+
+    def test_decoderReuse(self):
+        decoder = ujson.Decoder()
+        decoder.feed("[1, 2]")
+        self.assertEquals([1, 2], decoder.close())
+        decoder.feed('{"a": null}')
+        self.assertEquals({"a": None}, decoder.close())
+
+    def test_decoderFeedErrors(self):
+        for input in ("[1,", '{"a"', '"abc', "[1 2]", "[1,]", "1 2", "", "tru", '{1: 2}'):
+            decoder = ujson.Decoder()
+            try:
+                decoder.feed(input)
+                decoder.close()
+            except ValueError:
+                pass
+            else:
+                assert False, "expected ValueError for %r" % input
+
     def test_loadFileArgsError(self):
         try:
             ujson.load("[]")
@@ -654,6 +987,224 @@ class UltraJSONTests(TestCase):
         dec = ujson.decode(output)
         self.assertEquals(dec, d)
 
+    def test_encodeDefault(self):
+        class Point(object):
+            def __init__(self, x, y):
+                self.x = x
+                self.y = y
+
+        class DictTest(object):
+            def toDict(self):
+                return {u"key": 1}
+
+        self.assertEquals('[[1,2],{"key":1}]', ujson.encode([Point(1, 2), DictTest()], default=lambda o: [o.x, o.y]))
+        self.assertEquals('"1j"', ujson.encode(1j, default=repr))
+        self.assertEquals('[1,null]', ujson.encode([1, Point(1, 2)], default=lambda o: None))
+        # What default returns may need it again
+        self.assertEquals('[3]', ujson.encode(Point(Point(3, 4), 5), default=lambda o: o.x if isinstance(o.x, Point) else [o.x]))
+        self.assertRaises(OverflowError, ujson.encode, Point(1, 2), default=lambda o: o)
+        self.assertRaises(ZeroDivisionError, ujson.encode, [Point(1, 2)], default=lambda o: 1 // 0)
+        self.assertRaises(TypeError, ujson.encode, Point(1, 2), default=None)
+        self.assertRaises(TypeError, ujson.encode, Point(1, 2), default=1)
+
+        # toDict may also be set on the object or come from __getattr__
+        point = Point(1, 2)
+        point.toDict = lambda: {u"x": 1}
+
+        class Proxy(object):
+            def __getattr__(self, name):
+                if name == "toDict":
+                    return lambda: {u"proxy": True}
+                raise AttributeError(name)
+
+        self.assertEquals('[{"x":1},{"proxy":true},"p"]', ujson.encode([point, Proxy(), Point(1, 2)], default=lambda o: u"p"))
+        self.assertEquals('[{"x":1},{"proxy":true}]', ujson.encode([point, Proxy()]))
+
+    def test_encodeHandlers(self):
+        class Base(object):
+            pass
+
+        class Derived(Base):
+            pass
+
+        class Number(int):
+            pass
+
+        handlers = {Base: lambda o: type(o).__name__, Number: lambda o: [int(o)]}
+        self.assertEquals('["Base","Derived",[3],3]', ujson.encode([Base(), Derived(), Number(3), 3], handlers=handlers))
+        self.assertEquals('["d","b"]', ujson.encode([Derived(), Base()], handlers={Derived: lambda o: u"d", Base: lambda o: u"b"}))
+        self.assertEquals('["x","y"]', ujson.encode([Base(), 1j], handlers={Base: lambda o: u"x"}, default=lambda o: u"y"))
+        self.assertEquals('{"a":1.5}', ujson.encode(Base(), handlers={Base: lambda o: {u"a": decimal.Decimal("1.5")}, decimal.Decimal: str}))
+        self.assertRaises(TypeError, ujson.encode, Derived(), handlers={Number: str})
+        self.assertRaises(TypeError, ujson.encode, Base(), handlers=[])
+
+        encoder = ujson.Encoder(handlers=handlers, default=repr)
+        self.assertEquals('["Derived",[5],"1j"]', encoder.encode([Derived(), Number(5), 1j]))
+        self.assertEquals('"Base"', encoder.encode(Base()))
+        self.assertEquals('["Base"]\n', ujson.dumps_lines([[Base()]], handlers=handlers))
+
+        # The encoder keeps the handlers it was made with
+        class Late(object):
+            pass
+
+        handlers[Base] = handlers[Late] = lambda o: u"changed"
+        self.assertEquals('"Base"', encoder.encode(Base()))
+        self.assertTrue(encoder.encode(Late()).startswith('"<'))
+
+    def test_encodeRawJSON(self):
+        cached = b'{"a": [1, 2.50, "\xc3\xa5"]}'
+        raw = ujson.RawJSON(cached)
+        self.assertEquals(cached, raw.data)
+        self.assertEquals(b'{"doc":{"a": [1, 2.50, "\xc3\xa5"]}}', ujson.dumps_bytes({"doc": raw}))
+        self.assertEquals(b'[1e3,[1, 2.50, "\xc3\xa5"]]', ujson.dumps_bytes([ujson.RawJSON(u"1e3"), ujson.RawJSON(u'[1, 2.50, "\xe5"]')]))
+        self.assertEquals([1000.0, {"a": [1, 2.5, u"\xe5"]}], ujson.decode(ujson.encode([ujson.RawJSON("1e3"), raw], ensure_ascii=False)))
+        self.assertEquals('[ null , null ]', ujson.Encoder().encode([ujson.RawJSON(b" null ", validate=True)] * 2))
+
+        for input in (b"", b"[1,", b"[1] 2", u"{'a': 1}"):
+            ujson.RawJSON(input)
+            self.assertRaises(ValueError, ujson.RawJSON, input, validate=True)
+
+        self.assertRaises(TypeError, ujson.RawJSON, 1)
+        self.assertRaises(TypeError, ujson.RawJSON, bytearray(b"1"))
+
+    def test_encodeCache(self):
+        ujson.cache_clear()
+        frozen = tuple((u"item %d" % i, i, i * 1.5) for i in range(20))
+        expected = ujson.encode(frozen)
+        self.assertEquals(expected, ujson.encode(frozen, cache=True))
+        self.assertEquals(expected, ujson.encode(frozen, cache=True))
+        self.assertEquals("[" + expected + "]", ujson.encode([frozen], cache=True, ensure_ascii=False))
+        self.assertEquals(1, ujson.cache_info()["hits"])
+        self.assertEquals(ujson.encode(frozen, double_precision=0), ujson.encode(frozen, cache=True, double_precision=0))
+
+        # Tuples holding mutable values aren't kept
+        mutable = tuple([[u"x" * 100]])
+        ujson.encode(mutable, cache=True)
+        mutable[0].append(1)
+        self.assertEquals('[["%s",1]]' % (u"x" * 100), ujson.encode(mutable, cache=True))
+
+        settings = ujson.pin({"a": [1, 2]})
+        outer = ujson.pin({"settings": settings})
+        self.assertEquals('[{"settings":{"a":[1,2]}},{"a":[1,2]}]', ujson.encode([outer, settings], cache=True))
+        settings["b"] = True
+        self.assertEquals('{"settings":{"a":[1,2]}}', ujson.encode(outer, cache=True))
+        ujson.invalidate(settings)
+        self.assertEquals({"settings": {"a": [1, 2], "b": True}}, ujson.decode(ujson.encode(outer, cache=True)))
+        self.assertEquals([{"a": [1, 2], "b": True}], ujson.loads_lines(ujson.dumps_lines([settings], cache=True)))
+        self.assertEquals(2, ujson.cache_info()["pinned"])
+
+        ujson.unpin(settings)
+        ujson.unpin(outer)
+        settings["c"] = None
+        self.assertEquals({"settings": {"a": [1, 2], "b": True, "c": None}}, ujson.decode(ujson.encode(outer, cache=True)))
+
+        ujson.set_cache_size(0)
+        self.assertEquals(0, ujson.cache_info()["size"])
+        ujson.set_cache_size(8 * 1024 * 1024)
+        ujson.cache_clear()
+        self.assertEquals(0, ujson.cache_info()["entries"])
+        self.assertRaises(ValueError, ujson.encode, frozen, cache=True, default=str)
+        self.assertRaises(ValueError, ujson.set_cache_size, -1)
+
+    def test_decodeLazy(self):
+        input = '{"a": [1, 2.5, {"b": "\\u00e5"}, null], "c": {"d": true}, "a": [9, [10]], "e": "str"}'
+        doc = ujson.loads_lazy(input)
+        self.assertEquals(3, len(doc))
+        self.assertEquals(sorted(["a", "c", "e"]), sorted(doc.keys()))
+        self.assertEquals(sorted(["a", "c", "e"]), sorted(doc))
+        self.assertEquals(9, doc["a"][0])
+        self.assertEquals(10, doc["a"][-1][0])
+        self.assertEquals([10], doc["a"][1:][0].materialize())
+        self.assertTrue(doc["c"] is doc["c"])
+        self.assertTrue(doc["c"]["d"])
+        self.assertEquals("str", doc.get("e"))
+        self.assertEquals(None, doc.get("z"))
+        self.assertTrue("e" in doc)
+        self.assertFalse("z" in doc)
+        self.assertEquals(ujson.loads(input), doc.materialize())
+        self.assertRaises(KeyError, lambda: doc["z"])
+        self.assertRaises(IndexError, lambda: doc["a"][2])
+        self.assertRaises(TypeError, lambda: doc["a"]["x"])
+        self.assertRaises(TypeError, hash, doc)
+
+        # Views keep the document alive after the one they came from is gone
+        items = ujson.loads_lazy(bytearray(b'[{"x": [1, "\\u00e5"]}]'))[0]["x"]
+        self.assertEquals(u"\xe5", items[1])
+        self.assertEquals([1, u"\xe5"], list(items))
+
+        self.assertEquals(1.5, ujson.loads_lazy("1.5"))
+        self.assertEquals(decimal.Decimal("1.50"), ujson.loads_lazy("[1.50]", use_decimal=True)[0])
+        self.assertRaises(ValueError, ujson.loads_lazy, "[1,")
+
+    def test_decodeKeep(self):
+        input = '{"id": 1, "name": "\\u00e5", "meta": {"ts": 5, "big": [1, {"a": "b"}]}, "tags": ["a"], "rows": [{"id": 2, "z": 3}, {"z": 4}, 7]}'
+        self.assertEquals({"id": 1, "meta": {"ts": 5}}, ujson.loads(input, keep={"id": True, "meta": {"ts": True}}))
+        self.assertEquals({"tags": ["a"], "rows": [{"id": 2}, {}, 7]}, ujson.loads(input, keep={"rows": {"id": True}, "tags": True, "name": False}))
+        self.assertEquals({"name": u"\xe5", "meta": {"ts": 5, "big": [1, {"a": "b"}]}}, ujson.loads(input, keep={"name": True, "meta": True}))
+        self.assertEquals({}, ujson.loads(input, keep={}))
+        self.assertEquals({"id": 1}, ujson.loads(bytearray(input.encode("utf-8")), keep={"id": True}, release_gil=True))
+        self.assertEquals(5, ujson.loads("5", keep={"id": True}))
+        self.assertEquals(ujson.loads(input), ujson.loads(input, keep=None))
+        self.assertEquals([{"b": 2}, {"b": [3]}], ujson.loads_lines('{"a": 1, "b": 2}\n{"b": [3], "c": "x"}\n', keep={"b": True}))
+
+        # Skipped values are still checked
+        self.assertRaises(ValueError, ujson.loads, '{"a": [1,, 2], "id": 1}', keep={"id": True})
+        self.assertRaises(ValueError, ujson.loads, '{"a": "b', keep={"id": True})
+        self.assertRaises(ValueError, ujson.loads, '{"a": nul, "id": 1}', keep={"id": True})
+        self.assertRaises(ValueError, ujson.loads, '{"id": 1} 2', keep={"id": True})
+        self.assertRaises(TypeError, ujson.loads, input, keep=["id"])
+
+        # Skipped values are held to the same rules as decoded ones, both ways
+        for input in ('{"a": "\\q", "id": 1}', '{"a": "\\u12", "id": 1}', b'{"a": "\xff", "id": 1}', '{"a": 1e999, "id": 1}'):
+            self.assertRaises(ValueError, ujson.loads, input)
+            self.assertRaises(ValueError, ujson.loads, input, keep={"id": True})
+        self.assertEquals({"id": 1}, ujson.loads('{"a": {"x": 1, }, "id": 1}', keep={"id": True}))
+
+        # Keys which aren't strings are rejected before anything in them is decoded
+        for input in ('{"id": 1, {"x": {"y": [1]}}: 2}', '[{"id": 1}, {{"a": {"b": {"c": 1}}}: 1}]'):
+            self.assertRaises(ValueError, ujson.loads, input, keep={"id": True})
+            self.assertRaises(ValueError, ujson.loads_lines, input, keep={"id": True})
+
+    def test_extract(self):
+        input = '{"user": {"id": 7, "name": "\\u00e5"}, "items": [{"sku": "a", "n": 1}, {"sku": "b", "n": [1, 2]}, {"n": 3}], "a/b": {"~": true}}'
+        self.assertEquals(7, ujson.extract(input, "$.user.id"))
+        self.assertEquals(7, ujson.extract(input, "/user/id"))
+        self.assertEquals(["a", "b"], ujson.extract(input, "$.items[*].sku"))
+        self.assertEquals([1, 2], ujson.extract(input, "$['items'][1].n"))
+        self.assertEquals(2, ujson.extract(input, "/items/1/n/1"))
+        self.assertEquals(True, ujson.extract(input, "/a~1b/~0"))
+        self.assertEquals([7, u"\xe5"], ujson.extract(input, "$.user.*"))
+        self.assertEquals(ujson.decode(input), ujson.extract(input, ""))
+        self.assertEquals([{"id": 7, "name": u"\xe5"}, 7, None], ujson.extract(input, ["$.user", "$.user.id", "$.missing"]))
+        self.assertEquals([1, 0], ujson.extract(input, ["$.items[0].n", "$.items[2].sku"], default=0))
+        self.assertEquals([None, [], [7, u"\xe5"]], ujson.extract(input, ["$.items[3]", "$.user.id[*]", "$.user[*]"]))
+        self.assertEquals([2, 3], ujson.extract("[1, [2, 3]]", "$[*][*]"))
+        self.assertEquals(None, ujson.extract("5", "$.a"))
+
+        # Skipped values are still checked
+        self.assertRaises(ValueError, ujson.extract, '{"a": [1,, 2], "user": 1}', "$.user")
+        self.assertRaises(ValueError, ujson.extract, '{"a": "b', "$.user")
+        self.assertRaises(ValueError, ujson.extract, '{"a": tru, "user": 1}', "$.user")
+        self.assertRaises(ValueError, ujson.extract, '{"user": 1} 2', "$.user")
+
+        # Skipped values are held to the same rules as decoded ones, both ways
+        for input in ('{"a": "\\q", "user": 1}', '{"a": "\\u12", "user": 1}', b'{"a": "\xff", "user": 1}', '{"a": "\\ud800\\u0041", "user": 1}',
+                      '{"a": 1e999, "user": 1}', '{"a": [1, ], "user": 1}', '{"a": {1: 2}, "user": 1}'):
+            self.assertRaises(ValueError, ujson.loads, input)
+            self.assertRaises(ValueError, ujson.extract, input, "$.user")
+        for input in ('{"a": {"x": 1, }, "user": 1}', '{"a": ["\\ud800x", -, 1.], "user": 1}'):
+            ujson.loads(input)
+            self.assertEquals(1, ujson.extract(input, "$.user"))
+
+        # Keys which aren't strings are rejected before anything in them is decoded
+        for input in ('{"user": 1, {"x": {"y": [1]}}: 2}', '{{"a": {"b": {"c": 1}}}: 1}', '{"user": 1, [1, [2]]: 2}'):
+            self.assertRaises(ValueError, ujson.extract, input, "$.user")
+            self.assertRaises(ValueError, ujson.loads, input)
+
+        for path in ("user", "$..id", "$[x]", "$.", "/~2"):
+            self.assertRaises(ValueError, ujson.extract, input, path)
+        self.assertRaises(TypeError, ujson.extract, input, [1])
+
     def test_decodeArrayTrailingCommaFail(self):
         input = "[31337,]"
         self.assertRaises(ValueError, ujson.decode, input)
@@ -729,7 +1280,7 @@ class UltraJSONTests(TestCase):
               self.assertEqual(float(input), obj)
         else:
           input = "9223372036854775808.9"
-          self.assertRaises(ValueError, ujson.decode, input)
+          self.assertEqual(float(input), ujson.decode(input))
 
     def test_decodeTooSmallValue(self):
         if ujson.bigint_supported:
@@ -752,8 +1303,19 @@ class UltraJSONTests(TestCase):
               obj = ujson.decode(input)
               self.assertEqual(float(input), obj)
         else:
-          input = "9223372036854775808.9"
-          self.assertRaises(ValueError, ujson.decode, input)
+          input = "-9223372036854775809.9"
+          self.assertEqual(float(input), ujson.decode(input))
+
+    def test_decodeFloatLongIntegerPart(self):
+        inputs = ["39378494877607294422.90219885612", "260181590830166131860e-321", "18446744073709551616.0",
+                  "-18446744073709551617e3", "1" * 40 + ".5", "9" * 25 + "e-10"]
+        for input in inputs:
+            self.assertEqual(float(input), ujson.decode(input))
+            self.assertEqual(float(input), ujson.decode(input, precise_float=False))
+
+        if not ujson.bigint_supported:
+            self.assertRaises(ValueError, ujson.decode, "18446744073709551616")
+            self.assertRaises(ValueError, ujson.decode, "-18446744073709551617")
 
     def test_decodeWithTrailingWhitespaces(self):
         input = "{}\n\t "
@@ -882,6 +1444,139 @@ class UltraJSONTests(TestCase):
         arr = array.array('i', [1,2,3])
         self.assertRaises(TypeError, ujson.dumps, {'array_inst': arr})
 
+    def test_decodeLongASCIIString(self):
+        input = "A pretty long string which is in a list " * 10000
+        output = ujson.decode('["%s", "%s"]' % (input, input))
+        self.assertEqual([input, input], output)
+
+    def test_decodeStringWithASCIIPrefix(self):
+        for input in ['"abcdefghijklmnop\\n"', '"abcdefghijklmnop\xc3\xa5"', '"abcdefghijklmnop\\u00e5"']:
+            self.assertEqual(json.loads(input), ujson.decode(input))
+
+    def test_decodeUnterminatedASCIIStringFail(self):
+        self.assertRaises(ValueError, ujson.decode, '"abcdefghijklmnop')
+        self.assertRaises(ValueError, ujson.decode, '["abcdefghijklmnop')
+
+    def test_decodeCacheKeys(self):
+        input = '[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "name": "c"}]'
+        output = ujson.decode(input, cache_keys=True)
+        self.assertEqual(json.loads(input), output)
+        keys = [sorted(record.keys()) for record in output]
+        self.assertTrue(keys[0][0] is keys[1][0] is keys[2][0])
+        self.assertTrue(keys[0][1] is keys[1][1] is keys[2][1])
+
+    def test_decodeCacheKeysLongAndEscapedKeys(self):
+        longKey = "k" * 1000
+        input = '[{"%s": 1, "a\\\\b": 2, "\\u00e5": 3}, {"%s": 4, "a\\\\b": 5, "\\u00e5": 6}]' % (longKey, longKey)
+        self.assertEqual(json.loads(input), ujson.decode(input, cache_keys=True))
+
+    def test_decodeReleaseGIL(self):
+        for input in ('[1, 2.5, -3e2, "a\\"b\\\\", "\\u00e5\\ud834\\udd1e", true, false, null, {}, [], {"k": [{"x": "y"}]}]',
+                      '[9223372036854775807, -9223372036854775808, 2147483648, -1]',
+                      '"abc"', '123', 'null', '{"a": {"a": {"a": [[[]]]}}}'):
+            self.assertEquals(ujson.loads(input), ujson.loads(input, release_gil=True))
+            self.assertEquals(ujson.loads(input), ujson.loads(input, release_gil=True, cache_keys=True))
+
+    def test_decodeReleaseGILErrors(self):
+        for input in ("[1,", '{"a" 1}', "", "[1] x", '{"a": [1, 2}'):
+            self.assertRaises(ValueError, ujson.loads, input, release_gil=True)
+
+    def test_decodeReleaseGILThreads(self):
+        import threading
+        input = ujson.dumps([{"key%d" % i: [i, u"\u00e5" * i, i * 0.5]} for i in range(200)])
+        expected = ujson.loads(input)
+        results = []
+        def decode():
+            for i in range(20):
+                results.append(ujson.loads(input, release_gil=True) == expected)
+        threads = [threading.Thread(target=decode) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals([True] * 80, results)
+
+    def test_loadsMany(self):
+        documents = [ujson.dumps({"id": i, "name": u"\u00e5" * (i % 7), "list": range(i % 5)}) for i in range(500)]
+        expected = [ujson.loads(document) for document in documents]
+        for workers in (1, 3, 8):
+            self.assertEquals(expected, ujson.loads_many(documents, workers=workers))
+            self.assertEquals(expected, ujson.loads_many(documents, workers=workers, cache_keys=True))
+        self.assertEquals([], ujson.loads_many([]))
+        self.assertEquals([1, None], ujson.loads_many(("1", "null"), workers=4))
+
+    def test_loadsManyErrors(self):
+        try:
+            ujson.loads_many(["[1]", "[", "2"], workers=2)
+        except ValueError, e:
+            self.assertEquals("Expected object or value (document 1)", str(e))
+        else:
+            assert False, "expected ValueError"
+        self.assertRaises(TypeError, ujson.loads_many, [1])
+        self.assertRaises(ValueError, ujson.loads_many, [], workers=0)
+
+    def test_decodeBuffer(self):
+        self.assertEquals([1, 2], ujson.loads(bytearray(b"[1, 2]")))
+        self.assertEquals({"a": [1.5, "b"]}, ujson.loads(memoryview(b'{"a": [1.5, "b"]}')))
+        self.assertEquals([1, 2], ujson.loads(array.array("b", b"[1, 2]")))
+        self.assertEquals([1, 2], ujson.loads(bytearray(b"[1, 2]"), release_gil=True))
+        self.assertEquals([[1], 2], ujson.loads_many([memoryview(b"[1]"), bytearray(b"2")], workers=2))
+        self.assertEquals([1, 2], ujson.loads_lines(memoryview(b"1\n2")))
+        decoder = ujson.Decoder()
+        self.assertEquals(None, decoder.feed(memoryview(b"[1, ")))
+        self.assertEquals([1, 2], decoder.feed(bytearray(b"2]")))
+        self.assertRaises(TypeError, ujson.loads, 1)
+
+    def test_decodeBufferSlice(self):
+        # Nothing past the end of a slice may be read
+        data = memoryview(b"[1, 2]345")
+        self.assertEquals([1, 2], ujson.loads(data[:6]))
+        self.assertEquals(3, ujson.loads(data[6:7]))
+        self.assertEquals(34, ujson.loads(data[6:8], release_gil=True))
+        self.assertEquals([3, 34], ujson.loads_many([data[6:7], data[6:8]]))
+        self.assertEquals(u"ab", ujson.loads(memoryview(b'"ab"xx')[:4]))
+        for input in ('[1, 2', '"abc', 'tru', '{"a"'):
+            self.assertRaises(ValueError, ujson.loads, memoryview((input + "]" * 4).encode("ascii"))[:len(input)])
+            self.assertRaises(ValueError, ujson.loads, memoryview((input + "]" * 4).encode("ascii"))[:len(input)], release_gil=True)
+
+    def test_decodeMmap(self):
+        f = tempfile.TemporaryFile()
+        f.write(b'{"key": [1, 2, 3]}')
+        f.flush()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.assertEquals({"key": [1, 2, 3]}, ujson.loads(mapped))
+        mapped.close()
+        f.close()
+
+    def test_loadFile(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            for input in ({"key": [1, 2.5, u"\u00e5"]}, range(10000), "x" * (mmap.PAGESIZE - 2)):
+                f = open(path, "w")
+                f.write(ujson.dumps(input))
+                f.close()
+                self.assertEquals(input, ujson.load_file(path))
+                self.assertEquals(input, ujson.load_file(path, release_gil=True))
+
+            # Fills the last page exactly, so the end of the mapping is not NUL terminated
+            f = open(path, "w")
+            f.write("[" + "1," * (mmap.PAGESIZE // 2 - 1) + "1")
+            f.close()
+            self.assertRaises(ValueError, ujson.load_file, path)
+
+            f = open(path, "w")
+            f.close()
+            self.assertRaises(ValueError, ujson.load_file, path)
+        finally:
+            os.remove(path)
+
+        self.assertRaises(IOError, ujson.load_file, path)
+
+    def test_decodeCacheKeysCollisions(self):
+        input = dict(("key%d" % i, i) for i in range(5000))
+        self.assertEqual(input, ujson.decode(ujson.encode(input), cache_keys=True))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file